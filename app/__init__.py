@@ -19,6 +19,10 @@ def create_app(config_class=Config):
     
     init_db(app)
     
+    # Inicializar Celery (fila de execução de workflows)
+    from app.celery_app import celery_init_app
+    celery_init_app(app)
+    
     # Registrar rotas novas (DocGen)
     from app.routes import documents
     app.register_blueprint(documents.documents_bp)
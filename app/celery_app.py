@@ -0,0 +1,55 @@
+"""
+Integração do Celery com a aplicação Flask.
+
+As tasks rodam dentro do app context para ter acesso ao banco (db.session)
+e às configurações. O broker é o Redis configurado em Config.CELERY_BROKER_URL.
+"""
+from celery import Celery, Task
+from celery.schedules import crontab
+
+
+def celery_init_app(app) -> Celery:
+    """
+    Cria e configura a instância do Celery ligada ao app Flask.
+    
+    Args:
+        app: Aplicação Flask
+    
+    Returns:
+        Instância do Celery (também disponível em app.extensions['celery'])
+    """
+    class FlaskTask(Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+    
+    celery_app = Celery(app.name, task_cls=FlaskTask)
+    celery_app.conf.update(
+        broker_url=app.config.get('CELERY_BROKER_URL'),
+        result_backend=app.config.get('CELERY_RESULT_BACKEND'),
+        task_always_eager=app.config.get('CELERY_TASK_ALWAYS_EAGER', False),
+        task_serializer='json',
+        accept_content=['json'],
+        result_serializer='json',
+        # Confirmar a mensagem só depois da execução: se o worker morrer no meio,
+        # a task volta para a fila em vez de ser perdida
+        task_acks_late=True,
+        task_reject_on_worker_lost=True,
+        worker_prefetch_multiplier=1,
+        # Execuções longas (copy/replace/export/upload) não podem ser
+        # reentregues antes de terminar
+        broker_transport_options={'visibility_timeout': 3600},
+        result_expires=24 * 3600,
+        include=['app.tasks.workflow_tasks', 'app.tasks.bulk_generation_tasks', 'app.tasks.maintenance_tasks'],
+        # Manutenção diária (celery beat): partições e retenção de workflow_executions
+        beat_schedule={
+            'workflow-execution-partitions': {
+                'task': 'maintenance.workflow_execution_partitions',
+                'schedule': crontab(hour=3, minute=0),
+            },
+        },
+        timezone='UTC',
+    )
+    celery_app.set_default()
+    app.extensions['celery'] = celery_app
+    return celery_app
@@ -51,4 +51,61 @@ class Config:
     # Opção 2: Caminho para arquivo JSON (alternativa)
     GOOGLE_SERVICE_ACCOUNT_KEY_PATH = os.getenv('GOOGLE_SERVICE_ACCOUNT_KEY_PATH', '')
     GOOGLE_APPLICATION_CREDENTIALS = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', '')
-
+    
+    # Redis / Celery (fila de execução assíncrona de workflows)
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+    CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
+    # Em desenvolvimento, executa as tasks inline sem precisar de worker
+    CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+    
+    # Máximo de nodes de um workflow executando em paralelo (branches independentes)
+    WORKFLOW_MAX_PARALLEL_NODES = int(os.getenv('WORKFLOW_MAX_PARALLEL_NODES', '4'))
+    
+    # Chamadas simultâneas de LLM (geração de tags AI) por organização e por provedor
+    AI_MAX_CONCURRENCY_PER_ORG = int(os.getenv('AI_MAX_CONCURRENCY_PER_ORG', '4'))
+    AI_MAX_CONCURRENCY_PER_PROVIDER = int(os.getenv('AI_MAX_CONCURRENCY_PER_PROVIDER', '8'))
+    
+    # Cache de respostas do LLM (opt-in por AIGenerationMapping.cache_enabled)
+    LLM_CACHE_REDIS_URL = os.getenv('LLM_CACHE_REDIS_URL', REDIS_URL)
+    LLM_CACHE_DEFAULT_TTL_SECONDS = int(os.getenv('LLM_CACHE_DEFAULT_TTL_SECONDS', str(24 * 3600)))
+    LLM_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('LLM_CACHE_LOCAL_MAX_ENTRIES', '512'))
+    
+    # Transportes HTTP das APIs do Google mantidos em cache (por credencial e thread)
+    GOOGLE_CLIENT_CACHE_SIZE = int(os.getenv('GOOGLE_CLIENT_CACHE_SIZE', '128'))
+    
+    # Rate limit por portal do HubSpot (compartilhado entre workers via Redis)
+    HUBSPOT_RATE_LIMIT_REDIS_URL = os.getenv('HUBSPOT_RATE_LIMIT_REDIS_URL', REDIS_URL)
+    HUBSPOT_RATE_LIMIT_PER_10S = int(os.getenv('HUBSPOT_RATE_LIMIT_PER_10S', '100'))
+    HUBSPOT_RATE_LIMIT_DAILY = int(os.getenv('HUBSPOT_RATE_LIMIT_DAILY', '250000'))
+    HUBSPOT_RATE_LIMIT_MAX_WAIT_SECONDS = int(os.getenv('HUBSPOT_RATE_LIMIT_MAX_WAIT_SECONDS', '30'))
+    
+    # Geração em lote: máximo de objetos por job, itens por task do Celery e
+    # execuções simultâneas dentro de cada task
+    BULK_GENERATION_MAX_ITEMS = int(os.getenv('BULK_GENERATION_MAX_ITEMS', '10000'))
+    BULK_GENERATION_CHUNK_SIZE = int(os.getenv('BULK_GENERATION_CHUNK_SIZE', '50'))
+    BULK_GENERATION_MAX_CONCURRENCY = int(os.getenv('BULK_GENERATION_MAX_CONCURRENCY', '4'))
+    
+    # Cache em disco dos templates Word/PowerPoint (padrão: diretório temporário do sistema)
+    TEMPLATE_BLOB_CACHE_DIR = os.getenv('TEMPLATE_BLOB_CACHE_DIR')
+    TEMPLATE_BLOB_CACHE_MAX_MB = int(os.getenv('TEMPLATE_BLOB_CACHE_MAX_MB', '512'))
+    
+    # Prazo compartilhado das ações pós-geração (upload do PDF, anexo HubSpot, timeline...)
+    POST_GENERATION_DEADLINE_SECONDS = int(os.getenv('POST_GENERATION_DEADLINE_SECONDS', '120'))
+    
+    # PDFs/documentos gerados acima deste tamanho ficam em arquivo temporário, não na memória
+    DOCUMENT_ARTIFACT_MAX_MEMORY_MB = int(os.getenv('DOCUMENT_ARTIFACT_MAX_MEMORY_MB', '2'))
+    
+    # workflow_executions (particionada por mês): partições criadas com antecedência,
+    # dias de histórico mantidos (0 = sem retenção) e diretório para exportar
+    # (.jsonl.gz) as partições antes de removê-las (vazio = só remove)
+    WORKFLOW_EXECUTIONS_PARTITIONS_AHEAD = int(os.getenv('WORKFLOW_EXECUTIONS_PARTITIONS_AHEAD', '3'))
+    WORKFLOW_EXECUTIONS_RETENTION_DAYS = int(os.getenv('WORKFLOW_EXECUTIONS_RETENTION_DAYS', '0'))
+    WORKFLOW_EXECUTIONS_ARCHIVE_DIR = os.getenv('WORKFLOW_EXECUTIONS_ARCHIVE_DIR')
+    
+    # Cache em processo de portal_id -> organização e dos dados da organização (require_org)
+    ORGANIZATION_CACHE_TTL_SECONDS = int(os.getenv('ORGANIZATION_CACHE_TTL_SECONDS', '60'))
+    ORGANIZATION_CACHE_MAX_ENTRIES = int(os.getenv('ORGANIZATION_CACHE_MAX_ENTRIES', '10000'))
+    
+    # Prazo para operações assíncronas do Microsoft Graph (ex: cópia de arquivos)
+    GRAPH_OPERATION_MAX_WAIT_SECONDS = int(os.getenv('GRAPH_OPERATION_MAX_WAIT_SECONDS', '300'))
@@ -2,13 +2,14 @@
 from .organization import Organization, User, OrganizationFeature
 from .connection import DataSourceConnection
 from .template import Template
-from .workflow import Workflow, WorkflowFieldMapping, AIGenerationMapping, WorkflowNode
+from .workflow import Workflow, WorkflowFieldMapping, AIGenerationMapping, WorkflowNode, WorkflowTriggerIndex
 from .approval import WorkflowApproval
 from .hubspot_property_cache import HubSpotPropertyCache
 from .document import GeneratedDocument
 from .signature import SignatureRequest
 from .execution import WorkflowExecution
 from .pkce import PKCEVerifier
+from .bulk_generation import BulkGenerationJob, BulkGenerationItem
 
 # Importar models legados DEPOIS (para evitar importação circular)
 # Usar importação lazy para evitar problemas
@@ -66,11 +67,14 @@ __all__ = [
     'WorkflowFieldMapping',
     'AIGenerationMapping',
     'WorkflowNode',
+    'WorkflowTriggerIndex',
     'WorkflowApproval',
     'HubSpotPropertyCache',
     'GeneratedDocument',
     'SignatureRequest',
     'WorkflowExecution',
+    'BulkGenerationJob',
+    'BulkGenerationItem',
     # Legacy models
     'FieldMapping',
     'EnvelopeRelation',
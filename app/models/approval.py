@@ -14,7 +14,8 @@ class WorkflowApproval(db.Model):
     __tablename__ = 'workflow_approvals'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    workflow_execution_id = db.Column(UUID(as_uuid=True), db.ForeignKey('workflow_executions.id', ondelete='CASCADE'), nullable=False)
+    # Sem FK: workflow_executions é particionada (a retenção apaga as aprovações das execuções removidas)
+    workflow_execution_id = db.Column(UUID(as_uuid=True), nullable=False)
     workflow_id = db.Column(UUID(as_uuid=True), db.ForeignKey('workflows.id', ondelete='CASCADE'), nullable=False)
     node_id = db.Column(UUID(as_uuid=True), db.ForeignKey('workflow_nodes.id', ondelete='CASCADE'), nullable=False)
     
@@ -44,7 +45,12 @@ class WorkflowApproval(db.Model):
     rejection_comment = db.Column(db.Text)
     
     # Relationships
-    workflow_execution = db.relationship('WorkflowExecution', backref='approvals', foreign_keys=[workflow_execution_id])
+    workflow_execution = db.relationship(
+        'WorkflowExecution',
+        backref='approvals',
+        primaryjoin='WorkflowApproval.workflow_execution_id == WorkflowExecution.id',
+        foreign_keys=[workflow_execution_id]
+    )
     workflow = db.relationship('Workflow', backref='approvals', foreign_keys=[workflow_id])
     node = db.relationship('WorkflowNode', backref='approvals', foreign_keys=[node_id])
     
@@ -0,0 +1,106 @@
+"""
+Modelos para geração em lote (um workflow para muitos objetos do HubSpot).
+"""
+import uuid
+from datetime import datetime
+from app.database import db
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+
+class BulkGenerationJob(db.Model):
+    """
+    Job de geração em lote.
+    
+    Os objetos a processar ficam em BulkGenerationItem (um por objeto), o que
+    permite retomar o job reprocessando só os itens pendentes ou com falha.
+    """
+    __tablename__ = 'bulk_generation_jobs'
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = db.Column(UUID(as_uuid=True), db.ForeignKey('organizations.id'), nullable=False)
+    workflow_id = db.Column(UUID(as_uuid=True), db.ForeignKey('workflows.id', ondelete='CASCADE'), nullable=False)
+    
+    source_object_type = db.Column(db.String(100), nullable=False)
+    # Origem dos objetos: {"object_ids": [...]} | {"list_id": "..."} | {"filters": [...]}
+    source = db.Column(JSONB, nullable=False)
+    # Itens já criados a partir da origem (lista/filtros são percorridos uma vez)
+    items_collected = db.Column(db.Boolean, default=False, nullable=False)
+    
+    status = db.Column(db.String(50), default='pending')
+    # pending, collecting, running, completed, completed_with_errors, failed, cancelled
+    error_message = db.Column(db.Text)
+    
+    # Contadores (atualizados ao fim de cada lote de itens)
+    total_items = db.Column(db.Integer, default=0)
+    succeeded_items = db.Column(db.Integer, default=0)
+    failed_items = db.Column(db.Integer, default=0)
+    
+    created_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    
+    # Relationships
+    workflow = db.relationship('Workflow', foreign_keys=[workflow_id])
+    items = db.relationship('BulkGenerationItem', backref='job', lazy='dynamic', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('idx_bulk_job_org_created', 'organization_id', 'created_at'),
+    )
+    
+    def to_dict(self):
+        processed = (self.succeeded_items or 0) + (self.failed_items or 0)
+        return {
+            'id': str(self.id),
+            'organization_id': str(self.organization_id),
+            'workflow_id': str(self.workflow_id),
+            'source_object_type': self.source_object_type,
+            'source': self.source,
+            'status': self.status,
+            'error_message': self.error_message,
+            'total_items': self.total_items or 0,
+            'succeeded_items': self.succeeded_items or 0,
+            'failed_items': self.failed_items or 0,
+            'processed_items': processed,
+            'progress_percent': round(processed * 100 / self.total_items, 1) if self.total_items else 0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class BulkGenerationItem(db.Model):
+    """Um objeto do HubSpot dentro de um job de geração em lote"""
+    __tablename__ = 'bulk_generation_items'
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    job_id = db.Column(UUID(as_uuid=True), db.ForeignKey('bulk_generation_jobs.id', ondelete='CASCADE'), nullable=False)
+    source_object_id = db.Column(db.String(255), nullable=False)
+    
+    status = db.Column(db.String(50), default='pending')  # pending, running, succeeded, failed
+    attempts = db.Column(db.Integer, default=0)
+    error_message = db.Column(db.Text)
+    
+    # Sem FK: workflow_executions é particionada (a retenção limpa a referência)
+    execution_id = db.Column(UUID(as_uuid=True))
+    generated_document_id = db.Column(UUID(as_uuid=True), db.ForeignKey('generated_documents.id', ondelete='SET NULL'))
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('job_id', 'source_object_id', name='uq_bulk_item_job_object'),
+        db.Index('idx_bulk_item_job_status', 'job_id', 'status'),
+        db.Index('idx_bulk_item_job_updated', 'job_id', 'updated_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source_object_id': self.source_object_id,
+            'status': self.status,
+            'attempts': self.attempts or 0,
+            'error_message': self.error_message,
+            'execution_id': str(self.execution_id) if self.execution_id else None,
+            'generated_document_id': str(self.generated_document_id) if self.generated_document_id else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
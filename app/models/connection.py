@@ -21,6 +21,15 @@ class DataSourceConnection(db.Model):
     workflows = db.relationship('Workflow', backref='source_connection', lazy='dynamic')
     documents = db.relationship('GeneratedDocument', backref='source_connection', lazy='dynamic')
     
+    # Resolução portal_id -> organização (get_organization_id_from_portal_id)
+    __table_args__ = (
+        db.Index(
+            'idx_data_source_connections_hubspot_portal',
+            db.text("(config->>'portal_id')"),
+            postgresql_where=db.text("source_type = 'hubspot'")
+        ),
+    )
+    
     # Para HubSpot - campos de conveniência
     @property
     def portal_id(self):
@@ -40,13 +40,24 @@ class GeneratedDocument(db.Model):
     generated_data = db.Column(JSONB)
     generated_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     generator = db.relationship('User', foreign_keys=[generated_by])
     signature_requests = db.relationship('SignatureRequest', backref='document', lazy='dynamic')
     
+    # Índices da listagem (keyset em created_at, id), um por combinação de filtro
+    __table_args__ = (
+        db.Index('idx_generated_documents_org_created', 'organization_id', 'created_at', 'id'),
+        db.Index('idx_generated_documents_org_status_created', 'organization_id', 'status', 'created_at', 'id'),
+        db.Index('idx_generated_documents_org_workflow_created', 'organization_id', 'workflow_id', 'created_at', 'id'),
+        db.Index(
+            'idx_generated_documents_org_object_created',
+            'organization_id', 'source_object_type', 'source_object_id', 'created_at', 'id'
+        ),
+    )
+    
     def to_dict(self, include_details=False):
         result = {
             'id': str(self.id),
@@ -4,6 +4,13 @@ from app.database import db
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 class WorkflowExecution(db.Model):
+    """
+    Execução de um workflow.
+    
+    No banco a tabela é particionada por mês em created_at (chave primária
+    (id, created_at)), ver app/services/execution_partitions.py. Por isso
+    nenhuma tabela tem FK para workflow_executions.
+    """
     __tablename__ = 'workflow_executions'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -14,9 +21,19 @@ class WorkflowExecution(db.Model):
     trigger_data = db.Column(JSONB)
     
     status = db.Column(db.String(50), default='running')
-    # running, completed, failed
+    # queued, running, paused, completed, failed
     error_message = db.Column(db.Text)
     
+    # Progresso da execução (atualizado a cada node)
+    # Estrutura:
+    # {
+    #     "total_nodes": 4,
+    #     "completed_nodes": 2,
+    #     "current_node_id": "uuid",
+    #     "current_node_type": "google-docs"
+    # }
+    progress = db.Column(JSONB)
+    
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     execution_time_ms = db.Column(db.Integer)
@@ -43,11 +60,26 @@ class WorkflowExecution(db.Model):
     # }
     ai_metrics = db.Column(JSONB)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Resultado das ações pós-geração (executadas em paralelo)
+    # Estrutura:
+    # {
+    #     "drive_pdf": {"status": "success", "time_ms": 850},
+    #     "hubspot_attachment": {"status": "failed", "time_ms": 1200, "error": "..."},
+    #     "timeline_event": {"status": "timeout", "time_ms": 30000}
+    # }
+    post_generation = db.Column(JSONB)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
     generated_document = db.relationship('GeneratedDocument', foreign_keys=[generated_document_id])
     
+    __table_args__ = (
+        db.Index('idx_workflow_executions_id', 'id'),
+        db.Index('idx_workflow_executions_workflow_created', 'workflow_id', 'created_at'),
+        db.Index('idx_workflow_executions_workflow_trigger_created', 'workflow_id', 'trigger_type', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -57,10 +89,12 @@ class WorkflowExecution(db.Model):
             'trigger_data': self.trigger_data,
             'status': self.status,
             'error_message': self.error_message,
+            'progress': self.progress,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'execution_time_ms': self.execution_time_ms,
             'ai_metrics': self.ai_metrics,
+            'post_generation': self.post_generation,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
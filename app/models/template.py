@@ -19,6 +19,9 @@ class Template(db.Model):
     microsoft_file_type = db.Column(db.String(50))  # 'word', 'powerpoint'
     detected_tags = db.Column(JSONB)  # ["contact.firstname", "deal.amount", ...]
     version = db.Column(db.Integer, default=1)
+    # Índice de tags ({'tags': [...], 'ai_tags': [...]}) válido para source_modified_time
+    tag_index = db.Column(JSONB)
+    source_modified_time = db.Column(db.String(64))  # modifiedTime do arquivo no Drive
     last_synced_at = db.Column(db.DateTime)
     created_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
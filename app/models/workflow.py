@@ -1,7 +1,10 @@
 import uuid
 from datetime import datetime
+from itertools import chain
 from app.database import db
+from sqlalchemy import event, inspect
 from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Session
 
 class Workflow(db.Model):
     __tablename__ = 'workflows'
@@ -143,6 +146,10 @@ class AIGenerationMapping(db.Model):
     # Fallback (se IA falhar)
     fallback_value = db.Column(db.Text)  # Valor padrão se geração falhar
     
+    # Cache de respostas (opt-in): reaproveita o texto quando modelo, prompt e parâmetros são iguais
+    cache_enabled = db.Column(db.Boolean, default=False, nullable=False)
+    cache_ttl_seconds = db.Column(db.Integer)  # None = LLM_CACHE_DEFAULT_TTL_SECONDS
+    
     # Métricas de uso (para auditoria/debugging)
     last_used_at = db.Column(db.DateTime)
     usage_count = db.Column(db.Integer, default=0)
@@ -172,6 +179,8 @@ class AIGenerationMapping(db.Model):
             'temperature': self.temperature,
             'max_tokens': self.max_tokens,
             'fallback_value': self.fallback_value,
+            'cache_enabled': self.cache_enabled,
+            'cache_ttl_seconds': self.cache_ttl_seconds,
             'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None,
             'usage_count': self.usage_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -299,3 +308,135 @@ class WorkflowNode(db.Model):
         
         return False
 
+
+class WorkflowTriggerIndex(db.Model):
+    """
+    Índice desnormalizado: tipo de objeto do trigger de cada workflow.
+    
+    Mantido pelo listener before_flush abaixo (workflow ou trigger node salvo,
+    ativado ou removido). Usado pelas listagens por tipo de objeto (card do CRM,
+    dropdown da workflow action do HubSpot) sem ler o config de cada node.
+    """
+    __tablename__ = 'workflow_trigger_index'
+    
+    workflow_id = db.Column(UUID(as_uuid=True), db.ForeignKey('workflows.id', ondelete='CASCADE'), primary_key=True)
+    organization_id = db.Column(UUID(as_uuid=True), db.ForeignKey('organizations.id'), nullable=False)
+    # source_object_type do trigger node (ou do workflow legado), normalizado; None se não configurado
+    object_type = db.Column(db.String(100))
+    status = db.Column(db.String(50))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_workflow_trigger_index_lookup', 'organization_id', 'object_type', 'status'),
+    )
+    
+    @staticmethod
+    def normalize_object_type(object_type):
+        """Forma gravada/consultada no índice: minúsculas, sem espaços (ex: 'DEAL' -> 'deal')"""
+        if object_type is None:
+            return None
+        return str(object_type).strip().lower() or None
+
+
+# Colunas atualizadas durante a execução, que não mudam a definição do workflow
+_RUNTIME_COLUMNS = {'usage_count', 'last_used_at', 'updated_at'}
+
+
+@event.listens_for(Session, 'before_flush')
+def _touch_workflow_on_definition_change(session, flush_context, instances):
+    """
+    Atualiza Workflow.updated_at quando nodes ou mappings do workflow mudam.
+    
+    updated_at funciona como versão da definição do workflow para os caches
+    derivados dela (ex: hubspot_projection).
+    """
+    workflow_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, (WorkflowNode, WorkflowFieldMapping, AIGenerationMapping)) or not obj.workflow_id:
+            continue
+        if obj in session.dirty:
+            state = inspect(obj)
+            changed = {
+                attr.key for attr in state.attrs
+                if attr.key not in _RUNTIME_COLUMNS and attr.history.has_changes()
+            }
+            if not changed:
+                continue
+        workflow_ids.add(obj.workflow_id)
+    
+    now = datetime.utcnow()
+    for workflow_id in workflow_ids:
+        workflow = session.get(Workflow, workflow_id)
+        if workflow is not None and workflow not in session.deleted:
+            workflow.updated_at = now
+
+
+# Colunas que alimentam WorkflowTriggerIndex
+_INDEXED_WORKFLOW_COLUMNS = ('organization_id', 'status', 'source_object_type')
+_INDEXED_NODE_COLUMNS = ('node_type', 'config', 'workflow_id')
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_workflow_trigger_index(session, flush_context, instances):
+    """Atualiza WorkflowTriggerIndex dos workflows/trigger nodes alterados no flush"""
+    workflows = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Workflow):
+            if obj in session.dirty and not _has_changes(obj, _INDEXED_WORKFLOW_COLUMNS):
+                continue
+            if obj.id is None:
+                # Mesmo default da coluna, antecipado para a linha do índice
+                obj.id = uuid.uuid4()
+            workflows[obj.id] = obj
+        elif isinstance(obj, WorkflowNode) and obj.workflow_id:
+            if obj in session.dirty and not _has_changes(obj, _INDEXED_NODE_COLUMNS):
+                continue
+            if obj.node_type == 'trigger' or obj in session.dirty:
+                workflows.setdefault(obj.workflow_id, None)
+    
+    if not workflows:
+        return
+    
+    with session.no_autoflush:
+        for workflow_id, workflow in workflows.items():
+            if workflow is None:
+                workflow = session.get(Workflow, workflow_id)
+            # Workflow removido: a linha do índice sai pelo ON DELETE CASCADE
+            if workflow is None or workflow in session.deleted:
+                continue
+            
+            entry = session.get(WorkflowTriggerIndex, workflow_id)
+            if entry is None:
+                entry = WorkflowTriggerIndex(workflow_id=workflow_id)
+                session.add(entry)
+            entry.organization_id = workflow.organization_id
+            entry.status = workflow.status or 'draft'
+            entry.object_type = WorkflowTriggerIndex.normalize_object_type(_trigger_object_type(session, workflow))
+
+
+def _has_changes(obj, keys) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+
+def _trigger_object_type(session, workflow):
+    """source_object_type do trigger node do workflow (pendente no flush ou do banco)"""
+    trigger = None
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, WorkflowNode) and obj.workflow_id == workflow.id and obj.node_type == 'trigger':
+            trigger = obj
+            break
+    
+    if trigger is None and workflow.id is not None:
+        trigger = session.query(WorkflowNode).filter(
+            WorkflowNode.workflow_id == workflow.id,
+            WorkflowNode.node_type == 'trigger'
+        ).order_by(WorkflowNode.position).first()
+    
+    if trigger is not None and trigger not in session.deleted:
+        object_type = (trigger.config or {}).get('source_object_type')
+        if object_type:
+            return object_type
+    
+    # Workflows legados (sem nodes) guardam o tipo no próprio workflow
+    return workflow.source_object_type
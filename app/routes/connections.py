@@ -194,6 +194,31 @@ def test_connection(connection_id):
         }), 500
 
 
+@connections_bp.route('/<connection_id>/rate-limit', methods=['GET'])
+@require_auth
+@require_org
+def get_connection_rate_limit(connection_id):
+    """Utilização atual do rate limit do portal HubSpot da conexão"""
+    connection = DataSourceConnection.query.filter_by(
+        id=connection_id,
+        organization_id=g.organization_id
+    ).first_or_404()
+    
+    if connection.source_type != 'hubspot':
+        return jsonify({
+            'error': f'Tipo de fonte {connection.source_type} não possui rate limit'
+        }), 400
+    
+    portal_id = connection.config.get('portal_id') if connection.config else None
+    if not portal_id:
+        return jsonify({'error': 'portal_id não configurado na conexão'}), 400
+    
+    from app.utils.rate_limiter import get_hubspot_rate_limiter, hubspot_rate_limit_key
+    utilization = get_hubspot_rate_limiter().get_utilization(hubspot_rate_limit_key(portal_id))
+    
+    return jsonify(utilization)
+
+
 @connections_bp.route('/<connection_id>', methods=['DELETE'])
 @require_auth
 @require_org
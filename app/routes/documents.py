@@ -1,4 +1,6 @@
 from flask import Blueprint, request, jsonify, g
+from sqlalchemy import tuple_
+from sqlalchemy.orm import defer
 from app.database import db
 from app.models import (
     GeneratedDocument, Workflow, Template, 
@@ -9,6 +11,7 @@ from app.services.workflow_executor import WorkflowExecutor
 from app.services.data_sources.hubspot import HubSpotDataSource
 from app.utils.auth import require_auth, require_org
 from app.utils.hubspot_auth import flexible_hubspot_auth
+from app.utils.pagination import encode_cursor, decode_cursor, estimate_count
 from app.routes.google_drive_routes import get_google_credentials
 import logging
 import uuid
@@ -21,18 +24,39 @@ documents_bp = Blueprint('documents', __name__, url_prefix='/api/v1/documents')
 @flexible_hubspot_auth
 @require_org
 def list_documents():
-    """Lista documentos gerados da organização"""
+    """
+    Lista documentos gerados da organização (mais recentes primeiro).
+    
+    Paginação por cursor em (created_at, id), resolvida pelos índices
+    idx_generated_documents_org_*; generated_data não é carregado.
+    
+    Query params:
+    - status, workflow_id, object_type, object_id: Filtros (opcionais)
+    - limit: Tamanho da página, máximo 100 (padrão 20; per_page também aceito)
+    - cursor: next_cursor da página anterior
+    - total: 'approximate' (estimativa do planner) ou 'exact' (COUNT); sem total por padrão
+    - page: Paginação por OFFSET (legado; inclui total exato e pages)
+    
+    Sem cursor nem limit, a resposta mantém o formato legado (page padrão 1,
+    com total, pages e current_page).
+    """
     # Converter organization_id para UUID se for string
     org_id = uuid.UUID(g.organization_id) if isinstance(g.organization_id, str) else g.organization_id
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    limit = request.args.get('limit', type=int) or request.args.get('per_page', 20, type=int)
+    limit = min(max(limit, 1), 100)
+    cursor = request.args.get('cursor')
+    keyset = bool(cursor) or 'limit' in request.args
+    page = None if cursor else request.args.get('page', None if keyset else 1, type=int)
+    total_mode = request.args.get('total', 'exact' if page else None)
     status = request.args.get('status')
     workflow_id = request.args.get('workflow_id')
     object_type = request.args.get('object_type')
     object_id = request.args.get('object_id')
     
-    query = GeneratedDocument.query.filter_by(organization_id=org_id)
+    query = GeneratedDocument.query.options(
+        defer(GeneratedDocument.generated_data)
+    ).filter_by(organization_id=org_id)
     
     if status:
         query = query.filter_by(status=status)
@@ -43,16 +67,43 @@ def list_documents():
     if object_id:
         query = query.filter_by(source_object_id=object_id)
     
-    query = query.order_by(GeneratedDocument.created_at.desc())
+    total = None
+    if total_mode == 'exact':
+        total = query.order_by(None).count()
+    elif total_mode == 'approximate':
+        total = estimate_count(query)
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'cursor inválido'}), 400
+        query = query.filter(
+            tuple_(GeneratedDocument.created_at, GeneratedDocument.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    
+    query = query.order_by(GeneratedDocument.created_at.desc(), GeneratedDocument.id.desc())
+    if page:
+        query = query.offset((max(page, 1) - 1) * limit)
+    documents = query.limit(limit).all()
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    next_cursor = None
+    if len(documents) == limit:
+        next_cursor = encode_cursor(documents[-1].created_at, documents[-1].id)
     
-    return jsonify({
-        'documents': [doc_to_dict(d) for d in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    })
+    result = {
+        'documents': [doc_to_dict(d) for d in documents],
+        'next_cursor': next_cursor
+    }
+    if total_mode in ('exact', 'approximate'):
+        result['total'] = total
+        result['total_is_estimate'] = total_mode == 'approximate'
+    if page:
+        result['current_page'] = page
+        if total is not None:
+            result['pages'] = -(-total // limit)
+    
+    return jsonify(result)
 
 
 @documents_bp.route('/<document_id>', methods=['GET'])
@@ -116,11 +167,16 @@ def generate_document():
                 if source_field and '.' not in source_field:
                     additional_properties.append(source_field)
             
+            # Só as propriedades usadas pelo workflow; sem projeção, padrão + additional_properties
+            from app.services.data_sources.hubspot_projection import get_workflow_property_projection
+            projection = get_workflow_property_projection(workflow, workflow.source_object_type)
+            
             data_source = HubSpotDataSource(connection)
             source_data = data_source.get_object_data(
                 workflow.source_object_type,
                 source_object_id,
-                additional_properties=additional_properties if additional_properties else None
+                additional_properties=additional_properties if additional_properties else None,
+                projection=projection
             )
         else:
             return jsonify({'error': f'Fonte {connection.source_type} não suportada ainda'}), 400
@@ -175,7 +231,7 @@ def generate_document():
                 'success': True,
                 'document': doc_to_dict(doc)
             }), 201
-        
+    
     except Exception as e:
         logger.error(f"Erro ao gerar documento: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -242,7 +298,7 @@ def regenerate_document(document_id):
                 'success': True,
                 'document': doc_to_dict(new_doc)
             }), 201
-        
+    
     except Exception as e:
         logger.error(f"Erro ao regenerar documento: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -7,7 +7,7 @@ from app.utils.hubspot_auth import flexible_hubspot_auth
 from flask import g
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from app.utils.google_clients import get_google_service
 from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload, MediaIoBaseUpload
 from googleapiclient.errors import HttpError
 import json
@@ -64,7 +64,7 @@ def list_folders():
                 'error': 'Google account not connected or token expired'
             }), 401
         
-        service = build('drive', 'v3', credentials=creds)
+        service = get_google_service('drive', 'v3', creds)
         
         # Buscar apenas pastas
         results = service.files().list(
@@ -171,7 +171,7 @@ def list_templates():
                 'error': 'Google account not connected or token expired'
             }), 401
         
-        service = build('drive', 'v3', credentials=creds)
+        service = get_google_service('drive', 'v3', creds)
         
         # Se folder_id não fornecido, usar da configuração
         if not folder_id:
@@ -231,7 +231,7 @@ def upload_file():
                 'error': 'Google account not connected or token expired'
             }), 401
         
-        service = build('drive', 'v3', credentials=creds)
+        service = get_google_service('drive', 'v3', creds)
         
         # Decodificar base64
         file_bytes = base64.b64decode(file_content)
@@ -304,7 +304,7 @@ def get_oauth_status():
         
         # Testar conexão fazendo uma chamada simples
         try:
-            service = build('drive', 'v3', credentials=creds)
+            service = get_google_service('drive', 'v3', creds)
             service.files().list(pageSize=1).execute()
             
             return jsonify({
@@ -9,7 +9,7 @@ from app.config import Config
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from app.utils.google_clients import get_google_service
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 import os
@@ -211,7 +211,7 @@ def get_oauth_status():
             # Tentar obter email do usuário se token válido
             if is_connected:
                 try:
-                    service = build('oauth2', 'v2', credentials=creds)
+                    service = get_google_service('oauth2', 'v2', creds)
                     user_info = service.userinfo().get().execute()
                     email = user_info.get('email')
                 except Exception:
@@ -416,7 +416,7 @@ def callback():
         credentials = flow.credentials
         
         # Obter informações do usuário Google
-        service = build('oauth2', 'v2', credentials=credentials)
+        service = get_google_service('oauth2', 'v2', credentials)
         user_info = service.userinfo().get().execute()
         google_email = user_info.get('email')
         google_name = user_info.get('name', '')
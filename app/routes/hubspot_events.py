@@ -3,7 +3,8 @@ Rotas para criar eventos na timeline do HubSpot.
 """
 
 from flask import Blueprint, request, jsonify
-import requests
+from app.utils import http_client
+from app.utils.rate_limiter import get_hubspot_rate_limiter, hubspot_rate_limit_key
 import logging
 from functools import wraps
 
@@ -19,6 +20,15 @@ def get_hubspot_token():
     return request.headers.get('X-HubSpot-Access-Token')
 
 
+def acquire_hubspot_rate_limit(hubspot_token):
+    """
+    Aguarda o rate limit do portal (portalId vem do hubspot.fetch(); sem ele,
+    o bucket é o do token).
+    """
+    portal_id = request.args.get('portalId') or request.headers.get('X-HubSpot-Portal-Id')
+    get_hubspot_rate_limiter().acquire(hubspot_rate_limit_key(portal_id, hubspot_token))
+
+
 @hubspot_events_bp.route('/create', methods=['POST'])
 def create_timeline_event():
     """
@@ -57,7 +67,8 @@ def create_timeline_event():
     
     try:
         # Criar evento via HubSpot Timeline Events API
-        response = requests.post(
+        acquire_hubspot_rate_limit(hubspot_token)
+        response = http_client.post(
             'https://api.hubapi.com/crm/v3/timeline/events',
             headers={
                 'Authorization': f'Bearer {hubspot_token}',
@@ -196,7 +207,8 @@ def create_timeline_event_internal(object_type, object_id, event_type, propertie
         })
     
     try:
-        response = requests.post(
+        acquire_hubspot_rate_limit(hubspot_token)
+        response = http_client.post(
             'https://api.hubapi.com/crm/v3/timeline/events',
             headers={
                 'Authorization': f'Bearer {hubspot_token}',
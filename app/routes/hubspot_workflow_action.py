@@ -3,7 +3,8 @@ Rotas para Custom Workflow Actions do HubSpot.
 Endpoint chamado quando uma ação de workflow é executada no HubSpot.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, copy_current_request_context
+from app.database import db
 import logging
 import time
 from datetime import datetime
@@ -70,7 +71,6 @@ def execute_workflow_action():
     try:
         # Importar serviços necessários
         from app.models import Workflow, WorkflowNode, GeneratedDocument
-        from app.services.workflow_executor import WorkflowExecutor
         
         # Buscar workflow no banco
         workflow = Workflow.query.get(workflow_id)
@@ -91,25 +91,31 @@ def execute_workflow_action():
         nodes_count = WorkflowNode.query.filter_by(workflow_id=workflow.id).count()
         
         if nodes_count > 0:
-            # Usar WorkflowExecutor (nova estrutura com nodes)
-            executor = WorkflowExecutor()
-            execution = executor.execute_workflow(
+            # Usar WorkflowExecutor (nova estrutura com nodes) via fila.
+            # A action fica bloqueada no HubSpot até o worker completar o callback.
+            from app.tasks.workflow_tasks import enqueue_workflow_execution
+            execution = enqueue_workflow_execution(
                 workflow=workflow,
                 source_object_id=hubspot_object_id,
-                source_object_type=hubspot_object_type
+                source_object_type=hubspot_object_type,
+                trigger_type='hubspot_action',
+                trigger_data={
+                    'hubspot_callback_id': callback_id,
+                    'portal_id': portal_id,
+                    'send_to_clicksign': send_to_clicksign
+                }
             )
             
-            # Buscar documento gerado
-            if execution.generated_document_id:
-                doc = GeneratedDocument.query.get(execution.generated_document_id)
-                result = {
-                    'document_id': str(doc.id),
-                    'document_url': doc.google_doc_url,
-                    'pdf_url': doc.pdf_url,
-                    'document_name': doc.name
+            logger.info(f'Workflow action enfileirada: execution={execution.id}, callback={callback_id}')
+            
+            return jsonify({
+                'outputFields': {
+                    'hs_execution_state': 'BLOCK',
+                    'execution_id': str(execution.id),
+                    'status': execution.status,
+                    'error_message': ''
                 }
-            else:
-                raise Exception('Documento não foi gerado durante a execução')
+            }), 202
         else:
             # Método legado (sem nodes) - manter compatibilidade
             from app.services.document_generation.generator import DocumentGenerator
@@ -133,19 +139,45 @@ def execute_workflow_action():
             if not connection:
                 raise Exception('Conexão de dados não configurada no workflow')
             
+            from app.services.data_sources.hubspot_projection import get_workflow_property_projection
+            projection = get_workflow_property_projection(workflow, hubspot_object_type)
+            
             data_source = HubSpotDataSource(connection)
             source_data = data_source.get_object_data(
                 hubspot_object_type,
-                hubspot_object_id
+                hubspot_object_id,
+                projection=projection
             )
             
+            workflow_name = workflow.name
+            
+            @copy_current_request_context
+            def timeline_event(document):
+                """Evento na timeline (opcional, se tiver token), em paralelo com os uploads"""
+                from app.routes.hubspot_events import create_timeline_event_internal
+                response = create_timeline_event_internal(
+                    object_type=hubspot_object_type,
+                    object_id=hubspot_object_id,
+                    event_type='document_generated',
+                    properties={
+                        'document_name': document['document_name'],
+                        'template_name': workflow_name,
+                        'document_url': document['document_url'],
+                        'workflow_name': workflow_name,
+                        'format': 'docx'
+                    }
+                )
+                if isinstance(response, tuple):
+                    raise Exception(f'Não foi possível criar evento na timeline (HTTP {response[1]})')
+            
             generator = DocumentGenerator(google_creds)
             doc = generator.generate_from_workflow(
                 workflow=workflow,
                 source_data=source_data,
                 source_object_id=hubspot_object_id,
                 user_id=None,
-                organization_id=org_id
+                organization_id=org_id,
+                extra_sinks={'timeline_event': timeline_event}
             )
             
             result = {
@@ -157,24 +189,6 @@ def execute_workflow_action():
         
         execution_time = int((time.time() - start_time) * 1000)
         
-        # Criar evento na timeline (opcional, se tiver token)
-        try:
-            from app.routes.hubspot_events import create_timeline_event_internal
-            create_timeline_event_internal(
-                object_type=hubspot_object_type,
-                object_id=hubspot_object_id,
-                event_type='document_generated',
-                properties={
-                    'document_name': result.get('document_name', 'Documento'),
-                    'template_name': workflow.name,
-                    'document_url': result.get('document_url', ''),
-                    'workflow_name': workflow.name,
-                    'format': result.get('format', 'docx')
-                }
-            )
-        except Exception as e:
-            logger.warning(f'Não foi possível criar evento na timeline: {str(e)}')
-        
         # Enviar para ClickSign se solicitado
         if send_to_clicksign and result.get('document_id'):
             try:
@@ -194,7 +208,7 @@ def execute_workflow_action():
                 'error_message': ''
             }
         })
-        
+    
     except Exception as e:
         logger.exception(f'Erro ao executar workflow action: {str(e)}')
         return jsonify({
@@ -208,31 +222,57 @@ def execute_workflow_action():
         })
 
 
-@hubspot_workflow_bp.route('/workflows-options', methods=['GET'])
+@hubspot_workflow_bp.route('/workflows-options', methods=['GET', 'POST'])
 def get_workflows_options():
     """
     Retorna opções de workflows para o dropdown da workflow action.
     Chamado pelo HubSpot para popular o campo de seleção.
+    
+    Lê do índice de triggers (workflow_trigger_index): apenas workflows ativos
+    da organização do portal e, se informado, do tipo de objeto.
+    
+    Query params (ou body do HubSpot):
+    - portalId: portal do HubSpot (obrigatório)
+    - objectType: tipo de objeto do workflow do HubSpot (opcional)
     """
     try:
-        from app.models import Workflow
+        from app.models import Workflow, WorkflowTriggerIndex
+        from app.utils.helpers import get_organization_id_from_portal_id
         
-        # Buscar workflows ativos
-        workflows = Workflow.query.filter_by(status='active').all()
+        data = request.get_json(silent=True) or {}
+        portal_id = request.args.get('portalId') or (data.get('origin') or {}).get('portalId')
+        object_type = request.args.get('objectType') or data.get('objectType')
+        
+        org_id = get_organization_id_from_portal_id(portal_id) if portal_id else None
+        if not org_id:
+            logger.warning(f'Opções de workflow pedidas para portal desconhecido: {portal_id}')
+            return jsonify({'options': []})
+        
+        # Busca indexada (organization_id, object_type, status)
+        query = db.session.query(
+            Workflow.id, Workflow.name, Workflow.description
+        ).join(
+            WorkflowTriggerIndex, WorkflowTriggerIndex.workflow_id == Workflow.id
+        ).filter(
+            WorkflowTriggerIndex.organization_id == org_id,
+            WorkflowTriggerIndex.status == 'active'
+        )
+        if object_type:
+            query = query.filter(WorkflowTriggerIndex.object_type == WorkflowTriggerIndex.normalize_object_type(object_type))
         
         options = [
             {
-                'label': workflow.name,
-                'value': str(workflow.id),
-                'description': workflow.description or ''
+                'label': name,
+                'value': str(workflow_id),
+                'description': description or ''
             }
-            for workflow in workflows
+            for workflow_id, name, description in query.order_by(Workflow.name).all()
         ]
         
         return jsonify({
             'options': options
         })
-        
+    
     except Exception as e:
         logger.exception(f'Erro ao buscar workflows: {str(e)}')
         return jsonify({
@@ -190,16 +190,14 @@ def sync_template(template_id):
         
         docs_service = GoogleDocsService(google_creds)
         
-        # Extrair tags do documento
-        detected_tags = docs_service.extract_tags_from_document(template.google_file_id)
-        
-        # Extrair tags AI também
-        from app.services.document_generation.tag_processor import TagProcessor
-        # Buscar conteúdo do documento para extrair tags AI
-        # Por enquanto, vamos apenas atualizar as tags normais
-        # TODO: Extrair tags AI do conteúdo do documento
+        # Extrair tags do documento (normais e AI)
+        modified_time = docs_service.get_file_modified_time(template.google_file_id)
+        tag_index = docs_service.extract_tag_index(template.google_file_id)
+        detected_tags = tag_index['tags']
         
         template.detected_tags = detected_tags
+        template.tag_index = tag_index
+        template.source_modified_time = modified_time
         template.version += 1
         template.last_synced_at = db.func.now()
         db.session.commit()
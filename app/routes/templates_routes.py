@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, g
 from app.auth import require_auth
 from app.utils.auth import require_org
 from app.routes.google_drive_routes import get_google_credentials, list_templates as list_gdrive_templates
-from googleapiclient.discovery import build
+from app.utils.google_clients import get_google_service
 import requests
 
 bp = Blueprint('templates', __name__, url_prefix='/api/v1/templates')
@@ -30,7 +30,7 @@ def list_all_templates():
         try:
             creds = get_google_credentials(organization_id)
             if creds:
-                service = build('drive', 'v3', credentials=creds)
+                service = get_google_service('drive', 'v3', creds)
                 # Usar mesma lógica de list_templates
                 from app.models import GoogleDriveConfig
                 from app.database import db
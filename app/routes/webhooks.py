@@ -4,7 +4,6 @@ Rotas para webhooks - endpoints públicos e de teste para webhook triggers.
 from flask import Blueprint, request, jsonify, g
 from app.database import db
 from app.models import Workflow, WorkflowNode, WorkflowExecution
-from app.services.workflow_executor import WorkflowExecutor
 from app.utils.auth import require_auth, require_org
 import logging
 import secrets
@@ -97,39 +96,72 @@ def receive_webhook(workflow_id, webhook_token):
         # Determinar source_object_id (pode vir do payload ou gerar)
         source_object_id = source_data.get('id') or source_data.get('object_id') or f'webhook_{datetime.utcnow().isoformat()}'
         
-        # Criar execução do workflow
-        executor = WorkflowExecutor()
-        
-        # Executar workflow de forma assíncrona (ou síncrona por enquanto)
-        # TODO: Considerar usar Celery para execução assíncrona
+        # Enfileirar execução do workflow (processada pelo worker Celery)
+        from app.tasks.workflow_tasks import enqueue_workflow_execution
         try:
-            execution = executor.execute_workflow(
+            execution = enqueue_workflow_execution(
                 workflow=workflow,
                 source_object_id=str(source_object_id),
                 source_object_type=source_object_type,
-                user_id=None
+                trigger_type='webhook',
+                trigger_data={'source_data': source_data}
             )
             
-            logger.info(f'Webhook executado com sucesso: workflow={workflow_id}, execution={execution.id}')
+            logger.info(f'Webhook enfileirado: workflow={workflow_id}, execution={execution.id}')
             
             return jsonify({
                 'success': True,
                 'execution_id': str(execution.id),
-                'status': execution.status
-            }), 200
-            
+                'status': execution.status,
+                'status_url': f"{request.url_root.rstrip('/')}/api/v1/webhooks/{workflow_id}/{webhook_token}/executions/{execution.id}"
+            }), 202
+        
         except Exception as e:
-            logger.error(f'Erro ao executar workflow via webhook: {str(e)}')
+            logger.error(f'Erro ao enfileirar workflow via webhook: {str(e)}')
             return jsonify({
                 'success': False,
                 'error': str(e)
-            }), 500
-        
+            }), 503
+    
     except Exception as e:
         logger.exception(f'Erro ao processar webhook: {str(e)}')
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@webhooks_bp.route('/<workflow_id>/<webhook_token>/executions/<execution_id>', methods=['GET'])
+def get_webhook_execution_status(workflow_id, webhook_token, execution_id):
+    """
+    Endpoint público para consultar o status de uma execução enfileirada pelo webhook.
+    Usa o webhook_token para validação.
+    """
+    trigger_node = WorkflowNode.query.filter_by(
+        webhook_token=webhook_token,
+        node_type='trigger',
+        workflow_id=workflow_id
+    ).first()
+    
+    if not trigger_node:
+        return jsonify({'error': 'Invalid webhook token'}), 401
+    
+    execution = WorkflowExecution.query.filter_by(
+        id=execution_id,
+        workflow_id=workflow_id
+    ).first()
+    
+    if not execution:
+        return jsonify({'error': 'Execution not found'}), 404
+    
+    return jsonify({
+        'execution_id': str(execution.id),
+        'status': execution.status,
+        'progress': execution.progress,
+        'generated_document_id': str(execution.generated_document_id) if execution.generated_document_id else None,
+        'error_message': execution.error_message,
+        'started_at': execution.started_at.isoformat() if execution.started_at else None,
+        'completed_at': execution.completed_at.isoformat() if execution.completed_at else None
+    }), 200
+
+
 @webhooks_bp.route('/test/<workflow_id>', methods=['POST'])
 @require_auth
 @require_org
@@ -194,13 +226,13 @@ def test_webhook(workflow_id):
                 'response_status': response.status_code,
                 'response_body': response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
             }), 200
-            
+        
         except requests.exceptions.RequestException as e:
             return jsonify({
                 'success': False,
                 'error': f'Erro ao enviar teste: {str(e)}'
             }), 500
-        
+    
     except Exception as e:
         logger.exception(f'Erro ao testar webhook: {str(e)}')
         return jsonify({'error': str(e)}), 500
@@ -221,8 +253,9 @@ def get_webhook_logs(workflow_id):
         ).first_or_404()
         
         # Buscar últimas execuções via webhook
-        limit = request.args.get('limit', 10, type=int)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
         
+        # Resolvido por idx_workflow_executions_workflow_trigger_created em cada partição
         executions = WorkflowExecution.query.filter_by(
             workflow_id=workflow.id,
             trigger_type='webhook'
@@ -242,7 +275,7 @@ def get_webhook_logs(workflow_id):
             'logs': logs,
             'total': len(logs)
         }), 200
-        
+    
     except Exception as e:
         logger.exception(f'Erro ao buscar logs de webhook: {str(e)}')
         return jsonify({'error': str(e)}), 500
@@ -289,7 +322,7 @@ def regenerate_webhook_token(workflow_id):
             'webhook_token': new_token,
             'webhook_url': webhook_url
         }), 200
-        
+    
     except Exception as e:
         logger.exception(f'Erro ao regenerar token: {str(e)}')
         db.session.rollback()
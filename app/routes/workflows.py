@@ -1,8 +1,14 @@
+import uuid
+from datetime import datetime, timedelta
+
 from flask import Blueprint, request, jsonify, g
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import aliased, joinedload
 from app.database import db
-from app.models import Workflow, WorkflowFieldMapping, Template, AIGenerationMapping, DataSourceConnection, WorkflowNode
+from app.models import Workflow, WorkflowFieldMapping, Template, AIGenerationMapping, DataSourceConnection, WorkflowNode, WorkflowExecution, WorkflowTriggerIndex
 from app.utils.auth import require_auth, require_org, require_admin
 from app.utils.hubspot_auth import flexible_hubspot_auth
+from app.utils.pagination import encode_cursor, decode_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +17,15 @@ workflows_bp = Blueprint('workflows', __name__, url_prefix='/api/v1/workflows')
 # Provedores de IA suportados
 AI_PROVIDERS = ['openai', 'gemini', 'anthropic']
 
+# Ordenação da listagem para workflows sem updated_at/created_at
+WORKFLOW_CURSOR_EPOCH = datetime(1970, 1, 1)
+
+# Stream de progresso da geração em lote: intervalo de consulta e janela
+# relida a cada ciclo para itens commitados fora de ordem de updated_at
+BULK_EVENTS_POLL_SECONDS = 2
+BULK_EVENTS_LAG = timedelta(seconds=10)
+BULK_EVENTS_PAGE_SIZE = 500
+
 
 def validate_post_actions(post_actions):
     """
@@ -54,48 +69,127 @@ def validate_post_actions(post_actions):
 @flexible_hubspot_auth
 @require_org
 def list_workflows():
-    """Lista workflows da organização"""
-    import uuid
+    """
+    Lista workflows da organização.
+    
+    Uma única query: contagem de nodes agrupada, filtro pelo índice de
+    triggers e template carregado junto (sem N+1).
+    
+    Query params:
+    - status: Filtra por status (opcional)
+    - object_type: Apenas workflows com trigger para esse tipo de objeto (opcional)
+    - limit: Tamanho da página, máximo 500 (sem limit retorna todos)
+    - cursor: next_cursor da página anterior
+    """
     org_id = g.organization_id
     status = request.args.get('status')
     object_type = request.args.get('object_type')  # Para filtrar por tipo de objeto
-    
-    query = Workflow.query.filter_by(organization_id=org_id)
+    limit = request.args.get('limit', type=int)
+    if limit:
+        limit = min(max(limit, 1), 500)
+    
+    # Contagem de nodes por workflow (total e configurados), só dos workflows da organização
+    org_workflow = aliased(Workflow)
+    node_stats = db.session.query(
+        WorkflowNode.workflow_id.label('workflow_id'),
+        func.count(WorkflowNode.id).label('nodes_count'),
+        func.count(WorkflowNode.id).filter(WorkflowNode.status == 'configured').label('nodes_configured')
+    ).join(
+        org_workflow, org_workflow.id == WorkflowNode.workflow_id
+    ).filter(
+        org_workflow.organization_id == org_id
+    ).group_by(WorkflowNode.workflow_id).subquery()
+    
+    sort_key = func.coalesce(Workflow.updated_at, Workflow.created_at, WORKFLOW_CURSOR_EPOCH)
+    
+    query = db.session.query(
+        Workflow,
+        func.coalesce(node_stats.c.nodes_count, 0),
+        func.coalesce(node_stats.c.nodes_configured, 0),
+        sort_key
+    ).outerjoin(
+        node_stats, node_stats.c.workflow_id == Workflow.id
+    ).options(
+        joinedload(Workflow.template)
+    ).filter(Workflow.organization_id == org_id)
     
     if status:
-        query = query.filter_by(status=status)
-    
-    workflows = query.order_by(Workflow.updated_at.desc()).all()
+        query = query.filter(Workflow.status == status)
     
-    # Se object_type foi fornecido, filtrar workflows que têm trigger node configurado para esse tipo
+    # Se object_type foi fornecido, filtrar pelo índice de triggers (workflow_trigger_index)
     if object_type:
-        filtered_workflows = []
-        for w in workflows:
-            trigger_node = WorkflowNode.query.filter_by(
-                workflow_id=w.id,
-                node_type='trigger'
-            ).first()
-            if trigger_node and trigger_node.config:
-                trigger_config = trigger_node.config or {}
-                if trigger_config.get('source_object_type') == object_type:
-                    filtered_workflows.append(w)
-        workflows = filtered_workflows
+        query = query.join(
+            WorkflowTriggerIndex, WorkflowTriggerIndex.workflow_id == Workflow.id
+        ).filter(
+            WorkflowTriggerIndex.organization_id == org_id,
+            WorkflowTriggerIndex.object_type == WorkflowTriggerIndex.normalize_object_type(object_type)
+        )
+    
+    if request.args.get('cursor'):
+        try:
+            cursor_sort_key, cursor_id = decode_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'error': 'cursor inválido'}), 400
+        query = query.filter(tuple_(sort_key, Workflow.id) < tuple_(cursor_sort_key, cursor_id))
+    
+    query = query.order_by(sort_key.desc(), Workflow.id.desc())
+    if limit:
+        query = query.limit(limit)
+    
+    rows = query.all()
     
     result = []
-    for w in workflows:
+    for w, nodes_count, nodes_configured, _ in rows:
         workflow_dict = workflow_to_dict(w)
-        # Adicionar contagem de nodes
-        nodes_count = WorkflowNode.query.filter_by(workflow_id=w.id).count()
-        nodes_configured = WorkflowNode.query.filter_by(
-            workflow_id=w.id,
-            status='configured'
-        ).count()
         workflow_dict['nodes_count'] = nodes_count
         workflow_dict['nodes_configured'] = nodes_configured
         result.append(workflow_dict)
     
+    next_cursor = None
+    if limit and len(rows) == limit:
+        last_workflow, _, _, last_sort_key = rows[-1]
+        next_cursor = encode_cursor(last_sort_key, last_workflow.id)
+    
     return jsonify({
-        'workflows': result
+        'workflows': result,
+        'next_cursor': next_cursor
+    })
+
+
+@workflows_bp.route('/by-object-type/<object_type>', methods=['GET'])
+@flexible_hubspot_auth
+@require_org
+def list_workflows_by_object_type(object_type):
+    """
+    Workflows com trigger para o tipo de objeto (card do CRM), lidos do
+    índice de triggers.
+    
+    Query params:
+    - status: Status dos workflows (padrão: active; 'all' para todos)
+    """
+    status = request.args.get('status', 'active')
+    
+    query = db.session.query(
+        Workflow.id, Workflow.name, Workflow.description, WorkflowTriggerIndex.status
+    ).join(
+        WorkflowTriggerIndex, WorkflowTriggerIndex.workflow_id == Workflow.id
+    ).filter(
+        WorkflowTriggerIndex.organization_id == g.organization_id,
+        WorkflowTriggerIndex.object_type == WorkflowTriggerIndex.normalize_object_type(object_type)
+    )
+    if status != 'all':
+        query = query.filter(WorkflowTriggerIndex.status == status)
+    
+    return jsonify({
+        'workflows': [
+            {
+                'id': str(workflow_id),
+                'name': name,
+                'description': description,
+                'status': workflow_status
+            }
+            for workflow_id, name, description, workflow_status in query.order_by(Workflow.name).all()
+        ]
     })
 
 
@@ -331,6 +425,25 @@ def activate_workflow(workflow_id):
     })
 
 
+@workflows_bp.route('/<workflow_id>/executions/<execution_id>', methods=['GET'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def get_workflow_execution(workflow_id, execution_id):
+    """Retorna status e progresso de uma execução (inclusive enfileiradas)"""
+    workflow = Workflow.query.filter_by(
+        id=workflow_id,
+        organization_id=g.organization_id
+    ).first_or_404()
+    
+    execution = WorkflowExecution.query.filter_by(
+        id=execution_id,
+        workflow_id=workflow.id
+    ).first_or_404()
+    
+    return jsonify(execution.to_dict())
+
+
 def workflow_to_dict(workflow: Workflow, include_mappings: bool = False, include_ai_mappings: bool = False) -> dict:
     """Converte workflow para dicionário"""
     result = {
@@ -431,7 +544,9 @@ def create_ai_mapping(workflow_id):
         "prompt_template": "Gere um parágrafo descrevendo o deal {{dealname}}...",
         "temperature": 0.7,
         "max_tokens": 500,
-        "fallback_value": "[Texto não gerado]"
+        "fallback_value": "[Texto não gerado]",
+        "cache_enabled": false,
+        "cache_ttl_seconds": 86400
     }
     """
     workflow = Workflow.query.filter_by(
@@ -489,7 +604,9 @@ def create_ai_mapping(workflow_id):
         prompt_template=data.get('prompt_template'),
         temperature=data.get('temperature', 0.7),
         max_tokens=data.get('max_tokens', 1000),
-        fallback_value=data.get('fallback_value')
+        fallback_value=data.get('fallback_value'),
+        cache_enabled=bool(data.get('cache_enabled', False)),
+        cache_ttl_seconds=data.get('cache_ttl_seconds')
     )
     
     db.session.add(mapping)
@@ -540,7 +657,9 @@ def update_ai_mapping(workflow_id, mapping_id):
         "prompt_template": "...",
         "temperature": 0.5,
         "max_tokens": 800,
-        "fallback_value": "..."
+        "fallback_value": "...",
+        "cache_enabled": true,
+        "cache_ttl_seconds": 3600
     }
     """
     workflow = Workflow.query.filter_by(
@@ -593,6 +712,12 @@ def update_ai_mapping(workflow_id, mapping_id):
     if 'fallback_value' in data:
         mapping.fallback_value = data['fallback_value']
     
+    if 'cache_enabled' in data:
+        mapping.cache_enabled = bool(data['cache_enabled'])
+    
+    if 'cache_ttl_seconds' in data:
+        mapping.cache_ttl_seconds = data['cache_ttl_seconds']
+    
     db.session.commit()
     
     return jsonify({
@@ -1165,10 +1290,226 @@ def preview_workflow_data(workflow_id):
                 'warnings': []
             }
         })
-        
+    
     except Exception as e:
         logger.error(f"Erro ao gerar preview: {str(e)}")
         return jsonify({
             'error': str(e)
         }), 500
 
+
+
+# ==================== BULK GENERATION ENDPOINTS ====================
+
+@workflows_bp.route('/<workflow_id>/bulk-generations', methods=['POST'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def create_bulk_generation(workflow_id):
+    """
+    Cria um job de geração em lote e envia para a fila.
+    
+    Body:
+    {
+        "object_ids": ["123", "456"],     // ou
+        "list_id": "42",                  // ou
+        "filters": [{"propertyName": "dealstage", "operator": "EQ", "value": "closedwon"}],
+        "source_object_type": "deal",     // opcional (padrão: o do workflow)
+        "user_id": "uuid"                 // opcional
+    }
+    """
+    from app.services.bulk_generation import BulkGenerationError, create_bulk_job
+    from app.tasks.bulk_generation_tasks import enqueue_bulk_generation
+    
+    workflow = Workflow.query.filter_by(
+        id=workflow_id,
+        organization_id=g.organization_id
+    ).first_or_404()
+    
+    data = request.get_json() or {}
+    
+    try:
+        job = create_bulk_job(
+            workflow=workflow,
+            source={key: data.get(key) for key in ('object_ids', 'list_id', 'filters')},
+            source_object_type=data.get('source_object_type'),
+            user_id=data.get('user_id')
+        )
+    except BulkGenerationError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        enqueue_bulk_generation(job)
+    except Exception:
+        return jsonify({'error': 'Erro ao enfileirar job', 'job': job.to_dict()}), 503
+    
+    return jsonify(job.to_dict()), 202
+
+
+@workflows_bp.route('/<workflow_id>/bulk-generations/<job_id>', methods=['GET'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def get_bulk_generation(workflow_id, job_id):
+    """Retorna status e contadores de um job de geração em lote"""
+    job = _get_bulk_job_or_404(workflow_id, job_id)
+    return jsonify(job.to_dict())
+
+
+@workflows_bp.route('/<workflow_id>/bulk-generations/<job_id>/items', methods=['GET'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def list_bulk_generation_items(workflow_id, job_id):
+    """
+    Lista os itens do job.
+    
+    Query params:
+    - status: pending, running, succeeded, failed (opcional)
+    - after_id: cursor (id do último item da página anterior)
+    - limit: máximo 500 (padrão 100)
+    """
+    from app.models import BulkGenerationItem
+    
+    job = _get_bulk_job_or_404(workflow_id, job_id)
+    limit = min(request.args.get('limit', 100, type=int), 500)
+    
+    query = BulkGenerationItem.query.filter_by(job_id=job.id)
+    if request.args.get('status'):
+        query = query.filter_by(status=request.args['status'])
+    if request.args.get('after_id', type=int):
+        query = query.filter(BulkGenerationItem.id > request.args.get('after_id', type=int))
+    
+    items = query.order_by(BulkGenerationItem.id).limit(limit).all()
+    
+    return jsonify({
+        'items': [item.to_dict() for item in items],
+        'next_cursor': items[-1].id if len(items) == limit else None
+    })
+
+
+@workflows_bp.route('/<workflow_id>/bulk-generations/<job_id>/events', methods=['GET'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def stream_bulk_generation_events(workflow_id, job_id):
+    """
+    Progresso do job em Server-Sent Events: um evento 'item' por item
+    atualizado e um evento 'job' com os contadores a cada ciclo, até o job
+    terminar.
+    """
+    import json
+    import time
+    from flask import Response, stream_with_context
+    from app.models import BulkGenerationItem, BulkGenerationJob
+    from app.services.bulk_generation import FINAL_JOB_STATUSES
+    
+    job = _get_bulk_job_or_404(workflow_id, job_id)
+    job_id = job.id
+    
+    def generate():
+        # Cursor (updated_at, id) do último item da página e itens já enviados
+        # dentro da janela de atraso (id -> updated_at)
+        last_key = None
+        recent = {}
+        while True:
+            items_query = BulkGenerationItem.query.filter(BulkGenerationItem.job_id == job_id)
+            
+            # Um worker pode commitar depois de outro um item com updated_at menor
+            # que o cursor: relê a janela anterior ao cursor e envia o que mudou
+            late = []
+            if last_key:
+                late = [
+                    item for item in items_query.filter(
+                        BulkGenerationItem.updated_at >= last_key[0] - BULK_EVENTS_LAG,
+                        tuple_(BulkGenerationItem.updated_at, BulkGenerationItem.id) <= last_key
+                    ).order_by(BulkGenerationItem.updated_at, BulkGenerationItem.id)
+                    if recent.get(item.id) != item.updated_at
+                ]
+                items_query = items_query.filter(
+                    tuple_(BulkGenerationItem.updated_at, BulkGenerationItem.id) > last_key
+                )
+            
+            page = items_query.order_by(
+                BulkGenerationItem.updated_at, BulkGenerationItem.id
+            ).limit(BULK_EVENTS_PAGE_SIZE).all()
+            if page:
+                last_key = (page[-1].updated_at, page[-1].id)
+            
+            for item in late + page:
+                recent[item.id] = item.updated_at
+                yield f"event: item\ndata: {json.dumps(item.to_dict())}\n\n"
+            
+            if last_key:
+                window_start = last_key[0] - BULK_EVENTS_LAG
+                recent = {item_id: updated_at for item_id, updated_at in recent.items() if updated_at >= window_start}
+            
+            current = BulkGenerationJob.query.get(job_id)
+            yield f"event: job\ndata: {json.dumps(current.to_dict())}\n\n"
+            
+            finished = current.status in FINAL_JOB_STATUSES and len(page) < BULK_EVENTS_PAGE_SIZE
+            # Encerra a transação para enxergar as próximas atualizações
+            db.session.rollback()
+            if finished:
+                return
+            time.sleep(BULK_EVENTS_POLL_SECONDS)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@workflows_bp.route('/<workflow_id>/bulk-generations/<job_id>/retry', methods=['POST'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def retry_bulk_generation(workflow_id, job_id):
+    """Retoma o job: reprocessa itens com falha e os que ficaram pendentes"""
+    from app.services.bulk_generation import retry_failed_items
+    from app.tasks.bulk_generation_tasks import enqueue_bulk_generation
+    
+    job = _get_bulk_job_or_404(workflow_id, job_id)
+    if job.status in ('collecting', 'running'):
+        return jsonify({'error': 'Job ainda em execução'}), 409
+    
+    reopened = retry_failed_items(job)
+    
+    try:
+        enqueue_bulk_generation(job)
+    except Exception:
+        return jsonify({'error': 'Erro ao enfileirar job', 'job': job.to_dict()}), 503
+    
+    return jsonify({**job.to_dict(), 'reopened_items': reopened}), 202
+
+
+@workflows_bp.route('/<workflow_id>/bulk-generations/<job_id>/cancel', methods=['POST'])
+@flexible_hubspot_auth
+@require_auth
+@require_org
+def cancel_bulk_generation(workflow_id, job_id):
+    """Cancela o job: lotes ainda não iniciados não são processados"""
+    job = _get_bulk_job_or_404(workflow_id, job_id)
+    if job.status in ('completed', 'completed_with_errors', 'cancelled'):
+        return jsonify({'error': f'Job já finalizado ({job.status})'}), 409
+    
+    job.status = 'cancelled'
+    job.completed_at = datetime.utcnow()
+    db.session.commit()
+    
+    return jsonify(job.to_dict())
+
+
+def _get_bulk_job_or_404(workflow_id, job_id):
+    from app.models import BulkGenerationJob
+    
+    workflow = Workflow.query.filter_by(
+        id=workflow_id,
+        organization_id=g.organization_id
+    ).first_or_404()
+    
+    return BulkGenerationJob.query.filter_by(
+        id=job_id,
+        workflow_id=workflow.id
+    ).first_or_404()
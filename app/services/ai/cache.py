@@ -0,0 +1,186 @@
+"""
+Cache de respostas do LLM endereçado por conteúdo.
+
+A chave é o hash de (modelo, prompt renderizado, temperature, max_tokens): se o
+prompt montado por TagProcessor.build_ai_prompt não mudou (ex: regenerar um
+documento ou reexecutar um workflow com o mesmo objeto do HubSpot), o texto já
+gerado é reaproveitado sem nova chamada ao provedor.
+
+Dois níveis:
+- memória do processo: LRU limitado com TTL por entrada
+- Redis (REDIS_URL): compartilhado entre processos/workers, expira por TTL
+
+Se o Redis estiver indisponível, o cache funciona só em memória.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+from .llm_service import LLMResponse
+
+logger = logging.getLogger('docugen.ai')
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_LOCAL_MAX_ENTRIES = 512
+KEY_PREFIX = 'llm-cache:'
+# Após erro no Redis, usa só a memória por este intervalo
+REDIS_RETRY_SECONDS = 30
+
+
+def build_cache_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """
+    Gera a chave do cache.
+    
+    Args:
+        model: Model string do LiteLLM (ex: "openai/gpt-4o")
+        prompt: Prompt final enviado ao modelo
+        temperature: Temperatura usada
+        max_tokens: Limite de tokens usado
+    
+    Returns:
+        Hash sha256 em hexadecimal
+    """
+    payload = json.dumps(
+        {'model': model, 'prompt': prompt, 'temperature': temperature, 'max_tokens': max_tokens},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """Cache de LLMResponse com LRU em memória e Redis opcional"""
+    
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        default_ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        local_max_entries: int = DEFAULT_LOCAL_MAX_ENTRIES
+    ):
+        self.default_ttl_seconds = default_ttl_seconds
+        self.local_max_entries = max(1, local_max_entries)
+        self._local: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_retry_at = 0.0
+        
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            except Exception as e:
+                logger.warning(f"[AI] Cache Redis indisponível, usando apenas memória: {e}")
+    
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """
+        Busca uma resposta no cache.
+        
+        Args:
+            key: Chave gerada por build_cache_key
+        
+        Returns:
+            LLMResponse (time_ms e custo zerados) ou None
+        """
+        entry = self._get_local(key)
+        
+        if entry is None and self._redis_available():
+            try:
+                raw = self._redis.get(KEY_PREFIX + key)
+                if raw:
+                    entry = json.loads(raw)
+                    ttl = self._redis.ttl(KEY_PREFIX + key)
+                    self._set_local(key, entry, ttl if ttl and ttl > 0 else self.default_ttl_seconds)
+            except Exception as e:
+                self._redis_failed(e)
+        
+        if entry is None:
+            return None
+        
+        return LLMResponse(
+            text=entry['text'],
+            provider=entry.get('provider', ''),
+            model=entry.get('model', ''),
+            input_tokens=0,
+            output_tokens=0,
+            total_tokens=0,
+            time_ms=0,
+            estimated_cost_usd=0.0
+        )
+    
+    def set(self, key: str, response: LLMResponse, ttl_seconds: Optional[int] = None) -> None:
+        """
+        Armazena uma resposta no cache.
+        
+        Args:
+            key: Chave gerada por build_cache_key
+            response: Resposta do LLM
+            ttl_seconds: Tempo de vida (padrão: default_ttl_seconds)
+        """
+        ttl = ttl_seconds or self.default_ttl_seconds
+        entry = {
+            'text': response.text,
+            'provider': response.provider,
+            'model': response.model,
+            'total_tokens': response.total_tokens
+        }
+        self._set_local(key, entry, ttl)
+        
+        if self._redis_available():
+            try:
+                self._redis.setex(KEY_PREFIX + key, ttl, json.dumps(entry, ensure_ascii=False))
+            except Exception as e:
+                self._redis_failed(e)
+    
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.time() >= self._redis_retry_at
+    
+    def _redis_failed(self, error: Exception) -> None:
+        self._redis_retry_at = time.time() + REDIS_RETRY_SECONDS
+        logger.warning(f"[AI] Erro no cache Redis, usando apenas memória por {REDIS_RETRY_SECONDS}s: {error}")
+    
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at < time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+    
+    def _set_local(self, key: str, entry: Dict[str, Any], ttl_seconds: int) -> None:
+        with self._lock:
+            self._local[key] = (time.time() + ttl_seconds, entry)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> LLMResponseCache:
+    """
+    Retorna o cache do processo, configurado por LLM_CACHE_REDIS_URL,
+    LLM_CACHE_DEFAULT_TTL_SECONDS e LLM_CACHE_LOCAL_MAX_ENTRIES.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from flask import current_app, has_app_context
+                config = current_app.config if has_app_context() else {}
+                _cache = LLMResponseCache(
+                    redis_url=config.get('LLM_CACHE_REDIS_URL'),
+                    default_ttl_seconds=config.get('LLM_CACHE_DEFAULT_TTL_SECONDS', DEFAULT_TTL_SECONDS),
+                    local_max_entries=config.get('LLM_CACHE_LOCAL_MAX_ENTRIES', DEFAULT_LOCAL_MAX_ENTRIES)
+                )
+    return _cache
@@ -0,0 +1,102 @@
+"""
+Limites de concorrência para chamadas de LLM.
+
+Os limites são compartilhados por todo o processo (threads do scheduler de
+workflows e do worker), para que várias gerações simultâneas da mesma
+organização ou do mesmo provedor não estourem o rate limit da API key.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+DEFAULT_MAX_PER_ORGANIZATION = 4
+DEFAULT_MAX_PER_PROVIDER = 8
+
+# Intervalo para checar cancelamento enquanto espera uma vaga
+_ACQUIRE_POLL_SECONDS = 0.2
+
+
+class AIConcurrencyLimiter:
+    """Semáforos por organização e por provedor"""
+    
+    def __init__(
+        self,
+        max_per_organization: int = DEFAULT_MAX_PER_ORGANIZATION,
+        max_per_provider: int = DEFAULT_MAX_PER_PROVIDER
+    ):
+        self.max_per_organization = max(1, max_per_organization)
+        self.max_per_provider = max(1, max_per_provider)
+        self._organizations: Dict[str, threading.BoundedSemaphore] = {}
+        self._providers: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+    
+    def _semaphore(self, registry: Dict[str, threading.BoundedSemaphore], key: str, limit: int) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = registry.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(limit)
+                registry[key] = semaphore
+            return semaphore
+    
+    @staticmethod
+    def _acquire(semaphore: threading.BoundedSemaphore, cancel_event: Optional[threading.Event]) -> bool:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            if semaphore.acquire(timeout=_ACQUIRE_POLL_SECONDS):
+                return True
+    
+    @contextmanager
+    def slot(self, organization_id: str, provider: str, cancel_event: Optional[threading.Event] = None):
+        """
+        Reserva uma vaga para a organização e para o provedor.
+        
+        A vaga da organização é sempre obtida antes da do provedor, evitando deadlock.
+        
+        Args:
+            organization_id: ID da organização
+            provider: Provedor de IA (openai, gemini, ...)
+            cancel_event: Se setado enquanto espera, desiste da vaga
+        
+        Yields:
+            True se a vaga foi obtida, False se cancelado antes
+        """
+        org_semaphore = self._semaphore(self._organizations, str(organization_id), self.max_per_organization)
+        provider_semaphore = self._semaphore(self._providers, provider, self.max_per_provider)
+        
+        if not self._acquire(org_semaphore, cancel_event):
+            yield False
+            return
+        try:
+            if not self._acquire(provider_semaphore, cancel_event):
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                provider_semaphore.release()
+        finally:
+            org_semaphore.release()
+
+
+_limiter: Optional[AIConcurrencyLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_concurrency_limiter() -> AIConcurrencyLimiter:
+    """
+    Retorna o limitador do processo, configurado por AI_MAX_CONCURRENCY_PER_ORG
+    e AI_MAX_CONCURRENCY_PER_PROVIDER.
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                from flask import current_app, has_app_context
+                config = current_app.config if has_app_context() else {}
+                _limiter = AIConcurrencyLimiter(
+                    max_per_organization=config.get('AI_MAX_CONCURRENCY_PER_ORG', DEFAULT_MAX_PER_ORGANIZATION),
+                    max_per_provider=config.get('AI_MAX_CONCURRENCY_PER_PROVIDER', DEFAULT_MAX_PER_PROVIDER)
+                )
+    return _limiter
@@ -0,0 +1,344 @@
+"""
+Geração em lote: um workflow para milhares de objetos do HubSpot.
+
+Fluxo:
+1. create_bulk_job cria o job e, se a origem for uma lista de IDs, os itens
+2. o worker percorre lista/filtros do HubSpot (paginação 'after') e cria os
+   itens restantes (collect_items)
+3. os itens pendentes são divididos em lotes; cada lote busca os dados de todos
+   os objetos com as APIs de batch (get_objects_data) e executa o workflow de
+   cada objeto com concorrência limitada (process_items)
+
+Cada item guarda seu status, então um job interrompido ou com falhas parciais é
+retomado reprocessando só os itens pendentes/com falha (retry_failed_items).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import db
+from app.models import Workflow, WorkflowExecution, DataSourceConnection, BulkGenerationJob, BulkGenerationItem
+from app.services.data_sources.hubspot import HubSpotDataSource
+from app.services.data_sources.hubspot_projection import get_workflow_property_projection
+from app.services.workflow_executor import WorkflowExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ITEMS = 10000
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_CONCURRENCY = 4
+INSERT_BATCH_SIZE = 500
+
+FINAL_JOB_STATUSES = ('completed', 'completed_with_errors', 'failed', 'cancelled')
+
+
+class BulkGenerationError(Exception):
+    """Erro de validação ao criar um job de geração em lote"""
+    pass
+
+
+def create_bulk_job(
+    workflow: Workflow,
+    source: Dict[str, Any],
+    source_object_type: Optional[str] = None,
+    user_id: Optional[str] = None
+) -> BulkGenerationJob:
+    """
+    Cria o job e, para origem object_ids, os itens.
+    
+    Args:
+        workflow: Workflow a executar
+        source: {"object_ids": [...]} | {"list_id": "..."} | {"filters": [...]}
+        source_object_type: Tipo dos objetos (padrão: o do workflow)
+        user_id: Usuário que criou o job
+    
+    Returns:
+        BulkGenerationJob persistido (status 'pending')
+    
+    Raises:
+        BulkGenerationError: Se a origem for inválida
+    """
+    source_object_type = source_object_type or workflow.source_object_type
+    if not source_object_type:
+        raise BulkGenerationError('source_object_type é obrigatório')
+    
+    keys = [key for key in ('object_ids', 'list_id', 'filters') if source.get(key)]
+    if len(keys) != 1:
+        raise BulkGenerationError('Informe exatamente um entre object_ids, list_id e filters')
+    
+    object_ids = []
+    if 'object_ids' in keys:
+        if not isinstance(source['object_ids'], list):
+            raise BulkGenerationError('object_ids deve ser uma lista')
+        object_ids = list(dict.fromkeys(str(object_id) for object_id in source['object_ids']))
+        if len(object_ids) > _max_items():
+            raise BulkGenerationError(f'Máximo de {_max_items()} objetos por job')
+    elif 'filters' in keys and not isinstance(source['filters'], list):
+        raise BulkGenerationError('filters deve ser uma lista de filtros da API de search do HubSpot')
+    
+    job = BulkGenerationJob(
+        organization_id=workflow.organization_id,
+        workflow_id=workflow.id,
+        source_object_type=source_object_type,
+        source={key: source[key] for key in keys if key != 'object_ids'},
+        status='pending',
+        created_by=user_id
+    )
+    db.session.add(job)
+    db.session.flush()
+    
+    if object_ids:
+        _insert_items(job, object_ids)
+        job.items_collected = True
+    
+    db.session.commit()
+    return job
+
+
+def collect_items(job: BulkGenerationJob, data_source: HubSpotDataSource) -> int:
+    """
+    Cria os itens de um job com origem list_id/filters.
+    
+    Returns:
+        Total de itens do job
+    """
+    if job.items_collected:
+        return job.total_items or 0
+    
+    source = job.source or {}
+    batch = []
+    for object_id in data_source.iter_object_ids(
+        job.source_object_type,
+        list_id=source.get('list_id'),
+        filters=source.get('filters')
+    ):
+        batch.append(object_id)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            _insert_items(job, batch)
+            db.session.commit()
+            batch = []
+        if (job.total_items or 0) + len(batch) >= _max_items():
+            logger.warning(f'Job {job.id}: origem com mais de {_max_items()} objetos, excedentes ignorados')
+            break
+    
+    if batch:
+        _insert_items(job, batch)
+    
+    job.items_collected = True
+    db.session.commit()
+    return job.total_items
+
+
+def process_items(job: BulkGenerationJob, item_ids: List[int]) -> Dict[str, int]:
+    """
+    Processa um lote de itens: busca os dados em batch e executa o workflow para
+    cada objeto com até BULK_GENERATION_MAX_CONCURRENCY execuções simultâneas.
+    
+    Args:
+        job: Job dos itens
+        item_ids: IDs dos BulkGenerationItem do lote
+    
+    Returns:
+        Contagem {'succeeded': n, 'failed': n} do lote
+    """
+    items = BulkGenerationItem.query.filter(
+        BulkGenerationItem.id.in_(item_ids),
+        BulkGenerationItem.job_id == job.id,
+        BulkGenerationItem.status.in_(('pending', 'running'))
+    ).all()
+    if not items:
+        return {'succeeded': 0, 'failed': 0}
+    
+    for item in items:
+        item.status = 'running'
+        item.attempts = (item.attempts or 0) + 1
+    db.session.commit()
+    
+    workflow = job.workflow
+    try:
+        source_data = _prefetch_source_data(job, workflow, [item.source_object_id for item in items])
+    except Exception as e:
+        logger.error(f'Job {job.id}: erro ao buscar dados do lote: {str(e)}')
+        for item in items:
+            item.status = 'failed'
+            item.error_message = f'Erro ao buscar dados do HubSpot: {str(e)}'
+        db.session.commit()
+        return {'succeeded': 0, 'failed': len(items)}
+    
+    app = current_app._get_current_object()
+    max_workers = current_app.config.get('BULK_GENERATION_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)
+    work = [(item.id, item.source_object_id, source_data.get(item.source_object_id)) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='bulk-generation') as pool:
+        results = list(pool.map(
+            lambda args: _run_item_in_app_context(app, str(job.id), str(workflow.id), job.source_object_type, *args),
+            work
+        ))
+    
+    return {
+        'succeeded': sum(1 for status in results if status == 'succeeded'),
+        'failed': sum(1 for status in results if status == 'failed')
+    }
+
+
+def refresh_job_counters(job: BulkGenerationJob) -> BulkGenerationJob:
+    """
+    Recalcula os contadores a partir dos itens e finaliza o job quando não
+    restam itens pendentes.
+    """
+    counts = dict(
+        db.session.query(BulkGenerationItem.status, func.count(BulkGenerationItem.id))
+        .filter(BulkGenerationItem.job_id == job.id)
+        .group_by(BulkGenerationItem.status)
+        .all()
+    )
+    
+    job.total_items = sum(counts.values())
+    job.succeeded_items = counts.get('succeeded', 0)
+    job.failed_items = counts.get('failed', 0)
+    
+    remaining = counts.get('pending', 0) + counts.get('running', 0)
+    if job.items_collected and not remaining and job.status not in FINAL_JOB_STATUSES:
+        job.status = 'completed_with_errors' if job.failed_items else 'completed'
+        job.completed_at = datetime.utcnow()
+        logger.info(
+            f'Job {job.id} finalizado: {job.succeeded_items} sucesso, {job.failed_items} falhas'
+        )
+    
+    db.session.commit()
+    return job
+
+
+def retry_failed_items(job: BulkGenerationJob) -> int:
+    """
+    Volta os itens com falha para pendente (retomada do job).
+    
+    Returns:
+        Quantidade de itens reabertos
+    """
+    reopened = BulkGenerationItem.query.filter_by(job_id=job.id, status='failed').update(
+        {'status': 'pending', 'error_message': None},
+        synchronize_session=False
+    )
+    job.status = 'pending'
+    job.completed_at = None
+    job.error_message = None
+    db.session.commit()
+    return reopened
+
+
+def pending_item_ids(job: BulkGenerationJob) -> List[int]:
+    """IDs dos itens ainda não processados, em ordem de criação"""
+    rows = db.session.query(BulkGenerationItem.id).filter(
+        BulkGenerationItem.job_id == job.id,
+        BulkGenerationItem.status.in_(('pending', 'running'))
+    ).order_by(BulkGenerationItem.id).all()
+    return [row.id for row in rows]
+
+
+def get_job_data_source(job: BulkGenerationJob) -> HubSpotDataSource:
+    """Conexão HubSpot do workflow (ou a da organização)"""
+    workflow = job.workflow
+    connection = workflow.source_connection
+    if connection is None:
+        connection = DataSourceConnection.query.filter_by(
+            organization_id=job.organization_id,
+            source_type='hubspot'
+        ).first()
+    if connection is None or connection.source_type != 'hubspot':
+        raise BulkGenerationError('Conexão HubSpot não configurada para o workflow')
+    return HubSpotDataSource(connection)
+
+
+def _prefetch_source_data(job: BulkGenerationJob, workflow: Workflow, object_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Dados de todos os objetos do lote, já normalizados como no trigger node"""
+    data_source = get_job_data_source(job)
+    projection = get_workflow_property_projection(workflow, job.source_object_type)
+    objects = data_source.get_objects_data(job.source_object_type, object_ids, projection=projection)
+    
+    normalized = {}
+    for object_id, data in objects.items():
+        properties = data.pop('properties', {}) or {}
+        normalized[object_id] = {**data, **properties}
+    return normalized
+
+
+def _run_item_in_app_context(
+    app,
+    job_id: str,
+    workflow_id: str,
+    source_object_type: str,
+    item_id: int,
+    source_object_id: str,
+    source_data: Optional[Dict[str, Any]]
+) -> str:
+    """Executa o workflow de um item numa thread do pool, com app context e sessão próprios"""
+    with app.app_context():
+        item = BulkGenerationItem.query.get(item_id)
+        
+        if source_data is None:
+            item.status = 'failed'
+            item.error_message = f'Objeto {source_object_id} não encontrado no HubSpot'
+            db.session.commit()
+            return item.status
+        
+        executor = WorkflowExecutor()
+        workflow = Workflow.query.get(workflow_id)
+        execution = executor.create_execution(
+            workflow=workflow,
+            source_object_id=source_object_id,
+            source_object_type=source_object_type,
+            trigger_type='bulk',
+            trigger_data={
+                'source_data': source_data,
+                'source_data_prefetched': True,
+                'bulk_job_id': job_id
+            }
+        )
+        item.execution_id = execution.id
+        db.session.commit()
+        
+        try:
+            executor.run_execution(execution, workflow)
+        except Exception as e:
+            # Erro já registrado na execução pelo executor
+            logger.warning(f'Job {job_id}: item {source_object_id} falhou: {str(e)}')
+        
+        item = BulkGenerationItem.query.get(item_id)
+        execution = WorkflowExecution.query.get(execution.id)
+        if execution.status in ('completed', 'paused'):
+            item.status = 'succeeded'
+            item.error_message = None
+        else:
+            item.status = 'failed'
+            item.error_message = execution.error_message or 'Execução falhou'
+        item.generated_document_id = execution.generated_document_id
+        db.session.commit()
+        return item.status
+
+
+def _insert_items(job: BulkGenerationJob, object_ids: List[str]) -> None:
+    """Insere itens ignorando objetos já presentes no job"""
+    if not object_ids:
+        return
+    statement = insert(BulkGenerationItem.__table__).values([
+        {
+            'job_id': job.id,
+            'source_object_id': str(object_id),
+            'status': 'pending',
+            'attempts': 0,
+            'updated_at': datetime.utcnow()
+        }
+        for object_id in object_ids
+    ]).on_conflict_do_nothing(index_elements=['job_id', 'source_object_id'])  # uq_bulk_item_job_object
+    result = db.session.execute(statement)
+    job.total_items = (job.total_items or 0) + (result.rowcount or 0)
+
+
+def _max_items() -> int:
+    return current_app.config.get('BULK_GENERATION_MAX_ITEMS', DEFAULT_MAX_ITEMS)
@@ -1,7 +1,10 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import requests
+from app.utils import http_client
+from app.utils.rate_limiter import get_hubspot_rate_limiter, hubspot_rate_limit_key
 import logging
 from .base import BaseDataSource
+from .hubspot_projection import OBJECT_TYPES, PropertyProjection, normalize_object_type
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +15,56 @@ class HubSpotDataSource(BaseDataSource):
     
     BASE_URL = "https://api.hubapi.com"
     
+    # Limites de inputs por chamada das APIs de batch
+    BATCH_READ_LIMIT = 100
+    ASSOCIATIONS_BATCH_LIMIT = 1000
+    # A API de search não pagina além deste número de resultados
+    SEARCH_RESULTS_LIMIT = 10000
+    
+    # Tipos de objeto CRM (plural -> singular)
+    SINGULAR_OBJECT_TYPES = OBJECT_TYPES
+    
     def __init__(self, connection):
         super().__init__(connection)
         self.access_token = connection.credentials.get('access_token') if connection.credentials else None
         self.portal_id = connection.config.get('portal_id') if connection.config else None
     
-    def get_object_data(self, object_type: str, object_id: str, additional_properties: List[str] = None) -> Dict[str, Any]:
+    def get_object_data(
+        self,
+        object_type: str,
+        object_id: str,
+        additional_properties: List[str] = None,
+        association_properties: Dict[str, List[str]] = None,
+        projection: Optional[PropertyProjection] = None
+    ) -> Dict[str, Any]:
         """
         Busca dados de um objeto específico do HubSpot.
         
+        Os objetos associados são resolvidos com as APIs de batch (ver
+        _resolve_associations): o número de chamadas não cresce com a quantidade
+        de associações (ex: deals com muitos line items).
+        
         Args:
             object_type: Tipo do objeto (contacts, deals, companies, tickets, quotes, line_items)
             object_id: ID do objeto
             additional_properties: Lista opcional de propriedades adicionais a buscar
+            association_properties: Propriedades por tipo de associação
+                (ex: {'companies': ['name', 'cnpj']}). Padrão: _get_default_properties
+            projection: Propriedades usadas pelo workflow (ver hubspot_projection).
+                Se informada, só essas propriedades e associações são buscadas,
+                no lugar das listas padrão
         
         Returns:
-            Dict com os dados do objeto, incluindo propriedades e associações
+            Dict com os dados do objeto, incluindo propriedades e associações:
+            {
+                'id': '...',
+                'properties': {...},
+                'associations': {
+                    'companies': [{'id': '...', 'name': '...', ...}],
+                    'company': {'id': '...', 'name': '...', ...},  # primeiro da lista
+                    ...
+                }
+            }
         """
         if not self.access_token:
             raise Exception('HubSpot access token não configurado')
@@ -56,7 +93,10 @@ class HubSpotDataSource(BaseDataSource):
         
         # Combinar propriedades padrão com adicionais
         default_props = self._get_default_properties(object_type)
-        if additional_properties:
+        if projection is not None:
+            properties_param = ','.join(projection.properties) or 'hs_object_id'
+            association_properties = projection.association_properties
+        elif additional_properties:
             # Converter string de propriedades padrão em lista
             default_props_list = default_props.split(',') if default_props != '*' else []
             # Adicionar propriedades adicionais (removendo duplicatas)
@@ -72,7 +112,11 @@ class HubSpotDataSource(BaseDataSource):
         # Buscar propriedades e associações
         params = {
             'properties': properties_param,
-            'associations': self._get_default_associations(object_type)
+            'associations': (
+                list(projection.association_properties)
+                if projection is not None
+                else self._get_default_associations(object_type)
+            )
         }
         
         headers = {
@@ -81,7 +125,7 @@ class HubSpotDataSource(BaseDataSource):
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self._request('GET', url, headers=headers, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -90,60 +134,335 @@ class HubSpotDataSource(BaseDataSource):
             normalized = {
                 'id': data.get('id'),
                 'properties': data.get('properties', {}),
-                'associations': {}
+                'associations': self._resolve_associations(
+                    object_type,
+                    object_id,
+                    data.get('associations') or {},
+                    association_properties or {}
+                )
             }
             
-            # Processar associações
-            if 'associations' in data:
-                for assoc_type, assoc_data in data['associations'].items():
-                    results = assoc_data.get('results', [])
-                    if results:
-                        # Buscar detalhes das associações
-                        normalized['associations'][assoc_type] = self._fetch_associations(
-                            object_type, object_id, assoc_type
-                        )
-            
             return normalized
-            
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao buscar objeto do HubSpot: {str(e)}")
             raise Exception(f'Erro ao buscar dados do HubSpot: {str(e)}')
     
-    def _fetch_associations(self, object_type: str, object_id: str, association_type: str) -> List[Dict]:
-        """Busca detalhes de objetos associados"""
-        try:
-            # Mapear tipos de associação
-            assoc_map = {
-                'contacts': 'contacts/v3/objects/contacts',
-                'companies': 'crm/v3/objects/companies',
-                'deals': 'crm/v3/objects/deals',
-                'tickets': 'crm/v3/objects/tickets',
-                'quotes': 'crm/v3/objects/quotes',
-                'line_items': 'crm/v3/objects/line_items'
-            }
+    def _resolve_associations(
+        self,
+        object_type: str,
+        object_id: str,
+        inline_associations: Dict[str, Any],
+        association_properties: Dict[str, List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Resolve os objetos associados com suas propriedades.
+        
+        Os IDs vêm na própria resposta do objeto; só quando a lista vem paginada
+        os IDs são buscados com crm/v4/associations/.../batch/read. As propriedades
+        de cada tipo são buscadas com crm/v3/objects/<tipo>/batch/read
+        (até BATCH_READ_LIMIT por chamada).
+        """
+        associations = {}
+        
+        for assoc_type, assoc_data in inline_associations.items():
+            assoc_type = self._normalize_object_type(assoc_type)
+            if assoc_type not in self.SINGULAR_OBJECT_TYPES:
+                continue
             
-            endpoint = assoc_map.get(association_type)
-            if not endpoint:
-                return []
+            ids = [str(item.get('id')) for item in assoc_data.get('results', []) if item.get('id')]
+            if (assoc_data.get('paging') or {}).get('next'):
+                # Se a busca em lote falhar, ficam os IDs da primeira página
+                ids = self.batch_read_association_ids(object_type, assoc_type, [object_id]).get(str(object_id)) or ids
             
-            url = f"{self.BASE_URL}/crm/v4/objects/{object_type}/{object_id}/associations/{association_type}"
+            # IDs repetidos aparecem com tipos de associação diferentes
+            ids = list(dict.fromkeys(ids))
+            if not ids:
+                continue
             
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'Content-Type': 'application/json'
+            if assoc_type in association_properties:
+                properties = association_properties[assoc_type]
+            else:
+                properties = self._get_default_properties(assoc_type).split(',')
+            objects = self.batch_read_objects(assoc_type, ids, properties)
+            
+            associations[assoc_type] = objects
+            associations[self.SINGULAR_OBJECT_TYPES[assoc_type]] = objects[0] if objects else None
+        
+        return associations
+    
+    def batch_read_association_ids(self, from_type: str, to_type: str, object_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Busca IDs associados de vários objetos (crm/v4/associations/{from}/{to}/batch/read).
+        
+        Args:
+            from_type: Tipo de origem (deals, contacts, ...)
+            to_type: Tipo associado
+            object_ids: IDs de origem
+        
+        Returns:
+            Dict {id_origem: [ids_associados]}
+        """
+        from_type = self._normalize_object_type(from_type)
+        to_type = self._normalize_object_type(to_type)
+        url = f"{self.BASE_URL}/crm/v4/associations/{from_type}/{to_type}/batch/read"
+        result = {str(object_id): [] for object_id in object_ids}
+        
+        for chunk in self._chunks([str(object_id) for object_id in object_ids], self.ASSOCIATIONS_BATCH_LIMIT):
+            inputs = [{'id': object_id} for object_id in chunk]
+            while inputs:
+                try:
+                    response = self._request('POST', url, headers=self._headers(), json={'inputs': inputs})
+                    response.raise_for_status()
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Erro ao buscar associações {from_type}->{to_type} em lote: {str(e)}")
+                    break
+                
+                # Associações com mais resultados voltam com paging.next.after por origem
+                next_inputs = []
+                for item in response.json().get('results', []):
+                    from_id = str((item.get('from') or {}).get('id'))
+                    result.setdefault(from_id, []).extend(str(to.get('toObjectId')) for to in item.get('to', []))
+                    after = ((item.get('paging') or {}).get('next') or {}).get('after')
+                    if after:
+                        next_inputs.append({'id': from_id, 'after': after})
+                inputs = next_inputs
+        
+        return result
+    
+    def batch_read_objects(self, object_type: str, object_ids: List[str], properties: List[str]) -> List[Dict[str, Any]]:
+        """
+        Busca vários objetos de um tipo com as propriedades informadas
+        (crm/v3/objects/<tipo>/batch/read).
+        
+        Args:
+            object_type: Tipo dos objetos
+            object_ids: IDs a buscar
+            properties: Propriedades a retornar
+        
+        Returns:
+            Lista de {'id': ..., <propriedades>} na ordem de object_ids. Se a busca
+            falhar, os objetos voltam apenas com o id.
+        """
+        found = self._batch_read_properties(object_type, object_ids, properties)
+        return [
+            {'id': str(object_id), **found.get(str(object_id), {})}
+            for object_id in object_ids
+        ]
+    
+    def get_objects_data(
+        self,
+        object_type: str,
+        object_ids: List[str],
+        projection: Optional[PropertyProjection] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca vários objetos com associações usando só APIs de batch.
+        
+        Para N objetos: ceil(N/100) chamadas para as propriedades e, por tipo de
+        associação, ceil(N/1000) para os IDs associados + ceil(M/100) para os M
+        objetos associados distintos.
+        
+        Args:
+            object_type: Tipo dos objetos
+            object_ids: IDs a buscar
+            projection: Propriedades usadas pelo workflow (None = listas padrão)
+        
+        Returns:
+            Dict {object_id: dados no mesmo formato de get_object_data}. Objetos
+            não encontrados no HubSpot ficam fora do resultado.
+        
+        Raises:
+            Exception: Se a leitura das propriedades dos objetos falhar
+        """
+        if not self.access_token:
+            raise Exception('HubSpot access token não configurado')
+        
+        object_ids = [str(object_id) for object_id in dict.fromkeys(object_ids)]
+        
+        if projection is not None:
+            properties = list(projection.properties) or ['hs_object_id']
+            association_properties = projection.association_properties
+        else:
+            properties = self._get_default_properties(object_type).split(',')
+            association_properties = {
+                assoc_type: self._get_default_properties(assoc_type).split(',')
+                for assoc_type in self._get_default_associations(object_type)
             }
+        
+        found = self._batch_read_properties(object_type, object_ids, properties, raise_errors=True)
+        result = {
+            object_id: {'id': object_id, 'properties': found[object_id], 'associations': {}}
+            for object_id in object_ids if object_id in found
+        }
+        
+        for assoc_type, assoc_props in association_properties.items():
+            assoc_type = self._normalize_object_type(assoc_type)
+            ids_by_object = self.batch_read_association_ids(object_type, assoc_type, list(result))
             
-            response = requests.get(url, headers=headers)
-            if response.ok:
-                data = response.json()
-                # Retornar lista de IDs associados
-                return [item.get('id') for item in data.get('results', [])]
+            all_ids = list(dict.fromkeys(
+                assoc_id for ids in ids_by_object.values() for assoc_id in ids
+            ))
+            assoc_objects = {
+                obj['id']: obj for obj in self.batch_read_objects(assoc_type, all_ids, assoc_props)
+            } if all_ids else {}
             
-            return []
+            for object_id, data in result.items():
+                ids = list(dict.fromkeys(ids_by_object.get(object_id, [])))
+                if not ids:
+                    continue
+                objects = [assoc_objects.get(assoc_id, {'id': assoc_id}) for assoc_id in ids]
+                data['associations'][assoc_type] = objects
+                data['associations'][self.SINGULAR_OBJECT_TYPES[assoc_type]] = objects[0]
+        
+        return result
+    
+    def _batch_read_properties(
+        self,
+        object_type: str,
+        object_ids: List[str],
+        properties: List[str],
+        raise_errors: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """Propriedades por ID via crm/v3/objects/<tipo>/batch/read, em lotes de BATCH_READ_LIMIT"""
+        object_type = self._normalize_object_type(object_type)
+        url = f"{self.BASE_URL}/crm/v3/objects/{object_type}/batch/read"
+        found = {}
+        
+        for chunk in self._chunks([str(object_id) for object_id in object_ids], self.BATCH_READ_LIMIT):
+            try:
+                response = self._request(
+                    'POST',
+                    url,
+                    headers=self._headers(),
+                    json={
+                        'inputs': [{'id': object_id} for object_id in chunk],
+                        'properties': [p for p in properties if p and p != '*']
+                    }
+                )
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Erro ao buscar {object_type} em lote: {str(e)}")
+                if raise_errors:
+                    raise Exception(f'Erro ao buscar dados do HubSpot: {str(e)}')
+                continue
             
-        except Exception as e:
-            logger.warning(f"Erro ao buscar associações: {str(e)}")
-            return []
+            for item in response.json().get('results', []):
+                found[str(item.get('id'))] = item.get('properties') or {}
+        
+        return found
+    
+    def iter_object_ids(
+        self,
+        object_type: str,
+        list_id: Optional[str] = None,
+        filters: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Percorre os IDs de objetos de uma lista, de uma busca por filtros ou de
+        todos os objetos do tipo, seguindo a paginação 'after'.
+        
+        Args:
+            object_type: Tipo dos objetos
+            list_id: ID de uma lista do HubSpot (crm/v3/lists/{id}/memberships)
+            filters: Filtros da API de search ([{propertyName, operator, value}])
+        
+        Yields:
+            IDs dos objetos (str)
+        """
+        if not self.access_token:
+            raise Exception('HubSpot access token não configurado')
+        
+        object_type = self._normalize_object_type(object_type)
+        
+        if list_id:
+            url = f"{self.BASE_URL}/crm/v3/lists/{list_id}/memberships"
+            yield from self._paginate_ids('GET', url, lambda item: item.get('recordId'), params={'limit': 250})
+        elif filters:
+            yield from self._search_ids(object_type, filters)
+        else:
+            url = f"{self.BASE_URL}/crm/v3/objects/{object_type}"
+            yield from self._paginate_ids(
+                'GET', url, lambda item: item.get('id'),
+                params={'limit': 100, 'properties': 'hs_object_id'}
+            )
+    
+    def _paginate_ids(self, method: str, url: str, get_id, params: Dict[str, Any]):
+        after = None
+        while True:
+            page_params = dict(params, after=after) if after else params
+            response = self._request(method, url, headers=self._headers(), params=page_params)
+            response.raise_for_status()
+            data = response.json()
+            
+            for item in data.get('results', []):
+                if get_id(item):
+                    yield str(get_id(item))
+            
+            after = ((data.get('paging') or {}).get('next') or {}).get('after')
+            if not after:
+                return
+    
+    def _search_ids(self, object_type: str, filters: List[Dict[str, Any]]):
+        """
+        IDs via crm/v3/objects/<tipo>/search. A busca pagina no máximo
+        SEARCH_RESULTS_LIMIT resultados: ordena por hs_object_id e, ao atingir o
+        limite, recomeça a partir do último ID com um filtro GT.
+        """
+        url = f"{self.BASE_URL}/crm/v3/objects/{object_type}/search"
+        last_id = None
+        
+        while True:
+            page_filters = list(filters)
+            if last_id:
+                page_filters.append({'propertyName': 'hs_object_id', 'operator': 'GT', 'value': last_id})
+            
+            after = None
+            while True:
+                body = {
+                    'filterGroups': [{'filters': page_filters}],
+                    'sorts': [{'propertyName': 'hs_object_id', 'direction': 'ASCENDING'}],
+                    'properties': ['hs_object_id'],
+                    'limit': 100
+                }
+                if after:
+                    body['after'] = after
+                
+                response = self._request('POST', url, headers=self._headers(), json=body)
+                response.raise_for_status()
+                data = response.json()
+                
+                results = data.get('results', [])
+                for item in results:
+                    last_id = str(item.get('id'))
+                    yield last_id
+                
+                after = ((data.get('paging') or {}).get('next') or {}).get('after')
+                if not after:
+                    return
+                if int(after) >= self.SEARCH_RESULTS_LIMIT:
+                    break
+    
+    def _request(self, method: str, url: str, **kwargs):
+        """Chamada à API do HubSpot respeitando o rate limit do portal"""
+        get_hubspot_rate_limiter().acquire(hubspot_rate_limit_key(self.portal_id, self.access_token))
+        return http_client.request(method, url, **kwargs)
+    
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+    
+    @staticmethod
+    def _normalize_object_type(object_type: str) -> str:
+        """Converte para o nome no plural usado pelas APIs CRM v3/v4 (deal -> deals)"""
+        return normalize_object_type(object_type)
+    
+    @staticmethod
+    def _chunks(items: List[Any], size: int):
+        for index in range(0, len(items), size):
+            yield items[index:index + size]
     
     def _get_default_properties(self, object_type: str) -> str:
         """Retorna propriedades padrão para cada tipo de objeto"""
@@ -222,12 +541,12 @@ class HubSpotDataSource(BaseDataSource):
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self._request('GET', url, headers=headers, params=params)
             response.raise_for_status()
             
             data = response.json()
             return data.get('results', [])
-            
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao listar objetos do HubSpot: {str(e)}")
             raise Exception(f'Erro ao listar objetos do HubSpot: {str(e)}')
@@ -249,9 +568,9 @@ class HubSpotDataSource(BaseDataSource):
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(url, headers=headers, timeout=5)
+            response = self._request('GET', url, headers=headers, timeout=5)
             return response.ok
-            
+        
         except Exception as e:
             logger.error(f"Erro ao testar conexão HubSpot: {str(e)}")
             return False
@@ -293,7 +612,7 @@ class HubSpotDataSource(BaseDataSource):
         }
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._request('GET', url, headers=headers)
             response.raise_for_status()
             
             data = response.json()
@@ -314,7 +633,7 @@ class HubSpotDataSource(BaseDataSource):
                 })
             
             return properties
-            
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao buscar propriedades do HubSpot: {str(e)}")
             raise Exception(f'Erro ao buscar propriedades do HubSpot: {str(e)}')
@@ -1,5 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import BinaryIO, Dict, Any, Optional, Union
 import requests
+from app.utils import http_client
+from app.utils.rate_limiter import get_hubspot_rate_limiter, hubspot_rate_limit_key
 import logging
 import time
 from .hubspot import HubSpotDataSource
@@ -33,13 +35,19 @@ class HubSpotAttachmentService:
                 raise Exception('Erro ao descriptografar credenciais do HubSpot')
         
         self.access_token = credentials.get('access_token') if credentials else None
+        self.portal_id = connection.config.get('portal_id') if connection.config else None
         
         if not self.access_token:
             raise Exception('HubSpot access token não configurado')
     
+    def _request(self, method: str, url: str, **kwargs):
+        """Chamada à API do HubSpot respeitando o rate limit do portal"""
+        get_hubspot_rate_limiter().acquire(hubspot_rate_limit_key(self.portal_id, self.access_token))
+        return http_client.request(method, url, **kwargs)
+    
     def upload_file(
         self, 
-        file_bytes: bytes, 
+        file_bytes: Union[bytes, BinaryIO], 
         filename: str, 
         mime_type: str = 'application/pdf',
         folder_path: Optional[str] = None,
@@ -49,7 +57,8 @@ class HubSpotAttachmentService:
         Faz upload de um arquivo para o HubSpot.
         
         Args:
-            file_bytes: Conteúdo do arquivo em bytes
+            file_bytes: Conteúdo do arquivo (bytes ou arquivo binário, ex:
+                DocumentArtifact.open())
             filename: Nome do arquivo
             mime_type: Tipo MIME do arquivo (default: application/pdf)
             folder_path: Caminho da pasta no HubSpot (opcional)
@@ -77,7 +86,7 @@ class HubSpotAttachmentService:
             data['folderPath'] = folder_path
         
         try:
-            response = requests.post(url, headers=headers, files=files, data=data)
+            response = self._request('POST', url, headers=headers, files=files, data=data)
             response.raise_for_status()
             
             result = response.json()
@@ -145,7 +154,7 @@ class HubSpotAttachmentService:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self._request('POST', url, headers=headers, json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -217,7 +226,7 @@ class HubSpotAttachmentService:
         }
         
         try:
-            response = requests.patch(url, headers=headers, json=payload)
+            response = self._request('PATCH', url, headers=headers, json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -0,0 +1,283 @@
+"""
+Projeção das propriedades do HubSpot usadas por um workflow.
+
+Em vez das listas fixas de _get_default_properties, o trigger busca só os campos
+que o workflow realmente usa:
+- tags dos templates (Template.detected_tags), respeitando os field mappings
+- source_field dos field mappings (do workflow e dos nodes)
+- tags nos textos de configuração dos nodes (nome do arquivo, assunto/corpo de
+  email, mensagem de aprovação...)
+- source_fields e placeholders dos prompts dos AI mappings
+
+Caminhos com ponto resolvem objetos associados: "company.name",
+"associations.companies.name" e "associations.company.name" pedem a propriedade
+name das companies associadas. "deal.amount" num workflow de deals é a própria
+propriedade amount.
+
+A projeção é cacheada por workflow e tipo de objeto, e vale enquanto
+Workflow.updated_at (atualizado quando nodes/mappings mudam) e a versão dos
+templates usados não mudarem.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TAG_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
+PROPERTY_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+
+# Tipos de objeto CRM (plural -> singular)
+OBJECT_TYPES = {
+    'contacts': 'contact',
+    'companies': 'company',
+    'deals': 'deal',
+    'tickets': 'ticket',
+    'quotes': 'quote',
+    'line_items': 'line_item'
+}
+
+# Campos adicionados pelo gerador, que não existem no HubSpot
+META_FIELDS = {'id', 'date', 'timestamp', 'object_type'}
+
+# Nodes que usam source_data inteiro: sem projeção, busca as propriedades padrão
+FULL_DATA_NODE_TYPES = {'webhook'}
+
+DOCUMENT_NODE_TYPES = {'google-docs', 'google-slides', 'microsoft-word', 'microsoft-powerpoint'}
+
+MAX_CACHED_PROJECTIONS = 1024
+
+
+@dataclass(frozen=True)
+class PropertyProjection:
+    """Propriedades do objeto principal e das associações a buscar"""
+    properties: Tuple[str, ...] = ()
+    association_properties: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def normalize_object_type(object_type: str) -> str:
+    """Nome no plural usado pelas APIs CRM (deal -> deals)"""
+    # A resposta v3 usa 'line items' como chave das associações
+    object_type = (object_type or '').lower().replace(' ', '_')
+    for plural, singular in OBJECT_TYPES.items():
+        if object_type == singular:
+            return plural
+    return object_type
+
+
+def build_property_projection(object_type: str, field_paths: Iterable[str]) -> PropertyProjection:
+    """
+    Calcula as propriedades a buscar a partir dos caminhos usados nos templates.
+    
+    Args:
+        object_type: Tipo do objeto do trigger (deal, contacts...)
+        field_paths: Caminhos em dot notation (ex: "dealname", "company.name")
+    
+    Returns:
+        PropertyProjection
+    """
+    primary_type = normalize_object_type(object_type)
+    properties: Set[str] = set()
+    associations: Dict[str, Set[str]] = {}
+    
+    for path in field_paths:
+        parts = [part.strip() for part in (path or '').split('.') if part.strip()]
+        if parts and parts[0] == 'associations':
+            parts = parts[1:]
+            # "associations.companies" sem propriedade: só os IDs
+            if len(parts) == 1 and normalize_object_type(parts[0]) in OBJECT_TYPES:
+                associations.setdefault(normalize_object_type(parts[0]), set())
+                continue
+        if not parts:
+            continue
+        
+        head = normalize_object_type(parts[0])
+        if len(parts) > 1 and head in OBJECT_TYPES:
+            # Índice de lista (ex: line_items.0.name)
+            rest = parts[2:] if parts[1].isdigit() else parts[1:]
+            prop = rest[0] if rest else None
+            if head == primary_type:
+                _add_property(properties, prop)
+            else:
+                _add_property(associations.setdefault(head, set()), prop)
+        else:
+            _add_property(properties, parts[0])
+    
+    return PropertyProjection(
+        properties=tuple(sorted(properties)),
+        association_properties={assoc: sorted(props) for assoc, props in sorted(associations.items())}
+    )
+
+
+def _add_property(target: Set[str], prop: Optional[str]) -> None:
+    if prop and prop not in META_FIELDS and PROPERTY_NAME_PATTERN.match(prop):
+        target.add(prop)
+
+
+class _CacheEntry:
+    __slots__ = ('workflow_version', 'template_versions', 'projection')
+    
+    def __init__(self, workflow_version, template_versions, projection):
+        self.workflow_version = workflow_version
+        self.template_versions = template_versions
+        self.projection = projection
+
+
+_cache: 'OrderedDict[Tuple[str, str], _CacheEntry]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_workflow_property_projection(workflow, object_type: str) -> Optional[PropertyProjection]:
+    """
+    Retorna a projeção de propriedades do workflow (cacheada por versão).
+    
+    Args:
+        workflow: Workflow
+        object_type: Tipo do objeto do trigger
+    
+    Returns:
+        PropertyProjection, ou None quando o workflow usa os dados inteiros
+        (ex: node de webhook) ou algum template ainda não tem tags detectadas.
+        Nesse caso o chamador busca as propriedades padrão.
+    """
+    key = (str(workflow.id), normalize_object_type(object_type))
+    
+    with _cache_lock:
+        entry = _cache.get(key)
+    
+    if entry is not None and entry.workflow_version == workflow.updated_at:
+        if _load_template_versions(entry.template_versions.keys()) == entry.template_versions:
+            with _cache_lock:
+                if key in _cache:
+                    _cache.move_to_end(key)
+            return entry.projection
+    
+    try:
+        collected = _collect_workflow_fields(workflow)
+    except Exception as e:
+        logger.warning(f"Não foi possível calcular projeção de propriedades do workflow {workflow.id}: {str(e)}")
+        return None
+    
+    field_paths, templates = collected
+    template_versions = {str(template.id): _template_version(template) for template in templates}
+    projection = None
+    if field_paths is not None:
+        projection = build_property_projection(object_type, field_paths)
+        logger.info(
+            f"Projeção HubSpot do workflow {workflow.id}: {len(projection.properties)} propriedades, "
+            f"associações {list(projection.association_properties)}"
+        )
+    
+    with _cache_lock:
+        _cache[key] = _CacheEntry(workflow.updated_at, template_versions, projection)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_PROJECTIONS:
+            _cache.popitem(last=False)
+    
+    return projection
+
+
+def clear_projection_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _collect_workflow_fields(workflow) -> Tuple[Optional[Set[str]], list]:
+    """
+    Reúne os caminhos de campos usados pelo workflow.
+    
+    Returns:
+        (caminhos, templates consultados). Caminhos é None se a projeção não é possível
+    """
+    from app.models import Template
+    
+    field_paths: Set[str] = set()
+    templates = []
+    
+    # Nome do documento gerado e ações pós-geração também usam tags do objeto
+    field_paths.update(_extract_tags(workflow.output_name_template))
+    field_paths.update(_extract_tags(workflow.post_actions))
+    
+    # Workflow legado: template e field mappings no próprio workflow
+    legacy_mappings = {}
+    for mapping in workflow.field_mappings:
+        if mapping.source_field:
+            legacy_mappings[mapping.template_tag] = mapping.source_field
+            field_paths.add(mapping.source_field)
+    
+    if workflow.template_id and workflow.template is not None:
+        templates.append(workflow.template)
+        if not _add_template_tags(field_paths, workflow.template, legacy_mappings):
+            return None, templates
+    
+    for node in workflow.nodes:
+        if node.node_type in FULL_DATA_NODE_TYPES:
+            return None, templates
+        
+        config = node.config or {}
+        mappings = {}
+        for mapping in config.get('field_mappings') or []:
+            source_field = mapping.get('source_field')
+            if source_field:
+                mappings[mapping.get('template_tag')] = source_field
+                field_paths.add(source_field)
+        
+        field_paths.update(_extract_tags(config))
+        
+        if node.node_type in DOCUMENT_NODE_TYPES and config.get('template_id'):
+            template = Template.query.get(config['template_id'])
+            if template is None:
+                return None, templates
+            templates.append(template)
+            if not _add_template_tags(field_paths, template, mappings):
+                return None, templates
+    
+    for ai_mapping in workflow.ai_mappings:
+        field_paths.update(ai_mapping.source_fields or [])
+        field_paths.update(_extract_tags(ai_mapping.prompt_template))
+    
+    return field_paths, templates
+
+
+def _add_template_tags(field_paths: Set[str], template, mappings: Dict[str, str]) -> bool:
+    if template.detected_tags is None:
+        return False
+    for tag in template.detected_tags:
+        if tag.startswith('ai:'):
+            continue
+        field_paths.add(mappings.get(tag, tag))
+    return True
+
+
+def _extract_tags(value: Any) -> Set[str]:
+    """Tags {{...}} em qualquer texto da configuração (recursivo)"""
+    tags = set()
+    if isinstance(value, str):
+        tags.update(tag.strip() for tag in TAG_PATTERN.findall(value) if not tag.strip().startswith('ai:'))
+    elif isinstance(value, dict):
+        for item in value.values():
+            tags.update(_extract_tags(item))
+    elif isinstance(value, list):
+        for item in value:
+            tags.update(_extract_tags(item))
+    return tags
+
+
+def _template_version(template) -> Tuple[Any, Any]:
+    return (template.version, template.updated_at)
+
+
+def _load_template_versions(template_ids: Iterable[str]) -> Dict[str, Tuple[Any, Any]]:
+    template_ids = list(template_ids)
+    if not template_ids:
+        return {}
+    
+    from app.database import db
+    from app.models import Template
+    rows = db.session.query(Template.id, Template.version, Template.updated_at).filter(
+        Template.id.in_(template_ids)
+    ).all()
+    return {str(row.id): (row.version, row.updated_at) for row in rows}
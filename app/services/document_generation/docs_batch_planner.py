@@ -0,0 +1,158 @@
+"""
+Planejamento dos batchUpdate de substituição de tags (Google Docs).
+
+Em vez de mandar um replaceAllText por tag num único batchUpdate, o planner:
+- remove tags repetidas (depois da primeira substituição a tag não existe
+  mais no documento, as seguintes não fariam nada)
+- descarta substituições sem efeito (valor igual à própria tag)
+- divide as requisições em lotes limitados por quantidade e por tamanho do
+  JSON, para templates com centenas de tags
+
+Os lotes são executados em ordem (a ordem das substituições é mantida), com
+retry e backoff em erros de quota/indisponibilidade, e o tempo de cada lote é
+retornado.
+
+Uso:
+    plan = plan_replace_all_text([('{{nome}}', 'Maria'), ...])
+    timings = run_batch_plan(lambda requests: docs.documents().batchUpdate(...).execute(), plan)
+"""
+import json
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUESTS_PER_BATCH = 500
+MAX_BATCH_BYTES = 1024 * 1024
+MAX_RETRIES = 5
+INITIAL_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 32.0
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# Erros de quota do Google vêm como 403 com estes motivos
+QUOTA_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded')
+
+
+class BatchUpdatePlan(NamedTuple):
+    """Lotes de requisições, na ordem em que devem ser executados"""
+    chunks: List[List[Dict[str, Any]]]
+    skipped: int
+
+
+def plan_replace_all_text(
+    replacements: Iterable[Tuple[str, str]],
+    max_requests: int = MAX_REQUESTS_PER_BATCH,
+    max_bytes: int = MAX_BATCH_BYTES
+) -> BatchUpdatePlan:
+    """
+    Monta os lotes de replaceAllText.
+    
+    Args:
+        replacements: Pares (texto da tag com chaves, valor), na ordem de aplicação
+        max_requests: Máximo de requisições por batchUpdate
+        max_bytes: Tamanho máximo (JSON) das requisições de um batchUpdate; uma
+            requisição maior que o limite vai sozinha num lote
+    
+    Returns:
+        BatchUpdatePlan com os lotes e a quantidade de substituições descartadas
+    """
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_bytes = 0
+    seen = set()
+    skipped = 0
+    
+    for placeholder, value in replacements:
+        if placeholder in seen or value == placeholder:
+            skipped += 1
+            continue
+        seen.add(placeholder)
+        
+        request = {
+            'replaceAllText': {
+                'containsText': {
+                    'text': placeholder,
+                    'matchCase': True
+                },
+                'replaceText': value
+            }
+        }
+        size = len(json.dumps(request, ensure_ascii=False).encode('utf-8'))
+        
+        if current and (len(current) >= max_requests or current_bytes + size > max_bytes):
+            chunks.append(current)
+            current = []
+            current_bytes = 0
+        
+        current.append(request)
+        current_bytes += size
+    
+    if current:
+        chunks.append(current)
+    
+    return BatchUpdatePlan(chunks, skipped)
+
+
+def run_batch_plan(
+    execute: Callable[[List[Dict[str, Any]]], Any],
+    plan: BatchUpdatePlan,
+    max_retries: int = MAX_RETRIES
+) -> List[Dict[str, Any]]:
+    """
+    Executa os lotes em ordem.
+    
+    Args:
+        execute: Função que envia um batchUpdate com as requisições do lote
+        plan: Plano (ver plan_replace_all_text)
+        max_retries: Tentativas extras por lote em erros de quota/5xx
+    
+    Returns:
+        Lista por lote: {'chunk', 'requests', 'time_ms', 'retries'}
+    
+    Raises:
+        HttpError: Erro não recuperável ou tentativas esgotadas
+    """
+    timings = []
+    
+    for index, chunk in enumerate(plan.chunks):
+        start_time = time.monotonic()
+        retries = 0
+        
+        while True:
+            try:
+                execute(chunk)
+                break
+            except HttpError as e:
+                if retries >= max_retries or not _is_retryable(e):
+                    raise
+                delay = min(MAX_BACKOFF_SECONDS, INITIAL_BACKOFF_SECONDS * (2 ** retries))
+                delay *= random.uniform(0.5, 1.0)
+                retries += 1
+                logger.warning(
+                    f'batchUpdate (lote {index + 1}/{len(plan.chunks)}) retornou {e.resp.status}, '
+                    f'nova tentativa em {delay:.1f}s'
+                )
+                time.sleep(delay)
+        
+        timings.append({
+            'chunk': index,
+            'requests': len(chunk),
+            'time_ms': round((time.monotonic() - start_time) * 1000),
+            'retries': retries
+        })
+    
+    return timings
+
+
+def _is_retryable(error: HttpError) -> bool:
+    status = getattr(error.resp, 'status', None)
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403:
+        content = error.content.decode('utf-8', 'replace') if isinstance(error.content, bytes) else str(error.content)
+        return any(reason in content for reason in QUOTA_REASONS)
+    return False
@@ -0,0 +1,264 @@
+"""
+Pipeline compilado de field mappings.
+
+Os mappings de um workflow (WorkflowFieldMapping ou field_mappings do config de
+um node) viram uma lista de passos (tag, caminho já separado, transformação já
+configurada, valor padrão). Aplicar o pipeline a um objeto é uma busca e uma
+chamada por tag, sem reinterpretar transform_type/transform_config a cada tag.
+
+O pipeline é cacheado por workflow (e node) e vale enquanto Workflow.updated_at
+(atualizado quando nodes/mappings mudam) não mudar.
+
+Uso:
+    pipeline = get_workflow_mapping_pipeline(workflow)
+    values = pipeline.apply(data, tags)          # {tag: texto}
+    rows = pipeline.apply_batch(objects, tags)   # lote: uma coluna por tag
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from .tag_processor import _lookup, _split_path
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_PIPELINES = 1024
+
+
+class MappingStep(NamedTuple):
+    """Um passo do pipeline: de onde vem o valor da tag e como formatá-lo"""
+    tag: str
+    path: Tuple[str, ...]
+    transform: Optional[Callable[[Any], str]]
+    default: Optional[str]
+
+
+def compile_transform(transform_type: Optional[str], config: Dict = None) -> Optional[Callable[[Any], str]]:
+    """
+    Retorna a função de formatação para o tipo de transformação, com a
+    configuração (formato, casas decimais, símbolo) já resolvida.
+    
+    Transform types: date_format, number_format, currency, uppercase,
+    lowercase, capitalize. Tipo vazio/desconhecido retorna None (str(valor)).
+    
+    Args:
+        transform_type: Tipo da transformação
+        config: transform_config do mapping
+    
+    Returns:
+        Função valor -> texto (valor nunca é None), ou None
+    """
+    config = config or {}
+    
+    if transform_type == 'uppercase':
+        return lambda value: str(value).upper()
+    
+    if transform_type == 'lowercase':
+        return lambda value: str(value).lower()
+    
+    if transform_type == 'capitalize':
+        return lambda value: str(value).capitalize()
+    
+    if transform_type == 'date_format':
+        date_format = config.get('format', '%d/%m/%Y')
+        
+        def format_date(value):
+            if isinstance(value, str):
+                # Tenta parsear ISO format
+                try:
+                    return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime(date_format)
+                except ValueError:
+                    return value
+            if isinstance(value, datetime):
+                return value.strftime(date_format)
+            return str(value)
+        
+        return format_date
+    
+    if transform_type in ('number_format', 'currency'):
+        spec = f",.{config.get('decimals', 2)}f"
+        prefix = f"{config.get('symbol', 'R$')} " if transform_type == 'currency' else ''
+        
+        def format_number(value):
+            try:
+                return prefix + format(float(value), spec)
+            except (TypeError, ValueError):
+                return str(value)
+        
+        return format_number
+    
+    return None
+
+
+class FieldMappingPipeline:
+    """Passos de mapeamento por tag; tags sem mapping usam o próprio nome como caminho"""
+    
+    __slots__ = ('steps', '_steps_by_tag')
+    
+    def __init__(self, steps: Iterable[MappingStep] = ()):
+        self.steps: Tuple[MappingStep, ...] = tuple(steps)
+        self._steps_by_tag = {step.tag.strip(): step for step in self.steps}
+    
+    def step_for(self, tag: str) -> MappingStep:
+        """
+        Passo de uma tag como aparece no template: espaços em volta do nome
+        ({{ dealname }}) são ignorados, no mapping e no caminho sem mapping.
+        """
+        key = tag.strip()
+        step = self._steps_by_tag.get(key)
+        return step if step is not None else _plain_step(key)
+    
+    def value(self, data: Dict[str, Any], tag: str) -> str:
+        """Texto de uma tag para um objeto"""
+        step = self.step_for(tag)
+        return _format(step, _lookup(data, step.path))
+    
+    def apply(self, data: Dict[str, Any], tags: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Calcula o texto de cada tag para um objeto.
+        
+        Args:
+            data: Dados do objeto
+            tags: Tags a resolver (padrão: as tags com mapping)
+        
+        Returns:
+            Dict {tag: texto}, com as tags como foram passadas
+        """
+        return {tag: _format(step, _lookup(data, step.path)) for tag, step in self._tagged_steps(tags)}
+    
+    def apply_batch(
+        self,
+        rows: List[Dict[str, Any]],
+        tags: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Calcula as tags de vários objetos, uma coluna (tag) por vez.
+        
+        Args:
+            rows: Dados de cada objeto
+            tags: Tags a resolver (padrão: as tags com mapping)
+        
+        Returns:
+            Lista {tag: texto} na ordem de rows
+        """
+        results: List[Dict[str, str]] = [{} for _ in rows]
+        
+        for tag, step in self._tagged_steps(tags):
+            path = step.path
+            column = _format_column(step, [_lookup(row, path) for row in rows])
+            for result, value in zip(results, column):
+                result[tag] = value
+        
+        return results
+    
+    def _tagged_steps(self, tags: Optional[Iterable[str]]) -> List[Tuple[str, MappingStep]]:
+        if tags is None:
+            return [(step.tag, step) for step in self.steps]
+        return [(tag, self.step_for(tag)) for tag in tags]
+
+
+def compile_field_mappings(mappings: Any) -> FieldMappingPipeline:
+    """
+    Compila mappings no pipeline.
+    
+    Args:
+        mappings: Dict {tag: campo}, ou lista de WorkflowFieldMapping / dicts
+            com template_tag, source_field, transform_type, transform_config e
+            default_value
+    
+    Returns:
+        FieldMappingPipeline
+    """
+    if isinstance(mappings, FieldMappingPipeline):
+        return mappings
+    
+    if not mappings:
+        return FieldMappingPipeline()
+    
+    if isinstance(mappings, dict):
+        return FieldMappingPipeline(
+            MappingStep(tag, _split_path(field), None, None)
+            for tag, field in mappings.items() if tag and field
+        )
+    
+    steps = []
+    for mapping in mappings:
+        get = mapping.get if isinstance(mapping, dict) else (lambda name, m=mapping: getattr(m, name, None))
+        tag = get('template_tag')
+        source_field = get('source_field')
+        if not tag or not source_field:
+            continue
+        steps.append(MappingStep(
+            tag=tag,
+            path=_split_path(source_field),
+            transform=compile_transform(get('transform_type'), get('transform_config')),
+            default=get('default_value')
+        ))
+    
+    return FieldMappingPipeline(steps)
+
+
+_cache: 'OrderedDict[Tuple[str, Optional[str]], Tuple[Any, FieldMappingPipeline]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_workflow_mapping_pipeline(workflow, node=None) -> FieldMappingPipeline:
+    """
+    Retorna o pipeline dos mappings do workflow ou do node (cacheado por versão).
+    
+    Args:
+        workflow: Workflow
+        node: WorkflowNode (usa config['field_mappings']); None usa
+            workflow.field_mappings
+    
+    Returns:
+        FieldMappingPipeline
+    """
+    key = (str(workflow.id), str(node.id) if node is not None else None)
+    
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == workflow.updated_at:
+            _cache.move_to_end(key)
+            return entry[1]
+    
+    if node is not None:
+        mappings = (node.config or {}).get('field_mappings') or []
+    else:
+        mappings = list(workflow.field_mappings)
+    pipeline = compile_field_mappings(mappings)
+    
+    with _cache_lock:
+        _cache[key] = (workflow.updated_at, pipeline)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_PIPELINES:
+            _cache.popitem(last=False)
+    
+    return pipeline
+
+
+def clear_pipeline_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+@lru_cache(maxsize=4096)
+def _plain_step(tag: str) -> MappingStep:
+    return MappingStep(tag, _split_path(tag), None, None)
+
+
+def _format(step: MappingStep, value: Any) -> str:
+    if value is None or value == '':
+        return step.default if step.default is not None else ''
+    if step.transform is None:
+        return str(value)
+    return step.transform(value)
+
+
+def _format_column(step: MappingStep, values: List[Any]) -> List[str]:
+    transform = step.transform or str
+    default = step.default if step.default is not None else ''
+    return [default if value is None or value == '' else transform(value) for value in values]
@@ -1,6 +1,9 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Callable, Optional, List, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import partial
 import logging
+import threading
 import time
 
 from app.database import db
@@ -10,8 +13,13 @@ from app.models import (
     AIGenerationMapping
 )
 from app.utils.encryption import decrypt_credentials
+from app.utils.chunked_upload import upload_to_drive
+from app.utils.document_artifact import DocumentArtifact
 from .google_docs import GoogleDocsService
 from .tag_processor import TagProcessor
+from .field_mapping_pipeline import get_workflow_mapping_pipeline
+from .template_cache import get_template_tag_index
+from .post_generation import PostGenerationSinks
 
 logger = logging.getLogger(__name__)
 ai_logger = logging.getLogger('docugen.ai')
@@ -21,13 +29,24 @@ class AIGenerationMetrics:
     
     def __init__(self):
         self.details: List[Dict] = []
+        # Soma dos tempos de cada tag (custo de LLM) e tempo de relógio do lote
         self.total_time_ms = 0
+        self.wall_time_ms = 0
         self.total_tokens = 0
         self.total_cost = 0.0
         self.successful = 0
         self.failed = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
     
-    def add_success(self, mapping: 'AIGenerationMapping', time_ms: float, tokens: int = 0, cost: float = 0.0):
+    def add_success(
+        self,
+        mapping: 'AIGenerationMapping',
+        time_ms: float,
+        tokens: int = 0,
+        cost: float = 0.0,
+        cached: bool = False
+    ):
         self.details.append({
             'tag': mapping.ai_tag,
             'provider': mapping.provider,
@@ -35,7 +54,8 @@ class AIGenerationMetrics:
             'time_ms': round(time_ms),
             'tokens': tokens,
             'cost_usd': cost,
-            'status': 'success'
+            'status': 'success',
+            'cached': cached
         })
         self.total_time_ms += time_ms
         self.total_tokens += tokens
@@ -54,14 +74,26 @@ class AIGenerationMetrics:
         self.total_time_ms += time_ms
         self.failed += 1
     
+    def add_wall_time(self, time_ms: float):
+        self.wall_time_ms += time_ms
+    
+    def add_cache_lookup(self, hit: bool):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+    
     def to_dict(self) -> Dict:
         return {
             'total_tags': len(self.details),
             'successful': self.successful,
             'failed': self.failed,
             'total_time_ms': round(self.total_time_ms),
+            'wall_time_ms': round(self.wall_time_ms),
             'total_tokens': self.total_tokens,
             'estimated_cost_usd': round(self.total_cost, 6),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
             'details': self.details
         }
 
@@ -91,7 +123,8 @@ class DocumentGenerator:
         source_data: Dict[str, Any],
         source_object_id: str,
         user_id: str = None,
-        organization_id: Any = None
+        organization_id: Any = None,
+        extra_sinks: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None
     ) -> GeneratedDocument:
         """
         Gera um documento a partir de um workflow configurado.
@@ -102,6 +135,9 @@ class DocumentGenerator:
             source_object_id: ID do objeto na fonte
             user_id: ID do usuário que está gerando
             organization_id: ID da organização (opcional, usa workflow.organization_id se não fornecido)
+            extra_sinks: Ações pós-geração adicionais {nome: função(documento)}, executadas
+                em paralelo com o upload do PDF e o anexo HubSpot. documento tem
+                document_name, document_url e google_doc_id
         
         Returns:
             GeneratedDocument criado
@@ -134,19 +170,15 @@ class DocumentGenerator:
             # Normalizar dados do HubSpot (move properties para nível raiz)
             source_data = self._normalize_hubspot_data(source_data)
             
-            # Buscar mapeamentos de campos
-            mappings = {
-                m.template_tag: m.source_field 
-                for m in workflow.field_mappings
-            }
+            # Mapeamentos de campos compilados (transformações e valores padrão)
+            mappings = get_workflow_mapping_pipeline(workflow)
             
             # Processar tags AI antes de copiar o template
             ai_metrics = AIGenerationMetrics()
             ai_replacements = {}
             
-            # Buscar tags AI do template (precisamos do conteúdo primeiro)
-            # Por enquanto, vamos processar após copiar o template
-            # O ideal seria ter cache do conteúdo do template
+            # Índice de tags do template (cacheado pelo modifiedTime do Drive)
+            tag_index = get_template_tag_index(template, self.google_docs)
             
             # Gerar nome do documento
             doc_name = self._generate_document_name(
@@ -176,7 +208,8 @@ class DocumentGenerator:
             self.google_docs.replace_tags_in_document(
                 document_id=new_doc['id'],
                 data=combined_data,
-                mappings=mappings
+                mappings=mappings,
+                tag_index=tag_index
             )
             
             # Usar organization_id fornecido ou do workflow
@@ -201,28 +234,44 @@ class DocumentGenerator:
                 generated_at=datetime.utcnow()
             )
             
-            # Gerar PDF se configurado
-            pdf_bytes = None
-            if workflow.create_pdf:
-                pdf_bytes = self.google_docs.export_as_pdf(new_doc['id'])
-                pdf_result = self._upload_pdf(
-                    pdf_bytes, 
-                    f"{doc_name}.pdf",
-                    workflow.output_folder_id
-                )
+            # Ações pós-geração em paralelo, com prazo compartilhado
+            pdf = None
+            sinks = PostGenerationSinks()
+            try:
+                if workflow.create_pdf:
+                    # PDF em disco se for grande, enviado a cada destino sem cópias
+                    pdf = self.google_docs.export_pdf_artifact(new_doc['id'], f"{doc_name}.pdf")
+                    sinks.add('drive_pdf', partial(
+                        self._upload_pdf, pdf, f"{doc_name}.pdf", workflow.output_folder_id
+                    ))
+                
+                hubspot_sink = self._hubspot_attachment_sink(workflow, source_object_id, pdf, doc_name)
+                if hubspot_sink:
+                    sinks.add('hubspot_attachment', hubspot_sink)
+                
+                document_info = {
+                    'document_name': doc_name,
+                    'document_url': new_doc['url'],
+                    'google_doc_id': new_doc['id']
+                }
+                for name, sink in (extra_sinks or {}).items():
+                    sinks.add(name, partial(sink, document_info))
+                
+                post_generation = sinks.run()
+            finally:
+                # Com ação ainda em andamento (timeout), o PDF é liberado quando ela terminar
+                if pdf is not None and not sinks.pending:
+                    pdf.close()
+            
+            pdf_result = sinks.results.get('drive_pdf')
+            if pdf_result:
                 generated_doc.pdf_file_id = pdf_result['id']
                 generated_doc.pdf_url = pdf_result['url']
             
-            db.session.add(generated_doc)
+            for field, value in (sinks.results.get('hubspot_attachment') or {}).items():
+                setattr(generated_doc, field, value)
             
-            # Processar anexo HubSpot se configurado
-            self._process_hubspot_attachment(
-                workflow=workflow,
-                generated_doc=generated_doc,
-                source_object_id=source_object_id,
-                pdf_bytes=pdf_bytes,
-                doc_name=doc_name
-            )
+            db.session.add(generated_doc)
             
             # Incrementar contador da organização
             org.increment_document_count()
@@ -238,14 +287,19 @@ class DocumentGenerator:
             if ai_metrics.details:
                 execution.ai_metrics = ai_metrics.to_dict()
             
+            if post_generation:
+                execution.post_generation = post_generation
+            
             db.session.commit()
             
             logger.info(f"Documento gerado com sucesso: {generated_doc.id}")
             return generated_doc
-            
+        
         except Exception as e:
             logger.error(f"Erro ao gerar documento: {str(e)}")
             
+            # Descarta o que ficou pendente na geração (ex: índice de tags do template)
+            db.session.rollback()
             if execution:
                 execution.status = 'failed'
                 execution.error_message = str(e)
@@ -332,12 +386,8 @@ class DocumentGenerator:
         
         return TagProcessor.replace_tags(template, data_with_meta)
     
-    def _upload_pdf(self, pdf_bytes: bytes, name: str, folder_id: str) -> Dict:
-        """Upload do PDF para o Google Drive"""
-        from googleapiclient.http import MediaInMemoryUpload
-        
-        media = MediaInMemoryUpload(pdf_bytes, mimetype='application/pdf')
-        
+    def _upload_pdf(self, pdf: Union[bytes, DocumentArtifact], name: str, folder_id: str) -> Dict:
+        """Upload do PDF (bytes ou DocumentArtifact) para o Google Drive (resumable, em partes)"""
         file_metadata = {
             'name': name,
             'mimeType': 'application/pdf'
@@ -346,11 +396,12 @@ class DocumentGenerator:
         if folder_id:
             file_metadata['parents'] = [folder_id]
         
-        file = self.google_docs.drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id, webViewLink'
-        ).execute()
+        file = upload_to_drive(
+            self.google_docs.drive_service,
+            pdf.open() if isinstance(pdf, DocumentArtifact) else pdf,
+            file_metadata,
+            mimetype='application/pdf'
+        )
         
         return {
             'id': file['id'],
@@ -366,6 +417,11 @@ class DocumentGenerator:
         """
         Processa todas as tags AI do workflow.
         
+        As chamadas ao LLM são feitas em paralelo, limitadas por organização e por
+        provedor (ver app.services.ai.concurrency). Erros críticos (quota, API key)
+        cancelam as tags que ainda não começaram e são propagados. Mapeamentos com
+        cache_enabled reaproveitam respostas do cache (ver app.services.ai.cache).
+        
         Args:
             workflow: Workflow com mapeamentos de IA
             source_data: Dados da fonte para montar prompts
@@ -374,7 +430,9 @@ class DocumentGenerator:
         Returns:
             Dicionário com {ai:tag_name: texto_gerado}
         """
-        from app.services.ai import LLMService, AIGenerationError, AITimeoutError, AIQuotaExceededError, AIInvalidKeyError
+        from app.services.ai import AIGenerationError, AITimeoutError, AIQuotaExceededError, AIInvalidKeyError
+        from app.services.ai.cache import build_cache_key, get_response_cache
+        from app.services.ai.concurrency import get_concurrency_limiter
         from app.services.ai.utils import get_model_string
         
         replacements = {}
@@ -386,13 +444,14 @@ class DocumentGenerator:
             return replacements
         
         ai_logger.info(f"[AI] Processando {len(ai_mappings)} tags AI para workflow {workflow.id}")
+        wall_start = time.time()
         
+        # Montar as requisições na thread atual (acessa banco: conexão e credenciais)
+        requests_to_run = []
+        outcomes = {}
+        cache_keys = {}
         for mapping in ai_mappings:
-            start_time = time.time()
-            tag_key = f"ai:{mapping.ai_tag}"
-            
             try:
-                # Buscar API key da conexão
                 api_key = self._get_ai_api_key(mapping)
                 if not api_key:
                     raise AIInvalidKeyError(
@@ -401,74 +460,140 @@ class DocumentGenerator:
                         mapping.model
                     )
                 
-                # Montar prompt
                 prompt = TagProcessor.build_ai_prompt(
                     prompt_template=mapping.prompt_template,
                     source_data=source_data,
                     source_fields=mapping.source_fields
                 )
                 
-                # Gerar texto
-                model_string = get_model_string(mapping.provider, mapping.model)
-                response = self.llm_service.generate_text(
-                    model=model_string,
-                    prompt=prompt,
-                    api_key=api_key,
-                    temperature=mapping.temperature or 0.7,
-                    max_tokens=mapping.max_tokens or 1000,
-                    timeout=60
-                )
+                params = {
+                    'model': get_model_string(mapping.provider, mapping.model),
+                    'prompt': prompt,
+                    'api_key': api_key,
+                    'temperature': mapping.temperature or 0.7,
+                    'max_tokens': mapping.max_tokens or 1000,
+                    'timeout': 60
+                }
+                requests_to_run.append((mapping, params))
                 
-                # Salvar resultado
-                replacements[tag_key] = response.text
-                elapsed_ms = (time.time() - start_time) * 1000
+                if mapping.cache_enabled:
+                    cache_key = build_cache_key(params['model'], prompt, params['temperature'], params['max_tokens'])
+                    cached_response = get_response_cache().get(cache_key)
+                    metrics.add_cache_lookup(hit=cached_response is not None)
+                    if cached_response is not None:
+                        outcomes[mapping.id] = (cached_response, None, 0)
+                    else:
+                        cache_keys[mapping.id] = cache_key
+            
+            except AIInvalidKeyError as e:
+                # Erro crítico - nenhuma chamada foi feita ainda
+                metrics.add_failure(mapping, str(e))
+                ai_logger.error(f"[AI] Erro crítico na tag '{mapping.ai_tag}': {e}")
+                raise
+            
+            except Exception as e:
+                metrics.add_failure(mapping, str(e))
+                replacements[f"ai:{mapping.ai_tag}"] = mapping.fallback_value or f"[Erro: {mapping.ai_tag}]"
+                ai_logger.error(f"[AI] Erro inesperado ao montar prompt da tag '{mapping.ai_tag}': {e}")
+        
+        if not requests_to_run:
+            metrics.add_wall_time((time.time() - wall_start) * 1000)
+            return replacements
+        
+        # Chamadas ao LLM apenas para o que não veio do cache
+        pending_requests = [(m, params) for m, params in requests_to_run if m.id not in outcomes]
+        limiter = get_concurrency_limiter()
+        cancel_event = threading.Event()
+        organization_id = str(workflow.organization_id)
+        llm_service = self.llm_service
+        
+        def generate(mapping: AIGenerationMapping, params: Dict[str, Any]):
+            """Executa uma chamada ao LLM numa thread do pool: (response, erro, tempo_ms)"""
+            with limiter.slot(organization_id, mapping.provider, cancel_event) as acquired:
+                if not acquired:
+                    return None, None, 0
+                start_time = time.time()
+                try:
+                    response = llm_service.generate_text(**params)
+                    return response, None, (time.time() - start_time) * 1000
+                except Exception as e:
+                    return None, e, (time.time() - start_time) * 1000
+        
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, min(len(pending_requests), limiter.max_per_organization)),
+            thread_name_prefix='ai-tag'
+        )
+        try:
+            futures = {
+                pool.submit(generate, mapping, params): mapping
+                for mapping, params in pending_requests
+            }
+            for future in as_completed(futures):
+                mapping = futures[future]
+                response, error, elapsed_ms = future.result()
+                
+                if isinstance(error, (AIQuotaExceededError, AIInvalidKeyError)):
+                    # Erros críticos - cancelar as demais tags e interromper documento
+                    cancel_event.set()
+                    metrics.add_failure(mapping, str(error), elapsed_ms)
+                    metrics.add_wall_time((time.time() - wall_start) * 1000)
+                    ai_logger.error(f"[AI] Erro crítico na tag '{mapping.ai_tag}': {error}")
+                    raise error
                 
-                # Atualizar métricas
+                outcomes[mapping.id] = (response, error, elapsed_ms)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        # Registrar resultados na ordem dos mapeamentos
+        for mapping, _ in requests_to_run:
+            response, error, elapsed_ms = outcomes[mapping.id]
+            tag_key = f"ai:{mapping.ai_tag}"
+            
+            if error is None:
+                cached = mapping.cache_enabled and mapping.id not in cache_keys
+                replacements[tag_key] = response.text
                 metrics.add_success(
                     mapping=mapping,
                     time_ms=elapsed_ms,
                     tokens=response.total_tokens,
-                    cost=response.estimated_cost_usd
+                    cost=response.estimated_cost_usd,
+                    cached=cached
                 )
                 
+                if mapping.id in cache_keys:
+                    get_response_cache().set(cache_keys[mapping.id], response, mapping.cache_ttl_seconds)
+                
                 # Atualizar contador de uso do mapping
                 mapping.increment_usage()
                 
                 ai_logger.info(
                     f"[AI] Tag '{mapping.ai_tag}' gerada - "
-                    f"tokens={response.total_tokens}, time_ms={elapsed_ms:.0f}"
+                    f"tokens={response.total_tokens}, time_ms={elapsed_ms:.0f}, cached={cached}"
                 )
-                
-            except (AIQuotaExceededError, AIInvalidKeyError) as e:
-                # Erros críticos - propagar para interromper documento
-                elapsed_ms = (time.time() - start_time) * 1000
-                metrics.add_failure(mapping, str(e), elapsed_ms)
-                ai_logger.error(f"[AI] Erro crítico na tag '{mapping.ai_tag}': {e}")
-                raise
             
-            except AITimeoutError as e:
+            elif isinstance(error, AITimeoutError):
                 # Timeout - usar fallback
-                elapsed_ms = (time.time() - start_time) * 1000
-                metrics.add_failure(mapping, str(e), elapsed_ms)
-                fallback = mapping.fallback_value or f"[Timeout: {mapping.ai_tag}]"
-                replacements[tag_key] = fallback
+                metrics.add_failure(mapping, str(error), elapsed_ms)
+                replacements[tag_key] = mapping.fallback_value or f"[Timeout: {mapping.ai_tag}]"
                 ai_logger.warning(f"[AI] Timeout na tag '{mapping.ai_tag}', usando fallback")
             
-            except AIGenerationError as e:
+            elif isinstance(error, AIGenerationError):
                 # Outros erros de IA - usar fallback
-                elapsed_ms = (time.time() - start_time) * 1000
-                metrics.add_failure(mapping, str(e), elapsed_ms)
-                fallback = mapping.fallback_value or f"[Erro: {mapping.ai_tag}]"
-                replacements[tag_key] = fallback
-                ai_logger.warning(f"[AI] Erro na tag '{mapping.ai_tag}': {e}")
+                metrics.add_failure(mapping, str(error), elapsed_ms)
+                replacements[tag_key] = mapping.fallback_value or f"[Erro: {mapping.ai_tag}]"
+                ai_logger.warning(f"[AI] Erro na tag '{mapping.ai_tag}': {error}")
             
-            except Exception as e:
+            else:
                 # Erro inesperado - usar fallback
-                elapsed_ms = (time.time() - start_time) * 1000
-                metrics.add_failure(mapping, str(e), elapsed_ms)
-                fallback = mapping.fallback_value or f"[Erro: {mapping.ai_tag}]"
-                replacements[tag_key] = fallback
-                ai_logger.error(f"[AI] Erro inesperado na tag '{mapping.ai_tag}': {e}")
+                metrics.add_failure(mapping, str(error), elapsed_ms)
+                replacements[tag_key] = mapping.fallback_value or f"[Erro: {mapping.ai_tag}]"
+                ai_logger.error(f"[AI] Erro inesperado na tag '{mapping.ai_tag}': {error}")
+        
+        metrics.add_wall_time((time.time() - wall_start) * 1000)
+        ai_logger.info(
+            f"[AI] {len(requests_to_run)} tags processadas - "
+            f"wall_time_ms={metrics.wall_time_ms:.0f}, summed_time_ms={metrics.total_time_ms:.0f}"
+        )
         
         return replacements
     
@@ -508,62 +633,71 @@ class DocumentGenerator:
         
         return None
     
-    def _process_hubspot_attachment(
+    def _hubspot_attachment_sink(
         self,
         workflow: Workflow,
-        generated_doc: GeneratedDocument,
         source_object_id: str,
-        pdf_bytes: Optional[bytes],
+        pdf: Optional[DocumentArtifact],
         doc_name: str
-    ) -> None:
+    ) -> Optional[Callable[[], Dict[str, Any]]]:
         """
-        Processa anexo do documento no HubSpot se configurado no workflow.
+        Monta a ação de anexo do documento no HubSpot, se configurada no workflow.
+        
+        As validações e a conexão são resolvidas aqui (acessam o banco); a ação
+        retornada só faz chamadas ao HubSpot e pode rodar em outra thread.
         
         Args:
             workflow: Workflow com configurações
-            generated_doc: Documento gerado
             source_object_id: ID do objeto na fonte
-            pdf_bytes: Bytes do PDF (None se não foi gerado)
+            pdf: PDF gerado (None se não foi gerado)
             doc_name: Nome do documento
+        
+        Returns:
+            Função que anexa o PDF e retorna os campos hubspot_* do documento,
+            ou None se o anexo não está habilitado
         """
         # Verificar se anexo HubSpot está habilitado
         post_actions = workflow.post_actions
         if not post_actions or not isinstance(post_actions, dict):
-            return
+            return None
         
         hubspot_config = post_actions.get('hubspot_attachment')
         if not hubspot_config or not hubspot_config.get('enabled'):
-            return
+            return None
         
         # Verificar se há conexão HubSpot configurada
         connection = workflow.source_connection
         if not connection or connection.source_type != 'hubspot':
             logger.warning(f"Workflow {workflow.id} tem anexo HubSpot habilitado mas não tem conexão HubSpot configurada")
-            return
+            return None
         
         # Verificar se PDF foi gerado (necessário para anexo)
-        if not pdf_bytes:
+        if pdf is None:
             logger.warning(f"Workflow {workflow.id} tem anexo HubSpot habilitado mas PDF não foi gerado")
-            return
+            return None
         
-        try:
-            from app.services.data_sources.hubspot_attachments import HubSpotAttachmentService
-            
-            # Criar serviço de anexo
-            attachment_service = HubSpotAttachmentService(connection)
-            
+        from app.services.data_sources.hubspot_attachments import HubSpotAttachmentService
+        
+        # Criar serviço de anexo
+        attachment_service = HubSpotAttachmentService(connection)
+        object_type = workflow.source_object_type
+        workflow_id = workflow.id
+        
+        def attach() -> Dict[str, Any]:
             # Fazer upload do arquivo
             filename = f"{doc_name}.pdf"
             file_result = attachment_service.upload_file(
-                file_bytes=pdf_bytes,
+                file_bytes=pdf.open(),
                 filename=filename,
                 mime_type='application/pdf',
                 access='PRIVATE'
             )
             
-            # Salvar informações do arquivo no documento
-            generated_doc.hubspot_file_id = file_result['id']
-            generated_doc.hubspot_file_url = file_result['url']
+            # Informações do arquivo para o documento
+            fields = {
+                'hubspot_file_id': file_result['id'],
+                'hubspot_file_url': file_result['url']
+            }
             
             # Anexar ao objeto
             attachment_type = hubspot_config.get('attachment_type', 'engagement')
@@ -572,37 +706,31 @@ class DocumentGenerator:
                 # Anexar via engagement (NOTE)
                 note_body = hubspot_config.get('note_body', f'Documento gerado: {doc_name}')
                 engagement_result = attachment_service.attach_file_to_object(
-                    object_type=workflow.source_object_type,
+                    object_type=object_type,
                     object_id=source_object_id,
                     file_id=file_result['id'],
                     note_body=note_body
                 )
-                generated_doc.hubspot_attachment_id = engagement_result.get('engagement_id')
-                
+                fields['hubspot_attachment_id'] = engagement_result.get('engagement_id')
+            
             elif attachment_type == 'property':
                 # Atualizar propriedade customizada com URL do arquivo
                 property_name = hubspot_config.get('property_name')
                 if not property_name:
-                    logger.warning(f"Workflow {workflow.id} tem attachment_type='property' mas property_name não configurado")
+                    logger.warning(f"Workflow {workflow_id} tem attachment_type='property' mas property_name não configurado")
                 else:
                     attachment_service.update_object_property(
-                        object_type=workflow.source_object_type,
+                        object_type=object_type,
                         object_id=source_object_id,
                         property_name=property_name,
                         property_value=file_result['url']
                     )
             
             logger.info(
-                f"Documento {generated_doc.id} anexado ao HubSpot: "
-                f"object_type={workflow.source_object_type}, object_id={source_object_id}, "
+                f"Documento {doc_name} anexado ao HubSpot: "
+                f"object_type={object_type}, object_id={source_object_id}, "
                 f"file_id={file_result['id']}"
             )
-            
-        except Exception as e:
-            # Não falhar a geração se anexo falhar, apenas logar
-            logger.error(
-                f"Erro ao anexar documento {generated_doc.id} no HubSpot: {str(e)}",
-                exc_info=True
-            )
-            # Não propagar exceção para não interromper o fluxo de geração
-
+            return fields
+        
+        return attach
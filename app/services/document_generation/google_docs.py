@@ -1,7 +1,10 @@
-from typing import Dict, Any, Optional
-from googleapiclient.discovery import build
+from typing import Dict, Any, List, Optional, Union
+from app.utils.google_clients import get_google_service
+from app.utils.document_artifact import DocumentArtifact, export_drive_file
 from google.oauth2.credentials import Credentials
 from .tag_processor import TagProcessor
+from .field_mapping_pipeline import FieldMappingPipeline, compile_field_mappings
+from .docs_batch_planner import plan_replace_all_text, run_batch_plan
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,8 +16,8 @@ class GoogleDocsService:
     """
     
     def __init__(self, credentials: Credentials):
-        self.docs_service = build('docs', 'v1', credentials=credentials)
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.docs_service = get_google_service('docs', 'v1', credentials)
+        self.drive_service = get_google_service('drive', 'v3', credentials)
     
     def copy_template(self, template_id: str, new_name: str, folder_id: str = None) -> Dict:
         """
@@ -48,6 +51,15 @@ class GoogleDocsService:
         """Retorna o conteúdo completo do documento"""
         return self.docs_service.documents().get(documentId=document_id).execute()
     
+    def get_file_modified_time(self, file_id: str) -> Optional[str]:
+        """Retorna o modifiedTime do arquivo no Drive (apenas metadados)"""
+        file = self.drive_service.files().get(
+            fileId=file_id,
+            fields='modifiedTime',
+            supportsAllDrives=True
+        ).execute()
+        return file.get('modifiedTime')
+    
     def extract_tags_from_document(self, document_id: str) -> list:
         """
         Extrai todas as tags {{...}} do documento.
@@ -55,16 +67,29 @@ class GoogleDocsService:
         Returns:
             Lista de tags encontradas (sem as chaves)
         """
+        return self.extract_tag_index(document_id)['tags']
+    
+    def extract_tag_index(self, document_id: str) -> Dict[str, list]:
+        """
+        Extrai o índice de tags do documento.
+        
+        Returns:
+            Dict com 'tags' (tags normais) e 'ai_tags' (nomes das tags {{ai:...}})
+        """
         doc = self.get_document_content(document_id)
         text = self._extract_text_from_content(doc.get('body', {}).get('content', []))
-        return TagProcessor.extract_tags(text)
+        return {
+            'tags': sorted(TagProcessor.extract_tags(text)),
+            'ai_tags': sorted(TagProcessor.extract_ai_tags(text))
+        }
     
     def replace_tags_in_document(
         self, 
         document_id: str, 
         data: Dict[str, Any],
-        mappings: Dict[str, str] = None
-    ) -> None:
+        mappings: Union[Dict[str, str], FieldMappingPipeline, None] = None,
+        tag_index: Optional[Dict[str, list]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Substitui todas as tags no documento pelos valores correspondentes.
         Processa tanto tags normais quanto tags AI ({{ai:...}}).
@@ -72,41 +97,26 @@ class GoogleDocsService:
         Args:
             document_id: ID do documento
             data: Dados para substituição (pode conter valores gerados por IA com chaves 'ai:tag_name')
-            mappings: Mapeamento de tags para campos
-        """
-        doc = self.get_document_content(document_id)
-        text = self._extract_text_from_content(doc.get('body', {}).get('content', []))
+            mappings: Mapeamento de tags para campos, ou o pipeline compilado dos
+                field mappings (ver field_mapping_pipeline)
+            tag_index: Índice de tags do template (ver template_cache). Se informado,
+                o documento copiado não é baixado para descobrir as tags.
         
-        # Extrair tags normais (sem ai:)
-        tags = TagProcessor.extract_tags(text)
+        Returns:
+            Tempo de cada lote do batchUpdate (ver docs_batch_planner.run_batch_plan)
+        """
+        if tag_index is None:
+            tag_index = self.extract_tag_index(document_id)
         
-        # Extrair tags AI
-        ai_tags = TagProcessor.extract_ai_tags(text)
+        tags = tag_index.get('tags', [])
+        ai_tags = tag_index.get('ai_tags', [])
         
-        requests = []
+        replacements = []
         
-        # Processar tags normais
-        for tag in tags:
-            # Busca o campo mapeado ou usa o próprio tag
-            field = mappings.get(tag, tag) if mappings else tag
-            value = TagProcessor._get_nested_value(data, field)
-            
-            # Aplicar transformações se necessário (via mappings)
-            # Por enquanto, apenas substitui o valor
-            if value is None:
-                value = ''
-            else:
-                value = str(value)
-            
-            requests.append({
-                'replaceAllText': {
-                    'containsText': {
-                        'text': '{{' + tag + '}}',
-                        'matchCase': True
-                    },
-                    'replaceText': value
-                }
-            })
+        # Processar tags normais (campo mapeado, transformação e valor padrão)
+        values = compile_field_mappings(mappings).apply(data, tags)
+        for tag, value in values.items():
+            replacements.append(('{{' + tag + '}}', value))
         
         # Processar tags AI
         for ai_tag in ai_tags:
@@ -120,21 +130,26 @@ class GoogleDocsService:
             
             value = str(value) if value is not None else ''
             
-            requests.append({
-                'replaceAllText': {
-                    'containsText': {
-                        'text': '{{ai:' + ai_tag + '}}',
-                        'matchCase': True
-                    },
-                    'replaceText': value
-                }
-            })
-        
-        if requests:
-            self.docs_service.documents().batchUpdate(
+            replacements.append(('{{ai:' + ai_tag + '}}', value))
+        
+        # Lotes sem tags repetidas/substituições sem efeito, dentro dos limites da API
+        plan = plan_replace_all_text(replacements)
+        timings = run_batch_plan(
+            lambda requests: self.docs_service.documents().batchUpdate(
                 documentId=document_id,
                 body={'requests': requests}
-            ).execute()
+            ).execute(),
+            plan
+        )
+        
+        if timings:
+            logger.info(
+                f'Tags substituídas no documento {document_id}: '
+                f'{sum(t["requests"] for t in timings)} requisições em {len(timings)} lote(s), '
+                f'{plan.skipped} descartadas, {sum(t["time_ms"] for t in timings)}ms'
+            )
+        
+        return timings
     
     def export_as_pdf(self, document_id: str) -> bytes:
         """Exporta o documento como PDF"""
@@ -143,6 +158,15 @@ class GoogleDocsService:
             mimeType='application/pdf'
         ).execute()
     
+    def export_pdf_artifact(self, document_id: str, name: Optional[str] = None) -> DocumentArtifact:
+        """
+        Exporta o documento como PDF em partes, sem manter o arquivo inteiro em memória.
+        
+        Returns:
+            DocumentArtifact (fechar após o uso)
+        """
+        return export_drive_file(self.drive_service, document_id, 'application/pdf', name)
+    
     def _extract_text_from_content(self, content: list) -> str:
         """Extrai texto puro do conteúdo do documento"""
         text_parts = []
@@ -3,7 +3,8 @@ Serviço para manipulação de Google Slides.
 Similar ao GoogleDocsService, mas para apresentações.
 """
 from typing import Dict, Any, Optional
-from googleapiclient.discovery import build
+from app.utils.google_clients import get_google_service
+from app.utils.document_artifact import DocumentArtifact, export_drive_file
 from google.oauth2.credentials import Credentials
 from .tag_processor import TagProcessor
 import logging
@@ -17,8 +18,8 @@ class GoogleSlidesService:
     """
     
     def __init__(self, credentials: Credentials):
-        self.slides_service = build('slides', 'v1', credentials=credentials)
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.slides_service = get_google_service('slides', 'v1', credentials)
+        self.drive_service = get_google_service('drive', 'v3', credentials)
     
     def copy_template(self, template_id: str, new_name: str, folder_id: str = None) -> Dict:
         """
@@ -159,6 +160,15 @@ class GoogleSlidesService:
             mimeType='application/pdf'
         ).execute()
     
+    def export_pdf_artifact(self, presentation_id: str, name: Optional[str] = None) -> DocumentArtifact:
+        """
+        Exporta a apresentação como PDF em partes, sem manter o arquivo inteiro em memória.
+        
+        Returns:
+            DocumentArtifact (fechar após o uso)
+        """
+        return export_drive_file(self.drive_service, presentation_id, 'application/pdf', name)
+    
     def _extract_text_from_presentation(self, presentation: Dict) -> str:
         """Extrai texto puro da apresentação"""
         text_parts = []
@@ -0,0 +1,76 @@
+"""
+Criação de arquivos no OneDrive via Microsoft Graph, compartilhada pelos
+serviços de Word e PowerPoint.
+
+Arquivos até 4MB vão num único PUT; acima disso, por upload session em partes
+(upload_to_graph_session). Um nome já existente na pasta ganha sufixo
+(conflictBehavior=rename).
+
+Uso:
+    name = with_extension('Proposta ACME', 'Modelo.docx', '.docx')
+    new_file = upload_new_file(access_token, folder_id, name, content)
+"""
+from os.path import splitext
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from app.utils import http_client
+from app.utils.chunked_upload import upload_to_graph_session
+
+GRAPH_BASE_URL = 'https://graph.microsoft.com/v1.0'
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024  # 4MB
+
+
+def upload_new_file(
+    access_token: str,
+    parent_id: Optional[str],
+    name: str,
+    content: bytes,
+    base_url: str = GRAPH_BASE_URL
+) -> Dict:
+    """
+    Cria um arquivo novo na pasta.
+    
+    Args:
+        access_token: Access token do Graph
+        parent_id: ID da pasta de destino (None: raiz do drive)
+        name: Nome do arquivo
+        content: Conteúdo (bytes ou memoryview)
+        base_url: URL base do Graph
+    
+    Returns:
+        Dict com id e url do arquivo criado
+    """
+    if parent_id:
+        item_path = f'{base_url}/me/drive/items/{parent_id}:/{quote(name)}:'
+    else:
+        item_path = f'{base_url}/me/drive/root:/{quote(name)}:'
+    
+    if len(content) < SIMPLE_UPLOAD_LIMIT:
+        response = http_client.put(
+            f'{item_path}/content',
+            headers={'Authorization': f'Bearer {access_token}'},
+            params={'@microsoft.graph.conflictBehavior': 'rename'},
+            data=content
+        )
+        response.raise_for_status()
+        new_file = response.json()
+    else:
+        session_response = http_client.post(
+            f'{item_path}/createUploadSession',
+            headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'},
+            json={'item': {'@microsoft.graph.conflictBehavior': 'rename'}}
+        )
+        session_response.raise_for_status()
+        new_file = upload_to_graph_session(session_response.json()['uploadUrl'], content)
+    
+    return {
+        'id': new_file['id'],
+        'url': new_file.get('webUrl', f"{GRAPH_BASE_URL}/me/drive/items/{new_file['id']}")
+    }
+
+
+def with_extension(name: str, template_name: Optional[str], default_extension: str) -> str:
+    """Nome do arquivo gerado com a extensão do template (ex: .docx)"""
+    extension = splitext(template_name or '')[1] or default_extension
+    return name if name.lower().endswith(extension.lower()) else f'{name}{extension}'
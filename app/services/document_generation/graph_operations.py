@@ -0,0 +1,183 @@
+"""
+Acompanhamento de operações assíncronas do Microsoft Graph (ex: POST /copy).
+
+O Graph responde 202 com um monitor no header Location. Em vez de um número
+fixo de sleeps de 1s, wait_for_operation consulta o monitor com backoff
+exponencial e jitter (respeitando Retry-After) até o prazo
+GRAPH_OPERATION_MAX_WAIT_SECONDS. A espera acontece no worker do Celery que
+executa o node, não na thread da requisição HTTP.
+
+A duração de cada operação é registrada por tenant (get_operation_stats e
+telemetria) para acompanhar cópias lentas.
+"""
+import base64
+import json
+import logging
+import random
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from app.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WAIT_SECONDS = 300
+INITIAL_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 10.0
+
+
+class GraphOperationError(Exception):
+    """Operação falhou no Graph ou não terminou dentro do prazo"""
+    pass
+
+
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def wait_for_operation(
+    monitor_url: str,
+    tenant_id: Optional[str] = None,
+    operation: str = 'copy',
+    max_wait_seconds: Optional[float] = None
+) -> str:
+    """
+    Aguarda a conclusão de uma operação do Graph.
+    
+    Args:
+        monitor_url: URL do header Location da resposta 202
+        tenant_id: Tenant para as estatísticas (ver tenant_from_token)
+        operation: Nome da operação (estatísticas/logs)
+        max_wait_seconds: Prazo (padrão: GRAPH_OPERATION_MAX_WAIT_SECONDS)
+    
+    Returns:
+        resourceId do item criado
+    
+    Raises:
+        GraphOperationError: Se a operação falhar ou passar do prazo
+    """
+    if max_wait_seconds is None:
+        max_wait_seconds = _config_max_wait()
+    
+    start_time = time.monotonic()
+    attempt = 0
+    
+    while True:
+        # O monitor não aceita o header Authorization
+        response = http_client.get(monitor_url, allow_redirects=False)
+        
+        if response.status_code in (301, 302, 303):
+            # Algumas respostas concluídas redirecionam para o item criado
+            resource_id = response.headers.get('Location', '').rstrip('/').split('/')[-1]
+            return _finished(tenant_id, operation, start_time, resource_id)
+        
+        status_data = {}
+        if response.status_code in (200, 202):
+            try:
+                status_data = response.json()
+            except ValueError:
+                status_data = {}
+        elif response.status_code not in (429, 500, 502, 503, 504):
+            _record(tenant_id, operation, time.monotonic() - start_time, failed=True)
+            raise GraphOperationError(f'Monitor do Graph retornou {response.status_code}')
+        
+        status = status_data.get('status')
+        if status == 'completed':
+            resource_id = (status_data.get('resourceId') or '').split('!')[-1]
+            return _finished(tenant_id, operation, start_time, resource_id)
+        
+        if status == 'failed':
+            _record(tenant_id, operation, time.monotonic() - start_time, failed=True)
+            error = (status_data.get('error') or {}).get('message') or 'erro desconhecido'
+            raise GraphOperationError(f'Operação {operation} falhou no Graph: {error}')
+        
+        elapsed = time.monotonic() - start_time
+        delay = _next_delay(attempt, response.headers.get('Retry-After'))
+        if elapsed + delay > max_wait_seconds:
+            _record(tenant_id, operation, elapsed, failed=True)
+            raise GraphOperationError(
+                f'Operação {operation} não terminou em {max_wait_seconds}s '
+                f'({status_data.get("percentageComplete", 0)}% concluído)'
+            )
+        
+        time.sleep(delay)
+        attempt += 1
+
+
+def tenant_from_token(access_token: Optional[str]) -> Optional[str]:
+    """Tenant (claim 'tid') do access token do Graph, sem validar a assinatura"""
+    try:
+        payload = access_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get('tid')
+    except Exception:
+        return None
+
+
+def get_operation_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Duração das operações por tenant/operação neste processo.
+    
+    Returns:
+        Dict {"tenant:operação": {count, failures, avg_seconds, max_seconds}}
+    """
+    with _stats_lock:
+        return {
+            key: {
+                'count': int(stats['count']),
+                'failures': int(stats['failures']),
+                'avg_seconds': round(stats['total_seconds'] / stats['count'], 3) if stats['count'] else 0,
+                'max_seconds': round(stats['max_seconds'], 3)
+            }
+            for key, stats in _stats.items()
+        }
+
+
+def _next_delay(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    delay = min(MAX_DELAY_SECONDS, INITIAL_DELAY_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _finished(tenant_id: Optional[str], operation: str, start_time: float, resource_id: str) -> str:
+    elapsed = time.monotonic() - start_time
+    _record(tenant_id, operation, elapsed)
+    
+    if not resource_id:
+        raise GraphOperationError(f'Operação {operation} concluída sem resourceId')
+    
+    logger.info(f'Operação {operation} do Graph concluída em {elapsed:.1f}s (tenant={tenant_id})')
+    return resource_id
+
+
+def _record(tenant_id: Optional[str], operation: str, elapsed: float, failed: bool = False) -> None:
+    key = f'{tenant_id or "unknown"}:{operation}'
+    with _stats_lock:
+        stats = _stats.setdefault(key, {'count': 0, 'failures': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['count'] += 1
+        stats['failures'] += 1 if failed else 0
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+    
+    try:
+        from app.utils.telemetry import telemetry
+        telemetry.track_event('graph_operation', {
+            'tenant_id': tenant_id,
+            'operation': operation,
+            'duration_seconds': round(elapsed, 3),
+            'success': not failed
+        })
+    except Exception:
+        pass
+
+
+def _config_max_wait() -> float:
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config.get('GRAPH_OPERATION_MAX_WAIT_SECONDS', DEFAULT_MAX_WAIT_SECONDS)
+    return DEFAULT_MAX_WAIT_SECONDS
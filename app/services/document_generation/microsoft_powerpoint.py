@@ -3,9 +3,14 @@ Serviço para manipulação de Microsoft PowerPoint via Graph API.
 Similar ao MicrosoftWordService, mas para apresentações.
 """
 from typing import Dict, Any, Optional
-import requests
+from app.utils import http_client
+from app.utils.chunked_upload import upload_to_graph_session
+from app.utils.document_artifact import DocumentArtifact
 import logging
 from .tag_processor import TagProcessor
+from .template_blob_cache import get_template_content
+from .graph_operations import tenant_from_token, wait_for_operation
+from .graph_files import upload_new_file, with_extension
 
 logger = logging.getLogger(__name__)
 
@@ -48,51 +53,29 @@ class MicrosoftPowerPointService:
         Returns:
             Dict com id e url da nova apresentação
         """
-        # Obter informações do arquivo original
-        file_info = requests.get(
-            f'{self.base_url}/me/drive/items/{template_id}',
-            headers=self.headers
-        ).json()
-        
-        # Determinar pasta de destino
-        parent_reference = file_info.get('parentReference', {})
-        if folder_id:
-            parent_id = folder_id
-        else:
-            parent_id = parent_reference.get('id')
-        
-        # Copiar arquivo
         copy_body = {
             'name': new_name
         }
+        if folder_id:
+            copy_body['parentReference'] = {'id': folder_id}
         
-        copy_response = requests.post(
+        copy_response = http_client.post(
             f'{self.base_url}/me/drive/items/{template_id}/copy',
             headers=self.headers,
             json=copy_body
         )
+        copy_response.raise_for_status()
         
-        if copy_response.status_code == 202:
-            # Copy é assíncrono, aguardar e buscar
-            import time
-            time.sleep(1)
-            
-            # Buscar arquivo na pasta
-            folder_items = requests.get(
-                f'{self.base_url}/me/drive/items/{parent_id}/children',
-                headers=self.headers,
-                params={'$filter': f"name eq '{new_name}'"}
-            ).json()
-            
-            if folder_items.get('value'):
-                new_file = folder_items['value'][0]
-                return {
-                    'id': new_file['id'],
-                    'url': new_file.get('webUrl', f"https://graph.microsoft.com/v1.0/me/drive/items/{new_file['id']}")
-                }
+        # Copy é assíncrono: acompanhar o monitor do header Location
+        location = copy_response.headers.get('Location')
+        if not location:
+            raise Exception('Falha ao copiar arquivo PowerPoint: resposta sem monitor da cópia')
         
-        copy_response.raise_for_status()
-        raise Exception('Falha ao copiar arquivo PowerPoint')
+        resource_id = wait_for_operation(location, tenant_from_token(self.access_token), operation='copy')
+        return {
+            'id': resource_id,
+            'url': f"https://graph.microsoft.com/v1.0/me/drive/items/{resource_id}"
+        }
     
     def replace_tags_in_presentation(
         self,
@@ -115,57 +98,12 @@ class MicrosoftPowerPointService:
             # Baixar arquivo
             pptx_content = self._get_presentation_content(presentation_id)
             
-            # Processar com python-pptx
-            from io import BytesIO
-            from pptx import Presentation
-            
-            prs = Presentation(BytesIO(pptx_content))
-            
-            # Substituir tags em slides
-            for slide in prs.slides:
-                # Substituir em shapes de texto
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text'):
-                        text = shape.text
-                        tags = TagProcessor.extract_tags(text)
-                        
-                        for tag in tags:
-                            field = mappings.get(tag, tag) if mappings else tag
-                            value = TagProcessor._get_nested_value(data, field)
-                            
-                            if value is not None:
-                                text = text.replace(f'{{{{{tag}}}}}', str(value))
-                            else:
-                                text = text.replace(f'{{{{{tag}}}}}', '')
-                        
-                        shape.text = text
-                    
-                    # Substituir em tabelas
-                    if shape.has_table:
-                        for row in shape.table.rows:
-                            for cell in row.cells:
-                                text = cell.text
-                                tags = TagProcessor.extract_tags(text)
-                                
-                                for tag in tags:
-                                    field = mappings.get(tag, tag) if mappings else tag
-                                    value = TagProcessor._get_nested_value(data, field)
-                                    
-                                    if value is not None:
-                                        text = text.replace(f'{{{{{tag}}}}}', str(value))
-                                    else:
-                                        text = text.replace(f'{{{{{tag}}}}}', '')
-                                
-                                cell.text = text
-            
-            # Salvar em buffer
-            output = BytesIO()
-            prs.save(output)
-            output.seek(0)
-            
             # Fazer upload do arquivo atualizado
-            self._upload_presentation_content(presentation_id, output.read())
-            
+            self._upload_presentation_content(
+                presentation_id,
+                self._render_presentation(pptx_content, data, mappings)
+            )
+        
         except ImportError:
             logger.error('python-pptx não instalado. Instale com: pip install python-pptx')
             raise Exception('Biblioteca python-pptx não disponível')
@@ -173,9 +111,94 @@ class MicrosoftPowerPointService:
             logger.exception(f'Erro ao substituir tags no PowerPoint: {str(e)}')
             raise
     
+    def create_from_template(
+        self,
+        template_id: str,
+        new_name: str,
+        data: Dict[str, Any],
+        mappings: Dict[str, str] = None,
+        folder_id: str = None
+    ) -> Dict:
+        """
+        Gera uma apresentação a partir do template sem copiar no servidor: lê
+        o template do cache local (template_blob_cache), renderiza e faz upload
+        do resultado como um arquivo novo.
+        
+        Args:
+            template_id: ID do arquivo template (driveItem id)
+            new_name: Nome da nova apresentação
+            data: Dados para substituição
+            mappings: Mapeamento de tags para campos
+            folder_id: ID da pasta de destino (padrão: pasta do template)
+        
+        Returns:
+            Dict com id e url da nova apresentação
+        """
+        try:
+            template_content, metadata = get_template_content(
+                self.base_url, self.headers['Authorization'], template_id
+            )
+            content = self._render_presentation(template_content, data, mappings)
+        except ImportError:
+            logger.error('python-pptx não instalado. Instale com: pip install python-pptx')
+            raise Exception('Biblioteca python-pptx não disponível')
+        
+        parent_id = folder_id or metadata.get('parentReference', {}).get('id')
+        return upload_new_file(self.access_token, parent_id, with_extension(new_name, metadata.get('name'), '.pptx'), content)
+    
+    def _render_presentation(self, pptx_content: bytes, data: Dict[str, Any], mappings: Dict[str, str] = None) -> bytes:
+        """Substitui as tags da apresentação em memória (python-pptx)"""
+        # Processar com python-pptx
+        from io import BytesIO
+        from pptx import Presentation
+        
+        prs = Presentation(BytesIO(pptx_content))
+        
+        # Substituir tags em slides
+        for slide in prs.slides:
+            # Substituir em shapes de texto
+            for shape in slide.shapes:
+                if hasattr(shape, 'text'):
+                    text = shape.text
+                    tags = TagProcessor.extract_tags(text)
+                    
+                    for tag in tags:
+                        field = mappings.get(tag, tag) if mappings else tag
+                        value = TagProcessor._get_nested_value(data, field)
+                        
+                        if value is not None:
+                            text = text.replace(f'{{{{{tag}}}}}', str(value))
+                        else:
+                            text = text.replace(f'{{{{{tag}}}}}', '')
+                    
+                    shape.text = text
+                
+                # Substituir em tabelas
+                if shape.has_table:
+                    for row in shape.table.rows:
+                        for cell in row.cells:
+                            text = cell.text
+                            tags = TagProcessor.extract_tags(text)
+                            
+                            for tag in tags:
+                                field = mappings.get(tag, tag) if mappings else tag
+                                value = TagProcessor._get_nested_value(data, field)
+                                
+                                if value is not None:
+                                    text = text.replace(f'{{{{{tag}}}}}', str(value))
+                                else:
+                                    text = text.replace(f'{{{{{tag}}}}}', '')
+                            
+                            cell.text = text
+        
+        # Salvar em buffer
+        output = BytesIO()
+        prs.save(output)
+        return output.getvalue()
+    
     def _get_presentation_content(self, presentation_id: str) -> bytes:
         """Obtém o conteúdo da apresentação como bytes"""
-        response = requests.get(
+        response = http_client.get(
             f'{self.base_url}/me/drive/items/{presentation_id}/content',
             headers={'Authorization': self.headers['Authorization']}
         )
@@ -185,7 +208,7 @@ class MicrosoftPowerPointService:
     def _upload_presentation_content(self, presentation_id: str, content: bytes) -> None:
         """Faz upload do conteúdo atualizado da apresentação"""
         if len(content) < 4 * 1024 * 1024:  # 4MB
-            response = requests.put(
+            response = http_client.put(
                 f'{self.base_url}/me/drive/items/{presentation_id}/content',
                 headers={'Authorization': self.headers['Authorization']},
                 data=content
@@ -196,7 +219,7 @@ class MicrosoftPowerPointService:
     
     def _upload_large_file(self, presentation_id: str, content: bytes) -> None:
         """Faz upload de arquivo grande usando upload session"""
-        session_response = requests.post(
+        session_response = http_client.post(
             f'{self.base_url}/me/drive/items/{presentation_id}/createUploadSession',
             headers=self.headers,
             json={
@@ -206,18 +229,13 @@ class MicrosoftPowerPointService:
             }
         )
         session_response.raise_for_status()
-        upload_url = session_response.json()['uploadUrl']
         
-        upload_response = requests.put(
-            upload_url,
-            headers={'Content-Length': str(len(content))},
-            data=content
-        )
-        upload_response.raise_for_status()
+        # Envio em partes, retomando do último trecho confirmado em caso de erro
+        upload_to_graph_session(session_response.json()['uploadUrl'], content)
     
     def export_as_pdf(self, presentation_id: str) -> bytes:
         """Exporta apresentação PowerPoint como PDF"""
-        response = requests.get(
+        response = http_client.get(
             f'{self.base_url}/me/drive/items/{presentation_id}/content',
             headers={
                 'Authorization': self.headers['Authorization'],
@@ -226,4 +244,24 @@ class MicrosoftPowerPointService:
         )
         response.raise_for_status()
         return response.content
+    
+    def export_pdf_artifact(self, presentation_id: str, name: Optional[str] = None) -> DocumentArtifact:
+        """
+        Exporta apresentação PowerPoint como PDF em streaming, sem manter o arquivo inteiro em memória.
+        
+        Returns:
+            DocumentArtifact (fechar após o uso)
+        """
+        response = http_client.get(
+            f'{self.base_url}/me/drive/items/{presentation_id}/content',
+            headers={
+                'Authorization': self.headers['Authorization'],
+                'Accept': 'application/pdf'
+            },
+            stream=True
+        )
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        return DocumentArtifact.from_response(response, name=name)
 
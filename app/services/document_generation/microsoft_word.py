@@ -2,10 +2,17 @@
 Serviço para manipulação de Microsoft Word via Graph API.
 Similar ao GoogleDocsService, mas para Word/OneDrive.
 """
-from typing import Dict, Any, Optional
-import requests
+from io import BytesIO
+from typing import Dict, Any, Optional, Union
+from app.utils import http_client
+from app.utils.chunked_upload import upload_to_graph_session
+from app.utils.document_artifact import DocumentArtifact
 import logging
-from .tag_processor import TagProcessor
+from .field_mapping_pipeline import FieldMappingPipeline, compile_field_mappings
+from .ooxml_renderer import render_docx
+from .template_blob_cache import get_template_content
+from .graph_operations import tenant_from_token, wait_for_operation
+from .graph_files import upload_new_file, with_extension
 
 logger = logging.getLogger(__name__)
 
@@ -48,69 +55,29 @@ class MicrosoftWordService:
         Returns:
             Dict com id e url do novo documento
         """
-        # Obter informações do arquivo original
-        file_info = requests.get(
-            f'{self.base_url}/me/drive/items/{template_id}',
-            headers=self.headers
-        ).json()
-        
-        # Determinar pasta de destino
-        parent_reference = file_info.get('parentReference', {})
-        if folder_id:
-            parent_id = folder_id
-        else:
-            parent_id = parent_reference.get('id')
-        
-        # Copiar arquivo
         copy_body = {
             'name': new_name
         }
+        if folder_id:
+            copy_body['parentReference'] = {'id': folder_id}
         
-        copy_response = requests.post(
+        copy_response = http_client.post(
             f'{self.base_url}/me/drive/items/{template_id}/copy',
             headers=self.headers,
             json=copy_body
         )
-        
-        if copy_response.status_code == 202:
-            # Copy é assíncrono, obter o novo arquivo pelo nome
-            # Aguardar um pouco e buscar
-            import time
-            time.sleep(1)
-            
-            # Buscar arquivo na pasta
-            folder_items = requests.get(
-                f'{self.base_url}/me/drive/items/{parent_id}/children',
-                headers=self.headers,
-                params={'$filter': f"name eq '{new_name}'"}
-            ).json()
-            
-            if folder_items.get('value'):
-                new_file = folder_items['value'][0]
-                return {
-                    'id': new_file['id'],
-                    'url': new_file.get('webUrl', f"https://graph.microsoft.com/v1.0/me/drive/items/{new_file['id']}")
-                }
-        
         copy_response.raise_for_status()
-        # Se não retornou 202, tentar obter do Location header
+        
+        # Copy é assíncrono: acompanhar o monitor do header Location
         location = copy_response.headers.get('Location')
-        if location:
-            # Fazer polling até o arquivo estar pronto
-            import time
-            for _ in range(10):
-                time.sleep(1)
-                status_response = requests.get(location, headers=self.headers)
-                if status_response.status_code == 200:
-                    status_data = status_response.json()
-                    if status_data.get('status') == 'completed':
-                        resource_id = status_data.get('resourceId', '').split('!')[-1]
-                        return {
-                            'id': resource_id,
-                            'url': f"https://graph.microsoft.com/v1.0/me/drive/items/{resource_id}"
-                        }
+        if not location:
+            raise Exception('Falha ao copiar arquivo Word: resposta sem monitor da cópia')
         
-        raise Exception('Falha ao copiar arquivo Word')
+        resource_id = wait_for_operation(location, tenant_from_token(self.access_token), operation='copy')
+        return {
+            'id': resource_id,
+            'url': f"https://graph.microsoft.com/v1.0/me/drive/items/{resource_id}"
+        }
     
     def get_document_content(self, document_id: str) -> bytes:
         """
@@ -122,7 +89,7 @@ class MicrosoftWordService:
         Returns:
             Bytes do arquivo Word (.docx)
         """
-        response = requests.get(
+        response = http_client.get(
             f'{self.base_url}/me/drive/items/{document_id}/content',
             headers={'Authorization': self.headers['Authorization']}
         )
@@ -133,81 +100,85 @@ class MicrosoftWordService:
         self,
         document_id: str,
         data: Dict[str, Any],
-        mappings: Dict[str, str] = None
+        mappings: Union[Dict[str, str], FieldMappingPipeline, None] = None
     ) -> None:
         """
         Substitui tags no documento Word.
         
-        Nota: Microsoft Graph API não tem endpoint direto para editar conteúdo Word.
-        Usaremos uma abordagem alternativa:
-        1. Baixar o arquivo
-        2. Usar python-docx para substituir tags
-        3. Fazer upload do arquivo atualizado
+        Microsoft Graph API não tem endpoint para editar conteúdo Word, então:
+        1. Baixa o arquivo
+        2. Substitui as tags direto no XML (corpo, headers, footers, tabelas),
+           mantendo a formatação dos runs (ver ooxml_renderer)
+        3. Faz upload do arquivo atualizado
         
         Args:
             document_id: ID do documento
             data: Dados para substituição
-            mappings: Mapeamento de tags para campos
+            mappings: Mapeamento de tags para campos, ou o pipeline compilado
+                dos field mappings
         """
         try:
-            # Baixar arquivo
             docx_content = self.get_document_content(document_id)
             
-            # Processar com python-docx
-            from io import BytesIO
-            from docx import Document
-            
-            doc = Document(BytesIO(docx_content))
-            
-            # Substituir tags em parágrafos
-            for paragraph in doc.paragraphs:
-                text = paragraph.text
-                tags = TagProcessor.extract_tags(text)
-                
-                for tag in tags:
-                    field = mappings.get(tag, tag) if mappings else tag
-                    value = TagProcessor._get_nested_value(data, field)
-                    
-                    if value is not None:
-                        text = text.replace(f'{{{{{tag}}}}}', str(value))
-                    else:
-                        text = text.replace(f'{{{{{tag}}}}}', '')
-                
-                paragraph.text = text
-            
-            # Substituir tags em tabelas
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text = cell.text
-                        tags = TagProcessor.extract_tags(text)
-                        
-                        for tag in tags:
-                            field = mappings.get(tag, tag) if mappings else tag
-                            value = TagProcessor._get_nested_value(data, field)
-                            
-                            if value is not None:
-                                text = text.replace(f'{{{{{tag}}}}}', str(value))
-                            else:
-                                text = text.replace(f'{{{{{tag}}}}}', '')
-                        
-                        cell.text = text
-            
-            # Salvar em buffer
             output = BytesIO()
-            doc.save(output)
-            output.seek(0)
+            stats = render_docx(docx_content, self._tag_renderer(data, mappings), output)
+            logger.info(
+                f'Word {document_id}: {stats["tags_replaced"]} tags substituídas '
+                f'em {stats["parts_rendered"]} partes'
+            )
             
             # Fazer upload do arquivo atualizado
-            self._upload_document_content(document_id, output.read())
-            
-        except ImportError:
-            logger.error('python-docx não instalado. Instale com: pip install python-docx')
-            raise Exception('Biblioteca python-docx não disponível')
+            self._upload_document_content(document_id, output.getvalue())
+        
         except Exception as e:
             logger.exception(f'Erro ao substituir tags no Word: {str(e)}')
             raise
     
+    def create_from_template(
+        self,
+        template_id: str,
+        new_name: str,
+        data: Dict[str, Any],
+        mappings: Union[Dict[str, str], FieldMappingPipeline, None] = None,
+        folder_id: str = None
+    ) -> Dict:
+        """
+        Gera um documento a partir do template sem copiar no servidor: lê o
+        template do cache local (template_blob_cache), renderiza e faz upload
+        do resultado como um arquivo novo.
+        
+        Args:
+            template_id: ID do arquivo template (driveItem id)
+            new_name: Nome do novo documento
+            data: Dados para substituição
+            mappings: Mapeamento de tags para campos, ou o pipeline compilado
+            folder_id: ID da pasta de destino (padrão: pasta do template)
+        
+        Returns:
+            Dict com id e url do novo documento
+        """
+        template_content, metadata = get_template_content(
+            self.base_url, self.headers['Authorization'], template_id
+        )
+        
+        output = BytesIO()
+        stats = render_docx(template_content, self._tag_renderer(data, mappings), output)
+        logger.info(f'Word gerado do template {template_id}: {stats["tags_replaced"]} tags substituídas')
+        
+        parent_id = folder_id or metadata.get('parentReference', {}).get('id')
+        return upload_new_file(self.access_token, parent_id, with_extension(new_name, metadata.get('name'), '.docx'), output.getvalue())
+    
+    def _tag_renderer(self, data: Dict[str, Any], mappings):
+        pipeline = compile_field_mappings(mappings)
+        values: Dict[str, str] = {}
+        
+        def render_tag(tag: str) -> str:
+            if tag not in values:
+                values[tag] = pipeline.value(data, tag)
+            return values[tag]
+        
+        return render_tag
+    
     def _upload_document_content(self, document_id: str, content: bytes) -> None:
         """
         Faz upload do conteúdo atualizado do documento.
@@ -219,7 +190,7 @@ class MicrosoftWordService:
         # Microsoft Graph API requer upload em sessão para arquivos grandes
         # Para arquivos pequenos (< 4MB), podemos usar upload simples
         if len(content) < 4 * 1024 * 1024:  # 4MB
-            response = requests.put(
+            response = http_client.put(
                 f'{self.base_url}/me/drive/items/{document_id}/content',
                 headers={'Authorization': self.headers['Authorization']},
                 data=content
@@ -234,7 +205,7 @@ class MicrosoftWordService:
         Faz upload de arquivo grande usando upload session.
         """
         # Criar upload session
-        session_response = requests.post(
+        session_response = http_client.post(
             f'{self.base_url}/me/drive/items/{document_id}/createUploadSession',
             headers=self.headers,
             json={
@@ -244,15 +215,9 @@ class MicrosoftWordService:
             }
         )
         session_response.raise_for_status()
-        upload_url = session_response.json()['uploadUrl']
         
-        # Fazer upload
-        upload_response = requests.put(
-            upload_url,
-            headers={'Content-Length': str(len(content))},
-            data=content
-        )
-        upload_response.raise_for_status()
+        # Envio em partes, retomando do último trecho confirmado em caso de erro
+        upload_to_graph_session(session_response.json()['uploadUrl'], content)
     
     def export_as_pdf(self, document_id: str) -> bytes:
         """
@@ -264,7 +229,7 @@ class MicrosoftWordService:
         Returns:
             Bytes do PDF
         """
-        response = requests.get(
+        response = http_client.get(
             f'{self.base_url}/me/drive/items/{document_id}/content',
             headers={
                 'Authorization': self.headers['Authorization'],
@@ -273,4 +238,23 @@ class MicrosoftWordService:
         )
         response.raise_for_status()
         return response.content
-
+    
+    def export_pdf_artifact(self, document_id: str, name: Optional[str] = None) -> DocumentArtifact:
+        """
+        Exporta documento Word como PDF em streaming, sem manter o arquivo inteiro em memória.
+        
+        Returns:
+            DocumentArtifact (fechar após o uso)
+        """
+        response = http_client.get(
+            f'{self.base_url}/me/drive/items/{document_id}/content',
+            headers={
+                'Authorization': self.headers['Authorization'],
+                'Accept': 'application/pdf'
+            },
+            stream=True
+        )
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        return DocumentArtifact.from_response(response, name=name)
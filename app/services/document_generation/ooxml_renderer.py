@@ -0,0 +1,193 @@
+"""
+Renderização de templates Word (.docx) direto no XML do pacote OOXML.
+
+Em vez de carregar o documento inteiro num modelo de objetos (python-docx) e
+reescrever paragraph.text (o que perde a formatação dos runs), o renderer:
+- percorre os membros do zip uma vez, copiando sem alteração tudo que não é
+  texto do documento (imagens, estilos, fontes...)
+- em word/document.xml, headers, footers e notas de rodapé, junta o texto dos
+  <w:t> de cada parágrafo para achar tags quebradas entre runs, e grava o valor
+  no primeiro <w:t> da tag, removendo o restante da tag dos runs seguintes
+
+A formatação de cada run é mantida (o valor herda a formatação do run onde a
+tag começa), e tabelas aninhadas, caixas de texto, headers e footers são
+tratados igual ao corpo.
+
+Uso:
+    render_docx(docx_bytes, lambda tag: valores.get(tag, ''), output)
+"""
+import html
+import logging
+import re
+import shutil
+import zipfile
+from typing import BinaryIO, Callable, Dict, List, Tuple, Union
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger(__name__)
+
+# Partes com texto do documento
+TEXT_PART_PATTERN = re.compile(r'^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$')
+
+TAG_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
+
+# <w:t>texto</w:t>, <w:t xml:space="preserve">texto</w:t> e <w:t/>
+TEXT_NODE_PATTERN = re.compile(r'<w:t(?:\s[^>]*)?(?:/>|>(.*?)</w:t>)', re.DOTALL)
+
+# Início/fim de parágrafo: tags nunca atravessam esses limites
+PARAGRAPH_BOUNDARY_PATTERN = re.compile(r'<w:p[\s>/]|</w:p>')
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def render_docx(
+    source: Union[bytes, BinaryIO],
+    render_tag: Callable[[str], str],
+    output: BinaryIO
+) -> Dict[str, int]:
+    """
+    Substitui as tags {{...}} de um .docx, gravando o resultado em output.
+    
+    Args:
+        source: Conteúdo do .docx (bytes ou arquivo binário)
+        render_tag: Função tag (sem chaves, sem strip) -> texto do valor
+        output: Arquivo binário de saída
+    
+    Returns:
+        Estatísticas: {'parts_rendered': n, 'tags_replaced': n}
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    
+    stats = {'parts_rendered': 0, 'tags_replaced': 0}
+    
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(output, 'w') as zout:
+        for info in zin.infolist():
+            if TEXT_PART_PATTERN.match(info.filename):
+                xml = zin.read(info).decode('utf-8')
+                rendered, replaced = render_part_xml(xml, render_tag)
+                if replaced:
+                    stats['parts_rendered'] += 1
+                    stats['tags_replaced'] += replaced
+                zout.writestr(info, rendered.encode('utf-8'))
+                continue
+            
+            # Membros sem texto: cópia em streaming, mesmo nome/data/compressão
+            with zin.open(info) as src, zout.open(_copy_info(info), 'w') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+    
+    return stats
+
+
+def render_part_xml(xml: str, render_tag: Callable[[str], str]) -> Tuple[str, int]:
+    """
+    Substitui as tags de uma parte XML (document.xml, header, footer...).
+    
+    Returns:
+        (xml renderizado, quantidade de tags substituídas)
+    """
+    if '{' not in xml:
+        return xml, 0
+    
+    nodes = list(TEXT_NODE_PATTERN.finditer(xml))
+    if not nodes:
+        return xml, 0
+    
+    # Agrupa os <w:t> por parágrafo
+    boundaries = [match.start() for match in PARAGRAPH_BOUNDARY_PATTERN.finditer(xml)]
+    groups: List[List[re.Match]] = []
+    boundary_index = 0
+    current_segment = -1
+    for node in nodes:
+        while boundary_index < len(boundaries) and boundaries[boundary_index] < node.start():
+            boundary_index += 1
+        if boundary_index != current_segment or not groups:
+            groups.append([])
+            current_segment = boundary_index
+        groups[-1].append(node)
+    
+    replacements: Dict[int, str] = {}
+    replaced = 0
+    for group in groups:
+        texts = [html.unescape(node.group(1) or '') for node in group]
+        new_texts, count = _render_group(texts, render_tag)
+        if count:
+            replaced += count
+            for node, old_text, new_text in zip(group, texts, new_texts):
+                if new_text != old_text:
+                    replacements[node.start()] = new_text
+    
+    if not replaced:
+        return xml, 0
+    
+    parts = []
+    position = 0
+    for node in nodes:
+        if node.start() not in replacements:
+            continue
+        parts.append(xml[position:node.start()])
+        parts.append(_text_node(replacements[node.start()]))
+        position = node.end()
+    parts.append(xml[position:])
+    
+    return ''.join(parts), replaced
+
+
+def _render_group(texts: List[str], render_tag: Callable[[str], str]) -> Tuple[List[str], int]:
+    """
+    Substitui as tags no texto concatenado dos <w:t> de um parágrafo.
+    
+    O valor de cada tag vai para o nó onde a tag começa; os caracteres da tag
+    nos nós seguintes são removidos. O texto fora das tags fica no nó original.
+    """
+    joined = ''.join(texts)
+    matches = list(TAG_PATTERN.finditer(joined))
+    if not matches:
+        return texts, 0
+    
+    # Posição inicial de cada nó no texto concatenado
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+    
+    new_texts = [''] * len(texts)
+    
+    def emit(begin: int, end: int) -> None:
+        """Devolve o trecho literal [begin, end) aos nós de origem"""
+        for index, node_start in enumerate(starts):
+            node_end = node_start + len(texts[index])
+            if node_end <= begin or node_start >= end:
+                continue
+            new_texts[index] += joined[max(begin, node_start):min(end, node_end)]
+    
+    def owner(position: int) -> int:
+        for index in range(len(starts) - 1, -1, -1):
+            if starts[index] <= position and len(texts[index]):
+                return index
+        return 0
+    
+    position = 0
+    for match in matches:
+        emit(position, match.start())
+        new_texts[owner(match.start())] += render_tag(match.group(1))
+        position = match.end()
+    emit(position, len(joined))
+    
+    return new_texts, len(matches)
+
+
+def _text_node(text: str) -> str:
+    if text != text.strip():
+        return f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+    return f'<w:t>{escape(text)}</w:t>'
+
+
+def _copy_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    copy = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    copy.compress_type = info.compress_type
+    copy.external_attr = info.external_attr
+    copy.file_size = info.file_size
+    return copy
@@ -0,0 +1,117 @@
+"""
+Ações pós-geração executadas em paralelo (upload do PDF no Drive, anexo no
+HubSpot, evento na timeline...).
+
+Cada ação (sink) é independente: roda numa thread própria, com app context, e
+todas compartilham um prazo (POST_GENERATION_DEADLINE_SECONDS). A latência
+passa a ser a da ação mais lenta, não a soma de todas. O resultado de cada uma
+(success, failed ou timeout) é registrado em WorkflowExecution.post_generation.
+
+Os sinks não acessam o banco: retornam um dict com os valores a gravar (ex:
+pdf_file_id), aplicados pela thread que chamou run().
+
+Uso:
+    sinks = PostGenerationSinks()
+    sinks.add('drive_pdf', lambda: upload(...))
+    report = sinks.run()
+    updates = sinks.results['drive_pdf']
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_SECONDS = 120
+
+
+class PostGenerationSinks:
+    """Conjunto de ações pós-geração com prazo compartilhado"""
+    
+    def __init__(self, deadline_seconds: Optional[float] = None):
+        """
+        Args:
+            deadline_seconds: Prazo total para todas as ações
+                (padrão: POST_GENERATION_DEADLINE_SECONDS)
+        """
+        self.deadline_seconds = _config_deadline() if deadline_seconds is None else deadline_seconds
+        self.results: Dict[str, Any] = {}
+        self.pending = False
+        self._sinks: List[Tuple[str, Callable[[], Any]]] = []
+    
+    def __len__(self) -> int:
+        return len(self._sinks)
+    
+    def add(self, name: str, sink: Callable[[], Any]) -> None:
+        """
+        Registra uma ação.
+        
+        Args:
+            name: Nome da ação no relatório (ex: 'drive_pdf')
+            sink: Função sem argumentos; o retorno fica em results[name]
+        """
+        self._sinks.append((name, sink))
+    
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Executa as ações em paralelo e aguarda até o prazo.
+        
+        Ações que não terminam no prazo continuam em background, mas são
+        registradas como timeout e seu resultado é descartado.
+        
+        Returns:
+            Dict {nome: {'status': success|failed|timeout, 'time_ms': n, 'error'?: str}}
+        """
+        if not self._sinks:
+            return {}
+        
+        from flask import current_app, has_app_context
+        app = current_app._get_current_object() if has_app_context() else None
+        start_time = time.monotonic()
+        timings: Dict[str, float] = {}
+        
+        def run_sink(name: str, sink: Callable[[], Any]) -> Any:
+            sink_start = time.monotonic()
+            try:
+                if app is None:
+                    return sink()
+                with app.app_context():
+                    return sink()
+            finally:
+                timings[name] = (time.monotonic() - sink_start) * 1000
+        
+        pool = ThreadPoolExecutor(max_workers=len(self._sinks), thread_name_prefix='post-generation')
+        try:
+            futures = {pool.submit(run_sink, name, sink): name for name, sink in self._sinks}
+            wait(futures, timeout=self.deadline_seconds)
+        finally:
+            pool.shutdown(wait=False)
+        
+        report = {}
+        for future, name in futures.items():
+            if not future.done():
+                self.pending = True
+                report[name] = {
+                    'status': 'timeout',
+                    'time_ms': round((time.monotonic() - start_time) * 1000)
+                }
+                logger.warning(f'Ação pós-geração {name} não terminou em {self.deadline_seconds}s')
+                continue
+            
+            error = future.exception()
+            report[name] = {'status': 'failed' if error else 'success', 'time_ms': round(timings.get(name, 0))}
+            if error:
+                report[name]['error'] = str(error)
+                logger.error(f'Erro na ação pós-geração {name}: {str(error)}', exc_info=error)
+            else:
+                self.results[name] = future.result()
+        
+        return report
+
+
+def _config_deadline() -> float:
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config.get('POST_GENERATION_DEADLINE_SECONDS', DEFAULT_DEADLINE_SECONDS)
+    return DEFAULT_DEADLINE_SECONDS
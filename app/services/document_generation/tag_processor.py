@@ -1,9 +1,93 @@
 import re
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Templates compilados mantidos em memória (nomes, assuntos, corpos de email, prompts)
+TEMPLATE_CACHE_SIZE = 1024
+PATH_CACHE_SIZE = 4096
+
+
+class CompiledTemplate:
+    """
+    Template já analisado: sequência de trechos literais e tags, com o caminho
+    de cada tag já separado em chaves. Renderizar para vários dicts (lote,
+    um email por destinatário) é só uma busca por tag e um join.
+    
+    Obtido via TagProcessor.compile(text), que mantém um cache LRU por texto.
+    """
+    
+    __slots__ = ('text', 'segments', 'raw_tags')
+    
+    def __init__(self, text: str):
+        self.text = text
+        # Literais são str; tags são (tag, caminho)
+        self.segments: List[Any] = []
+        self.raw_tags: List[str] = []
+        
+        position = 0
+        for match in _TAG_REGEX.finditer(text):
+            if match.start() > position:
+                self.segments.append(text[position:match.start()])
+            tag = match.group(1).strip()
+            self.segments.append((tag, _split_path(tag)))
+            self.raw_tags.append(match.group(1))
+            position = match.end()
+        if position < len(text):
+            self.segments.append(text[position:])
+    
+    @property
+    def has_tags(self) -> bool:
+        return bool(self.raw_tags)
+    
+    def render(self, data: Dict[str, Any], mappings: Dict[str, str] = None) -> str:
+        """
+        Substitui as tags pelos valores em data (tags sem valor viram '').
+        
+        Args:
+            data: Dicionário com os dados
+            mappings: Mapeamento opcional de tag -> campo no data
+        
+        Returns:
+            Texto renderizado
+        """
+        if not self.raw_tags:
+            return self.text
+        
+        parts = []
+        for segment in self.segments:
+            if segment.__class__ is str:
+                parts.append(segment)
+                continue
+            
+            tag, path = segment
+            if mappings and tag in mappings:
+                path = _split_path(mappings[tag])
+            
+            value = _lookup(data, path)
+            if value is not None:
+                parts.append(str(value))
+        
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _split_path(path: str) -> Tuple[str, ...]:
+    return tuple(path.split('.'))
+
+
+def _lookup(data: Any, keys: Tuple[str, ...]) -> Any:
+    value = data
+    for key in keys:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+        if value is None:
+            return None
+    return value
+
 
 class TagProcessor:
     """
@@ -20,10 +104,23 @@ class TagProcessor:
     TAG_PATTERN = r'\{\{([^}]+)\}\}'
     AI_TAG_PATTERN = r'\{\{ai:([^}]+)\}\}'
     
+    @classmethod
+    def compile(cls, text: str) -> CompiledTemplate:
+        """
+        Retorna o template compilado do texto (cache LRU por texto).
+        
+        Args:
+            text: Texto com tags {{...}}
+        
+        Returns:
+            CompiledTemplate reutilizável para vários dicts de dados
+        """
+        return _compile_template(text or '')
+    
     @classmethod
     def extract_tags(cls, text: str) -> List[str]:
         """Extrai todas as tags de um texto (excluindo tags AI)"""
-        matches = re.findall(cls.TAG_PATTERN, text)
+        matches = cls.compile(text).raw_tags
         # Filtra tags AI que serão processadas separadamente
         return list(set(m for m in matches if not m.startswith('ai:')))
     
@@ -44,8 +141,8 @@ class TagProcessor:
             >>> TagProcessor.extract_ai_tags("Hello {{ai:intro}} world {{ai:outro}}")
             ['intro', 'outro']
         """
-        matches = re.findall(cls.AI_TAG_PATTERN, text)
-        return list(set(matches))
+        matches = cls.compile(text).raw_tags
+        return list(set(m[3:] for m in matches if m.startswith('ai:')))
     
     @classmethod
     def replace_tags(cls, text: str, data: Dict[str, Any], mappings: Dict[str, str] = None) -> str:
@@ -60,21 +157,8 @@ class TagProcessor:
         Returns:
             Texto com tags substituídas
         """
-        def replace_match(match):
-            tag = match.group(1).strip()
-            
-            # Se tem mapeamento, usa o campo mapeado
-            field = mappings.get(tag, tag) if mappings else tag
-            
-            # Busca o valor (suporta dot notation: "contact.firstname")
-            value = cls._get_nested_value(data, field)
-            
-            if value is None:
-                return ''  # ou match.group(0) para manter a tag
-            
-            return str(value)
-        
-        return re.sub(cls.TAG_PATTERN, replace_match, text)
+        # Tags sem valor viram '' (suporta dot notation: "contact.firstname")
+        return cls.compile(text).render(data, mappings)
     
     @classmethod
     def _get_nested_value(cls, data: Dict, path: str) -> Any:
@@ -82,19 +166,7 @@ class TagProcessor:
         Busca valor em dicionário usando dot notation.
         Ex: "contact.firstname" -> data['contact']['firstname']
         """
-        keys = path.split('.')
-        value = data
-        
-        for key in keys:
-            if isinstance(value, dict):
-                value = value.get(key)
-            else:
-                return None
-            
-            if value is None:
-                return None
-        
-        return value
+        return _lookup(data, _split_path(path))
     
     @classmethod
     def apply_transform(cls, value: Any, transform_type: str, config: Dict = None) -> str:
@@ -112,49 +184,10 @@ class TagProcessor:
         if value is None:
             return ''
         
-        config = config or {}
-        
-        if transform_type == 'uppercase':
-            return str(value).upper()
-        
-        elif transform_type == 'lowercase':
-            return str(value).lower()
-        
-        elif transform_type == 'capitalize':
-            return str(value).capitalize()
-        
-        elif transform_type == 'date_format':
-            from datetime import datetime
-            fmt = config.get('format', '%d/%m/%Y')
-            if isinstance(value, str):
-                # Tenta parsear ISO format
-                try:
-                    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                    return dt.strftime(fmt)
-                except:
-                    return value
-            elif isinstance(value, datetime):
-                return value.strftime(fmt)
-            return str(value)
-        
-        elif transform_type == 'number_format':
-            try:
-                num = float(value)
-                decimals = config.get('decimals', 2)
-                return f"{num:,.{decimals}f}"
-            except:
-                return str(value)
-        
-        elif transform_type == 'currency':
-            try:
-                num = float(value)
-                symbol = config.get('symbol', 'R$')
-                decimals = config.get('decimals', 2)
-                return f"{symbol} {num:,.{decimals}f}"
-            except:
-                return str(value)
-        
-        return str(value)
+        # Implementação compartilhada com o pipeline de field mappings
+        from .field_mapping_pipeline import compile_transform
+        transform = compile_transform(transform_type, config)
+        return transform(value) if transform else str(value)
     
     @classmethod
     def replace_ai_tag(cls, text: str, tag_name: str, value: str) -> str:
@@ -236,3 +269,11 @@ class TagProcessor:
         
         return '; '.join(parts) if parts else "Nenhum dado disponível"
 
+
+
+_TAG_REGEX = re.compile(TagProcessor.TAG_PATTERN)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile_template(text: str) -> CompiledTemplate:
+    return CompiledTemplate(text)
@@ -0,0 +1,157 @@
+"""
+Cache em disco dos arquivos de template Word/PowerPoint (OneDrive/SharePoint).
+
+Em vez de copiar o template no servidor (POST /copy + polling do Location) e
+baixar a cópia para editar, o gerador lê o template deste cache, renderiza
+localmente e faz upload do resultado como um arquivo novo.
+
+A chave é o driveItem id + cTag (muda quando o conteúdo muda), então uma
+edição do template invalida a entrada. O diretório é limitado por tamanho
+(TEMPLATE_BLOB_CACHE_MAX_MB); as entradas menos usadas recentemente (mtime,
+atualizado a cada leitura) são removidas primeiro.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from app.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 512
+
+
+class TemplateBlobCache:
+    """Arquivos de template em disco, com LRU por tamanho total"""
+    
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Diretório do cache (criado se não existir)
+            max_bytes: Tamanho máximo somado das entradas
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def get(self, item_id: str, version: str) -> Optional[bytes]:
+        """Conteúdo do template na versão informada, ou None se não está no cache"""
+        path = self._path(item_id, version)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f'Erro ao ler template {item_id} do cache: {str(e)}')
+            return None
+    
+    def put(self, item_id: str, version: str, content: bytes) -> None:
+        """Grava o conteúdo (escrita atômica) e remove as entradas mais antigas se passar do limite"""
+        if len(content) > self.max_bytes:
+            return
+        
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(item_id, version))
+        except OSError as e:
+            logger.warning(f'Erro ao gravar template {item_id} no cache: {str(e)}')
+            return
+        
+        self._evict()
+    
+    def _path(self, item_id: str, version: str) -> str:
+        digest = hashlib.sha256(f'{item_id}:{version}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.bin')
+    
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.bin'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+_cache: Optional[TemplateBlobCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_template_blob_cache() -> TemplateBlobCache:
+    """
+    Retorna o cache do processo, configurado por TEMPLATE_BLOB_CACHE_DIR e
+    TEMPLATE_BLOB_CACHE_MAX_MB.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from flask import current_app, has_app_context
+                config = current_app.config if has_app_context() else {}
+                directory = config.get('TEMPLATE_BLOB_CACHE_DIR') or os.path.join(
+                    tempfile.gettempdir(), 'template-blob-cache'
+                )
+                max_mb = config.get('TEMPLATE_BLOB_CACHE_MAX_MB', DEFAULT_MAX_MB)
+                _cache = TemplateBlobCache(directory, max_mb * 1024 * 1024)
+    return _cache
+
+
+def get_template_content(base_url: str, authorization: str, item_id: str) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Conteúdo atual do template, do cache ou baixado do Graph.
+    
+    Args:
+        base_url: URL base do Graph (https://graph.microsoft.com/v1.0)
+        authorization: Header Authorization ('Bearer ...')
+        item_id: driveItem id do template
+    
+    Returns:
+        (bytes do arquivo, metadados do driveItem: name, cTag, eTag, parentReference)
+    """
+    headers = {'Authorization': authorization}
+    response = http_client.get(
+        f'{base_url}/me/drive/items/{item_id}',
+        headers=headers,
+        params={'$select': 'id,name,eTag,cTag,size,parentReference'}
+    )
+    response.raise_for_status()
+    metadata = response.json()
+    version = metadata.get('cTag') or metadata.get('eTag')
+    
+    cache = get_template_blob_cache()
+    if version:
+        content = cache.get(item_id, version)
+        if content is not None:
+            logger.info(f'Template {item_id} lido do cache local ({len(content)} bytes)')
+            return content, metadata
+    
+    response = http_client.get(f'{base_url}/me/drive/items/{item_id}/content', headers=headers)
+    response.raise_for_status()
+    content = response.content
+    
+    if version:
+        cache.put(item_id, version, content)
+    
+    return content, metadata
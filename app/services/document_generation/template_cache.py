@@ -0,0 +1,89 @@
+"""
+Cache do índice de tags de templates Google Docs.
+
+O índice (tags normais e tags AI) é guardado no próprio Template, junto de
+detected_tags/version, e vale enquanto o modifiedTime do arquivo no Drive não
+mudar. Com ele, a substituição de tags no documento copiado é montada sem
+baixar a cópia (documents().get).
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.database import db
+from app.models import Template
+from .google_docs import GoogleDocsService
+
+logger = logging.getLogger(__name__)
+
+# Intervalo em que o modifiedTime já conferido no processo é considerado atual
+MODIFIED_TIME_CHECK_SECONDS = 60
+
+_checked: Dict[str, Tuple[str, float]] = {}
+_checked_lock = threading.Lock()
+
+
+def get_template_tag_index(template: Template, docs_service: GoogleDocsService) -> Optional[Dict[str, list]]:
+    """
+    Retorna o índice de tags do template, recalculando se o arquivo mudou no Drive.
+    
+    Args:
+        template: Template Google Docs
+        docs_service: Serviço com as credenciais da organização
+    
+    Returns:
+        Dict com 'tags' e 'ai_tags', ou None se não foi possível ler o Drive (o
+        chamador deve cair no fluxo antigo, que lê o documento copiado)
+    
+    Raises:
+        Erros do banco ao gravar o índice (o chamador faz o rollback)
+    """
+    file_id = template.google_file_id
+    
+    try:
+        modified_time = _recently_checked_modified_time(file_id)
+        if modified_time is None:
+            modified_time = docs_service.get_file_modified_time(file_id)
+            _remember_modified_time(file_id, modified_time)
+        
+        if template.tag_index and modified_time and template.source_modified_time == modified_time:
+            return template.tag_index
+        
+        tag_index = docs_service.extract_tag_index(file_id)
+    except Exception as e:
+        logger.warning(f"Não foi possível obter índice de tags do template {template.id}: {str(e)}")
+        return None
+    
+    # Template alterado no Drive desde o último índice: nova versão
+    if template.source_modified_time and template.detected_tags != tag_index['tags']:
+        template.version = (template.version or 1) + 1
+    
+    template.tag_index = tag_index
+    template.detected_tags = tag_index['tags']
+    template.source_modified_time = modified_time
+    template.last_synced_at = datetime.utcnow()
+    # Só flush: o commit (ou rollback) fica com a geração que chamou, junto do documento gerado
+    db.session.flush()
+    
+    logger.info(
+        f"Índice de tags atualizado para template {template.id}: "
+        f"{len(tag_index['tags'])} tags, {len(tag_index['ai_tags'])} tags AI"
+    )
+    return tag_index
+
+
+def _recently_checked_modified_time(file_id: str) -> Optional[str]:
+    with _checked_lock:
+        item = _checked.get(file_id)
+    if item and time.time() - item[1] < MODIFIED_TIME_CHECK_SECONDS:
+        return item[0]
+    return None
+
+
+def _remember_modified_time(file_id: str, modified_time: Optional[str]) -> None:
+    if not modified_time:
+        return
+    with _checked_lock:
+        _checked[file_id] = (modified_time, time.time())
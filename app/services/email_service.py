@@ -7,7 +7,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-import requests
+from app.utils import http_client
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -174,7 +174,7 @@ class EmailService:
                 message['message']['attachments'] = attachments_data
             
             # Enviar email
-            response = requests.post(
+            response = http_client.post(
                 f'{base_url}/users/{from_email}/sendMail',
                 headers=headers,
                 json=message
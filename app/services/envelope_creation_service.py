@@ -9,14 +9,14 @@ from app.models import (
 )
 from app.models import DataSourceConnection
 from datetime import datetime
-import requests
+from app.utils import http_client
 import uuid
 import json
 import base64
 import io
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from app.utils.google_clients import get_google_service
 from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 
@@ -97,7 +97,7 @@ class EnvelopeCreationService:
                 }
             }
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 headers={
                     "Authorization": token,
@@ -158,7 +158,7 @@ class EnvelopeCreationService:
                 }
             }
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 headers={
                     "Authorization": token,
@@ -196,7 +196,7 @@ class EnvelopeCreationService:
                 'filename': filename
             }
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 headers={
                     "Authorization": token
@@ -253,7 +253,7 @@ class EnvelopeCreationService:
             if not creds:
                 raise Exception("Google account not connected")
             
-            service = build('drive', 'v3', credentials=creds)
+            service = get_google_service('drive', 'v3', creds)
             
             # Verificar tipo de arquivo
             file_metadata = service.files().get(fileId=file_id).execute()
@@ -348,7 +348,7 @@ class EnvelopeCreationService:
                 }
             }
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 headers={
                     "Authorization": token,
@@ -406,7 +406,7 @@ class EnvelopeCreationService:
                 }
             }
             
-            response = requests.patch(
+            response = http_client.patch(
                 url,
                 headers={
                     "Authorization": token,
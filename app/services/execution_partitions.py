@@ -0,0 +1,344 @@
+"""
+Partições mensais e retenção de workflow_executions.
+
+A tabela é particionada por RANGE (created_at), uma partição por mês
+(workflow_executions_pAAAAMM). As linhas anteriores ao particionamento ficam
+na partição workflow_executions_legacy até serem divididas em meses
+(split_legacy_partition).
+
+Manutenção (task diária do Celery beat):
+- ensure_future_partitions: cria as partições dos próximos meses, para que os
+  inserts nunca caiam na partição default (linhas que já caíram nela são
+  movidas para a partição do mês ao criá-la)
+- apply_retention: partições inteiramente mais antigas que a retenção são
+  exportadas (opcional) para JSON Lines comprimido e removidas com DROP, sem
+  DELETE linha a linha nem VACUUM da tabela inteira
+
+Uso:
+    ensure_future_partitions(months_ahead=3)
+    report = apply_retention(retention_days=365, archive_dir='/var/archive')
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import text
+
+from app.database import db
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = 'workflow_executions'
+LEGACY_PARTITION = 'workflow_executions_legacy'
+# Tabela temporária para as linhas retiradas da partição default
+PENDING_TABLE = 'workflow_executions_pending'
+DEFAULT_MONTHS_AHEAD = 3
+ARCHIVE_FETCH_SIZE = 1000
+
+# FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00') / FROM (MINVALUE)
+_BOUND_PATTERN = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \((?:'([^']+)'|MAXVALUE)\)")
+
+
+class ExecutionPartition(NamedTuple):
+    """Partição de workflow_executions e seu intervalo [lower, upper)"""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    is_default: bool = False
+
+
+def month_start(moment: datetime) -> datetime:
+    """Primeiro instante do mês"""
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """Primeiro dia do mês deslocado em N meses"""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f'{TABLE_NAME}_p{month:%Y%m}'
+
+
+def months_between(first: datetime, last: datetime) -> List[datetime]:
+    """Início de cada mês de first até last (inclusive)"""
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def parse_partition_bound(bound: str) -> tuple:
+    """
+    Intervalo de uma partição a partir de pg_get_expr(relpartbound).
+    
+    Args:
+        bound: Ex: "FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')"
+    
+    Returns:
+        Tupla (lower, upper, is_default); None para MINVALUE/MAXVALUE
+    """
+    if bound.strip().upper() == 'DEFAULT':
+        return None, None, True
+    
+    match = _BOUND_PATTERN.search(bound)
+    if not match:
+        raise ValueError(f'Intervalo de partição não reconhecido: {bound}')
+    lower, upper = (datetime.fromisoformat(value) if value else None for value in match.groups())
+    return lower, upper, False
+
+
+def list_partitions() -> List[ExecutionPartition]:
+    """Partições atuais de workflow_executions, em ordem de intervalo"""
+    rows = db.session.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {'table': TABLE_NAME}).all()
+    
+    partitions = [ExecutionPartition(name, *parse_partition_bound(bound)) for name, bound in rows]
+    return sorted(partitions, key=lambda p: (p.is_default, p.lower or datetime.min))
+
+
+def ensure_future_partitions(months_ahead: int = DEFAULT_MONTHS_AHEAD, now: Optional[datetime] = None) -> List[str]:
+    """
+    Cria as partições do mês atual e dos próximos meses que ainda não existem,
+    uma transação por partição. Meses anteriores que já têm linhas na
+    partição default (ex: beat parado na virada do mês) também ganham partição.
+    
+    Args:
+        months_ahead: Quantidade de meses à frente
+        now: Referência (padrão: agora, UTC)
+    
+    Returns:
+        Nomes das partições criadas
+    """
+    current = month_start(now or datetime.utcnow())
+    partitions = list_partitions()
+    covered = [(p.lower, p.upper) for p in partitions if not p.is_default]
+    default = next((p.name for p in partitions if p.is_default), None)
+    created = []
+    
+    first = current
+    if default:
+        oldest = db.session.execute(text(f'SELECT min(created_at) FROM "{default}"')).scalar()
+        if oldest is not None and oldest < current:
+            first = month_start(oldest)
+    
+    for lower in months_between(first, add_months(current, months_ahead)):
+        upper = add_months(lower, 1)
+        if any(_overlaps(lower, upper, other_lower, other_upper) for other_lower, other_upper in covered):
+            continue
+        
+        moved = create_month_partition(lower, default)
+        db.session.commit()
+        
+        covered.append((lower, upper))
+        created.append(partition_name(lower))
+        if moved:
+            logger.info(f'{moved} execuções movidas de {default} para {partition_name(lower)}')
+    
+    if created:
+        logger.info(f'Partições criadas em {TABLE_NAME}: {", ".join(created)}')
+    return created
+
+
+def create_month_partition(month: datetime, default_partition: Optional[str] = None) -> int:
+    """
+    Cria a partição do mês, sem commit.
+    
+    O Postgres recusa criar a partição se a partição default já tem linhas do
+    intervalo. Nesse caso elas são retiradas da default (com a default
+    bloqueada, para não receber novas linhas do intervalo no meio do caminho)
+    e reinseridas pela tabela pai depois do CREATE, na mesma transação.
+    
+    Args:
+        month: Início do mês
+        default_partition: Nome da partição default, se existir
+    
+    Returns:
+        Quantidade de linhas movidas da partição default
+    """
+    bounds = {'lower': month, 'upper': add_months(month, 1)}
+    moved = 0
+    
+    if default_partition:
+        db.session.execute(text(f'LOCK TABLE "{default_partition}" IN SHARE ROW EXCLUSIVE MODE'))
+        pending = db.session.execute(text(f"""
+            SELECT 1 FROM "{default_partition}"
+            WHERE created_at >= :lower AND created_at < :upper
+            LIMIT 1
+        """), bounds).first()
+        if pending:
+            db.session.execute(text(f'CREATE TEMP TABLE {PENDING_TABLE} (LIKE {TABLE_NAME})'))
+            moved = db.session.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM "{default_partition}"
+                    WHERE created_at >= :lower AND created_at < :upper
+                    RETURNING *
+                )
+                INSERT INTO {PENDING_TABLE} SELECT * FROM moved
+            """), bounds).rowcount
+    
+    db.session.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF {TABLE_NAME} '
+        f"FOR VALUES FROM ('{bounds['lower'].isoformat()}') TO ('{bounds['upper'].isoformat()}')"
+    ))
+    
+    if moved:
+        db.session.execute(text(f'INSERT INTO {TABLE_NAME} SELECT * FROM {PENDING_TABLE}'))
+        db.session.execute(text(f'DROP TABLE {PENDING_TABLE}'))
+    return moved
+
+
+def split_legacy_partition() -> List[Dict[str, Any]]:
+    """
+    Divide a partição legada (linhas anteriores ao particionamento) em partições
+    mensais, um mês por transação.
+    
+    A partição legada é desanexada antes: enquanto a divisão roda, as execuções
+    dos meses ainda não movidos não aparecem nas consultas. Rodar em janela de
+    manutenção (scripts/split_workflow_executions_legacy.py).
+    
+    Pode ser rodada de novo se for interrompida: a tabela legada é encontrada
+    mesmo já desanexada e a divisão continua do mês mais antigo que ainda tem
+    linhas nela.
+    
+    Returns:
+        Lista por mês: {'partition', 'rows'}
+    """
+    if db.session.execute(text('SELECT to_regclass(:name)'), {'name': LEGACY_PARTITION}).scalar() is None:
+        logger.info(f'{LEGACY_PARTITION} não existe, nada a dividir')
+        return []
+    
+    partitions = list_partitions()
+    if any(p.name == LEGACY_PARTITION for p in partitions):
+        db.session.execute(text(f'ALTER TABLE {TABLE_NAME} DETACH PARTITION {LEGACY_PARTITION}'))
+        db.session.commit()
+    else:
+        logger.info(f'{LEGACY_PARTITION} já desanexada, retomando a divisão')
+    default = next((p.name for p in partitions if p.is_default), None)
+    
+    first, last = db.session.execute(text(
+        f'SELECT min(created_at), max(created_at) FROM {LEGACY_PARTITION}'
+    )).one()
+    report = []
+    
+    for month in months_between(first, last) if first else []:
+        name = partition_name(month)
+        create_month_partition(month, default)
+        moved = db.session.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {LEGACY_PARTITION}
+                WHERE created_at >= :lower AND created_at < :upper
+                RETURNING *
+            )
+            INSERT INTO {TABLE_NAME} SELECT * FROM moved
+        """), {'lower': month, 'upper': add_months(month, 1)}).rowcount
+        db.session.commit()
+        
+        report.append({'partition': name, 'rows': moved})
+        logger.info(f'{LEGACY_PARTITION}: {moved} execuções movidas para {name}')
+    
+    db.session.execute(text(f'DROP TABLE {LEGACY_PARTITION}'))
+    db.session.commit()
+    return report
+
+
+def apply_retention(
+    retention_days: int,
+    archive_dir: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Remove as partições inteiramente anteriores ao prazo de retenção.
+    
+    Antes do DROP, as aprovações das execuções removidas são apagadas e os
+    itens de geração em lote perdem a referência (como faziam as FKs com
+    ON DELETE CASCADE / SET NULL antes do particionamento).
+    
+    Args:
+        retention_days: Dias de histórico mantidos (<= 0 desativa a retenção)
+        archive_dir: Diretório para exportar cada partição em .jsonl.gz antes
+            do DROP (sem diretório, as partições são só removidas)
+        now: Referência (padrão: agora, UTC)
+    
+    Returns:
+        Lista por partição removida: {'partition', 'rows', 'archive'}
+    """
+    if retention_days <= 0:
+        return []
+    
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    report = []
+    
+    for partition in list_partitions():
+        if partition.is_default or partition.upper is None or partition.upper > cutoff:
+            continue
+        
+        archive_path, rows = None, None
+        if archive_dir:
+            archive_path, rows = archive_partition(partition.name, archive_dir)
+        
+        db.session.execute(text(f"""
+            DELETE FROM workflow_approvals
+            WHERE workflow_execution_id IN (SELECT id FROM "{partition.name}")
+        """))
+        db.session.execute(text(f"""
+            UPDATE bulk_generation_items SET execution_id = NULL
+            WHERE execution_id IN (SELECT id FROM "{partition.name}")
+        """))
+        db.session.execute(text(f'ALTER TABLE {TABLE_NAME} DETACH PARTITION "{partition.name}"'))
+        db.session.execute(text(f'DROP TABLE "{partition.name}"'))
+        db.session.commit()
+        
+        report.append({'partition': partition.name, 'rows': rows, 'archive': archive_path})
+        logger.info(f'Partição {partition.name} removida (retenção de {retention_days} dias)')
+    
+    return report
+
+
+def archive_partition(name: str, archive_dir: str) -> tuple:
+    """
+    Exporta uma partição para <archive_dir>/<partição>.jsonl.gz (uma execução
+    por linha), lendo com cursor no servidor.
+    
+    O arquivo é escrito com extensão .tmp e renomeado só no final: um arquivo
+    .jsonl.gz presente está sempre completo.
+    
+    Returns:
+        Tupla (caminho do arquivo, quantidade de linhas)
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{name}.jsonl.gz')
+    tmp_path = f'{path}.tmp'
+    rows = 0
+    
+    result = db.session.connection().execution_options(
+        stream_results=True, yield_per=ARCHIVE_FETCH_SIZE
+    ).execute(text(f'SELECT row_to_json(e)::text FROM "{name}" e ORDER BY created_at'))
+    
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as archive:
+        for (line,) in result:
+            archive.write(line)
+            archive.write('\n')
+            rows += 1
+    
+    os.replace(tmp_path, path)
+    logger.info(f'Partição {name} exportada para {path} ({rows} execuções)')
+    return path, rows
+
+
+def _overlaps(lower, upper, other_lower, other_upper) -> bool:
+    other_lower = other_lower or datetime.min
+    other_upper = other_upper or datetime.max
+    return lower < other_upper and other_lower < upper
@@ -1,7 +1,7 @@
 from typing import Dict, Any, List
 from app.models import GeneratedDocument, SignatureRequest, DataSourceConnection
 from app.database import db
-import requests
+from app.utils import http_client
 import logging
 from .base import BaseIntegration
 
@@ -112,7 +112,7 @@ class ClickSignIntegration(BaseIntegration):
             }
         }
         
-        response = requests.post(
+        response = http_client.post(
             url,
             headers={
                 "Authorization": self.api_key,
@@ -153,7 +153,7 @@ class ClickSignIntegration(BaseIntegration):
             }
         }
         
-        response = requests.post(
+        response = http_client.post(
             url,
             headers={
                 "Authorization": self.api_key,
@@ -178,7 +178,7 @@ class ClickSignIntegration(BaseIntegration):
             }
         }
         
-        response = requests.patch(
+        response = http_client.patch(
             url,
             headers={
                 "Authorization": self.api_key,
@@ -206,7 +206,7 @@ class ClickSignIntegration(BaseIntegration):
         # Consultar status no ClickSign
         url = f"{self.BASE_URL}/envelopes/{signature_request.external_id}"
         
-        response = requests.get(
+        response = http_client.get(
             url,
             headers={
                 "Authorization": self.api_key,
@@ -1,15 +1,18 @@
 """
 WorkflowExecutor - Orquestrador de execução de workflows com nodes.
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Optional, List
 from datetime import datetime
 import logging
 import time
-import requests
+import uuid
+from flask import current_app
 
 from app.database import db
 from app.models import Workflow, WorkflowNode, WorkflowExecution, GeneratedDocument
 from app.services.data_sources.hubspot import HubSpotDataSource
+from app.services.workflow_scheduler import DAGScheduler
+from app.utils import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +50,29 @@ class ExecutionContext:
             }
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExecutionContext':
+        """Recria o context a partir de to_dict() (snapshot da aprovação)"""
+        context = cls(
+            workflow_id=data.get('workflow_id'),
+            execution_id=data.get('execution_id'),
+            source_object_id=data.get('source_object_id'),
+            source_object_type=data.get('source_object_type')
+        )
+        context.source_data = dict(data.get('source_data') or {})
+        context.generated_documents = list(data.get('generated_documents') or [])
+        context.signature_requests = list(data.get('signature_requests') or [])
+        
+        metadata = dict(data.get('metadata') or {})
+        if isinstance(metadata.get('started_at'), str):
+            try:
+                metadata['started_at'] = datetime.fromisoformat(metadata['started_at'])
+            except ValueError:
+                metadata.pop('started_at')
+        metadata['errors'] = list(metadata.get('errors') or [])
+        context.metadata.update(metadata)
+        return context
+    
     def add_error(self, node_id: str, node_type: str, error: str):
         """Adiciona erro ao context"""
         self.metadata['errors'].append({
@@ -54,6 +80,43 @@ class ExecutionContext:
             'node_type': node_type,
             'error': error
         })
+    
+    def fork(self) -> 'ExecutionContext':
+        """
+        Cria uma cópia do context para um node executado em paralelo.
+        
+        O node escreve apenas na cópia; o scheduler mescla o resultado de volta
+        com merge() quando o node termina.
+        """
+        branch = ExecutionContext(
+            workflow_id=self.workflow_id,
+            execution_id=self.execution_id,
+            source_object_id=self.source_object_id,
+            source_object_type=self.source_object_type
+        )
+        branch.source_data = dict(self.source_data)
+        branch.generated_documents = list(self.generated_documents)
+        branch.signature_requests = list(self.signature_requests)
+        branch.metadata = {**self.metadata, 'errors': []}
+        branch._forked_from = (len(self.generated_documents), len(self.signature_requests))
+        return branch
+    
+    def merge(self, branch: 'ExecutionContext') -> None:
+        """Mescla no context os dados escritos por um node executado em um fork"""
+        documents_base, signatures_base = getattr(branch, '_forked_from', (0, 0))
+        
+        self.source_data.update(branch.source_data)
+        self.generated_documents.extend(branch.generated_documents[documents_base:])
+        self.signature_requests.extend(branch.signature_requests[signatures_base:])
+        
+        errors = self.metadata['errors']
+        for key, value in branch.metadata.items():
+            if key == 'errors':
+                errors.extend(value)
+            elif key == 'current_node_position':
+                self.metadata[key] = max(self.metadata.get(key) or 0, value or 0)
+            elif key != 'started_at':
+                self.metadata[key] = value
 
 
 class NodeExecutor:
@@ -90,6 +153,12 @@ class TriggerNodeExecutor(NodeExecutor):
             logger.info(f"Webhook trigger node executado: dados recebidos do webhook")
             return context
         
+        # Dados já buscados em lote (geração em lote)
+        if context.metadata.get('source_data_prefetched') and context.source_data:
+            context.metadata['current_node_position'] = node.position
+            logger.info(f"Trigger node executado: dados pré-carregados de {context.source_object_type} {context.source_object_id}")
+            return context
+        
         # Trigger HubSpot (comportamento original)
         source_connection_id = config.get('source_connection_id')
         source_object_type = config.get('source_object_type') or context.source_object_type
@@ -106,11 +175,16 @@ class TriggerNodeExecutor(NodeExecutor):
         if connection.source_type != 'hubspot':
             raise ValueError(f'Tipo de conexão não suportado: {connection.source_type}')
         
-        # Extrair dados do HubSpot
+        # Extrair dados do HubSpot (só as propriedades usadas pelo workflow)
+        from app.services.data_sources.hubspot_projection import get_workflow_property_projection
+        workflow = Workflow.query.get(context.workflow_id)
+        projection = get_workflow_property_projection(workflow, source_object_type) if workflow else None
+        
         data_source = HubSpotDataSource(connection)
         source_data = data_source.get_object_data(
             source_object_type,
-            context.source_object_id
+            context.source_object_id,
+            projection=projection
         )
         
         # Normalizar dados (mover properties para nível raiz)
@@ -161,14 +235,9 @@ class GoogleDocsNodeExecutor(NodeExecutor):
         # Criar generator
         generator = DocumentGenerator(google_creds)
         
-        # Buscar field mappings do node (se configurado no config)
-        field_mappings_data = config.get('field_mappings', [])
-        mappings = {}
-        for mapping_data in field_mappings_data:
-            template_tag = mapping_data.get('template_tag')
-            source_field = mapping_data.get('source_field')
-            if template_tag and source_field:
-                mappings[template_tag] = source_field
+        # Field mappings do node compilados (transformações e valores padrão)
+        from app.services.document_generation.field_mapping_pipeline import get_workflow_mapping_pipeline
+        mappings = get_workflow_mapping_pipeline(workflow, node)
         
         # Gerar nome do documento
         from app.services.document_generation.tag_processor import TagProcessor
@@ -186,6 +255,10 @@ class GoogleDocsNodeExecutor(NodeExecutor):
         
         doc_name = TagProcessor.replace_tags(output_name_template, data_with_meta)
         
+        # Índice de tags do template (cacheado pelo modifiedTime do Drive)
+        from app.services.document_generation.template_cache import get_template_tag_index
+        tag_index = get_template_tag_index(template, generator.google_docs)
+        
         # Copiar template
         new_doc = generator.google_docs.copy_template(
             template_id=template.google_file_id,
@@ -214,18 +287,19 @@ class GoogleDocsNodeExecutor(NodeExecutor):
         generator.google_docs.replace_tags_in_document(
             document_id=new_doc['id'],
             data=combined_data,
-            mappings=mappings
+            mappings=mappings,
+            tag_index=tag_index
         )
         
         # Gerar PDF se configurado
         pdf_result = None
         if config.get('create_pdf', True):
-            pdf_bytes = generator.google_docs.export_as_pdf(new_doc['id'])
-            pdf_result = generator._upload_pdf(
-                pdf_bytes,
-                f"{doc_name}.pdf",
-                config.get('output_folder_id')
-            )
+            with generator.google_docs.export_pdf_artifact(new_doc['id'], f"{doc_name}.pdf") as pdf:
+                pdf_result = generator._upload_pdf(
+                    pdf,
+                    f"{doc_name}.pdf",
+                    config.get('output_folder_id')
+                )
         
         # Criar registro do documento
         generated_doc = GeneratedDocument(
@@ -274,6 +348,7 @@ class MicrosoftWordNodeExecutor(NodeExecutor):
     def execute(self, node: WorkflowNode, context: ExecutionContext) -> ExecutionContext:
         """Gera documento no Microsoft Word"""
         from app.services.document_generation.microsoft_word import MicrosoftWordService
+        from app.services.document_generation.graph_files import upload_new_file
         from app.models import Template, GeneratedDocument, DataSourceConnection
         from datetime import datetime
         from app.services.document_generation.tag_processor import TagProcessor
@@ -335,14 +410,9 @@ class MicrosoftWordNodeExecutor(NodeExecutor):
             'user_email': credentials.get('user_email'),
         })
         
-        # Buscar field mappings do node
-        field_mappings_data = config.get('field_mappings', [])
-        mappings = {}
-        for mapping_data in field_mappings_data:
-            template_tag = mapping_data.get('template_tag')
-            source_field = mapping_data.get('source_field')
-            if template_tag and source_field:
-                mappings[template_tag] = source_field
+        # Field mappings do node compilados (transformações e valores padrão)
+        from app.services.document_generation.field_mapping_pipeline import get_workflow_mapping_pipeline
+        mappings = get_workflow_mapping_pipeline(workflow, node)
         
         # Gerar nome do documento
         output_name_template = config.get('output_name_template', '{{object_type}} - {{timestamp}}')
@@ -357,13 +427,6 @@ class MicrosoftWordNodeExecutor(NodeExecutor):
         
         doc_name = TagProcessor.replace_tags(output_name_template, data_with_meta)
         
-        # Copiar template
-        new_doc = word_service.copy_template(
-            template_id=template.microsoft_file_id or template.google_file_id,  # Fallback para google_file_id
-            new_name=doc_name,
-            folder_id=config.get('output_folder_id')
-        )
-        
         # Processar AI mappings (se houver)
         ai_replacements = {}
         ai_mappings = list(workflow.ai_mappings)
@@ -392,31 +455,28 @@ class MicrosoftWordNodeExecutor(NodeExecutor):
         # Combinar dados
         combined_data = {**context.source_data, **ai_replacements}
         
-        # Substituir tags
-        word_service.replace_tags_in_document(
-            document_id=new_doc['id'],
+        # Renderizar o template (cache local) e criar o documento, sem copiar no servidor
+        new_doc = word_service.create_from_template(
+            template_id=template.microsoft_file_id or template.google_file_id,  # Fallback para google_file_id
+            new_name=doc_name,
             data=combined_data,
-            mappings=mappings
+            mappings=mappings,
+            folder_id=config.get('output_folder_id')
         )
         
         # Gerar PDF se configurado
         pdf_result = None
         if config.get('create_pdf', True):
             try:
-                pdf_bytes = word_service.export_as_pdf(new_doc['id'])
-                # Upload PDF para OneDrive
+                # Upload PDF para OneDrive (upload session em partes acima de 4MB)
                 pdf_name = f"{doc_name}.pdf"
-                pdf_upload_response = requests.put(
-                    f'https://graph.microsoft.com/v1.0/me/drive/items/{config.get("output_folder_id", "root")}/children/{pdf_name}/content',
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    data=pdf_bytes
-                )
-                if pdf_upload_response.ok:
-                    pdf_file = pdf_upload_response.json()
-                    pdf_result = {
-                        'id': pdf_file['id'],
-                        'url': pdf_file.get('webUrl')
-                    }
+                with word_service.export_pdf_artifact(new_doc['id'], pdf_name) as pdf:
+                    pdf_result = upload_new_file(
+                        word_service.access_token,
+                        config.get('output_folder_id'),
+                        pdf_name,
+                        pdf.view()
+                    )
             except Exception as e:
                 logger.warning(f'Erro ao gerar PDF do Word: {str(e)}')
         
@@ -551,15 +611,15 @@ class GoogleSlidesNodeExecutor(NodeExecutor):
         # Gerar PDF se configurado
         pdf_result = None
         if config.get('create_pdf', True):
-            pdf_bytes = slides_service.export_as_pdf(new_pres['id'])
             # Upload PDF para Google Drive
             from app.services.document_generation.generator import DocumentGenerator
             generator = DocumentGenerator(google_creds)
-            pdf_result = generator._upload_pdf(
-                pdf_bytes,
-                f"{pres_name}.pdf",
-                config.get('output_folder_id')
-            )
+            with slides_service.export_pdf_artifact(new_pres['id'], f"{pres_name}.pdf") as pdf:
+                pdf_result = generator._upload_pdf(
+                    pdf,
+                    f"{pres_name}.pdf",
+                    config.get('output_folder_id')
+                )
         
         # Criar registro do documento
         generated_doc = GeneratedDocument(
@@ -608,6 +668,7 @@ class MicrosoftPowerPointNodeExecutor(NodeExecutor):
     def execute(self, node: WorkflowNode, context: ExecutionContext) -> ExecutionContext:
         """Gera apresentação no Microsoft PowerPoint"""
         from app.services.document_generation.microsoft_powerpoint import MicrosoftPowerPointService
+        from app.services.document_generation.graph_files import upload_new_file
         from app.models import Template, GeneratedDocument, DataSourceConnection
         from datetime import datetime
         from app.services.document_generation.tag_processor import TagProcessor
@@ -689,13 +750,6 @@ class MicrosoftPowerPointNodeExecutor(NodeExecutor):
         
         pres_name = TagProcessor.replace_tags(output_name_template, data_with_meta)
         
-        # Copiar template
-        new_pres = ppt_service.copy_template(
-            template_id=template.microsoft_file_id or template.google_file_id,
-            new_name=pres_name,
-            folder_id=config.get('output_folder_id')
-        )
-        
         # Processar AI mappings (se houver)
         ai_replacements = {}
         ai_mappings = list(workflow.ai_mappings)
@@ -724,30 +778,28 @@ class MicrosoftPowerPointNodeExecutor(NodeExecutor):
         # Combinar dados
         combined_data = {**context.source_data, **ai_replacements}
         
-        # Substituir tags
-        ppt_service.replace_tags_in_presentation(
-            presentation_id=new_pres['id'],
+        # Renderizar o template (cache local) e criar a apresentação, sem copiar no servidor
+        new_pres = ppt_service.create_from_template(
+            template_id=template.microsoft_file_id or template.google_file_id,
+            new_name=pres_name,
             data=combined_data,
-            mappings=mappings
+            mappings=mappings,
+            folder_id=config.get('output_folder_id')
         )
         
         # Gerar PDF se configurado
         pdf_result = None
         if config.get('create_pdf', True):
             try:
-                pdf_bytes = ppt_service.export_as_pdf(new_pres['id'])
+                # Upload PDF para OneDrive (upload session em partes acima de 4MB)
                 pdf_name = f"{pres_name}.pdf"
-                pdf_upload_response = requests.put(
-                    f'https://graph.microsoft.com/v1.0/me/drive/items/{config.get("output_folder_id", "root")}/children/{pdf_name}/content',
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    data=pdf_bytes
-                )
-                if pdf_upload_response.ok:
-                    pdf_file = pdf_upload_response.json()
-                    pdf_result = {
-                        'id': pdf_file['id'],
-                        'url': pdf_file.get('webUrl')
-                    }
+                with ppt_service.export_pdf_artifact(new_pres['id'], pdf_name) as pdf:
+                    pdf_result = upload_new_file(
+                        ppt_service.access_token,
+                        config.get('output_folder_id'),
+                        pdf_name,
+                        pdf.view()
+                    )
             except Exception as e:
                 logger.warning(f'Erro ao gerar PDF do PowerPoint: {str(e)}')
         
@@ -1133,13 +1185,9 @@ class HumanInLoopNodeExecutor(NodeExecutor):
                 workflow_execution_id=execution.id,
                 workflow_id=context.workflow_id,
                 node_id=node.id,
-                execution_context={
-                    'source_object_id': context.source_object_id,
-                    'source_object_type': context.source_object_type,
-                    'source_data': context.source_data,
-                    'metadata': context.metadata,
-                    'generated_documents': context.generated_documents
-                },
+                # Snapshot deste branch; substituído pelo context mesclado de
+                # todos os branches quando o scheduler termina (_save_pause_snapshot)
+                execution_context=context.to_dict(),
                 approver_email=approver_email,
                 approval_token=secrets.token_urlsafe(32),
                 status='pending',
@@ -1202,7 +1250,7 @@ class HumanInLoopNodeExecutor(NodeExecutor):
                 
                 # TODO: Implementar envio real quando sistema de email da organização estiver configurado
                 # Por enquanto, o link pode ser copiado do log ou aprovado diretamente pela URL
-                
+        
         except Exception as e:
             logger.exception(f'Erro ao preparar emails de aprovação: {str(e)}')
             # Não falhar a execução se email falhar, apenas log
@@ -1281,8 +1329,6 @@ class WebhookNodeExecutor(NodeExecutor):
     
     def execute(self, node: WorkflowNode, context: ExecutionContext) -> ExecutionContext:
         """Chama webhook com dados do context"""
-        import requests
-        
         config = node.config or {}
         url = config.get('url')
         method = config.get('method', 'POST').upper()
@@ -1306,7 +1352,7 @@ class WebhookNodeExecutor(NodeExecutor):
         
         # Chamar webhook
         try:
-            response = requests.request(
+            response = http_client.request(
                 method=method,
                 url=url,
                 json=body,
@@ -1350,7 +1396,7 @@ class WorkflowExecutor:
         user_id: Optional[str] = None
     ) -> WorkflowExecution:
         """
-        Executa um workflow processando nodes sequencialmente.
+        Executa um workflow processando os nodes conforme o grafo de dependências.
         
         Args:
             workflow: Workflow com nodes configurados
@@ -1361,30 +1407,76 @@ class WorkflowExecutor:
         Returns:
             WorkflowExecution com resultado da execução
         """
-        # Criar registro de execução
+        execution = self.create_execution(
+            workflow=workflow,
+            source_object_id=source_object_id,
+            source_object_type=source_object_type
+        )
+        return self.run_execution(execution, workflow)
+    
+    def create_execution(
+        self,
+        workflow: Workflow,
+        source_object_id: str,
+        source_object_type: str,
+        trigger_type: str = 'manual',
+        trigger_data: Optional[Dict[str, Any]] = None,
+        status: str = 'running'
+    ) -> WorkflowExecution:
+        """
+        Cria o registro de execução sem processar os nodes.
+        
+        Usado diretamente pelas rotas que enfileiram a execução (status 'queued'),
+        para devolver o execution_id antes do processamento.
+        
+        Args:
+            workflow: Workflow a ser executado
+            source_object_id: ID do objeto na fonte
+            source_object_type: Tipo do objeto
+            trigger_type: Origem da execução (manual, webhook, hubspot_action)
+            trigger_data: Dados adicionais do trigger (ex: source_data do webhook)
+            status: Status inicial ('running' ou 'queued')
+        
+        Returns:
+            WorkflowExecution persistido
+        """
         execution = WorkflowExecution(
             workflow_id=workflow.id,
-            trigger_type='manual',
+            trigger_type=trigger_type,
             trigger_data={
+                **(trigger_data or {}),
                 'source_object_id': source_object_id,
                 'source_object_type': source_object_type
             },
-            status='running'
+            status=status
         )
         db.session.add(execution)
         db.session.commit()
         
+        return execution
+    
+    def run_execution(self, execution: WorkflowExecution, workflow: Optional[Workflow] = None) -> WorkflowExecution:
+        """
+        Processa os nodes de uma execução já criada.
+        
+        Args:
+            execution: WorkflowExecution criado via create_execution
+            workflow: Workflow da execução (buscado se não fornecido)
+        
+        Returns:
+            WorkflowExecution com resultado da execução
+        """
+        workflow = workflow or execution.workflow
+        trigger_data = execution.trigger_data or {}
+        source_object_id = trigger_data.get('source_object_id')
+        source_object_type = trigger_data.get('source_object_type')
+        
         start_time = datetime.utcnow()
+        execution.status = 'running'
+        execution.started_at = start_time
+        db.session.commit()
         
         try:
-            # Buscar nodes ordenados por position
-            nodes = WorkflowNode.query.filter_by(
-                workflow_id=workflow.id
-            ).order_by(WorkflowNode.position).all()
-            
-            if not nodes:
-                raise ValueError('Workflow não possui nodes configurados')
-            
             # Criar execution context
             context = ExecutionContext(
                 workflow_id=str(workflow.id),
@@ -1393,48 +1485,144 @@ class WorkflowExecutor:
                 source_object_type=source_object_type
             )
             
-            # Processar cada node sequencialmente
-            for node in nodes:
-                try:
-                    executor = self.executors.get(node.node_type)
-                    if not executor:
-                        raise ValueError(f'Executor não encontrado para node_type: {node.node_type}')
-                    
-                    context = executor.execute(node, context)
-                    
-                except Exception as e:
-                    # Registrar erro mas continuar (ou parar, dependendo da configuração)
-                    context.add_error(str(node.id), node.node_type, str(e))
-                    logger.error(f"Erro ao executar node {node.id} ({node.node_type}): {str(e)}")
-                    # Para erros críticos, interromper execução
-                    if node.node_type in ['trigger', 'google-docs']:
-                        raise
-            
-            # Atualizar execução com resultado
-            end_time = datetime.utcnow()
-            execution.status = 'completed' if not context.metadata['errors'] else 'failed'
-            execution.completed_at = end_time
-            execution.execution_time_ms = int((end_time - start_time).total_seconds() * 1000)
-            
-            # Associar documento gerado se houver
-            if context.generated_documents:
-                last_doc_id = context.generated_documents[-1].get('document_id')
-                if last_doc_id:
-                    execution.generated_document_id = last_doc_id
-            
-            db.session.commit()
-            
-            logger.info(f"Workflow {workflow.id} executado com sucesso em {execution.execution_time_ms}ms")
-            
-            return execution
+            # Dados já recebidos pelo trigger (ex: payload mapeado do webhook)
+            if trigger_data.get('source_data'):
+                context.source_data = dict(trigger_data['source_data'])
+                context.metadata['source_data_prefetched'] = bool(trigger_data.get('source_data_prefetched'))
             
+            return self._run_nodes(execution, workflow, context, start_time)
+        
         except Exception as e:
-            logger.error(f"Erro ao executar workflow {workflow.id}: {str(e)}")
-            
-            execution.status = 'failed'
-            execution.error_message = str(e)
-            execution.completed_at = datetime.utcnow()
-            execution.execution_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
-            db.session.commit()
-            
+            self._mark_failed(execution, workflow, e, start_time)
+            raise
+    
+    def resume_execution(
+        self,
+        execution: WorkflowExecution,
+        context: ExecutionContext,
+        completed_node_ids: Iterable[str]
+    ) -> WorkflowExecution:
+        """
+        Retoma uma execução pausada (human-in-loop) executando apenas os nodes
+        ainda não concluídos, seguindo o mesmo grafo de dependências.
+        
+        Args:
+            execution: WorkflowExecution pausado
+            context: Context mesclado salvo no snapshot da aprovação
+            completed_node_ids: Nodes já executados antes da pausa
+        
+        Returns:
+            WorkflowExecution com resultado da execução
+        """
+        workflow = execution.workflow
+        start_time = datetime.utcnow()
+        execution.status = 'running'
+        db.session.commit()
+        
+        try:
+            return self._run_nodes(execution, workflow, context, start_time, completed_node_ids)
+        except Exception as e:
+            self._mark_failed(execution, workflow, e, start_time)
             raise
+    
+    def _run_nodes(
+        self,
+        execution: WorkflowExecution,
+        workflow: Workflow,
+        context: ExecutionContext,
+        start_time: datetime,
+        completed_node_ids: Iterable[str] = ()
+    ) -> WorkflowExecution:
+        """Executa os nodes pendentes pelo DAGScheduler e grava o resultado na execução"""
+        # Buscar nodes ordenados por position
+        nodes = WorkflowNode.query.filter_by(
+            workflow_id=workflow.id
+        ).order_by(WorkflowNode.position).all()
+        
+        if not nodes:
+            raise ValueError('Workflow não possui nodes configurados')
+        
+        completed_node_ids = set(completed_node_ids)
+        self._update_progress(execution, len(nodes), len(completed_node_ids))
+        
+        # Processar nodes seguindo o grafo (branches independentes em paralelo)
+        scheduler = DAGScheduler(
+            run_node=self._execute_node,
+            max_workers=current_app.config.get('WORKFLOW_MAX_PARALLEL_NODES', 4),
+            on_progress=lambda completed, node: self._update_progress(execution, len(nodes), completed, node)
+        )
+        context = scheduler.run(nodes, context, completed=completed_node_ids)
+        
+        # Atualizar execução com resultado
+        end_time = datetime.utcnow()
+        if context.metadata.get('paused'):
+            execution.status = 'paused'
+            self._save_pause_snapshot(context, scheduler.completed_node_ids)
+        else:
+            execution.status = 'completed' if not context.metadata['errors'] else 'failed'
+            execution.completed_at = end_time
+            self._update_progress(execution, len(nodes), len(nodes))
+        # Retomadas somam ao tempo já registrado antes da pausa
+        execution.execution_time_ms = (execution.execution_time_ms or 0) + int((end_time - start_time).total_seconds() * 1000)
+        
+        # Associar documento gerado se houver
+        if context.generated_documents:
+            last_doc_id = context.generated_documents[-1].get('document_id')
+            if last_doc_id:
+                execution.generated_document_id = last_doc_id
+        
+        db.session.commit()
+        
+        logger.info(f"Workflow {workflow.id} executado com sucesso em {execution.execution_time_ms}ms")
+        
+        return execution
+    
+    def _save_pause_snapshot(self, context: ExecutionContext, completed_node_ids: Iterable[str]) -> None:
+        """
+        Grava nas aprovações criadas pela pausa o context mesclado de todos os
+        branches e os nodes já concluídos (inclusive os que terminaram depois da
+        pausa), usados por resume_execution.
+        """
+        from app.models import WorkflowApproval
+        
+        approval_ids = [uuid.UUID(str(approval_id)) for approval_id in context.metadata.get('approval_ids') or []]
+        if not approval_ids:
+            return
+        
+        snapshot = {**context.to_dict(), 'completed_node_ids': sorted(completed_node_ids)}
+        for approval in WorkflowApproval.query.filter(WorkflowApproval.id.in_(approval_ids)).all():
+            approval.execution_context = snapshot
+    
+    def _mark_failed(self, execution: WorkflowExecution, workflow: Workflow, error: Exception, start_time: datetime) -> None:
+        logger.error(f"Erro ao executar workflow {workflow.id}: {str(error)}")
+        
+        db.session.rollback()
+        execution.status = 'failed'
+        execution.error_message = str(error)
+        execution.completed_at = datetime.utcnow()
+        execution.execution_time_ms = (execution.execution_time_ms or 0) + int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        db.session.commit()
+    
+    def _execute_node(self, node: WorkflowNode, context: ExecutionContext) -> ExecutionContext:
+        """Executa um node com o executor correspondente ao seu tipo"""
+        executor = self.executors.get(node.node_type)
+        if not executor:
+            raise ValueError(f'Executor não encontrado para node_type: {node.node_type}')
+        
+        return executor.execute(node, context)
+    
+    def _update_progress(
+        self,
+        execution: WorkflowExecution,
+        total_nodes: int,
+        completed_nodes: int,
+        current_node: Optional[WorkflowNode] = None
+    ) -> None:
+        """Atualiza o progresso da execução (consultado pelo endpoint de status)"""
+        execution.progress = {
+            'total_nodes': total_nodes,
+            'completed_nodes': completed_nodes,
+            'current_node_id': str(current_node.id) if current_node else None,
+            'current_node_type': current_node.node_type if current_node else None
+        }
+        db.session.commit()
@@ -0,0 +1,195 @@
+"""
+Scheduler de execução de workflows em grafo (DAG).
+
+Monta o grafo de dependências dos nodes a partir de parent_node_id e executa
+branches independentes em paralelo num pool de threads limitado. Ex: um node
+Google Docs e um node PowerPoint ligados ao mesmo trigger rodam ao mesmo tempo.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Iterable, List, Set, Callable, Optional
+import logging
+
+from flask import current_app
+
+from app.models import WorkflowNode
+
+logger = logging.getLogger(__name__)
+
+# Nodes cuja falha interrompe a execução inteira
+CRITICAL_NODE_TYPES = ('trigger', 'google-docs')
+
+
+def build_dependency_graph(nodes: List[WorkflowNode]) -> Dict[str, Set[str]]:
+    """
+    Monta o grafo de dependências dos nodes.
+    
+    Regras:
+    - trigger não depende de ninguém
+    - node com parent_node_id depende do pai
+    - node sem parent_node_id depende do node anterior (por position),
+      mantendo o comportamento sequencial dos workflows lineares
+    - nodes de email que anexam documentos também dependem dos nodes
+      listados em document_node_ids
+    
+    Args:
+        nodes: Nodes do workflow
+    
+    Returns:
+        Dict {node_id: {ids dos nodes que precisam terminar antes}}
+    
+    Raises:
+        ValueError: Se o grafo tiver ciclo
+    """
+    ordered = sorted(nodes, key=lambda n: n.position)
+    node_ids = {str(n.id) for n in ordered}
+    graph = {}
+    previous_id = None
+    
+    for node in ordered:
+        node_id = str(node.id)
+        dependencies = set()
+        
+        if node.node_type != 'trigger':
+            parent_id = str(node.parent_node_id) if node.parent_node_id else None
+            if parent_id in node_ids:
+                dependencies.add(parent_id)
+            elif previous_id is not None:
+                dependencies.add(previous_id)
+            
+            config = node.config or {}
+            if config.get('attach_documents'):
+                for document_node_id in config.get('document_node_ids', []):
+                    if str(document_node_id) in node_ids:
+                        dependencies.add(str(document_node_id))
+        
+        dependencies.discard(node_id)
+        graph[node_id] = dependencies
+        previous_id = node_id
+    
+    _check_acyclic(graph)
+    return graph
+
+
+def _check_acyclic(graph: Dict[str, Set[str]]) -> None:
+    """Valida que o grafo não tem ciclos (algoritmo de Kahn)"""
+    remaining = {node_id: set(deps) for node_id, deps in graph.items()}
+    while remaining:
+        ready = [node_id for node_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f'Ciclo detectado entre os nodes: {", ".join(sorted(remaining))}')
+        for node_id in ready:
+            del remaining[node_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+class DAGScheduler:
+    """
+    Executa os nodes de um workflow respeitando as dependências do grafo.
+    
+    Cada node recebe uma cópia (fork) do ExecutionContext com o estado dos nodes
+    já concluídos; ao terminar, o que ele escreveu é mesclado no contexto
+    principal. A mesclagem acontece só na thread do scheduler, então o contexto
+    principal nunca é alterado por duas threads ao mesmo tempo.
+    """
+    
+    def __init__(
+        self,
+        run_node: Callable[[WorkflowNode, Any], Any],
+        max_workers: int = 4,
+        on_progress: Optional[Callable[[int, Optional[WorkflowNode]], None]] = None
+    ):
+        """
+        Args:
+            run_node: Função que executa um node: (node, context) -> context
+            max_workers: Máximo de nodes executando ao mesmo tempo
+            on_progress: Callback (nodes_concluidos, node_atual) chamado na thread do scheduler
+        """
+        self.run_node = run_node
+        self.max_workers = max(1, max_workers)
+        self.on_progress = on_progress
+        # Nodes concluídos (com sucesso ou erro) ao fim de run()
+        self.completed_node_ids: Set[str] = set()
+    
+    def run(self, nodes: List[WorkflowNode], context: Any, completed: Optional[Iterable[str]] = None) -> Any:
+        """
+        Executa os nodes ainda não concluídos e retorna o contexto mesclado.
+        
+        Falhas em nodes críticos (trigger, google-docs) interrompem o agendamento
+        de novos nodes e são propagadas depois que os nodes em andamento terminam.
+        Falhas nos demais são registradas no contexto e a execução continua.
+        Um node que pausa a execução (human-in-loop) também interrompe o agendamento;
+        os nodes que já estavam rodando terminam e entram em completed_node_ids.
+        
+        Args:
+            nodes: Nodes do workflow
+            context: Contexto de execução
+            completed: IDs dos nodes já executados (retomada após aprovação)
+        """
+        graph = build_dependency_graph(nodes)
+        nodes_by_id = {str(n.id): n for n in nodes}
+        done: Set[str] = {str(node_id) for node_id in completed or ()} & graph.keys()
+        pending = {node_id: set(deps) for node_id, deps in graph.items() if node_id not in done}
+        self.completed_node_ids = done
+        running = {}
+        critical_error = None
+        current_node = None
+        stop = False
+        app = current_app._get_current_object()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='workflow-node') as pool:
+            while True:
+                if not stop:
+                    ready = sorted(
+                        (node_id for node_id, deps in pending.items() if deps <= done),
+                        key=lambda node_id: nodes_by_id[node_id].position
+                    )
+                    for node_id in ready:
+                        del pending[node_id]
+                        branch = context.fork()
+                        future = pool.submit(self._execute_in_app_context, app, node_id, branch)
+                        running[future] = (node_id, branch)
+                        current_node = nodes_by_id[node_id]
+                        self._notify_progress(len(done), current_node)
+                
+                if not running:
+                    break
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node_id, branch = running.pop(future)
+                    node = nodes_by_id[node_id]
+                    done.add(node_id)
+                    
+                    try:
+                        context.merge(future.result())
+                    except Exception as e:
+                        context.add_error(node_id, node.node_type, str(e))
+                        logger.error(f"Erro ao executar node {node_id} ({node.node_type}): {str(e)}")
+                        if node.node_type in CRITICAL_NODE_TYPES and critical_error is None:
+                            critical_error = e
+                            stop = True
+                    
+                    if context.metadata.get('paused'):
+                        stop = True
+                
+                self._notify_progress(len(done), current_node)
+        
+        if critical_error is not None:
+            raise critical_error
+        
+        if pending and not stop:
+            # Não deveria acontecer com grafo acíclico
+            raise ValueError(f'Nodes não executados: {", ".join(sorted(pending))}')
+        
+        return context
+    
+    def _execute_in_app_context(self, app, node_id: str, branch: Any) -> Any:
+        """Executa o node numa thread do pool, com app context e sessão próprios"""
+        with app.app_context():
+            node = WorkflowNode.query.get(node_id)
+            return self.run_node(node, branch)
+    
+    def _notify_progress(self, completed: int, current_node: Optional[WorkflowNode]) -> None:
+        if self.on_progress:
+            self.on_progress(completed, current_node)
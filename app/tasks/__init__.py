@@ -0,0 +1,3 @@
+"""
+Tasks assíncronas (Celery).
+"""
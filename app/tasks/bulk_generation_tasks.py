@@ -0,0 +1,113 @@
+"""
+Tasks de geração em lote.
+
+start_bulk_generation_task cria os itens (lista/filtros do HubSpot) e divide os
+pendentes em lotes de BULK_GENERATION_CHUNK_SIZE; cada lote é uma task
+process_bulk_chunk_task, então vários workers processam o mesmo job e uma
+reentrega reprocessa só um lote.
+"""
+import logging
+from datetime import datetime
+from typing import List
+
+from celery import shared_task
+from flask import current_app
+
+from app.database import db
+from app.models import BulkGenerationJob
+from app.services.bulk_generation import (
+    DEFAULT_CHUNK_SIZE,
+    FINAL_JOB_STATUSES,
+    collect_items,
+    get_job_data_source,
+    pending_item_ids,
+    process_items,
+    refresh_job_counters,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_bulk_generation(job: BulkGenerationJob) -> None:
+    """
+    Envia o job para a fila.
+    
+    Raises:
+        Exception: Se não foi possível publicar na fila (job marcado como failed)
+    """
+    try:
+        start_bulk_generation_task.delay(str(job.id))
+    except Exception as e:
+        logger.error(f'Erro ao enfileirar job {job.id}: {str(e)}')
+        job.status = 'failed'
+        job.error_message = f'Erro ao enfileirar job: {str(e)}'
+        db.session.commit()
+        raise
+    
+    logger.info(f'Job de geração em lote {job.id} enfileirado: workflow={job.workflow_id}')
+
+
+@shared_task(name='bulk_generation.start', ignore_result=True)
+def start_bulk_generation_task(job_id: str) -> None:
+    """
+    Cria os itens do job e enfileira os lotes pendentes.
+    
+    Args:
+        job_id: ID do BulkGenerationJob
+    """
+    job = BulkGenerationJob.query.get(job_id)
+    if not job:
+        logger.error(f'Job de geração em lote não encontrado: {job_id}')
+        return
+    
+    if job.status in FINAL_JOB_STATUSES:
+        logger.info(f'Job {job_id} já finalizado ({job.status}), ignorando')
+        return
+    
+    job.started_at = job.started_at or datetime.utcnow()
+    
+    try:
+        if not job.items_collected:
+            job.status = 'collecting'
+            db.session.commit()
+            collect_items(job, get_job_data_source(job))
+    except Exception as e:
+        logger.error(f'Job {job_id}: erro ao buscar objetos da origem: {str(e)}')
+        db.session.rollback()
+        job.status = 'failed'
+        job.error_message = f'Erro ao buscar objetos da origem: {str(e)}'
+        db.session.commit()
+        return
+    
+    job.status = 'running'
+    db.session.commit()
+    
+    chunk_size = current_app.config.get('BULK_GENERATION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    item_ids = pending_item_ids(job)
+    for index in range(0, len(item_ids), chunk_size):
+        process_bulk_chunk_task.delay(job_id, item_ids[index:index + chunk_size])
+    
+    logger.info(f'Job {job_id}: {len(item_ids)} itens pendentes em lotes de {chunk_size}')
+    
+    # Nada pendente (ex: origem vazia)
+    refresh_job_counters(job)
+
+
+@shared_task(name='bulk_generation.process_chunk', ignore_result=True)
+def process_bulk_chunk_task(job_id: str, item_ids: List[int]) -> None:
+    """
+    Processa um lote de itens e atualiza os contadores do job.
+    
+    Args:
+        job_id: ID do BulkGenerationJob
+        item_ids: IDs dos BulkGenerationItem do lote
+    """
+    job = BulkGenerationJob.query.get(job_id)
+    if not job or job.status in FINAL_JOB_STATUSES:
+        return
+    
+    result = process_items(job, item_ids)
+    logger.info(f'Job {job_id}: lote de {len(item_ids)} itens, {result["succeeded"]} sucesso, {result["failed"]} falhas')
+    
+    job = BulkGenerationJob.query.get(job_id)
+    refresh_job_counters(job)
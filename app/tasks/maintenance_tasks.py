@@ -0,0 +1,42 @@
+"""
+Tasks periódicas de manutenção do banco (agendadas pelo Celery beat).
+
+Beat:
+    celery -A celery_worker.celery beat --loglevel=info
+"""
+import logging
+
+from celery import shared_task
+from flask import current_app
+
+from app.database import db
+from app.services.execution_partitions import DEFAULT_MONTHS_AHEAD, apply_retention, ensure_future_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='maintenance.workflow_execution_partitions', ignore_result=True)
+def maintain_workflow_execution_partitions_task() -> None:
+    """
+    Cria as partições dos próximos meses de workflow_executions e aplica a
+    retenção (WORKFLOW_EXECUTIONS_RETENTION_DAYS), exportando as partições
+    removidas para WORKFLOW_EXECUTIONS_ARCHIVE_DIR quando configurado.
+    """
+    config = current_app.config
+    
+    try:
+        ensure_future_partitions(config.get('WORKFLOW_EXECUTIONS_PARTITIONS_AHEAD', DEFAULT_MONTHS_AHEAD))
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f'Erro ao criar partições de workflow_executions: {str(e)}')
+    
+    try:
+        removed = apply_retention(
+            config.get('WORKFLOW_EXECUTIONS_RETENTION_DAYS', 0),
+            archive_dir=config.get('WORKFLOW_EXECUTIONS_ARCHIVE_DIR')
+        )
+        if removed:
+            logger.info(f'Retenção de workflow_executions: {removed}')
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f'Erro na retenção de workflow_executions: {str(e)}')
@@ -0,0 +1,161 @@
+"""
+Tasks de execução de workflows.
+
+As rotas de webhook e de workflow action do HubSpot apenas criam o registro de
+execução (status 'queued') e enfileiram esta task; o worker processa os nodes
+fora do ciclo de request.
+
+Worker:
+    celery -A celery_worker.celery worker --loglevel=info
+"""
+import logging
+from typing import Dict, Any, Optional
+
+import requests
+from app.utils import http_client
+from celery import shared_task
+
+from app.database import db
+from app.models import Workflow, WorkflowExecution, GeneratedDocument, DataSourceConnection
+from app.services.workflow_executor import WorkflowExecutor
+
+logger = logging.getLogger(__name__)
+
+# Status em que a execução não deve ser reprocessada (ex: reentrega da mensagem)
+FINAL_STATUSES = ('completed', 'failed', 'paused')
+
+HUBSPOT_CALLBACK_URL = 'https://api.hubapi.com/automation/v4/actions/callbacks/{callback_id}/complete'
+
+
+def enqueue_workflow_execution(
+    workflow: Workflow,
+    source_object_id: str,
+    source_object_type: str,
+    trigger_type: str = 'manual',
+    trigger_data: Optional[Dict[str, Any]] = None
+) -> WorkflowExecution:
+    """
+    Cria a execução com status 'queued' e envia para a fila.
+    
+    Args:
+        workflow: Workflow a ser executado
+        source_object_id: ID do objeto na fonte
+        source_object_type: Tipo do objeto
+        trigger_type: Origem da execução (webhook, hubspot_action, ...)
+        trigger_data: Dados adicionais persistidos para o worker
+    
+    Returns:
+        WorkflowExecution criado
+    
+    Raises:
+        Exception: Se não foi possível publicar na fila (execução marcada como failed)
+    """
+    executor = WorkflowExecutor()
+    execution = executor.create_execution(
+        workflow=workflow,
+        source_object_id=source_object_id,
+        source_object_type=source_object_type,
+        trigger_type=trigger_type,
+        trigger_data=trigger_data,
+        status='queued'
+    )
+    
+    try:
+        execute_workflow_task.delay(str(execution.id))
+    except Exception as e:
+        logger.error(f'Erro ao enfileirar execução {execution.id}: {str(e)}')
+        execution.status = 'failed'
+        execution.error_message = f'Erro ao enfileirar execução: {str(e)}'
+        db.session.commit()
+        raise
+    
+    logger.info(f'Execução {execution.id} enfileirada: workflow={workflow.id}, trigger={trigger_type}')
+    return execution
+
+
+@shared_task(name='workflows.execute_workflow', ignore_result=True)
+def execute_workflow_task(execution_id: str) -> None:
+    """
+    Processa uma execução enfileirada.
+    
+    Args:
+        execution_id: ID do WorkflowExecution com status 'queued'
+    """
+    execution = WorkflowExecution.query.get(execution_id)
+    if not execution:
+        logger.error(f'Execução não encontrada: {execution_id}')
+        return
+    
+    if execution.status in FINAL_STATUSES:
+        logger.info(f'Execução {execution_id} já finalizada ({execution.status}), ignorando')
+        return
+    
+    executor = WorkflowExecutor()
+    try:
+        executor.run_execution(execution)
+    except Exception as e:
+        # Erro já registrado na execução pelo executor
+        logger.error(f'Execução {execution_id} falhou: {str(e)}')
+    
+    # Execuções pausadas (human-in-loop) completam o callback só após a aprovação
+    callback_id = (execution.trigger_data or {}).get('hubspot_callback_id')
+    if callback_id and execution.status != 'paused':
+        complete_hubspot_callback(execution, callback_id)
+
+
+def complete_hubspot_callback(execution: WorkflowExecution, callback_id: str) -> bool:
+    """
+    Completa a workflow action do HubSpot que ficou bloqueada aguardando a execução.
+    
+    Args:
+        execution: Execução finalizada
+        callback_id: callbackId recebido na workflow action
+    
+    Returns:
+        True se o HubSpot aceitou o callback
+    """
+    workflow = execution.workflow
+    connection = DataSourceConnection.query.filter_by(
+        organization_id=workflow.organization_id,
+        source_type='hubspot'
+    ).first()
+    
+    access_token = connection.access_token if connection else None
+    if not access_token:
+        logger.warning(f'Token HubSpot não encontrado para completar callback {callback_id}')
+        return False
+    
+    output_fields = {
+        'document_id': '',
+        'document_url': '',
+        'pdf_url': '',
+        'status': 'success' if execution.status == 'completed' else 'error',
+        'error_message': execution.error_message or '',
+        'hs_execution_state': 'SUCCESS' if execution.status == 'completed' else 'FAIL_CONTINUE'
+    }
+    
+    if execution.generated_document_id:
+        doc = GeneratedDocument.query.get(execution.generated_document_id)
+        if doc:
+            output_fields.update({
+                'document_id': str(doc.id),
+                'document_url': doc.google_doc_url or '',
+                'pdf_url': doc.pdf_url or ''
+            })
+    
+    try:
+        response = http_client.post(
+            HUBSPOT_CALLBACK_URL.format(callback_id=callback_id),
+            headers={
+                'Authorization': f'Bearer {access_token}',
+                'Content-Type': 'application/json'
+            },
+            json={'outputFields': output_fields},
+            timeout=30
+        )
+        if not response.ok:
+            logger.error(f'Erro ao completar callback HubSpot {callback_id}: {response.status_code} - {response.text}')
+        return response.ok
+    except requests.exceptions.RequestException as e:
+        logger.error(f'Erro ao completar callback HubSpot {callback_id}: {str(e)}')
+        return False
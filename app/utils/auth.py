@@ -1,8 +1,9 @@
 from functools import wraps
 from flask import request, jsonify, g
 from app.config import Config
-from app.models import User, Organization
+from app.models import User
 from app.database import db
+from app.utils.organization_cache import get_organization_snapshot
 import uuid
 
 def require_auth(f):
@@ -48,7 +49,7 @@ def require_auth(f):
             
             # Armazenar token no contexto
             g.token = token
-            
+        
         except ValueError:
             return jsonify({
                 'error': 'Invalid authorization header format',
@@ -144,16 +145,15 @@ def require_org(f):
                 'message': 'organization_id ou portal_id é obrigatório'
             }), 400
         
-        # Validar que organização existe
-        try:
-            org = Organization.query.filter_by(id=organization_id).first_or_404()
-            g.organization_id = organization_id
-            g.organization = org
-        except Exception as e:
+        # Validar que organização existe (snapshot em cache, ver app/utils/organization_cache.py)
+        org = get_organization_snapshot(organization_id)
+        if org is None:
             return jsonify({
                 'error': 'Invalid organization',
                 'message': 'Organização não encontrada'
             }), 404
+        g.organization_id = organization_id
+        g.organization = org
         
         return f(*args, **kwargs)
     
@@ -0,0 +1,196 @@
+"""
+Upload em partes (chunked) e retomável para arquivos grandes.
+
+- Microsoft Graph (upload session): envia partes de tamanho fixo (múltiplo de
+  320 KiB) com Content-Range. Em erro transitório, consulta a sessão e retoma
+  do primeiro byte em nextExpectedRanges, em vez de reenviar o arquivo inteiro.
+- Google Drive: upload resumable do googleapiclient (MediaIoBaseUpload), parte
+  a parte, com retry de cada parte.
+
+A origem pode ser bytes (lidos via memoryview, sem cópias do arquivo inteiro)
+ou um arquivo binário (BytesIO, SpooledTemporaryFile...): só uma parte fica em
+memória por vez, independente do tamanho do arquivo.
+
+Uso:
+    item = upload_to_graph_session(upload_url, content)
+    file = upload_to_drive(drive_service, content, {'name': 'x.pdf'}, 'application/pdf')
+"""
+import io
+import logging
+import time
+from typing import BinaryIO, Dict, Any, Optional, Union
+
+import requests
+
+from app.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+# O Graph exige partes múltiplas de 320 KiB (máx. 60 MiB)
+GRAPH_CHUNK_UNIT = 320 * 1024
+GRAPH_CHUNK_SIZE = 10 * GRAPH_CHUNK_UNIT
+DRIVE_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_RESUME_ATTEMPTS = 5
+RESUME_BACKOFF_SECONDS = 1.0
+
+Source = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class ChunkedUploadError(Exception):
+    """Upload não pôde ser concluído (sessão expirada ou erros seguidos)"""
+    pass
+
+
+def upload_to_graph_session(
+    upload_url: str,
+    source: Source,
+    total_size: Optional[int] = None,
+    chunk_size: int = GRAPH_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Envia o conteúdo para uma upload session do Microsoft Graph.
+    
+    Args:
+        upload_url: uploadUrl retornado por createUploadSession
+        source: Conteúdo (bytes ou arquivo binário posicionável)
+        total_size: Tamanho total (calculado se não informado)
+        chunk_size: Tamanho das partes (arredondado para múltiplo de 320 KiB)
+    
+    Returns:
+        driveItem criado/atualizado
+    
+    Raises:
+        ChunkedUploadError: Se a sessão expirar ou os erros seguidos passarem
+            de MAX_RESUME_ATTEMPTS
+    """
+    reader = _ChunkReader(source, total_size)
+    total = reader.total_size
+    chunk_size = max(GRAPH_CHUNK_UNIT, chunk_size - chunk_size % GRAPH_CHUNK_UNIT)
+    
+    offset = 0
+    failures = 0
+    
+    while True:
+        chunk = reader.read(offset, chunk_size)
+        end = offset + len(chunk) - 1
+        
+        try:
+            # A upload URL já é autenticada: não enviar Authorization
+            response = http_client.put(
+                upload_url,
+                headers={
+                    'Content-Length': str(len(chunk)),
+                    'Content-Range': f'bytes {offset}-{end}/{total}'
+                },
+                data=chunk
+            )
+        except requests.exceptions.RequestException as e:
+            response = None
+            error = str(e)
+        
+        if response is not None and response.status_code in (200, 201):
+            return response.json()
+        
+        if response is not None and response.status_code == 202:
+            offset = _next_expected_offset(response.json(), end + 1)
+            failures = 0
+            continue
+        
+        if response is not None:
+            if response.status_code == 404:
+                raise ChunkedUploadError('Upload session expirada ou não encontrada')
+            if response.status_code not in (409, 416, 429) and response.status_code < 500:
+                response.raise_for_status()
+            error = f'HTTP {response.status_code}'
+        
+        failures += 1
+        if failures > MAX_RESUME_ATTEMPTS:
+            raise ChunkedUploadError(f'Upload interrompido em {offset}/{total} bytes: {error}')
+        
+        logger.warning(f'Erro no upload ({error}) em {offset}/{total} bytes, retomando (tentativa {failures})')
+        time.sleep(RESUME_BACKOFF_SECONDS * (2 ** (failures - 1)))
+        offset = _session_offset(upload_url, offset)
+
+
+def upload_to_drive(
+    drive_service,
+    source: Source,
+    file_metadata: Dict[str, Any],
+    mimetype: str,
+    fields: str = 'id, webViewLink',
+    chunk_size: int = DRIVE_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Cria um arquivo no Google Drive com upload resumable em partes.
+    
+    Args:
+        drive_service: Cliente da Drive API v3
+        source: Conteúdo (bytes ou arquivo binário posicionável)
+        file_metadata: Metadados do arquivo (name, parents, mimeType...)
+        mimetype: Tipo do conteúdo
+        fields: Campos retornados
+        chunk_size: Tamanho das partes
+    
+    Returns:
+        Recurso do arquivo criado
+    """
+    from googleapiclient.http import MediaIoBaseUpload
+    
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    stream.seek(0)
+    media = MediaIoBaseUpload(stream, mimetype=mimetype, chunksize=chunk_size, resumable=True)
+    request = drive_service.files().create(body=file_metadata, media_body=media, fields=fields)
+    
+    response = None
+    while response is None:
+        # num_retries: a parte é reenviada a partir do último byte confirmado
+        _, response = request.next_chunk(num_retries=MAX_RESUME_ATTEMPTS)
+    return response
+
+
+class _ChunkReader:
+    """Lê partes da origem sem materializar o arquivo inteiro"""
+    
+    def __init__(self, source: Source, total_size: Optional[int] = None):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source)
+            self._file = None
+            self.total_size = len(self._view) if total_size is None else total_size
+        else:
+            self._view = None
+            self._file = source
+            # seek em vez de fileno(): fileno() força SpooledTemporaryFile para o disco
+            self.total_size = _seek_size(source) if total_size is None else total_size
+    
+    def read(self, offset: int, size: int) -> bytes:
+        if self._view is not None:
+            return bytes(self._view[offset:offset + size])
+        self._file.seek(offset)
+        return self._file.read(size)
+
+
+def _seek_size(source) -> int:
+    source.seek(0, io.SEEK_END)
+    size = source.tell()
+    source.seek(0)
+    return size
+
+
+def _next_expected_offset(status: Dict[str, Any], default: int) -> int:
+    ranges = status.get('nextExpectedRanges') or []
+    if not ranges:
+        return default
+    return int(str(ranges[0]).split('-')[0])
+
+
+def _session_offset(upload_url: str, fallback: int) -> int:
+    """Primeiro byte ainda não recebido pela sessão"""
+    try:
+        response = http_client.get(upload_url)
+        if response.status_code == 404:
+            raise ChunkedUploadError('Upload session expirada ou não encontrada')
+        response.raise_for_status()
+        return _next_expected_offset(response.json(), fallback)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f'Não foi possível consultar a upload session: {str(e)}')
+        return fallback
@@ -0,0 +1,245 @@
+"""
+Conteúdo binário de um documento gerado (ex: PDF exportado), em memória ou em
+disco.
+
+Até DOCUMENT_ARTIFACT_MAX_MEMORY_MB o conteúdo fica num BytesIO; acima disso
+vai para um arquivo temporário (como SpooledTemporaryFile), então PDFs grandes
+de várias gerações simultâneas não ficam inteiros na memória do worker.
+
+Depois de escrito, o conteúdo é lido sem cópias:
+- view(): memoryview do buffer em memória ou mmap do arquivo em disco
+- open(): leitor binário próprio (posição independente) sobre o view, para
+  enviar o mesmo artefato a vários destinos (Drive, HubSpot, Graph...), inclusive
+  em paralelo
+
+Uso:
+    with google_docs.export_pdf_artifact(doc_id) as pdf:
+        upload_to_drive(drive_service, pdf.open(), metadata, 'application/pdf')
+        http_client.put(url, data=pdf.view())
+"""
+import io
+import logging
+import mmap
+import tempfile
+import threading
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MEMORY_MB = 2
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class DocumentArtifact:
+    """Bytes de um documento, em memória até o limite e em disco acima dele"""
+    
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        mime_type: str = 'application/pdf',
+        max_memory_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Nome do arquivo (ex: 'Proposta.pdf')
+            mime_type: Tipo MIME do conteúdo
+            max_memory_bytes: Tamanho a partir do qual o conteúdo vai para o disco
+                (padrão: DOCUMENT_ARTIFACT_MAX_MEMORY_MB)
+        """
+        self.name = name
+        self.mime_type = mime_type
+        self.max_memory_bytes = _config_max_memory() if max_memory_bytes is None else max_memory_bytes
+        self._file = io.BytesIO()
+        self._on_disk = False
+        self._size = 0
+        self._view: Optional[memoryview] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_bytes(cls, content: bytes, **kwargs) -> 'DocumentArtifact':
+        artifact = cls(**kwargs)
+        artifact.write(content)
+        return artifact
+    
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[bytes], **kwargs) -> 'DocumentArtifact':
+        artifact = cls(**kwargs)
+        try:
+            for chunk in chunks:
+                if chunk:
+                    artifact.write(chunk)
+        except Exception:
+            artifact.close()
+            raise
+        return artifact
+    
+    @classmethod
+    def from_response(cls, response, **kwargs) -> 'DocumentArtifact':
+        """Artefato a partir de uma resposta do requests com stream=True"""
+        try:
+            return cls.from_chunks(response.iter_content(DOWNLOAD_CHUNK_SIZE), **kwargs)
+        finally:
+            response.close()
+    
+    @property
+    def size(self) -> int:
+        return self._size
+    
+    @property
+    def on_disk(self) -> bool:
+        return self._on_disk
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def write(self, chunk: bytes) -> int:
+        """Acrescenta bytes ao conteúdo (antes de qualquer view()/open())"""
+        if self._view is not None:
+            raise ValueError('DocumentArtifact já está sendo lido')
+        
+        if not self._on_disk and self._size + len(chunk) > self.max_memory_bytes:
+            self._rollover()
+        
+        written = self._file.write(chunk)
+        self._size += written
+        return written
+    
+    def view(self) -> memoryview:
+        """Conteúdo completo, sem cópia (válido até close())"""
+        with self._lock:
+            if self._view is None:
+                if self._file is None:
+                    raise ValueError('DocumentArtifact fechado')
+                if not self._on_disk:
+                    self._view = self._file.getbuffer()
+                elif self._size == 0:
+                    # mmap não aceita arquivo vazio
+                    self._view = memoryview(b'')
+                else:
+                    self._file.flush()
+                    self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._view = memoryview(self._mmap)
+            return self._view
+    
+    def open(self) -> io.BufferedReader:
+        """Leitor binário posicionável com posição própria"""
+        return io.BufferedReader(_ViewReader(self.view()))
+    
+    def read_bytes(self) -> bytes:
+        """Cópia do conteúdo em bytes (para destinos que exigem bytes)"""
+        return bytes(self.view())
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._view is not None:
+                self._view.release()
+                self._view = None
+            # Se ainda houver fatias do view em uso (ex: um upload em andamento),
+            # o buffer/mmap é liberado quando elas forem coletadas
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    pass
+                self._mmap = None
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except BufferError:
+                    pass
+                self._file = None
+    
+    def __enter__(self) -> 'DocumentArtifact':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _rollover(self) -> None:
+        disk_file = tempfile.TemporaryFile()
+        disk_file.write(self._file.getbuffer())
+        self._file.close()
+        self._file = disk_file
+        self._on_disk = True
+        logger.debug(f'DocumentArtifact {self.name or ""} passou de {self.max_memory_bytes} bytes, usando disco')
+
+
+class _ViewReader(io.RawIOBase):
+    """Leitura de um memoryview sem copiar o conteúdo inteiro"""
+    
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._position = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self._view) - self._position)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f'whence inválido: {whence}')
+        if position < 0:
+            raise ValueError('Posição negativa')
+        self._position = position
+        return position
+    
+    def tell(self) -> int:
+        return self._position
+
+
+def export_drive_file(
+    drive_service,
+    file_id: str,
+    mime_type: str = 'application/pdf',
+    name: Optional[str] = None
+) -> DocumentArtifact:
+    """
+    Exporta um arquivo do Google Drive (Docs, Slides...) para um artefato, em partes.
+    
+    Args:
+        drive_service: Cliente da Drive API v3
+        file_id: ID do arquivo
+        mime_type: Formato de exportação
+        name: Nome do artefato
+    
+    Returns:
+        DocumentArtifact com o conteúdo exportado
+    """
+    from googleapiclient.http import MediaIoBaseDownload
+    
+    artifact = DocumentArtifact(name=name, mime_type=mime_type)
+    try:
+        request = drive_service.files().export_media(fileId=file_id, mimeType=mime_type)
+        downloader = MediaIoBaseDownload(artifact, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk(num_retries=3)
+    except Exception:
+        artifact.close()
+        raise
+    return artifact
+
+
+def _config_max_memory() -> int:
+    from flask import current_app, has_app_context
+    max_mb = DEFAULT_MAX_MEMORY_MB
+    if has_app_context():
+        max_mb = current_app.config.get('DOCUMENT_ARTIFACT_MAX_MEMORY_MB', DEFAULT_MAX_MEMORY_MB)
+    return int(max_mb * 1024 * 1024)
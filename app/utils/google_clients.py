@@ -0,0 +1,192 @@
+"""
+Fábrica de clientes das APIs do Google reutilizados no processo.
+
+googleapiclient.discovery.build() lê e faz o parse do documento de discovery e
+cria um transporte httplib2 novo a cada chamada, sem reaproveitar conexões.
+Aqui:
+- o documento de discovery (estático, empacotado com a lib) é carregado uma vez
+  por (serviço, versão)
+- o transporte autorizado (AuthorizedHttp) é reaproveitado por credencial e por
+  thread (httplib2.Http não é thread-safe), mantendo as conexões abertas
+- os transportes ficam num LRU limitado (GOOGLE_CLIENT_CACHE_SIZE)
+
+Uso:
+    drive = get_google_service('drive', 'v3', credentials)
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import google_auth_httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.http import build_http
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 128
+# A cada N clientes criados, envia as métricas para a telemetria
+STATS_REPORT_INTERVAL = 500
+
+_discovery_docs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_transports: 'OrderedDict[Tuple[str, int], google_auth_httplib2.AuthorizedHttp]' = OrderedDict()
+_lock = threading.Lock()
+# build_from_document ajusta o documento de discovery em memória
+_build_lock = threading.Lock()
+
+_stats = {
+    'services_built': 0,
+    'discovery_loads': 0,
+    'discovery_load_ms': 0.0,
+    'transport_hits': 0,
+    'transport_misses': 0,
+    'transport_evictions': 0,
+    'build_ms': 0.0,
+}
+
+
+def get_google_service(service_name: str, version: str, credentials):
+    """
+    Retorna um Resource da API do Google usando discovery e transporte em cache.
+
+    Args:
+        service_name: Nome da API (drive, docs, slides, oauth2...)
+        version: Versão da API (v3, v1...)
+        credentials: Credenciais google-auth (OAuth do usuário ou service account)
+
+    Returns:
+        Resource equivalente ao de build(service_name, version, credentials=credentials)
+    """
+    start_time = time.time()
+
+    document = _get_discovery_document(service_name, version)
+    if document is None:
+        # Sem documento estático: comportamento original
+        service = build(service_name, version, credentials=credentials)
+        _record_build(start_time)
+        return service
+
+    http = _get_authorized_http(credentials)
+    with _build_lock:
+        service = build_from_document(document, http=http)
+
+    _record_build(start_time)
+    return service
+
+
+def get_google_client_stats() -> Dict[str, Any]:
+    """
+    Métricas da fábrica de clientes.
+
+    estimated_saved_ms considera que cada transporte reaproveitado evitou um
+    carregamento de discovery (tempo médio medido) além do novo handshake TLS,
+    que não é contabilizado.
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats['cached_transports'] = len(_transports)
+        stats['cached_discovery_documents'] = len(_discovery_docs)
+
+    avg_discovery_ms = stats['discovery_load_ms'] / stats['discovery_loads'] if stats['discovery_loads'] else 0
+    avg_build_ms = stats['build_ms'] / stats['services_built'] if stats['services_built'] else 0
+    saved_loads = max(stats['services_built'] - stats['discovery_loads'], 0)
+
+    stats['avg_build_ms'] = round(avg_build_ms, 3)
+    stats['avg_discovery_load_ms'] = round(avg_discovery_ms, 3)
+    stats['estimated_saved_ms'] = round(saved_loads * avg_discovery_ms)
+    stats['discovery_load_ms'] = round(stats['discovery_load_ms'], 3)
+    stats['build_ms'] = round(stats['build_ms'], 3)
+    return stats
+
+
+def clear_google_clients() -> None:
+    """Descarta transportes e documentos em cache (ex: testes)"""
+    with _lock:
+        _transports.clear()
+        _discovery_docs.clear()
+
+
+def _get_discovery_document(service_name: str, version: str) -> Optional[Dict[str, Any]]:
+    key = (service_name, version)
+    with _lock:
+        document = _discovery_docs.get(key)
+    if document is not None:
+        return document
+
+    start_time = time.time()
+    content = discovery_cache.get_static_doc(service_name, version)
+    if content is None:
+        return None
+    document = json.loads(content)
+    elapsed_ms = (time.time() - start_time) * 1000
+
+    with _lock:
+        _discovery_docs.setdefault(key, document)
+        _stats['discovery_loads'] += 1
+        _stats['discovery_load_ms'] += elapsed_ms
+        document = _discovery_docs[key]
+
+    logger.debug(f"Discovery {service_name} {version} carregado em {elapsed_ms:.1f}ms")
+    return document
+
+
+def _get_authorized_http(credentials) -> google_auth_httplib2.AuthorizedHttp:
+    key = (_credential_key(credentials), threading.get_ident())
+
+    with _lock:
+        http = _transports.get(key)
+        if http is not None:
+            _transports.move_to_end(key)
+            _stats['transport_hits'] += 1
+            # Credencial mais recente (token renovado) para o mesmo transporte
+            http.credentials = credentials
+            return http
+
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=build_http())
+
+    with _lock:
+        _transports[key] = http
+        _stats['transport_misses'] += 1
+        max_size = _get_cache_size()
+        while len(_transports) > max_size:
+            _transports.popitem(last=False)
+            _stats['transport_evictions'] += 1
+
+    return http
+
+
+def _credential_key(credentials) -> str:
+    """Identidade estável da credencial (não muda quando o access token é renovado)"""
+    identity = (
+        getattr(credentials, 'refresh_token', None)
+        or getattr(credentials, 'service_account_email', None)
+        or getattr(credentials, 'token', None)
+        or str(id(credentials))
+    )
+    return hashlib.sha256(str(identity).encode('utf-8')).hexdigest()
+
+
+def _get_cache_size() -> int:
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            return max(1, int(current_app.config.get('GOOGLE_CLIENT_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
+    except Exception:
+        pass
+    return DEFAULT_CACHE_SIZE
+
+
+def _record_build(start_time: float) -> None:
+    elapsed_ms = (time.time() - start_time) * 1000
+    with _lock:
+        _stats['services_built'] += 1
+        _stats['build_ms'] += elapsed_ms
+        should_report = _stats['services_built'] % STATS_REPORT_INTERVAL == 0
+    
+    if should_report:
+        from app.utils.telemetry import telemetry
+        telemetry.track_event('google_client_cache', get_google_client_stats())
@@ -15,7 +15,7 @@ def get_hubspot_portal_id(organization_id):
     
     Args:
         organization_id: UUID da organização
-        
+    
     Returns:
         portal_id (string) ou None se não encontrado
     """
@@ -31,23 +31,30 @@ def get_organization_id_from_portal_id(portal_id):
     """
     Busca organization_id a partir de um portal_id do HubSpot.
     
+    O resultado fica no cache em processo (app/utils/organization_cache.py);
+    a consulta usa o índice idx_data_source_connections_hubspot_portal.
+    
     Args:
         portal_id: portal_id do HubSpot
-        
+    
     Returns:
         organization_id (UUID) ou None se não encontrado
     """
+    from app.utils.organization_cache import get_cached_portal_organization
+    return get_cached_portal_organization(portal_id, _query_organization_id_by_portal)
+
+
+def _query_organization_id_by_portal(portal_id):
     # Buscar connection onde config.portal_id = portal_id
-    # Usar JSONB operator para buscar no campo config
+    # A expressão precisa ser idêntica à do índice: config->>'portal_id'
     from sqlalchemy import text
-    from app.database import db
     
     result = db.session.execute(
         text("""
             SELECT organization_id 
             FROM data_source_connections 
             WHERE source_type = 'hubspot' 
-            AND (config->>'portal_id')::text = :portal_id
+            AND config->>'portal_id' = :portal_id
             LIMIT 1
         """),
         {'portal_id': str(portal_id)}
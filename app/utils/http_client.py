@@ -0,0 +1,190 @@
+"""
+Cliente HTTP compartilhado para as integrações externas (HubSpot, Microsoft
+Graph, ClickSign, webhooks).
+
+Uma única requests.Session por processo, com:
+- pool de conexões por host e keep-alive (evita novo handshake TCP+TLS a cada chamada)
+- timeout padrão quando o chamador não informa um
+- retry com backoff exponencial em erros de conexão, 5xx (métodos idempotentes)
+  e 429 (qualquer método), respeitando o header Retry-After
+- contadores de latência e erros por host
+
+Uso (mesma interface do requests):
+    from app.utils import http_client
+    response = http_client.get(url, headers=headers, params=params)
+"""
+import logging
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) em segundos
+DEFAULT_TIMEOUT = (10, 60)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Retry-After maior que isso é limitado (ex: limite diário do HubSpot)
+MAX_RETRY_AFTER_SECONDS = 30
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+POOL_CONNECTIONS = 32  # hosts com pool mantido
+POOL_MAXSIZE = 16  # conexões por host (threads simultâneas)
+
+
+class _IntegrationRetry(Retry):
+    """Retry que também repete 429 em métodos não idempotentes (a requisição não foi processada)"""
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+    
+    def parse_retry_after(self, retry_after: str) -> float:
+        return min(super().parse_retry_after(retry_after), MAX_RETRY_AFTER_SECONDS)
+
+
+class _RejectAllCookies(DefaultCookiePolicy):
+    """A sessão é compartilhada entre organizações: nenhum cookie é guardado"""
+    
+    def set_ok(self, cookie, request):
+        return False
+
+
+class _HostStats:
+    __slots__ = ('requests', 'errors', 'status_4xx', 'status_5xx', 'retries', 'total_ms', 'max_ms')
+    
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.status_4xx = 0
+        self.status_5xx = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'status_4xx': self.status_4xx,
+            'status_5xx': self.status_5xx,
+            'retries': self.retries,
+            'avg_ms': round(self.total_ms / self.requests, 1) if self.requests else 0,
+            'max_ms': round(self.max_ms, 1)
+        }
+
+
+class IntegrationSession(requests.Session):
+    """requests.Session com timeout padrão e métricas por host"""
+    
+    def __init__(self):
+        super().__init__()
+        self.cookies.set_policy(_RejectAllCookies())
+        
+        retry = _IntegrationRetry(
+            total=MAX_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        
+        self._stats: Dict[str, _HostStats] = {}
+        self._stats_lock = threading.Lock()
+    
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = DEFAULT_TIMEOUT
+        
+        host = urlsplit(url).netloc
+        start_time = time.time()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(host, (time.time() - start_time) * 1000, error=True)
+            raise
+        
+        retries = response.raw.retries if response.raw is not None else None
+        self._record(
+            host,
+            (time.time() - start_time) * 1000,
+            status_code=response.status_code,
+            retries=len(retries.history) if retries else 0
+        )
+        return response
+    
+    def _record(self, host: str, elapsed_ms: float, status_code: Optional[int] = None, error: bool = False, retries: int = 0):
+        with self._stats_lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = _HostStats()
+            stats.requests += 1
+            stats.retries += retries
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error:
+                stats.errors += 1
+            elif status_code is not None and status_code >= 500:
+                stats.status_5xx += 1
+                stats.errors += 1
+            elif status_code is not None and status_code >= 400:
+                stats.status_4xx += 1
+        
+        if error or (status_code is not None and status_code >= 500):
+            logger.warning(f"HTTP {host}: {'erro de conexão' if error else status_code} em {elapsed_ms:.0f}ms")
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._stats_lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+
+_session: Optional[IntegrationSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> IntegrationSession:
+    """Retorna a sessão HTTP compartilhada do processo"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = IntegrationSession()
+    return _session
+
+
+def get_host_stats() -> Dict[str, Dict[str, Any]]:
+    """Latência e erros por host desde o início do processo"""
+    return get_session().get_stats()
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session().request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_session().request('POST', url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return get_session().request('PUT', url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return get_session().request('PATCH', url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return get_session().request('DELETE', url, **kwargs)
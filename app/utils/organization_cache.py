@@ -0,0 +1,215 @@
+"""
+Cache em processo da resolução de organização (require_org).
+
+Toda requisição autenticada resolve portal_id -> organization_id (consulta em
+data_source_connections) e carrega a Organization. Os dois resultados mudam
+raramente, então ficam num cache por processo com TTL
+(ORGANIZATION_CACHE_TTL_SECONDS) e tamanho limitado
+(ORGANIZATION_CACHE_MAX_ENTRIES):
+- portal_id -> organization_id (só resultados encontrados: um portal recém
+  instalado é resolvido na requisição seguinte)
+- organization_id -> OrganizationSnapshot (cópia imutável dos campos, sem
+  vínculo com a sessão do SQLAlchemy)
+
+Alterações em DataSourceConnection/Organization feitas neste processo
+invalidam as entradas na hora; nos demais processos valem até o TTL.
+
+Uso:
+    org_id = get_cached_portal_organization(portal_id, loader)
+    org = get_organization_snapshot(organization_id)
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from sqlalchemy import event
+
+from app.models import DataSourceConnection, Organization
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_MAX_ENTRIES = 10000
+
+_MISSING = object()
+
+
+class OrganizationSnapshot(NamedTuple):
+    """Campos da Organization usados no contexto da requisição (g.organization)"""
+    id: uuid.UUID
+    name: str
+    slug: str
+    plan: Optional[str]
+    is_active: bool
+    trial_expires_at: Optional[datetime]
+    plan_expires_at: Optional[datetime]
+    
+    @classmethod
+    def from_model(cls, org: Organization) -> 'OrganizationSnapshot':
+        return cls(
+            id=org.id,
+            name=org.name,
+            slug=org.slug,
+            plan=org.plan,
+            is_active=org.is_active,
+            trial_expires_at=org.trial_expires_at,
+            plan_expires_at=org.plan_expires_at
+        )
+
+
+class TTLCache:
+    """LRU com expiração por entrada, thread-safe"""
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Any:
+        """Valor em cache, ou _MISSING se ausente/expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def pop_values(self, value: Any) -> None:
+        """Remove todas as entradas com o valor informado"""
+        with self._lock:
+            for key in [k for k, (v, _) in self._entries.items() if v == value]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_portal_cache = TTLCache()
+_organization_cache = TTLCache()
+
+
+def get_cached_portal_organization(portal_id, loader: Callable[[str], Optional[uuid.UUID]]) -> Optional[uuid.UUID]:
+    """
+    organization_id do portal, consultando loader só em cache miss.
+    
+    Args:
+        portal_id: portal_id do HubSpot
+        loader: Consulta no banco (portal_id em texto -> organization_id ou None)
+    
+    Returns:
+        organization_id (UUID) ou None se não encontrado
+    """
+    key = str(portal_id)
+    organization_id = _portal_cache.get(key)
+    if organization_id is not _MISSING:
+        return organization_id
+    
+    organization_id = loader(key)
+    if organization_id:
+        _resize(_portal_cache)
+        _portal_cache.set(key, organization_id, _config_ttl())
+    return organization_id
+
+
+def get_organization_snapshot(organization_id) -> Optional[OrganizationSnapshot]:
+    """
+    Snapshot da organização, carregado do banco só em cache miss.
+    
+    Args:
+        organization_id: UUID (ou string) da organização
+    
+    Returns:
+        OrganizationSnapshot ou None se o id for inválido ou não existir
+    """
+    try:
+        key = organization_id if isinstance(organization_id, uuid.UUID) else uuid.UUID(str(organization_id))
+    except ValueError:
+        return None
+    
+    snapshot = _organization_cache.get(key)
+    if snapshot is not _MISSING:
+        return snapshot
+    
+    org = Organization.query.get(key)
+    if org is None:
+        return None
+    
+    snapshot = OrganizationSnapshot.from_model(org)
+    _resize(_organization_cache)
+    _organization_cache.set(key, snapshot, _config_ttl())
+    return snapshot
+
+
+def invalidate_portal(portal_id) -> None:
+    if portal_id is not None:
+        _portal_cache.pop(str(portal_id))
+
+
+def invalidate_organization(organization_id) -> None:
+    """Remove o snapshot e os portais que apontam para a organização"""
+    if organization_id is None:
+        return
+    _organization_cache.pop(organization_id)
+    _portal_cache.pop_values(organization_id)
+
+
+def clear_organization_cache() -> None:
+    _portal_cache.clear()
+    _organization_cache.clear()
+
+
+@event.listens_for(DataSourceConnection, 'after_insert')
+@event.listens_for(DataSourceConnection, 'after_update')
+@event.listens_for(DataSourceConnection, 'after_delete')
+def _invalidate_connection(mapper, connection, target):
+    """
+    Portal atual da conexão e todos os portais da organização: o portal_id
+    anterior nem sempre está no histórico (config expirado após commit)
+    """
+    if target.source_type != 'hubspot':
+        return
+    invalidate_portal(target.portal_id)
+    _portal_cache.pop_values(target.organization_id)
+
+
+@event.listens_for(Organization, 'after_update')
+@event.listens_for(Organization, 'after_delete')
+def _invalidate_organization(mapper, connection, target):
+    invalidate_organization(target.id)
+
+
+def _config_ttl() -> float:
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config.get('ORGANIZATION_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    return DEFAULT_TTL_SECONDS
+
+
+def _resize(cache: TTLCache) -> None:
+    from flask import current_app, has_app_context
+    if has_app_context():
+        cache.max_entries = current_app.config.get('ORGANIZATION_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
@@ -0,0 +1,84 @@
+"""
+Paginação por cursor (keyset) para listagens grandes.
+
+Em vez de OFFSET (que lê e descarta todas as linhas das páginas anteriores) e
+COUNT(*) (que percorre todas as linhas do filtro), a próxima página começa
+depois da última linha da anterior: WHERE (sort_key, id) < (:sort_key, :id),
+resolvido direto pelo índice composto da listagem.
+
+O cursor é opaco para o cliente: base64 de "sort_key|id".
+
+Uso:
+    cursor = encode_cursor(last.created_at, last.id)
+    sort_key, item_id = decode_cursor(request.args['cursor'])
+    total = estimate_count(query)
+"""
+import base64
+import binascii
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.database import db
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(sort_key: datetime, item_id) -> str:
+    """Cursor opaco (sort_key, id) da última linha da página"""
+    raw = f'{sort_key.isoformat()}|{item_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Args:
+        cursor: Cursor gerado por encode_cursor
+    
+    Returns:
+        Tupla (sort_key, id)
+    
+    Raises:
+        ValueError: Cursor malformado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        sort_key, item_id = raw.split('|', 1)
+        return datetime.fromisoformat(sort_key), uuid.UUID(item_id)
+    except (ValueError, UnicodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+
+def estimate_count(query) -> Optional[int]:
+    """
+    Total aproximado de linhas da query, pela estimativa do planner do Postgres
+    (EXPLAIN, sem executar a query).
+    
+    A precisão depende das estatísticas da tabela (ANALYZE/autovacuum); serve
+    para "cerca de N documentos" na interface, não para cálculo de páginas.
+    
+    Args:
+        query: Query do SQLAlchemy (sem order_by/limit)
+    
+    Returns:
+        Número estimado de linhas, ou None se não foi possível estimar
+    """
+    try:
+        connection = db.session.connection()
+        compiled = query.statement.compile(
+            dialect=connection.dialect,
+            compile_kwargs={'render_postcompile': True}
+        )
+        # Savepoint: um erro no EXPLAIN não aborta a transação da requisição
+        with db.session.begin_nested():
+            plan = connection.exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+            ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.warning(f'Não foi possível estimar o total da listagem: {str(e)}')
+        return None
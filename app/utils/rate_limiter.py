@@ -0,0 +1,285 @@
+"""
+Rate limiter token bucket compartilhado entre processos/workers.
+
+Usado para respeitar os limites por portal do HubSpot (burst por janela de 10s
+e limite diário): antes de cada chamada o chamador pega um token do bucket da
+chave (portal_id); sem tokens, espera o tempo de reposição em vez de receber 429.
+
+O estado fica no Redis (script Lua atômico, relógio do próprio Redis). Se o
+Redis estiver indisponível, cada processo usa um bucket em memória com os mesmos
+limites até o Redis voltar.
+
+Uso:
+    limiter = get_hubspot_rate_limiter()
+    limiter.acquire(hubspot_rate_limit_key(portal_id, access_token))
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão do HubSpot para apps OAuth/privados (Starter): 100 req/10s por portal
+DEFAULT_HUBSPOT_REQUESTS_PER_10S = 100
+DEFAULT_HUBSPOT_DAILY_LIMIT = 250000
+DEFAULT_MAX_WAIT_SECONDS = 30
+# Após erro no Redis, usa só a memória por este intervalo
+REDIS_RETRY_SECONDS = 30
+# Utilização diária a partir da qual o portal é reportado como próximo do limite
+NEAR_LIMIT_RATIO = 0.8
+
+_TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+local daily = tonumber(redis.call('GET', KEYS[2]) or '0')
+if requested == 0 then
+    allowed = 1
+elseif tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+    daily = redis.call('INCRBY', KEYS[2], requested)
+    redis.call('EXPIRE', KEYS[2], 172800)
+else
+    wait = (requested - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return {allowed, tostring(wait), tostring(tokens), daily}
+"""
+
+
+class TokenBucketRateLimiter:
+    """Token bucket por chave com Redis e fallback em memória"""
+    
+    def __init__(
+        self,
+        capacity: int,
+        refill_per_second: float,
+        redis_url: Optional[str] = None,
+        daily_limit: int = 0,
+        max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+        namespace: str = 'rate-limit'
+    ):
+        """
+        Args:
+            capacity: Tamanho do bucket (burst máximo)
+            refill_per_second: Tokens repostos por segundo
+            redis_url: Redis compartilhado (None = apenas memória)
+            daily_limit: Limite diário por chave (0 = sem limite). Só é
+                monitorado: passar do limite gera alerta, não espera
+            max_wait_seconds: Espera máxima por token; depois disso a chamada
+                segue (e o retry de 429 do http_client assume)
+            namespace: Prefixo das chaves no Redis
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.daily_limit = daily_limit
+        self.max_wait_seconds = max_wait_seconds
+        self.namespace = namespace
+        
+        self._lock = threading.Lock()
+        self._local_buckets: Dict[str, Tuple[float, float]] = {}
+        self._local_daily: Dict[str, Tuple[str, int]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._near_limit_reported: Dict[str, str] = {}
+        
+        self._redis = None
+        self._script = None
+        self._redis_retry_at = 0.0
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+            except Exception as e:
+                logger.warning(f"Rate limiter sem Redis, usando buckets em memória: {e}")
+                self._redis = None
+    
+    def acquire(self, key: str, tokens: int = 1) -> float:
+        """
+        Pega tokens do bucket da chave, esperando a reposição se necessário.
+        
+        Args:
+            key: Chave do bucket (ex: portal_id)
+            tokens: Quantidade de tokens (chamadas)
+        
+        Returns:
+            Tempo esperado em segundos
+        """
+        start_time = time.monotonic()
+        
+        while True:
+            allowed, wait, _, daily = self._take(key, tokens)
+            if allowed:
+                break
+            
+            elapsed = time.monotonic() - start_time
+            if elapsed + wait > self.max_wait_seconds:
+                logger.warning(
+                    f"Rate limit de {key}: sem tokens após {elapsed:.1f}s, seguindo sem esperar"
+                )
+                break
+            time.sleep(wait)
+        
+        waited = time.monotonic() - start_time
+        self._record(key, waited)
+        self._check_daily(key, daily)
+        return waited
+    
+    def get_utilization(self, key: str) -> Dict[str, Any]:
+        """
+        Utilização atual da chave.
+        
+        Returns:
+            Dict com tokens disponíveis, utilização do burst e diária, e
+            esperas registradas neste processo
+        """
+        _, _, available, daily = self._take(key, 0)
+        
+        with self._lock:
+            stats = dict(self._stats.get(key, {}))
+        
+        return {
+            'key': key,
+            'backend': 'redis' if self._redis_available() else 'memory',
+            'capacity': self.capacity,
+            'tokens_available': round(available, 2),
+            'burst_utilization': round(1 - available / self.capacity, 3) if self.capacity else 0,
+            'daily_count': daily,
+            'daily_limit': self.daily_limit or None,
+            'daily_utilization': round(daily / self.daily_limit, 3) if self.daily_limit else None,
+            'near_limit': bool(self.daily_limit and daily >= self.daily_limit * NEAR_LIMIT_RATIO),
+            'throttled_requests': int(stats.get('throttled', 0)),
+            'total_wait_seconds': round(stats.get('wait_seconds', 0.0), 3)
+        }
+    
+    def _take(self, key: str, tokens: int) -> Tuple[bool, float, float, int]:
+        """Retorna (permitido, espera em segundos, tokens restantes, contagem diária)"""
+        if self._redis_available():
+            day = datetime.utcnow().strftime('%Y%m%d')
+            try:
+                allowed, wait, remaining, daily = self._script(
+                    keys=[f'{self.namespace}:{key}', f'{self.namespace}:{key}:day:{day}'],
+                    args=[self.capacity, self.refill_per_second, tokens]
+                )
+                return bool(allowed), float(wait), float(remaining), int(daily)
+            except Exception as e:
+                self._redis_failed(e)
+        
+        return self._take_local(key, tokens)
+    
+    def _take_local(self, key: str, tokens: int) -> Tuple[bool, float, float, int]:
+        now = time.monotonic()
+        day = datetime.utcnow().strftime('%Y%m%d')
+        
+        with self._lock:
+            available, updated_at = self._local_buckets.get(key, (float(self.capacity), now))
+            available = min(self.capacity, available + (now - updated_at) * self.refill_per_second)
+            
+            daily_day, daily = self._local_daily.get(key, (day, 0))
+            if daily_day != day:
+                daily = 0
+            
+            allowed = available >= tokens
+            wait = 0.0
+            if allowed:
+                available -= tokens
+                daily += tokens
+            else:
+                wait = (tokens - available) / self.refill_per_second
+            
+            self._local_buckets[key] = (available, now)
+            self._local_daily[key] = (day, daily)
+        
+        return allowed, wait, available, daily
+    
+    def _record(self, key: str, waited: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(key, {'requests': 0, 'throttled': 0, 'wait_seconds': 0.0})
+            stats['requests'] += 1
+            if waited >= 0.001:
+                stats['throttled'] += 1
+                stats['wait_seconds'] += waited
+    
+    def _check_daily(self, key: str, daily: int) -> None:
+        if not self.daily_limit or daily < self.daily_limit * NEAR_LIMIT_RATIO:
+            return
+        
+        # Um alerta por chave por dia
+        day = datetime.utcnow().strftime('%Y%m%d')
+        with self._lock:
+            if self._near_limit_reported.get(key) == day:
+                return
+            self._near_limit_reported[key] = day
+        
+        logger.warning(f"Rate limit de {key}: {daily}/{self.daily_limit} chamadas hoje")
+        try:
+            from app.utils.telemetry import telemetry
+            telemetry.track_event('rate_limit_near_daily_limit', {
+                'namespace': self.namespace,
+                'key': key,
+                'daily_count': daily,
+                'daily_limit': self.daily_limit
+            })
+        except Exception:
+            pass
+    
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.time() >= self._redis_retry_at
+    
+    def _redis_failed(self, error: Exception) -> None:
+        self._redis_retry_at = time.time() + REDIS_RETRY_SECONDS
+        logger.warning(f"Erro no Redis do rate limiter, usando memória por {REDIS_RETRY_SECONDS}s: {error}")
+
+
+def hubspot_rate_limit_key(portal_id: Optional[Any] = None, access_token: Optional[str] = None) -> str:
+    """
+    Chave do bucket do HubSpot: o portal_id ou, quando não conhecido, o hash do token.
+    """
+    if portal_id:
+        return f'portal:{portal_id}'
+    digest = hashlib.sha256((access_token or '').encode('utf-8')).hexdigest()[:16]
+    return f'token:{digest}'
+
+
+_hubspot_limiter: Optional[TokenBucketRateLimiter] = None
+_hubspot_limiter_lock = threading.Lock()
+
+
+def get_hubspot_rate_limiter() -> TokenBucketRateLimiter:
+    """
+    Retorna o rate limiter do HubSpot do processo, configurado por
+    HUBSPOT_RATE_LIMIT_REDIS_URL, HUBSPOT_RATE_LIMIT_PER_10S,
+    HUBSPOT_RATE_LIMIT_DAILY e HUBSPOT_RATE_LIMIT_MAX_WAIT_SECONDS.
+    """
+    global _hubspot_limiter
+    if _hubspot_limiter is None:
+        with _hubspot_limiter_lock:
+            if _hubspot_limiter is None:
+                from flask import current_app, has_app_context
+                config = current_app.config if has_app_context() else {}
+                per_10s = config.get('HUBSPOT_RATE_LIMIT_PER_10S', DEFAULT_HUBSPOT_REQUESTS_PER_10S)
+                _hubspot_limiter = TokenBucketRateLimiter(
+                    capacity=per_10s,
+                    refill_per_second=per_10s / 10.0,
+                    redis_url=config.get('HUBSPOT_RATE_LIMIT_REDIS_URL'),
+                    daily_limit=config.get('HUBSPOT_RATE_LIMIT_DAILY', DEFAULT_HUBSPOT_DAILY_LIMIT),
+                    max_wait_seconds=config.get('HUBSPOT_RATE_LIMIT_MAX_WAIT_SECONDS', DEFAULT_MAX_WAIT_SECONDS),
+                    namespace='hubspot-rate-limit'
+                )
+    return _hubspot_limiter
@@ -0,0 +1,8 @@
+from app import create_app
+from app.config import Config
+
+# Entry point do worker e do beat (tarefas periódicas, uma única instância):
+#   celery -A celery_worker.celery worker --loglevel=info
+#   celery -A celery_worker.celery beat --loglevel=info
+app = create_app(Config)
+celery = app.extensions['celery']
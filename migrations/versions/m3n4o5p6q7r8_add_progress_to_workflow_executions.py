@@ -0,0 +1,25 @@
+"""Add progress to workflow_executions
+
+Revision ID: m3n4o5p6q7r8
+Revises: l2m3n4o5p6q7
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'm3n4o5p6q7r8'
+down_revision = 'l2m3n4o5p6q7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Progresso da execução (para execuções enfileiradas)
+    op.add_column('workflow_executions', sa.Column('progress', postgresql.JSONB, nullable=True))
+
+
+def downgrade():
+    op.drop_column('workflow_executions', 'progress')
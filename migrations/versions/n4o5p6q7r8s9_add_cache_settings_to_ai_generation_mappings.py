@@ -0,0 +1,26 @@
+"""Add cache settings to ai_generation_mappings
+
+Revision ID: n4o5p6q7r8s9
+Revises: m3n4o5p6q7r8
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'n4o5p6q7r8s9'
+down_revision = 'm3n4o5p6q7r8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cache de respostas do LLM (opt-in por mapeamento)
+    op.add_column('ai_generation_mappings', sa.Column('cache_enabled', sa.Boolean, nullable=False, server_default='false'))
+    op.add_column('ai_generation_mappings', sa.Column('cache_ttl_seconds', sa.Integer, nullable=True))
+
+
+def downgrade():
+    op.drop_column('ai_generation_mappings', 'cache_ttl_seconds')
+    op.drop_column('ai_generation_mappings', 'cache_enabled')
@@ -0,0 +1,27 @@
+"""Add tag_index and source_modified_time to templates
+
+Revision ID: o5p6q7r8s9t0
+Revises: n4o5p6q7r8s9
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'o5p6q7r8s9t0'
+down_revision = 'n4o5p6q7r8s9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cache do índice de tags do template (válido para o modifiedTime do Drive)
+    op.add_column('templates', sa.Column('tag_index', postgresql.JSONB, nullable=True))
+    op.add_column('templates', sa.Column('source_modified_time', sa.String(64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('templates', 'source_modified_time')
+    op.drop_column('templates', 'tag_index')
@@ -0,0 +1,68 @@
+"""Add bulk_generation_jobs and bulk_generation_items tables
+
+Revision ID: p6q7r8s9t0u1
+Revises: o5p6q7r8s9t0
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'p6q7r8s9t0u1'
+down_revision = 'o5p6q7r8s9t0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bulk_generation_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('workflow_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('source_object_type', sa.String(100), nullable=False),
+        sa.Column('source', postgresql.JSONB, nullable=False),
+        sa.Column('items_collected', sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column('status', sa.String(50), default='pending'),
+        sa.Column('error_message', sa.Text),
+        sa.Column('total_items', sa.Integer, default=0),
+        sa.Column('succeeded_items', sa.Integer, default=0),
+        sa.Column('failed_items', sa.Integer, default=0),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True)),
+        sa.Column('created_at', sa.DateTime, default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime),
+        sa.Column('completed_at', sa.DateTime),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id']),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+    )
+    op.create_index('idx_bulk_job_org_created', 'bulk_generation_jobs', ['organization_id', 'created_at'])
+    
+    op.create_table(
+        'bulk_generation_items',
+        sa.Column('id', sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('source_object_id', sa.String(255), nullable=False),
+        sa.Column('status', sa.String(50), default='pending'),
+        sa.Column('attempts', sa.Integer, default=0),
+        sa.Column('error_message', sa.Text),
+        sa.Column('execution_id', postgresql.UUID(as_uuid=True)),
+        sa.Column('generated_document_id', postgresql.UUID(as_uuid=True)),
+        sa.Column('updated_at', sa.DateTime, default=sa.func.now()),
+        sa.ForeignKeyConstraint(['job_id'], ['bulk_generation_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['execution_id'], ['workflow_executions.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['generated_document_id'], ['generated_documents.id'], ondelete='SET NULL'),
+        sa.UniqueConstraint('job_id', 'source_object_id', name='uq_bulk_item_job_object'),
+    )
+    op.create_index('idx_bulk_item_job_status', 'bulk_generation_items', ['job_id', 'status'])
+    op.create_index('idx_bulk_item_job_updated', 'bulk_generation_items', ['job_id', 'updated_at'])
+
+
+def downgrade():
+    op.drop_index('idx_bulk_item_job_updated', table_name='bulk_generation_items')
+    op.drop_index('idx_bulk_item_job_status', table_name='bulk_generation_items')
+    op.drop_table('bulk_generation_items')
+    op.drop_index('idx_bulk_job_org_created', table_name='bulk_generation_jobs')
+    op.drop_table('bulk_generation_jobs')
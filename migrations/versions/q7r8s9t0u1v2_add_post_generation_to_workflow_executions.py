@@ -0,0 +1,25 @@
+"""Add post_generation to workflow_executions
+
+Revision ID: q7r8s9t0u1v2
+Revises: p6q7r8s9t0u1
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'q7r8s9t0u1v2'
+down_revision = 'p6q7r8s9t0u1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Resultado de cada ação pós-geração (upload do PDF, anexo HubSpot, timeline...)
+    op.add_column('workflow_executions', sa.Column('post_generation', postgresql.JSONB, nullable=True))
+
+
+def downgrade():
+    op.drop_column('workflow_executions', 'post_generation')
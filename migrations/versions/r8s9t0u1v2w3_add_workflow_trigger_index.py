@@ -0,0 +1,61 @@
+"""Add workflow_trigger_index table
+
+Revision ID: r8s9t0u1v2w3
+Revises: q7r8s9t0u1v2
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'r8s9t0u1v2w3'
+down_revision = 'q7r8s9t0u1v2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'workflow_trigger_index',
+        sa.Column('workflow_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('object_type', sa.String(100)),
+        sa.Column('status', sa.String(50)),
+        sa.Column('updated_at', sa.DateTime, default=sa.func.now()),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id']),
+    )
+    op.create_index(
+        'idx_workflow_trigger_index_lookup',
+        'workflow_trigger_index',
+        ['organization_id', 'object_type', 'status']
+    )
+    
+    # Preencher a partir do trigger node de cada workflow (ou do workflow legado),
+    # com o tipo em minúsculas como em WorkflowTriggerIndex.normalize_object_type
+    op.execute("""
+        INSERT INTO workflow_trigger_index (workflow_id, organization_id, object_type, status, updated_at)
+        SELECT
+            w.id,
+            w.organization_id,
+            NULLIF(lower(trim(COALESCE(
+                NULLIF((
+                    SELECT n.config->>'source_object_type'
+                    FROM workflow_nodes n
+                    WHERE n.workflow_id = w.id AND n.node_type = 'trigger'
+                    ORDER BY n.position
+                    LIMIT 1
+                ), ''),
+                w.source_object_type
+            ))), ''),
+            COALESCE(w.status, 'draft'),
+            now()
+        FROM workflows w
+    """)
+
+
+def downgrade():
+    op.drop_index('idx_workflow_trigger_index_lookup', table_name='workflow_trigger_index')
+    op.drop_table('workflow_trigger_index')
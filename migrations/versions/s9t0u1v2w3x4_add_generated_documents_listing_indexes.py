@@ -0,0 +1,68 @@
+"""Add keyset listing indexes to generated_documents
+
+Revision ID: s9t0u1v2w3x4
+Revises: r8s9t0u1v2w3
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 's9t0u1v2w3x4'
+down_revision = 'r8s9t0u1v2w3'
+branch_labels = None
+depends_on = None
+
+LISTING_INDEXES = [
+    ('idx_generated_documents_org_created', ['organization_id', 'created_at', 'id']),
+    ('idx_generated_documents_org_status_created', ['organization_id', 'status', 'created_at', 'id']),
+    ('idx_generated_documents_org_workflow_created', ['organization_id', 'workflow_id', 'created_at', 'id']),
+    (
+        'idx_generated_documents_org_object_created',
+        ['organization_id', 'source_object_type', 'source_object_id', 'created_at', 'id']
+    ),
+]
+
+
+def upgrade():
+    # O cursor da listagem é (created_at, id): created_at não pode ser nulo
+    op.execute("""
+        UPDATE generated_documents
+        SET created_at = COALESCE(generated_at, updated_at, now())
+        WHERE created_at IS NULL
+    """)
+    
+    # SET NOT NULL direto varre a tabela com ACCESS EXCLUSIVE (bloqueia leituras
+    # e gerações). O CHECK NOT VALID só pega o lock por um instante; o VALIDATE
+    # varre com SHARE UPDATE EXCLUSIVE, e o SET NOT NULL aproveita o CHECK
+    # validado sem varrer de novo. Cada passo em sua própria transação.
+    with op.get_context().autocommit_block():
+        op.execute("""
+            ALTER TABLE generated_documents
+            ADD CONSTRAINT generated_documents_created_at_not_null
+            CHECK (created_at IS NOT NULL) NOT VALID
+        """)
+        op.execute('ALTER TABLE generated_documents VALIDATE CONSTRAINT generated_documents_created_at_not_null')
+        op.alter_column('generated_documents', 'created_at', existing_type=sa.DateTime(), nullable=False)
+        op.drop_constraint('generated_documents_created_at_not_null', 'generated_documents', type_='check')
+    
+    # CONCURRENTLY: a tabela tem milhões de linhas nos maiores tenants, sem
+    # bloquear as gerações durante a criação dos índices
+    with op.get_context().autocommit_block():
+        for name, columns in LISTING_INDEXES:
+            op.create_index(
+                name, 'generated_documents', columns,
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(LISTING_INDEXES):
+            op.drop_index(
+                name, table_name='generated_documents',
+                postgresql_concurrently=True, if_exists=True
+            )
+    
+    op.alter_column('generated_documents', 'created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,178 @@
+"""Partition workflow_executions by month
+
+Revision ID: t0u1v2w3x4y5
+Revises: s9t0u1v2w3x4
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 't0u1v2w3x4y5'
+down_revision = 's9t0u1v2w3x4'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+LEGACY_PARTITION = 'workflow_executions_legacy'
+
+BACKFILL_BATCH_SIZE = 5000
+
+EXECUTION_INDEXES = [
+    # (nome do índice da tabela particionada, sufixo do índice de cada partição, colunas)
+    # Busca por id (a chave primária da tabela particionada é (id, created_at))
+    ('idx_workflow_executions_id', 'id_idx', ['id']),
+    # Histórico de execuções do workflow, mais recentes primeiro
+    ('idx_workflow_executions_workflow_created', 'workflow_created_idx', ['workflow_id', 'created_at']),
+    # Logs de webhook (get_webhook_logs)
+    ('idx_workflow_executions_workflow_trigger_created', 'workflow_trigger_created_idx', ['workflow_id', 'trigger_type', 'created_at']),
+]
+
+
+def _add_months(moment, months):
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    # A tabela existente não é copiada: vira a partição workflow_executions_legacy
+    # (até o início do mês atual). As execuções do mês atual vão para a partição
+    # do mês; a divisão da legada em meses é feita depois, fora da migration
+    # (scripts/split_workflow_executions_legacy.py).
+    cutover = _add_months(datetime.utcnow(), 0)  # início do mês atual
+    
+    # created_at vira parte da chave primária: preencher e tornar NOT NULL sem
+    # ACCESS EXCLUSIVE durante a varredura. Preenchimento em lotes (cada um na
+    # sua transação), CHECK NOT VALID só pega o lock por um instante, VALIDATE
+    # varre com SHARE UPDATE EXCLUSIVE e o SET NOT NULL aproveita o CHECK validado.
+    op.alter_column('workflow_executions', 'created_at', existing_type=sa.DateTime(), server_default=sa.func.now())
+    with op.get_context().autocommit_block():
+        backfill = sa.text("""
+            UPDATE workflow_executions
+            SET created_at = COALESCE(started_at, completed_at, now())
+            WHERE id IN (
+                SELECT id FROM workflow_executions WHERE created_at IS NULL LIMIT :batch_size
+            )
+        """).bindparams(batch_size=BACKFILL_BATCH_SIZE)
+        while op.get_bind().execute(backfill).rowcount:
+            pass
+        op.execute("""
+            ALTER TABLE workflow_executions
+            ADD CONSTRAINT workflow_executions_created_at_not_null
+            CHECK (created_at IS NOT NULL) NOT VALID
+        """)
+        op.execute('ALTER TABLE workflow_executions VALIDATE CONSTRAINT workflow_executions_created_at_not_null')
+    
+    # Índices da futura partição legada, CONCURRENTLY sem bloquear as execuções:
+    # a nova chave primária (id, created_at) e os índices da tabela particionada
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'workflow_executions_legacy_pkey', 'workflow_executions', ['id', 'created_at'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+        for _, suffix, columns in EXECUTION_INDEXES:
+            op.create_index(
+                f'{LEGACY_PARTITION}_{suffix}', 'workflow_executions', columns,
+                postgresql_concurrently=True, if_not_exists=True
+            )
+    
+    op.alter_column('workflow_executions', 'created_at', existing_type=sa.DateTime(), nullable=False)
+    op.drop_constraint('workflow_executions_created_at_not_null', 'workflow_executions', type_='check')
+    
+    # Uma tabela particionada só pode ser referenciada por FK que inclua a chave
+    # de partição: a limpeza das referências passa a ser feita pela retenção
+    op.drop_constraint('workflow_approvals_workflow_execution_id_fkey', 'workflow_approvals', type_='foreignkey')
+    op.drop_constraint('bulk_generation_items_execution_id_fkey', 'bulk_generation_items', type_='foreignkey')
+    
+    op.rename_table('workflow_executions', LEGACY_PARTITION)
+    op.execute(f'ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT workflow_executions_pkey')
+    op.execute(f"""
+        ALTER TABLE {LEGACY_PARTITION}
+        ADD CONSTRAINT workflow_executions_legacy_pkey PRIMARY KEY USING INDEX workflow_executions_legacy_pkey
+    """)
+    
+    # LIKE mantém a ordem das colunas da tabela atual (exigido pelo ATTACH)
+    op.execute(f"""
+        CREATE TABLE workflow_executions (
+            LIKE {LEGACY_PARTITION} INCLUDING DEFAULTS,
+            CONSTRAINT workflow_executions_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT workflow_executions_workflow_id_fkey
+                FOREIGN KEY (workflow_id) REFERENCES workflows (id),
+            CONSTRAINT workflow_executions_generated_document_id_fkey
+                FOREIGN KEY (generated_document_id) REFERENCES generated_documents (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    partitions = ['workflow_executions_default']
+    op.execute('CREATE TABLE workflow_executions_default PARTITION OF workflow_executions DEFAULT')
+    
+    for offset in range(MONTHS_AHEAD + 1):
+        lower = _add_months(cutover, offset)
+        upper = _add_months(cutover, offset + 1)
+        partitions.append(f'workflow_executions_p{lower:%Y%m}')
+        op.execute(
+            f'CREATE TABLE {partitions[-1]} PARTITION OF workflow_executions '
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    
+    op.execute(sa.text(f"""
+        WITH moved AS (
+            DELETE FROM {LEGACY_PARTITION} WHERE created_at >= :cutover RETURNING *
+        )
+        INSERT INTO workflow_executions SELECT * FROM moved
+    """).bindparams(cutover=cutover))
+    
+    # CHECK antes do ATTACH: o Postgres usa a constraint em vez de varrer a tabela
+    op.execute(sa.text(f"""
+        ALTER TABLE {LEGACY_PARTITION}
+        ADD CONSTRAINT workflow_executions_legacy_range CHECK (created_at < :cutover)
+    """).bindparams(cutover=cutover))
+    op.execute(
+        f'ALTER TABLE workflow_executions ATTACH PARTITION {LEGACY_PARTITION} '
+        f"FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat()}')"
+    )
+    op.execute(f'ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT workflow_executions_legacy_range')
+    
+    # Índices da tabela particionada: ON ONLY não percorre as partições; o índice
+    # fica válido quando o de cada partição é anexado (o da legada já existe,
+    # os das partições novas são criados agora, ainda quase vazias)
+    for name, suffix, columns in EXECUTION_INDEXES:
+        column_list = ', '.join(columns)
+        op.execute(f'CREATE INDEX {name} ON ONLY workflow_executions ({column_list})')
+        op.execute(f'ALTER INDEX {name} ATTACH PARTITION {LEGACY_PARTITION}_{suffix}')
+        for partition in partitions:
+            op.execute(f'CREATE INDEX {partition}_{suffix} ON {partition} ({column_list})')
+            op.execute(f'ALTER INDEX {name} ATTACH PARTITION {partition}_{suffix}')
+
+
+def downgrade():
+    op.execute("""
+        CREATE TABLE workflow_executions_unpartitioned (
+            LIKE workflow_executions INCLUDING DEFAULTS
+        )
+    """)
+    op.execute('INSERT INTO workflow_executions_unpartitioned SELECT * FROM workflow_executions')
+    op.execute('DROP TABLE workflow_executions CASCADE')
+    op.rename_table('workflow_executions_unpartitioned', 'workflow_executions')
+    
+    op.create_primary_key('workflow_executions_pkey', 'workflow_executions', ['id'])
+    op.create_foreign_key(
+        'workflow_executions_workflow_id_fkey', 'workflow_executions', 'workflows',
+        ['workflow_id'], ['id']
+    )
+    op.create_foreign_key(
+        'workflow_executions_generated_document_id_fkey', 'workflow_executions', 'generated_documents',
+        ['generated_document_id'], ['id']
+    )
+    op.alter_column('workflow_executions', 'created_at', existing_type=sa.DateTime(), nullable=True)
+    
+    op.create_foreign_key(
+        'bulk_generation_items_execution_id_fkey', 'bulk_generation_items', 'workflow_executions',
+        ['execution_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_foreign_key(
+        'workflow_approvals_workflow_execution_id_fkey', 'workflow_approvals', 'workflow_executions',
+        ['workflow_execution_id'], ['id'], ondelete='CASCADE'
+    )
@@ -0,0 +1,39 @@
+"""Add expression index on HubSpot portal_id to data_source_connections
+
+Revision ID: u1v2w3x4y5z6
+Revises: t0u1v2w3x4y5
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'u1v2w3x4y5z6'
+down_revision = 't0u1v2w3x4y5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Resolução portal_id -> organização a cada requisição do HubSpot (require_org).
+    # A expressão é a mesma da consulta em get_organization_id_from_portal_id.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_data_source_connections_hubspot_portal',
+            'data_source_connections',
+            [sa.text("(config->>'portal_id')")],
+            postgresql_where=sa.text("source_type = 'hubspot'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_data_source_connections_hubspot_portal',
+            table_name='data_source_connections',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
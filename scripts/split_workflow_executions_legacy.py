@@ -0,0 +1,44 @@
+"""
+Divide a partição workflow_executions_legacy (execuções anteriores ao
+particionamento) em partições mensais.
+
+Este script:
+1. Desanexa workflow_executions_legacy da tabela particionada
+2. Para cada mês da partição legada, cria a partição mensal e move as linhas
+   (um mês por transação)
+3. Remove a tabela legada, já vazia
+
+Enquanto roda, as execuções dos meses ainda não movidos não aparecem nas
+consultas: rodar em janela de manutenção. Se for interrompido, basta rodar de
+novo: a divisão continua do mês mais antigo que ainda está na tabela legada.
+Depois disso a retenção passa a remover o histórico antigo mês a mês.
+
+Uso:
+    python scripts/split_workflow_executions_legacy.py
+"""
+import sys
+import os
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.execution_partitions import split_legacy_partition
+
+
+def split_legacy():
+    """Move as execuções da partição legada para partições mensais"""
+    app = create_app()
+    
+    with app.app_context():
+        report = split_legacy_partition()
+        
+        for month in report:
+            print(f"{month['partition']}: {month['rows']} execuções")
+        
+        print(f"\nPartições criadas: {len(report)}")
+        print(f"Execuções movidas: {sum(month['rows'] for month in report)}")
+
+
+if __name__ == '__main__':
+    split_legacy()
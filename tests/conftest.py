@@ -0,0 +1,104 @@
+"""
+Fixtures compartilhadas dos testes que usam a aplicação.
+
+O app roda com SQLite num arquivo temporário por teste (tipos JSONB/ARRAY do
+Postgres compilados como JSON, BIGINT como INTEGER para as chaves
+autoincrementais, UUIDs aceitos também como string, como no psycopg2) e com as
+tasks do Celery executadas inline (eager). Em arquivo, cada thread (nodes do
+DAGScheduler, itens da geração em lote) usa sua própria conexão, como no
+Postgres; em memória todas dividiriam uma só transação.
+
+A fixture organization cria a organização com conexão HubSpot do portal 123:
+rotas autenticadas pelo HubSpot usam ?portalId=123&appId=1. O cache
+portal -> organização é limpo a cada app, já que os ids mudam entre testes.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import types
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from app import create_app
+from app.config import Config
+from app.database import db
+from app.models import DataSourceConnection, Organization
+from app.utils.organization_cache import clear_organization_cache
+
+
+@compiles(JSONB, 'sqlite')
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+
+@compiles(ARRAY, 'sqlite')
+def _compile_array_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+
+@compiles(types.BigInteger, 'sqlite')
+def _compile_bigint_sqlite(type_, compiler, **kw):
+    # Só INTEGER PRIMARY KEY é autoincremental no SQLite
+    return 'INTEGER'
+
+
+_uuid_bind_processor = types.Uuid.bind_processor
+
+
+def _uuid_bind_processor_accepting_str(self, dialect):
+    process = _uuid_bind_processor(self, dialect)
+    if dialect.name != 'sqlite' or process is None:
+        return process
+    
+    def coerce(value):
+        if isinstance(value, str):
+            value = uuid.UUID(value)
+        return process(value)
+    return coerce
+
+
+types.Uuid.bind_processor = _uuid_bind_processor_accepting_str
+
+
+class SQLiteConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    BACKEND_API_TOKEN = 'test-token'
+    CELERY_TASK_ALWAYS_EAGER = True
+    CELERY_BROKER_URL = 'memory://'
+    CELERY_RESULT_BACKEND = 'cache+memory://'
+
+
+@pytest.fixture
+def app(tmp_path):
+    class Config(SQLiteConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+    
+    clear_organization_cache()
+    app = create_app(Config)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+    clear_organization_cache()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def organization(app):
+    """Organização com conexão HubSpot do portal 123"""
+    org = Organization(name='Org', slug='org')
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(DataSourceConnection(
+        organization_id=org.id,
+        source_type='hubspot',
+        config={'portal_id': '123'},
+        credentials={'access_token': 'hubspot-token'}
+    ))
+    db.session.commit()
+    return org
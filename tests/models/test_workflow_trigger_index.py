@@ -0,0 +1,84 @@
+"""
+Testes para o índice de triggers (WorkflowTriggerIndex) mantido pelo listener before_flush
+"""
+from app.database import db
+from app.models import Workflow, WorkflowNode, WorkflowTriggerIndex
+
+
+def make_workflow(organization, object_type='deal', status='draft'):
+    workflow = Workflow(organization_id=organization.id, name='Workflow', status=status)
+    db.session.add(workflow)
+    db.session.flush()
+    db.session.add(WorkflowNode(
+        workflow_id=workflow.id,
+        node_type='trigger',
+        position=1,
+        config={'trigger_type': 'manual', 'source_object_type': object_type}
+    ))
+    db.session.commit()
+    return workflow
+
+
+def index_entry(workflow):
+    db.session.expire_all()
+    return db.session.get(WorkflowTriggerIndex, workflow.id)
+
+
+class TestWorkflowTriggerIndexListener:
+    """Testes de _sync_workflow_trigger_index"""
+    
+    def test_workflow_created_with_trigger(self, organization):
+        workflow = make_workflow(organization)
+        
+        entry = index_entry(workflow)
+        assert entry.organization_id == organization.id
+        assert entry.object_type == 'deal'
+        assert entry.status == 'draft'
+    
+    def test_trigger_object_type_changed(self, organization):
+        workflow = make_workflow(organization)
+        trigger = WorkflowNode.query.filter_by(workflow_id=workflow.id, node_type='trigger').one()
+        
+        trigger.config = {'trigger_type': 'manual', 'source_object_type': 'Contact'}
+        db.session.commit()
+        
+        assert index_entry(workflow).object_type == 'contact'
+    
+    def test_trigger_node_deleted_falls_back_to_workflow(self, organization):
+        workflow = make_workflow(organization)
+        workflow.source_object_type = 'company'
+        db.session.commit()
+        
+        db.session.delete(WorkflowNode.query.filter_by(workflow_id=workflow.id, node_type='trigger').one())
+        db.session.commit()
+        
+        assert index_entry(workflow).object_type == 'company'
+    
+    def test_workflow_activated(self, organization):
+        workflow = make_workflow(organization)
+        
+        workflow.status = 'active'
+        db.session.commit()
+        
+        assert index_entry(workflow).status == 'active'
+    
+    def test_legacy_workflow_without_nodes(self, organization):
+        workflow = Workflow(organization_id=organization.id, name='Legado', source_object_type=' Ticket ')
+        db.session.add(workflow)
+        db.session.commit()
+        
+        entry = index_entry(workflow)
+        assert entry.object_type == 'ticket'
+        assert entry.status == 'draft'
+
+
+class TestListWorkflowsByObjectType:
+    """Testes de GET /api/v1/workflows/by-object-type/<object_type>"""
+    
+    def test_object_type_is_case_insensitive(self, client, organization):
+        workflow = make_workflow(organization, object_type='DEAL', status='active')
+        
+        response = client.get('/api/v1/workflows/by-object-type/Deal?portalId=123&appId=1')
+        
+        assert response.status_code == 200
+        assert [item['id'] for item in response.get_json()['workflows']] == [str(workflow.id)]
@@ -0,0 +1,207 @@
+"""
+Testes para os endpoints de geração em lote (Celery em modo eager)
+"""
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import db
+from app.models import BulkGenerationItem, BulkGenerationJob, Workflow, WorkflowNode
+from app.routes import workflows
+from app.services import bulk_generation
+from app.tasks import bulk_generation_tasks
+
+AUTH = 'portalId=123&appId=1'
+
+
+class FakeHubSpot:
+    """HubSpotDataSource falso: devolve os objetos conhecidos"""
+    
+    def __init__(self, known_ids):
+        self.known_ids = set(known_ids)
+    
+    def get_objects_data(self, object_type, object_ids, projection=None):
+        return {
+            object_id: {'id': object_id, 'properties': {'dealname': f'Deal {object_id}'}}
+            for object_id in object_ids if object_id in self.known_ids
+        }
+
+
+@pytest.fixture
+def workflow(organization):
+    workflow = Workflow(organization_id=organization.id, name='Workflow', status='active', source_object_type='deal')
+    db.session.add(workflow)
+    db.session.flush()
+    db.session.add(WorkflowNode(
+        workflow_id=workflow.id,
+        node_type='trigger',
+        position=1,
+        config={'trigger_type': 'hubspot', 'source_object_type': 'deal'}
+    ))
+    db.session.commit()
+    return workflow
+
+
+@pytest.fixture
+def hubspot(app, monkeypatch):
+    fake = FakeHubSpot(known_ids=['1', '2', '3'])
+    monkeypatch.setattr(bulk_generation, 'get_job_data_source', lambda job: fake)
+    monkeypatch.setattr(bulk_generation_tasks, 'get_job_data_source', lambda job: fake)
+    app.config['BULK_GENERATION_MAX_CONCURRENCY'] = 1
+    return fake
+
+
+def make_job(workflow, statuses, status='running', updated_at=None):
+    job = BulkGenerationJob(
+        organization_id=workflow.organization_id,
+        workflow_id=workflow.id,
+        source_object_type='deal',
+        source={},
+        status=status,
+        items_collected=True,
+        total_items=len(statuses)
+    )
+    db.session.add(job)
+    db.session.flush()
+    db.session.add_all([
+        BulkGenerationItem(
+            job_id=job.id,
+            source_object_id=str(index),
+            status=item_status,
+            updated_at=updated_at or datetime.utcnow()
+        )
+        for index, item_status in enumerate(statuses, start=1)
+    ])
+    db.session.commit()
+    return job
+
+
+def jobs_url(workflow, path=''):
+    return f'/api/v1/workflows/{workflow.id}/bulk-generations{path}?{AUTH}'
+
+
+class TestCreateBulkGeneration:
+    """Testes de POST /workflows/<id>/bulk-generations"""
+    
+    def test_creates_and_runs_job(self, client, workflow, hubspot):
+        response = client.post(jobs_url(workflow), json={'object_ids': ['1', '2', '4']})
+        
+        assert response.status_code == 202
+        body = response.get_json()
+        assert body['total_items'] == 3
+        
+        job = client.get(jobs_url(workflow, f'/{body["id"]}')).get_json()
+        assert job['status'] == 'completed_with_errors'
+        assert (job['succeeded_items'], job['failed_items'], job['progress_percent']) == (2, 1, 100.0)
+    
+    def test_invalid_source_returns_400(self, client, workflow, hubspot):
+        response = client.post(jobs_url(workflow), json={'object_ids': ['1'], 'list_id': '42'})
+        
+        assert response.status_code == 400
+        assert BulkGenerationJob.query.count() == 0
+    
+    def test_queue_error_returns_503(self, client, workflow, monkeypatch):
+        def broken_delay(job_id):
+            raise ConnectionError('broker indisponível')
+        monkeypatch.setattr(bulk_generation_tasks.start_bulk_generation_task, 'delay', broken_delay)
+        
+        response = client.post(jobs_url(workflow), json={'object_ids': ['1']})
+        
+        assert response.status_code == 503
+        assert response.get_json()['job']['status'] == 'failed'
+
+
+class TestBulkGenerationJob:
+    """Testes de consulta, itens, retry e cancelamento de um job"""
+    
+    def test_get_unknown_job_returns_404(self, client, workflow):
+        other = make_job(workflow, [])
+        
+        assert client.get(jobs_url(workflow, f'/{other.id}')).status_code == 200
+        assert client.get(jobs_url(workflow, '/00000000-0000-0000-0000-000000000000')).status_code == 404
+    
+    def test_items_keyset_pagination_and_status_filter(self, client, workflow):
+        job = make_job(workflow, ['succeeded', 'failed', 'succeeded', 'pending', 'succeeded'])
+        
+        first = client.get(jobs_url(workflow, f'/{job.id}/items') + '&limit=2').get_json()
+        second = client.get(jobs_url(workflow, f'/{job.id}/items') + f'&limit=2&after_id={first["next_cursor"]}').get_json()
+        third = client.get(jobs_url(workflow, f'/{job.id}/items') + f'&limit=2&after_id={second["next_cursor"]}').get_json()
+        
+        pages = [[item['source_object_id'] for item in page['items']] for page in (first, second, third)]
+        assert pages == [['1', '2'], ['3', '4'], ['5']]
+        assert third['next_cursor'] is None
+        
+        failed = client.get(jobs_url(workflow, f'/{job.id}/items') + '&status=failed').get_json()
+        assert [item['source_object_id'] for item in failed['items']] == ['2']
+    
+    def test_retry_reprocesses_failed_items(self, client, workflow, hubspot):
+        job = make_job(workflow, ['succeeded', 'failed', 'failed'], status='completed_with_errors')
+        
+        response = client.post(jobs_url(workflow, f'/{job.id}/retry'))
+        
+        assert response.status_code == 202
+        assert response.get_json()['reopened_items'] == 2
+        db.session.refresh(job)
+        assert job.status == 'completed'
+        assert (job.succeeded_items, job.failed_items) == (3, 0)
+    
+    def test_retry_running_job_returns_409(self, client, workflow):
+        job = make_job(workflow, ['running'])
+        
+        assert client.post(jobs_url(workflow, f'/{job.id}/retry')).status_code == 409
+    
+    def test_cancel(self, client, workflow):
+        job = make_job(workflow, ['succeeded', 'pending'])
+        
+        response = client.post(jobs_url(workflow, f'/{job.id}/cancel'))
+        
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'cancelled'
+        assert response.get_json()['completed_at'] is not None
+        assert client.post(jobs_url(workflow, f'/{job.id}/cancel')).status_code == 409
+
+
+class TestBulkGenerationEvents:
+    """Testes do stream de progresso (SSE)"""
+    
+    @staticmethod
+    def item_events(response):
+        events = []
+        for block in response.get_data(as_text=True).strip().split('\n\n'):
+            event, data = block.split('\n')
+            if event == 'event: item':
+                events.append(json.loads(data[len('data: '):])['source_object_id'])
+        return events
+    
+    def test_pages_tied_timestamps_without_duplicates(self, client, workflow, monkeypatch):
+        monkeypatch.setattr(workflows, 'BULK_EVENTS_PAGE_SIZE', 2)
+        monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+        job = make_job(workflow, ['succeeded'] * 5, status='completed', updated_at=datetime(2026, 1, 1))
+        
+        response = client.get(jobs_url(workflow, f'/{job.id}/events'))
+        
+        assert response.mimetype == 'text/event-stream'
+        assert self.item_events(response) == ['1', '2', '3', '4', '5']
+    
+    def test_rereads_items_committed_behind_the_cursor(self, client, workflow, monkeypatch):
+        now = datetime.utcnow()
+        job = make_job(workflow, ['succeeded', 'running'], updated_at=now)
+        late = BulkGenerationItem.query.filter_by(job_id=job.id, source_object_id='2').one()
+        
+        def worker_commits_late(seconds):
+            # Item 2 termina com updated_at anterior ao cursor; depois um item novo
+            if late.status == 'running':
+                late.status = 'succeeded'
+                late.updated_at = now - timedelta(seconds=1)
+            else:
+                db.session.add(BulkGenerationItem(job_id=job.id, source_object_id='3', status='succeeded', updated_at=now))
+                BulkGenerationJob.query.get(job.id).status = 'completed'
+            db.session.commit()
+        monkeypatch.setattr(time, 'sleep', worker_commits_late)
+        
+        response = client.get(jobs_url(workflow, f'/{job.id}/events'))
+        
+        assert self.item_events(response) == ['1', '2', '2', '3']
+
@@ -0,0 +1,53 @@
+"""
+Testes para a listagem de documentos gerados (formato legado e paginação por cursor)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import db
+from app.models import GeneratedDocument
+
+LIST_URL = '/api/v1/documents?portalId=123&appId=1'
+
+
+@pytest.fixture
+def documents(organization):
+    start = datetime(2026, 1, 1)
+    docs = [
+        GeneratedDocument(organization_id=organization.id, name=f'Doc {i}', status='completed', created_at=start + timedelta(days=i))
+        for i in range(5)
+    ]
+    db.session.add_all(docs)
+    db.session.commit()
+    return docs
+
+
+class TestListDocuments:
+    """Testes de GET /api/v1/documents"""
+    
+    def test_legacy_shape_without_cursor_or_limit(self, client, documents):
+        response = client.get(f'{LIST_URL}&per_page=2')
+        
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['total'] == 5
+        assert body['pages'] == 3
+        assert body['current_page'] == 1
+        assert [doc['name'] for doc in body['documents']] == ['Doc 4', 'Doc 3']
+    
+    def test_legacy_page_parameter(self, client, documents):
+        body = client.get(f'{LIST_URL}&per_page=2&page=3').get_json()
+        
+        assert body['current_page'] == 3
+        assert [doc['name'] for doc in body['documents']] == ['Doc 0']
+    
+    def test_cursor_pagination_without_total(self, client, documents):
+        first = client.get(f'{LIST_URL}&limit=3').get_json()
+        
+        assert 'total' not in first and 'pages' not in first and 'current_page' not in first
+        assert [doc['name'] for doc in first['documents']] == ['Doc 4', 'Doc 3', 'Doc 2']
+        
+        second = client.get(f'{LIST_URL}&limit=3&cursor={first["next_cursor"]}').get_json()
+        assert [doc['name'] for doc in second['documents']] == ['Doc 1', 'Doc 0']
+        assert second['next_cursor'] is None
@@ -0,0 +1,66 @@
+"""
+Testes para os endpoints públicos de webhook (execução enfileirada e status)
+"""
+import pytest
+
+from app.database import db
+from app.models import Workflow, WorkflowExecution, WorkflowNode
+
+
+@pytest.fixture
+def webhook_workflow(organization):
+    workflow = Workflow(organization_id=organization.id, name='Webhook', status='active')
+    db.session.add(workflow)
+    db.session.flush()
+    db.session.add(WorkflowNode(
+        workflow_id=workflow.id,
+        node_type='trigger',
+        position=1,
+        webhook_token='secret-token',
+        config={'trigger_type': 'webhook', 'source_object_type': 'deal'}
+    ))
+    db.session.commit()
+    return workflow
+
+
+class TestWebhookExecution:
+    """Testes do recebimento de webhook e do endpoint de status"""
+    
+    def test_webhook_returns_202_with_status_url(self, client, webhook_workflow):
+        response = client.post(f'/api/v1/webhooks/{webhook_workflow.id}/secret-token', json={'id': '42'})
+        
+        assert response.status_code == 202
+        body = response.get_json()
+        assert body['status'] == 'queued'
+        assert body['status_url'].endswith(f'/executions/{body["execution_id"]}')
+        
+        status = client.get(body['status_url'])
+        assert status.status_code == 200
+        assert status.get_json()['status'] == 'completed'
+    
+    def test_invalid_token_is_rejected(self, client, webhook_workflow):
+        response = client.post(f'/api/v1/webhooks/{webhook_workflow.id}/wrong-token', json={'id': '42'})
+        assert response.status_code == 401
+    
+    def test_status_requires_webhook_token(self, client, webhook_workflow):
+        execution = WorkflowExecution(workflow_id=webhook_workflow.id, status='queued', trigger_data={})
+        db.session.add(execution)
+        db.session.commit()
+        base_url = f'/api/v1/webhooks/{webhook_workflow.id}'
+        
+        assert client.get(f'{base_url}/wrong-token/executions/{execution.id}').status_code == 401
+        
+        response = client.get(f'{base_url}/secret-token/executions/{execution.id}')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'queued'
+    
+    def test_status_of_other_workflow_execution(self, client, webhook_workflow):
+        other = Workflow(organization_id=webhook_workflow.organization_id, name='Outro')
+        db.session.add(other)
+        db.session.flush()
+        execution = WorkflowExecution(workflow_id=other.id, status='completed', trigger_data={})
+        db.session.add(execution)
+        db.session.commit()
+        
+        response = client.get(f'/api/v1/webhooks/{webhook_workflow.id}/secret-token/executions/{execution.id}')
+        assert response.status_code == 404
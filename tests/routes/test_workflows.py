@@ -0,0 +1,136 @@
+"""
+Testes para a listagem de workflows (contagem de nodes, filtro por objeto e cursor)
+"""
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.database import db
+from app.models import Organization, Template, Workflow, WorkflowNode
+from app.routes.workflows import workflow_to_dict
+
+LIST_URL = '/api/v1/workflows?portalId=123&appId=1'
+
+
+def make_workflow(organization, name, object_type=None, node_statuses=(), template=None):
+    workflow = Workflow(organization_id=organization.id, name=name, status='active', template_id=template and template.id)
+    db.session.add(workflow)
+    db.session.flush()
+    if object_type:
+        db.session.add(WorkflowNode(
+            workflow_id=workflow.id,
+            node_type='trigger',
+            position=1,
+            status='configured',
+            config={'trigger_type': 'manual', 'source_object_type': object_type}
+        ))
+    for position, node_status in enumerate(node_statuses, start=2):
+        db.session.add(WorkflowNode(
+            workflow_id=workflow.id,
+            node_type='google-docs',
+            position=position,
+            status=node_status,
+            config={}
+        ))
+    db.session.commit()
+    return workflow
+
+
+def set_timestamps(workflow, created_at, updated_at):
+    # UPDATE direto: o listener de nodes atualizaria updated_at num flush do ORM
+    db.session.execute(
+        update(Workflow).where(Workflow.id == workflow.id).values(created_at=created_at, updated_at=updated_at)
+    )
+    db.session.commit()
+
+
+def listed_ids(body):
+    return [workflow['id'] for workflow in body['workflows']]
+
+
+class TestListWorkflows:
+    """Testes de GET /api/v1/workflows"""
+    
+    def test_node_counts_and_template_match_legacy_response(self, client, organization):
+        template = Template(organization_id=organization.id, name='Proposta', google_file_id='file-1', google_file_type='document')
+        db.session.add(template)
+        db.session.flush()
+        with_nodes = make_workflow(organization, 'Com nodes', 'deal', ['configured', 'draft'], template=template)
+        empty = make_workflow(organization, 'Vazio')
+        other_org = Organization(name='Outra', slug='outra')
+        db.session.add(other_org)
+        db.session.flush()
+        make_workflow(other_org, 'Outra org', 'deal', ['configured'])
+        
+        body = client.get(LIST_URL).get_json()
+        
+        assert sorted(listed_ids(body)) == sorted([str(with_nodes.id), str(empty.id)])
+        by_id = {workflow['id']: workflow for workflow in body['workflows']}
+        for workflow in (with_nodes, empty):
+            # Contagens como na listagem anterior (uma query por workflow)
+            expected = {
+                **workflow_to_dict(workflow),
+                'nodes_count': WorkflowNode.query.filter_by(workflow_id=workflow.id).count(),
+                'nodes_configured': WorkflowNode.query.filter_by(workflow_id=workflow.id, status='configured').count()
+            }
+            assert by_id[str(workflow.id)] == expected
+        assert by_id[str(with_nodes.id)]['nodes_count'] == 3
+        assert by_id[str(with_nodes.id)]['nodes_configured'] == 2
+        assert by_id[str(with_nodes.id)]['template']['name'] == 'Proposta'
+        assert by_id[str(empty.id)]['nodes_count'] == 0
+        assert body['next_cursor'] is None
+    
+    def test_object_type_filter(self, client, organization):
+        deal = make_workflow(organization, 'Deal', 'deal')
+        make_workflow(organization, 'Contato', 'contact')
+        make_workflow(organization, 'Sem trigger')
+        
+        body = client.get(f'{LIST_URL}&object_type=DEAL').get_json()
+        
+        assert listed_ids(body) == [str(deal.id)]
+    
+    def test_cursor_pagination_with_null_and_tied_timestamps(self, client, organization):
+        tied = datetime(2026, 3, 1)
+        timestamps = [
+            (tied, tied),
+            (tied, tied),
+            (datetime(2026, 1, 1), tied),
+            (datetime(2026, 1, 1), None),
+            (datetime(2026, 2, 1), None),
+            (None, None),
+            (None, None),
+        ]
+        workflows = []
+        for index, (created_at, updated_at) in enumerate(timestamps):
+            workflow = make_workflow(organization, f'Workflow {index}', node_statuses=['draft'])
+            set_timestamps(workflow, created_at, updated_at)
+            workflows.append(workflow)
+        
+        # Ordem esperada: coalesce(updated_at, created_at, epoch) desc, id desc
+        epoch = datetime(1970, 1, 1)
+        expected = [
+            str(workflow.id) for (created_at, updated_at), workflow in sorted(
+                zip(timestamps, workflows),
+                key=lambda pair: (pair[0][1] or pair[0][0] or epoch, pair[1].id),
+                reverse=True
+            )
+        ]
+        
+        pages = []
+        url = f'{LIST_URL}&limit=2'
+        while True:
+            body = client.get(url).get_json()
+            pages.append(listed_ids(body))
+            if not body['next_cursor']:
+                break
+            url = f'{LIST_URL}&limit=2&cursor={body["next_cursor"]}'
+        
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+        assert [workflow_id for page in pages for workflow_id in page] == expected
+        assert listed_ids(client.get(LIST_URL).get_json()) == expected
+    
+    def test_invalid_cursor_returns_400(self, client, organization):
+        response = client.get(f'{LIST_URL}&limit=2&cursor=nao-e-um-cursor')
+        
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'cursor inválido'}
@@ -0,0 +1,70 @@
+"""
+Testes para o cache de respostas do LLM
+"""
+
+import time
+
+from app.services.ai.cache import LLMResponseCache, build_cache_key
+from app.services.ai.llm_service import LLMResponse
+
+
+def make_response(text):
+    return LLMResponse(
+        text=text,
+        provider='openai',
+        model='gpt-4o',
+        input_tokens=10,
+        output_tokens=20,
+        total_tokens=30,
+        time_ms=1500,
+        estimated_cost_usd=0.002
+    )
+
+
+class TestBuildCacheKey:
+    """Testes para build_cache_key()"""
+    
+    def test_same_inputs_same_key(self):
+        assert build_cache_key('openai/gpt-4o', 'prompt', 0.7, 1000) == build_cache_key('openai/gpt-4o', 'prompt', 0.7, 1000)
+    
+    def test_parameters_change_key(self):
+        base = build_cache_key('openai/gpt-4o', 'prompt', 0.7, 1000)
+        assert build_cache_key('openai/gpt-4o-mini', 'prompt', 0.7, 1000) != base
+        assert build_cache_key('openai/gpt-4o', 'prompt 2', 0.7, 1000) != base
+        assert build_cache_key('openai/gpt-4o', 'prompt', 0.2, 1000) != base
+        assert build_cache_key('openai/gpt-4o', 'prompt', 0.7, 500) != base
+
+
+class TestLLMResponseCache:
+    """Testes para LLMResponseCache em memória"""
+    
+    def test_hit_returns_text_without_cost(self):
+        cache = LLMResponseCache()
+        cache.set('k', make_response('texto'))
+        
+        cached = cache.get('k')
+        assert cached.text == 'texto'
+        assert cached.estimated_cost_usd == 0.0
+        assert cached.total_tokens == 0
+    
+    def test_miss(self):
+        cache = LLMResponseCache()
+        assert cache.get('inexistente') is None
+    
+    def test_lru_eviction(self):
+        cache = LLMResponseCache(local_max_entries=2)
+        cache.set('a', make_response('a'))
+        cache.set('b', make_response('b'))
+        cache.get('a')
+        cache.set('c', make_response('c'))
+        
+        assert cache.get('a') is not None
+        assert cache.get('b') is None
+        assert cache.get('c') is not None
+    
+    def test_ttl_expiration(self):
+        cache = LLMResponseCache()
+        cache.set('k', make_response('texto'), ttl_seconds=1)
+        cache._local['k'] = (time.time() - 1, cache._local['k'][1])
+        
+        assert cache.get('k') is None
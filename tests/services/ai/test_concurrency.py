@@ -0,0 +1,56 @@
+"""
+Testes para os limites de concorrência de chamadas de LLM
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.ai.concurrency import AIConcurrencyLimiter
+
+
+class TestAIConcurrencyLimiter:
+    """Testes para AIConcurrencyLimiter.slot()"""
+    
+    def _run_concurrently(self, limiter, keys, hold_seconds=0.05):
+        active = {'now': 0, 'max': 0}
+        lock = threading.Lock()
+        
+        def task(organization_id, provider):
+            with limiter.slot(organization_id, provider) as acquired:
+                assert acquired
+                with lock:
+                    active['now'] += 1
+                    active['max'] = max(active['max'], active['now'])
+                time.sleep(hold_seconds)
+                with lock:
+                    active['now'] -= 1
+        
+        with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+            for future in [pool.submit(task, *key) for key in keys]:
+                future.result()
+        return active['max']
+    
+    def test_organization_cap(self):
+        limiter = AIConcurrencyLimiter(max_per_organization=2, max_per_provider=10)
+        keys = [('org-1', 'openai')] * 6
+        assert self._run_concurrently(limiter, keys) <= 2
+    
+    def test_provider_cap_across_organizations(self):
+        limiter = AIConcurrencyLimiter(max_per_organization=10, max_per_provider=3)
+        keys = [(f'org-{i}', 'gemini') for i in range(8)]
+        assert self._run_concurrently(limiter, keys) <= 3
+    
+    def test_cancel_while_waiting(self):
+        limiter = AIConcurrencyLimiter(max_per_organization=1, max_per_provider=1)
+        cancel_event = threading.Event()
+        
+        with limiter.slot('org-1', 'openai') as acquired:
+            assert acquired
+            cancel_event.set()
+            with limiter.slot('org-1', 'openai', cancel_event) as waiting:
+                assert waiting is False
+        
+        # Vaga liberada após o cancelamento
+        with limiter.slot('org-1', 'openai') as acquired:
+            assert acquired
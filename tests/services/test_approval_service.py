@@ -0,0 +1,103 @@
+"""
+Testes para a retomada de execuções pausadas por human-in-loop (DAGScheduler)
+"""
+import threading
+import time
+
+import pytest
+
+from app.database import db
+from app.models import Workflow, WorkflowApproval, WorkflowExecution, WorkflowNode
+from app.services import workflow_executor
+from app.services.approval_service import resume_workflow_execution
+from app.services.workflow_executor import WorkflowExecutor
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Nodes de documento/email falsos: registram cada execução e o documento gerado"""
+    executed = []
+    lock = threading.Lock()
+    
+    def fake_execute(delay):
+        def execute(self, node, context):
+            time.sleep(delay)
+            with lock:
+                executed.append(node.node_type)
+            context.generated_documents.append({'node_type': node.node_type})
+            context.metadata['current_node_position'] = node.position
+            return context
+        return execute
+    
+    # google-docs demora: ainda está rodando quando o human-in-loop pausa
+    monkeypatch.setattr(workflow_executor.GoogleDocsNodeExecutor, 'execute', fake_execute(0.3))
+    monkeypatch.setattr(workflow_executor.GoogleSlidesNodeExecutor, 'execute', fake_execute(0))
+    monkeypatch.setattr(workflow_executor.GmailEmailNodeExecutor, 'execute', fake_execute(0))
+    return executed
+
+
+@pytest.fixture
+def branched_workflow(organization):
+    """
+    trigger -> google-docs -> google-slides
+            -> human-in-loop -> gmail
+    """
+    workflow = Workflow(organization_id=organization.id, name='Aprovação', status='active')
+    db.session.add(workflow)
+    db.session.flush()
+    
+    def add_node(node_type, position, parent=None, config=None):
+        node = WorkflowNode(
+            workflow_id=workflow.id,
+            node_type=node_type,
+            position=position,
+            parent_node_id=parent.id if parent else None,
+            config=config or {}
+        )
+        db.session.add(node)
+        db.session.flush()
+        return node
+    
+    trigger = add_node('trigger', 1, config={'trigger_type': 'webhook'})
+    docs = add_node('google-docs', 2, trigger)
+    add_node('google-slides', 3, docs)
+    approval_node = add_node('human-in-loop', 4, trigger, {'approver_emails': ['aprovador@example.com']})
+    add_node('gmail', 5, approval_node)
+    db.session.commit()
+    return workflow
+
+
+class TestResumeWorkflowExecution:
+    """Testes de resume_workflow_execution com branches paralelos"""
+    
+    def test_parallel_branch_runs_once_and_pending_nodes_run_on_resume(self, app, calls, branched_workflow):
+        executor = WorkflowExecutor()
+        execution = executor.create_execution(
+            workflow=branched_workflow,
+            source_object_id='42',
+            source_object_type='deal',
+            trigger_type='webhook',
+            trigger_data={'source_data': {'id': '42'}}
+        )
+        
+        executor.run_execution(execution, branched_workflow)
+        
+        assert execution.status == 'paused'
+        assert calls == ['google-docs']
+        
+        approval = WorkflowApproval.query.filter_by(workflow_execution_id=execution.id).one()
+        snapshot = approval.execution_context
+        assert snapshot['generated_documents'] == [{'node_type': 'google-docs'}]
+        assert len(snapshot['completed_node_ids']) == 3  # trigger, google-docs, human-in-loop
+        
+        approval.status = 'approved'
+        db.session.commit()
+        resume_workflow_execution(approval)
+        
+        execution = db.session.get(WorkflowExecution, execution.id)
+        assert execution.status == 'completed'
+        assert sorted(calls) == ['gmail', 'google-docs', 'google-slides']
+        
+        # Segunda aprovação da mesma execução não executa nada de novo
+        resume_workflow_execution(approval)
+        assert len(calls) == 3
@@ -0,0 +1,90 @@
+"""
+Testes para o planejamento dos batchUpdate do Google Docs
+"""
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.services.document_generation import docs_batch_planner
+from app.services.document_generation.docs_batch_planner import plan_replace_all_text, run_batch_plan
+
+
+def http_error(status, content=b'{}'):
+    return HttpError(httplib2.Response({'status': status}), content)
+
+
+class TestPlanReplaceAllText:
+    """Testes da montagem dos lotes"""
+    
+    def test_dedups_and_drops_noops(self):
+        plan = plan_replace_all_text([
+            ('{{nome}}', 'Maria'),
+            ('{{nome}}', 'João'),
+            ('{{cargo}}', '{{cargo}}'),
+            ('{{empresa}}', '')
+        ])
+        
+        texts = [(r['replaceAllText']['containsText']['text'], r['replaceAllText']['replaceText']) for r in plan.chunks[0]]
+        assert texts == [('{{nome}}', 'Maria'), ('{{empresa}}', '')]
+        assert plan.skipped == 2
+    
+    def test_chunks_by_count_keeping_order(self):
+        plan = plan_replace_all_text([(f'{{{{tag{i}}}}}', str(i)) for i in range(7)], max_requests=3)
+        
+        assert [len(chunk) for chunk in plan.chunks] == [3, 3, 1]
+        assert plan.chunks[2][0]['replaceAllText']['replaceText'] == '6'
+    
+    def test_chunks_by_size(self):
+        plan = plan_replace_all_text(
+            [('{{a}}', 'x' * 600), ('{{b}}', 'y' * 600), ('{{c}}', 'z' * 5000)],
+            max_bytes=1000
+        )
+        
+        # Requisição maior que o limite vai sozinha num lote
+        assert [len(chunk) for chunk in plan.chunks] == [1, 1, 1]
+    
+    def test_empty(self):
+        assert plan_replace_all_text([]).chunks == []
+
+
+class TestRunBatchPlan:
+    """Testes da execução dos lotes"""
+    
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        monkeypatch.setattr(docs_batch_planner.time, 'sleep', lambda seconds: None)
+    
+    def test_retries_quota_errors(self):
+        errors = [http_error(429), http_error(403, b'{"error": {"errors": [{"reason": "rateLimitExceeded"}]}}')]
+        sent = []
+        
+        def execute(requests):
+            if errors:
+                raise errors.pop(0)
+            sent.append(len(requests))
+        
+        plan = plan_replace_all_text([(f'{{{{t{i}}}}}', 'v') for i in range(5)], max_requests=2)
+        timings = run_batch_plan(execute, plan)
+        
+        assert sent == [2, 2, 1]
+        assert [t['retries'] for t in timings] == [2, 0, 0]
+        assert [t['chunk'] for t in timings] == [0, 1, 2]
+    
+    def test_non_retryable_error_propagates(self):
+        def execute(requests):
+            raise http_error(400)
+        
+        with pytest.raises(HttpError):
+            run_batch_plan(execute, plan_replace_all_text([('{{a}}', 'b')]))
+    
+    def test_gives_up_after_max_retries(self):
+        calls = []
+        
+        def execute(requests):
+            calls.append(1)
+            raise http_error(503)
+        
+        with pytest.raises(HttpError):
+            run_batch_plan(execute, plan_replace_all_text([('{{a}}', 'b')]), max_retries=2)
+        assert len(calls) == 3
@@ -0,0 +1,305 @@
+"""
+Testes para os helpers de partições de workflow_executions
+"""
+import gzip
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import execution_partitions
+from app.services.execution_partitions import (
+    _overlaps,
+    add_months,
+    apply_retention,
+    archive_partition,
+    create_month_partition,
+    ensure_future_partitions,
+    month_start,
+    months_between,
+    parse_partition_bound,
+    partition_name,
+    split_legacy_partition,
+)
+
+
+class FakeResult:
+    def __init__(self, scalar=None, row=None, rowcount=0):
+        self._scalar = scalar
+        self._row = row
+        self.rowcount = rowcount
+    
+    def scalar(self):
+        return self._scalar
+    
+    def first(self):
+        return self._row
+    
+    def one(self):
+        return self._row
+    
+    def all(self):
+        return self._row or []
+    
+    def __iter__(self):
+        return iter(self._row or [])
+
+
+class FakeSession:
+    """Registra o SQL executado; as respostas são escolhidas pelo trecho do SQL"""
+    
+    def __init__(self, responses):
+        self.responses = responses
+        self.statements = []
+        self.commits = 0
+    
+    def execute(self, statement, params=None):
+        sql = ' '.join(str(statement).split())
+        self.statements.append(sql)
+        for fragment, result in self.responses.items():
+            if fragment in sql:
+                return result
+        return FakeResult()
+    
+    def commit(self):
+        self.commits += 1
+    
+    def connection(self):
+        return self
+    
+    def execution_options(self, **options):
+        self.execution_options_used = options
+        return self
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(responses):
+        fake = FakeSession(responses)
+        monkeypatch.setattr(execution_partitions, 'db', SimpleNamespace(session=fake))
+        return fake
+    return install
+
+
+class TestMonths:
+    """Testes do cálculo de meses das partições"""
+    
+    def test_month_start(self):
+        assert month_start(datetime(2026, 10, 16, 23, 59)) == datetime(2026, 10, 1)
+    
+    @pytest.mark.parametrize('months, expected', [
+        (0, datetime(2026, 11, 1)),
+        (2, datetime(2027, 1, 1)),
+        (-11, datetime(2025, 12, 1)),
+    ])
+    def test_add_months(self, months, expected):
+        assert add_months(datetime(2026, 11, 20), months) == expected
+    
+    def test_partition_name(self):
+        assert partition_name(datetime(2026, 3, 1)) == 'workflow_executions_p202603'
+    
+    def test_months_between(self):
+        assert months_between(datetime(2025, 11, 20), datetime(2026, 1, 3)) == [
+            datetime(2025, 11, 1), datetime(2025, 12, 1), datetime(2026, 1, 1)
+        ]
+
+
+class TestPartitionBounds:
+    """Testes da leitura de pg_get_expr(relpartbound)"""
+    
+    def test_monthly_bound(self):
+        bound = "FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')"
+        assert parse_partition_bound(bound) == (datetime(2026, 10, 1), datetime(2026, 11, 1), False)
+    
+    def test_legacy_bound(self):
+        bound = "FOR VALUES FROM (MINVALUE) TO ('2026-10-01 00:00:00')"
+        assert parse_partition_bound(bound) == (None, datetime(2026, 10, 1), False)
+    
+    def test_default_partition(self):
+        assert parse_partition_bound('DEFAULT') == (None, None, True)
+    
+    def test_unknown_bound(self):
+        with pytest.raises(ValueError):
+            parse_partition_bound("FOR VALUES IN ('a')")
+    
+    def test_overlap_with_legacy(self):
+        october, november = datetime(2026, 10, 1), datetime(2026, 11, 1)
+        assert _overlaps(october, november, None, november)
+        assert not _overlaps(november, datetime(2026, 12, 1), None, november)
+
+
+class TestCreateMonthPartition:
+    """Testes de create_month_partition()"""
+    
+    def test_moves_rows_already_in_default(self, session):
+        fake = session({
+            'SELECT 1 FROM': FakeResult(row=(1,)),
+            'INSERT INTO workflow_executions_pending': FakeResult(rowcount=4),
+        })
+        
+        moved = create_month_partition(datetime(2026, 11, 1), 'workflow_executions_default')
+        
+        assert moved == 4
+        create = next(i for i, sql in enumerate(fake.statements) if sql.startswith('CREATE TABLE IF NOT EXISTS'))
+        delete = next(i for i, sql in enumerate(fake.statements) if 'DELETE FROM "workflow_executions_default"' in sql)
+        reinsert = fake.statements.index('INSERT INTO workflow_executions SELECT * FROM workflow_executions_pending')
+        assert delete < create < reinsert
+        assert fake.statements[-1] == 'DROP TABLE workflow_executions_pending'
+    
+    def test_empty_default_only_creates_partition(self, session):
+        fake = session({'SELECT 1 FROM': FakeResult(row=None)})
+        
+        assert create_month_partition(datetime(2026, 11, 1), 'workflow_executions_default') == 0
+        assert not any('DELETE' in sql or 'pending' in sql for sql in fake.statements)
+        assert fake.statements[-1].startswith('CREATE TABLE IF NOT EXISTS "workflow_executions_p202611"')
+
+
+class TestEnsureFuturePartitions:
+    """Testes de ensure_future_partitions()"""
+    
+    def test_creates_past_months_found_in_default(self, session):
+        fake = session({
+            'pg_inherits': FakeResult(row=[
+                ('workflow_executions_default', 'DEFAULT'),
+                ('workflow_executions_p202610', "FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')"),
+            ]),
+            'min(created_at)': FakeResult(scalar=datetime(2026, 9, 12)),
+        })
+        
+        created = ensure_future_partitions(months_ahead=2, now=datetime(2026, 10, 16))
+        
+        assert created == ['workflow_executions_p202609', 'workflow_executions_p202611', 'workflow_executions_p202612']
+        assert fake.commits == 3
+
+
+class TestSplitLegacyPartition:
+    """Testes de split_legacy_partition()"""
+    
+    def test_resumes_detached_legacy_table(self, session):
+        fake = session({
+            'to_regclass': FakeResult(scalar='workflow_executions_legacy'),
+            'pg_inherits': FakeResult(row=[
+                ('workflow_executions_default', 'DEFAULT'),
+                ('workflow_executions_p202610', "FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')"),
+            ]),
+            'min(created_at)': FakeResult(row=(datetime(2026, 8, 15), datetime(2026, 9, 30))),
+            'DELETE FROM workflow_executions_legacy': FakeResult(rowcount=10),
+        })
+        
+        report = split_legacy_partition()
+        
+        assert not any('DETACH' in sql for sql in fake.statements)
+        assert report == [
+            {'partition': 'workflow_executions_p202608', 'rows': 10},
+            {'partition': 'workflow_executions_p202609', 'rows': 10},
+        ]
+        assert fake.statements[-1] == 'DROP TABLE workflow_executions_legacy'
+    
+    def test_missing_legacy_table(self, session):
+        fake = session({'to_regclass': FakeResult(scalar=None)})
+        
+        assert split_legacy_partition() == []
+        assert len(fake.statements) == 1
+
+
+PARTITIONS = FakeResult(row=[
+    ('workflow_executions_default', 'DEFAULT'),
+    ('workflow_executions_legacy', "FOR VALUES FROM (MINVALUE) TO ('2025-09-01 00:00:00')"),
+    ('workflow_executions_p202509', "FOR VALUES FROM ('2025-09-01 00:00:00') TO ('2025-10-01 00:00:00')"),
+    ('workflow_executions_p202510', "FOR VALUES FROM ('2025-10-01 00:00:00') TO ('2025-11-01 00:00:00')"),
+    ('workflow_executions_p202610', "FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')"),
+])
+
+
+def dropped(fake):
+    return [sql[len('DROP TABLE '):].strip('"') for sql in fake.statements if sql.startswith('DROP TABLE')]
+
+
+class TestApplyRetention:
+    """Testes de apply_retention()"""
+    
+    def test_drops_only_partitions_ending_before_cutoff(self, session):
+        fake = session({'pg_inherits': PARTITIONS})
+        
+        # cutoff: 2025-10-16; p202510 termina depois, default e mês atual ficam
+        report = apply_retention(retention_days=365, now=datetime(2026, 10, 16))
+        
+        assert [item['partition'] for item in report] == ['workflow_executions_legacy', 'workflow_executions_p202509']
+        assert dropped(fake) == ['workflow_executions_legacy', 'workflow_executions_p202509']
+        assert report[0] == {'partition': 'workflow_executions_legacy', 'rows': None, 'archive': None}
+        assert fake.commits == 2
+    
+    def test_partition_ending_at_cutoff_is_dropped(self, session):
+        fake = session({'pg_inherits': PARTITIONS})
+        
+        apply_retention(retention_days=365, now=datetime(2026, 10, 1))
+        
+        assert dropped(fake) == ['workflow_executions_legacy', 'workflow_executions_p202509']
+    
+    def test_references_cleaned_before_detach_and_drop(self, session):
+        fake = session({'pg_inherits': PARTITIONS})
+        
+        apply_retention(retention_days=400, now=datetime(2026, 10, 16))
+        
+        statements = fake.statements[1:]
+        assert [sql.split(' ')[0] for sql in statements] == ['DELETE', 'UPDATE', 'ALTER', 'DROP']
+        assert 'workflow_approvals' in statements[0] and '"workflow_executions_legacy"' in statements[0]
+        assert statements[1].startswith('UPDATE bulk_generation_items SET execution_id = NULL')
+        assert statements[2] == 'ALTER TABLE workflow_executions DETACH PARTITION "workflow_executions_legacy"'
+    
+    def test_archives_before_drop(self, session, tmp_path):
+        fake = session({
+            'pg_inherits': PARTITIONS,
+            'row_to_json': FakeResult(row=[('{"id": "1"}',), ('{"id": "2"}',)]),
+        })
+        
+        report = apply_retention(retention_days=400, archive_dir=str(tmp_path), now=datetime(2026, 10, 16))
+        
+        archive = str(tmp_path / 'workflow_executions_legacy.jsonl.gz')
+        assert report == [{'partition': 'workflow_executions_legacy', 'rows': 2, 'archive': archive}]
+        export = next(i for i, sql in enumerate(fake.statements) if 'row_to_json' in sql)
+        delete = next(i for i, sql in enumerate(fake.statements) if sql.startswith('DELETE'))
+        assert export < delete
+    
+    @pytest.mark.parametrize('retention_days', [0, -30])
+    def test_non_positive_retention_is_noop(self, session, retention_days):
+        fake = session({'pg_inherits': PARTITIONS})
+        
+        assert apply_retention(retention_days=retention_days, now=datetime(2026, 10, 16)) == []
+        assert fake.statements == []
+        assert fake.commits == 0
+
+
+class TestArchivePartition:
+    """Testes de archive_partition()"""
+    
+    def test_writes_tmp_file_then_renames(self, session, tmp_path, monkeypatch):
+        fake = session({'row_to_json': FakeResult(row=[('{"id": "1"}',), ('{"id": "2"}',)])})
+        renames = []
+        real_replace = os.replace
+        
+        def replace(src, dst):
+            renames.append((src, dst, os.path.exists(src), os.path.exists(dst)))
+            real_replace(src, dst)
+        monkeypatch.setattr(execution_partitions.os, 'replace', replace)
+        
+        path, rows = archive_partition('workflow_executions_p202509', str(tmp_path / 'archive'))
+        
+        assert rows == 2
+        assert renames == [(f'{path}.tmp', path, True, False)]
+        assert not os.path.exists(f'{path}.tmp')
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            assert archive.read() == '{"id": "1"}\n{"id": "2"}\n'
+        assert fake.execution_options_used['stream_results'] is True
+    
+    def test_interrupted_export_leaves_no_archive(self, session, tmp_path):
+        def broken_rows():
+            yield ('{"id": "1"}',)
+            raise RuntimeError('conexão perdida')
+        session({'row_to_json': broken_rows()})
+        
+        with pytest.raises(RuntimeError):
+            archive_partition('workflow_executions_p202509', str(tmp_path))
+        
+        assert not os.path.exists(tmp_path / 'workflow_executions_p202509.jsonl.gz')
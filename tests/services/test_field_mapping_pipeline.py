@@ -0,0 +1,123 @@
+"""
+Testes para o pipeline compilado de field mappings
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.document_generation import google_docs
+from app.services.document_generation.field_mapping_pipeline import (
+    clear_pipeline_cache,
+    compile_field_mappings,
+    get_workflow_mapping_pipeline,
+)
+from app.services.document_generation.google_docs import GoogleDocsService
+from app.services.document_generation.microsoft_word import MicrosoftWordService
+from app.services.document_generation.tag_processor import TagProcessor
+
+
+MAPPINGS = [
+    {'template_tag': 'valor', 'source_field': 'amount', 'transform_type': 'currency', 'transform_config': {'symbol': 'US$'}},
+    {'template_tag': 'empresa', 'source_field': 'company.name', 'transform_type': 'uppercase'},
+    {'template_tag': 'fechamento', 'source_field': 'closedate', 'transform_type': 'date_format', 'default_value': 'a definir'},
+    {'template_tag': 'sem_campo', 'source_field': ''},
+]
+
+
+class TestCompileFieldMappings:
+    """Testes para compile_field_mappings()"""
+    
+    def test_apply_transforms_defaults_and_unmapped_tags(self):
+        pipeline = compile_field_mappings(MAPPINGS)
+        data = {'amount': '1500.5', 'company': {'name': 'acme'}, 'dealname': 'Deal'}
+        
+        values = pipeline.apply(data, ['valor', 'empresa', 'fechamento', 'dealname', 'missing'])
+        
+        assert values == {
+            'valor': 'US$ 1,500.50',
+            'empresa': 'ACME',
+            'fechamento': 'a definir',
+            'dealname': 'Deal',
+            'missing': ''
+        }
+    
+    def test_batch_matches_single_object(self):
+        pipeline = compile_field_mappings(MAPPINGS)
+        rows = [
+            {'amount': 10, 'closedate': '2026-03-01T00:00:00Z'},
+            {'amount': 'n/a', 'company': {'name': 'beta'}},
+        ]
+        
+        assert pipeline.apply_batch(rows) == [pipeline.apply(row) for row in rows]
+        assert pipeline.apply_batch(rows)[0]['fechamento'] == '01/03/2026'
+    
+    def test_plain_dict_mappings(self):
+        pipeline = compile_field_mappings({'nome': 'contact.firstname'})
+        assert pipeline.apply({'contact': {'firstname': 'Ana'}}, ['nome']) == {'nome': 'Ana'}
+    
+    def test_tags_with_spaces_use_the_same_step(self):
+        pipeline = compile_field_mappings(MAPPINGS + [{'template_tag': ' cliente ', 'source_field': 'company.name'}])
+        data = {'amount': 10, 'company': {'name': 'acme'}, 'dealname': 'Deal'}
+        tags = [' valor ', 'cliente', ' dealname']
+        
+        assert pipeline.step_for(' valor ') is pipeline.step_for('valor')
+        assert pipeline.apply(data, tags) == {' valor ': 'US$ 10.00', 'cliente': 'acme', ' dealname': 'Deal'}
+        assert pipeline.apply_batch([data], tags) == [pipeline.apply(data, tags)]
+    
+    def test_apply_transform_uses_same_formatting(self):
+        assert TagProcessor.apply_transform(1234, 'number_format', {'decimals': 1}) == '1,234.0'
+        assert TagProcessor.apply_transform('abc', 'currency') == 'abc'
+        assert TagProcessor.apply_transform(None, 'uppercase') == ''
+
+
+class TestGetWorkflowMappingPipeline:
+    """Testes para get_workflow_mapping_pipeline()"""
+    
+    def setup_method(self):
+        clear_pipeline_cache()
+    
+    def test_cached_until_workflow_changes(self):
+        node = SimpleNamespace(id='node-1', config={'field_mappings': MAPPINGS})
+        workflow = SimpleNamespace(id='wf-1', updated_at=datetime(2026, 1, 1), field_mappings=[])
+        
+        first = get_workflow_mapping_pipeline(workflow, node)
+        assert get_workflow_mapping_pipeline(workflow, node) is first
+        assert get_workflow_mapping_pipeline(workflow).steps == ()
+        
+        workflow.updated_at = datetime(2026, 1, 2)
+        assert get_workflow_mapping_pipeline(workflow, node) is not first
+
+
+class FakeDocsApi:
+    """Cliente da Docs API falso: guarda os replaceAllText do batchUpdate"""
+    
+    def __init__(self):
+        self.replacements = {}
+    
+    def documents(self):
+        return self
+    
+    def batchUpdate(self, documentId, body):
+        for request in body['requests']:
+            replace = request['replaceAllText']
+            self.replacements[replace['containsText']['text']] = replace['replaceText']
+        return SimpleNamespace(execute=lambda: {})
+
+
+class TestRenderersShareTagNormalization:
+    """Word e Google Docs resolvem tags com espaços pelo mesmo passo do pipeline"""
+    
+    def test_word_and_google_docs_render_same_values(self, monkeypatch):
+        docs_api = FakeDocsApi()
+        monkeypatch.setattr(google_docs, 'get_google_service', lambda name, version, credentials: docs_api)
+        pipeline = compile_field_mappings(MAPPINGS)
+        data = {'amount': 10, 'company': {'name': 'acme'}, 'dealname': 'Deal'}
+        tags = [' valor ', 'empresa', ' dealname ']
+        
+        GoogleDocsService(credentials=None).replace_tags_in_document(
+            'doc-1', data, pipeline, tag_index={'tags': tags, 'ai_tags': []}
+        )
+        render_tag = MicrosoftWordService('token')._tag_renderer(data, pipeline)
+        
+        assert docs_api.replacements == {'{{' + tag + '}}': render_tag(tag) for tag in tags}
+        assert docs_api.replacements['{{ valor }}'] == 'US$ 10.00'
@@ -0,0 +1,74 @@
+"""
+Testes para a criação de arquivos no OneDrive via Graph
+"""
+
+from app.services.document_generation import graph_files
+from app.services.document_generation.graph_files import SIMPLE_UPLOAD_LIMIT, upload_new_file, with_extension
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self._data
+
+
+class FakeGraph:
+    def __init__(self):
+        self.calls = []
+    
+    def put(self, url, **kwargs):
+        self.calls.append(('PUT', url, kwargs))
+        return FakeResponse({'id': 'new-1', 'webUrl': 'https://onedrive/new-1'})
+    
+    def post(self, url, **kwargs):
+        self.calls.append(('POST', url, kwargs))
+        return FakeResponse({'uploadUrl': 'https://upload/session'})
+
+
+class TestWithExtension:
+    """Testes para with_extension()"""
+    
+    def test_uses_template_extension(self):
+        assert with_extension('Proposta', 'Modelo.DOCM', '.docx') == 'Proposta.DOCM'
+    
+    def test_keeps_existing_extension(self):
+        assert with_extension('Proposta.pptx', None, '.pptx') == 'Proposta.pptx'
+
+
+class TestUploadNewFile:
+    """Testes para upload_new_file()"""
+    
+    def test_small_file_single_put_in_folder(self, monkeypatch):
+        graph = FakeGraph()
+        monkeypatch.setattr(graph_files, 'http_client', graph)
+        
+        result = upload_new_file('token', 'folder-1', 'Proposta ACME.docx', b'conteudo')
+        
+        method, url, kwargs = graph.calls[0]
+        assert method == 'PUT'
+        assert url.endswith('/me/drive/items/folder-1:/Proposta%20ACME.docx:/content')
+        assert kwargs['params'] == {'@microsoft.graph.conflictBehavior': 'rename'}
+        assert kwargs['headers'] == {'Authorization': 'Bearer token'}
+        assert result == {'id': 'new-1', 'url': 'https://onedrive/new-1'}
+    
+    def test_large_file_uses_upload_session(self, monkeypatch):
+        graph = FakeGraph()
+        uploads = []
+        monkeypatch.setattr(graph_files, 'http_client', graph)
+        monkeypatch.setattr(
+            graph_files, 'upload_to_graph_session',
+            lambda upload_url, content: uploads.append((upload_url, len(content))) or {'id': 'big-1'}
+        )
+        
+        result = upload_new_file('token', None, 'Grande.pdf', memoryview(bytes(SIMPLE_UPLOAD_LIMIT)))
+        
+        assert graph.calls[0][0] == 'POST'
+        assert graph.calls[0][1].endswith('/me/drive/root:/Grande.pdf:/createUploadSession')
+        assert uploads == [('https://upload/session', SIMPLE_UPLOAD_LIMIT)]
+        assert result['id'] == 'big-1'
+        assert result['url'].endswith('/me/drive/items/big-1')
@@ -0,0 +1,83 @@
+"""
+Testes para o acompanhamento de operações assíncronas do Graph
+"""
+
+import base64
+import json
+
+import pytest
+
+from app.services.document_generation import graph_operations
+from app.services.document_generation.graph_operations import (
+    GraphOperationError,
+    get_operation_stats,
+    tenant_from_token,
+    wait_for_operation,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+    
+    def json(self):
+        return self._data
+
+
+class FakeMonitor:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+    
+    def get(self, url, **kwargs):
+        self.calls.append(kwargs)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(graph_operations.time, 'sleep', calls.append)
+    return calls
+
+
+class TestWaitForOperation:
+    """Testes para wait_for_operation()"""
+    
+    def test_backoff_until_completed(self, monkeypatch, sleeps):
+        monitor = FakeMonitor([
+            FakeResponse(202, {'status': 'inProgress', 'percentageComplete': 10}),
+            FakeResponse(202, {'status': 'inProgress', 'percentageComplete': 60}),
+            FakeResponse(200, {'status': 'completed', 'resourceId': 'drive!item-9'}),
+        ])
+        monkeypatch.setattr(graph_operations, 'http_client', monitor)
+        
+        assert wait_for_operation('https://monitor', tenant_id='t-1', max_wait_seconds=60) == 'item-9'
+        
+        assert len(sleeps) == 2
+        assert 0.25 <= sleeps[0] <= 0.5 and 0.5 <= sleeps[1] <= 1.0
+        assert all(call == {'allow_redirects': False} for call in monitor.calls)
+        assert get_operation_stats()['t-1:copy']['count'] >= 1
+    
+    def test_retry_after_and_deadline(self, monkeypatch, sleeps):
+        monitor = FakeMonitor([FakeResponse(202, {'status': 'inProgress'}, headers={'Retry-After': '30'})])
+        monkeypatch.setattr(graph_operations, 'http_client', monitor)
+        
+        with pytest.raises(GraphOperationError):
+            wait_for_operation('https://monitor', max_wait_seconds=10)
+        assert sleeps == []
+    
+    def test_failed_operation(self, monkeypatch, sleeps):
+        monitor = FakeMonitor([FakeResponse(200, {'status': 'failed', 'error': {'message': 'quota'}})])
+        monkeypatch.setattr(graph_operations, 'http_client', monitor)
+        
+        with pytest.raises(GraphOperationError, match='quota'):
+            wait_for_operation('https://monitor', max_wait_seconds=10)
+
+
+def test_tenant_from_token():
+    payload = base64.urlsafe_b64encode(json.dumps({'tid': 'tenant-1'}).encode()).decode().rstrip('=')
+    assert tenant_from_token(f'header.{payload}.signature') == 'tenant-1'
+    assert tenant_from_token('opaque-token') is None
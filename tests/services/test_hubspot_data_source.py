@@ -0,0 +1,162 @@
+"""
+Testes para a busca de associações em lote do HubSpotDataSource
+"""
+
+from types import SimpleNamespace
+
+import requests
+
+from app.services.data_sources.hubspot import HubSpotDataSource
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self._data
+
+
+class FakeHttp:
+    """Responde às chamadas do HubSpot e registra as URLs chamadas"""
+    
+    def __init__(self, object_response, batch_objects):
+        self.object_response = object_response
+        self.batch_objects = batch_objects
+        self.calls = []
+    
+    def request(self, method, url, **kwargs):
+        return self.get(url, **kwargs) if method == 'GET' else self.post(url, **kwargs)
+    
+    def get(self, url, **kwargs):
+        self.calls.append(('GET', url, None))
+        return FakeResponse(self.object_response)
+    
+    def post(self, url, json=None, **kwargs):
+        self.calls.append(('POST', url, json))
+        object_type = url.split('/crm/v3/objects/')[1].split('/')[0]
+        return FakeResponse({
+            'results': [
+                {'id': item['id'], 'properties': self.batch_objects[object_type][item['id']]}
+                for item in json['inputs']
+            ]
+        })
+
+
+def make_data_source():
+    connection = SimpleNamespace(credentials={'access_token': 'token'}, config={'portal_id': '1'})
+    return HubSpotDataSource(connection)
+
+
+class TestGetObjectDataAssociations:
+    """Testes para get_object_data() com associações"""
+    
+    def test_one_batch_call_per_association_type(self, monkeypatch):
+        line_items = {str(i): {'name': f'Item {i}'} for i in range(150)}
+        fake = FakeHttp(
+            object_response={
+                'id': '10',
+                'properties': {'dealname': 'Deal'},
+                'associations': {
+                    'companies': {'results': [{'id': '7', 'type': 'deal_to_company'}]},
+                    'line items': {'results': [{'id': i} for i in line_items]}
+                }
+            },
+            batch_objects={'companies': {'7': {'name': 'ACME'}}, 'line_items': line_items}
+        )
+        monkeypatch.setattr('app.services.data_sources.hubspot.http_client', fake)
+        
+        data = make_data_source().get_object_data('deal', '10')
+        
+        # 1 GET + 1 lote de companies + 2 lotes de line items (limite de 100)
+        assert len(fake.calls) == 4
+        assert data['associations']['company'] == {'id': '7', 'name': 'ACME'}
+        assert len(data['associations']['line_items']) == 150
+        assert data['associations']['line_items'][0] == {'id': '0', 'name': 'Item 0'}
+    
+    def test_association_properties_override_defaults(self, monkeypatch):
+        fake = FakeHttp(
+            object_response={
+                'id': '10',
+                'properties': {},
+                'associations': {
+                    'companies': {'results': [{'id': '7'}, {'id': '7'}]}
+                }
+            },
+            batch_objects={'companies': {'7': {'cnpj': '123'}}}
+        )
+        monkeypatch.setattr('app.services.data_sources.hubspot.http_client', fake)
+        
+        data = make_data_source().get_object_data('deal', '10', association_properties={'companies': ['cnpj']})
+        
+        batch_call = fake.calls[1]
+        assert batch_call[2]['properties'] == ['cnpj']
+        assert batch_call[2]['inputs'] == [{'id': '7'}]
+        assert data['associations']['companies'] == [{'id': '7', 'cnpj': '123'}]
+    
+    def test_paged_associations_keep_inline_ids_when_batch_read_fails(self, monkeypatch):
+        fake = FakeHttp(
+            object_response={
+                'id': '10',
+                'properties': {},
+                'associations': {
+                    'contacts': {
+                        'results': [{'id': '3'}],
+                        'paging': {'next': {'after': '1'}}
+                    }
+                }
+            },
+            batch_objects={'contacts': {'3': {'firstname': 'Ana'}}}
+        )
+        fake_post = fake.post
+        
+        def post(url, json=None, **kwargs):
+            if '/crm/v4/associations/' in url:
+                raise requests.exceptions.ConnectionError('timeout')
+            return fake_post(url, json=json, **kwargs)
+        
+        monkeypatch.setattr(fake, 'post', post)
+        monkeypatch.setattr('app.services.data_sources.hubspot.http_client', fake)
+        
+        data = make_data_source().get_object_data('deal', '10')
+        
+        assert data['associations']['contacts'] == [{'id': '3', 'firstname': 'Ana'}]
+
+
+class FakeSearchHttp:
+    """Simula a API de search: páginas de 2 resultados ordenados por ID"""
+    
+    def __init__(self, ids):
+        self.ids = ids
+        self.bodies = []
+    
+    def request(self, method, url, json=None, **kwargs):
+        self.bodies.append(json)
+        greater_than = [f['value'] for f in json['filterGroups'][0]['filters'] if f['operator'] == 'GT']
+        ids = [i for i in self.ids if not greater_than or int(i) > int(greater_than[0])]
+        start = int(json.get('after', 0))
+        page = ids[start:start + 2]
+        data = {'results': [{'id': i} for i in page]}
+        if start + 2 < len(ids):
+            data['paging'] = {'next': {'after': str(start + 2)}}
+        return FakeResponse(data)
+
+
+class TestIterObjectIds:
+    """Testes para iter_object_ids() com filtros"""
+    
+    def test_search_restarts_after_results_limit(self, monkeypatch):
+        fake = FakeSearchHttp([str(i) for i in range(1, 8)])
+        monkeypatch.setattr('app.services.data_sources.hubspot.http_client', fake)
+        monkeypatch.setattr(HubSpotDataSource, 'SEARCH_RESULTS_LIMIT', 4)
+        
+        filters = [{'propertyName': 'dealstage', 'operator': 'EQ', 'value': 'won'}]
+        ids = list(make_data_source().iter_object_ids('deal', filters=filters))
+        
+        assert ids == [str(i) for i in range(1, 8)]
+        restart_filters = fake.bodies[2]['filterGroups'][0]['filters']
+        assert restart_filters[-1] == {'propertyName': 'hs_object_id', 'operator': 'GT', 'value': '4'}
+        assert 'after' not in fake.bodies[2]
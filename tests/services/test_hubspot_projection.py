@@ -0,0 +1,110 @@
+"""
+Testes para a projeção de propriedades do HubSpot por workflow
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.data_sources import hubspot_projection
+from app.services.data_sources.hubspot_projection import (
+    build_property_projection,
+    clear_projection_cache,
+    get_workflow_property_projection,
+)
+
+
+def make_workflow(nodes, ai_mappings=None, output_name_template=None, post_actions=None):
+    return SimpleNamespace(
+        id='wf-1',
+        updated_at=datetime(2026, 1, 1),
+        template_id=None,
+        template=None,
+        output_name_template=output_name_template,
+        post_actions=post_actions,
+        field_mappings=[],
+        nodes=nodes,
+        ai_mappings=ai_mappings or []
+    )
+
+
+class TestBuildPropertyProjection:
+    """Testes para build_property_projection()"""
+    
+    def test_primary_and_associated_properties(self):
+        projection = build_property_projection('deal', [
+            'dealname',
+            'deal.amount',
+            'company.name',
+            'associations.contacts.email',
+            'associations.contact.firstname',
+            'line_items.0.price',
+            'timestamp',
+            '=SUM(A1:A2)'
+        ])
+        
+        assert projection.properties == ('amount', 'dealname')
+        assert projection.association_properties == {
+            'companies': ['name'],
+            'contacts': ['email', 'firstname'],
+            'line_items': ['price']
+        }
+    
+    def test_association_without_property(self):
+        projection = build_property_projection('deals', ['associations.companies'])
+        assert projection.association_properties == {'companies': []}
+
+
+class TestGetWorkflowPropertyProjection:
+    """Testes para get_workflow_property_projection()"""
+    
+    def setup_method(self):
+        clear_projection_cache()
+    
+    def test_collects_node_config_and_ai_fields(self):
+        workflow = make_workflow(
+            nodes=[SimpleNamespace(node_type='gmail', config={
+                'to': ['{{email}}'],
+                'subject_template': 'Proposta {{dealname}}'
+            })],
+            ai_mappings=[SimpleNamespace(source_fields=['amount'], prompt_template='Resuma {{company.name}}')]
+        )
+        
+        projection = get_workflow_property_projection(workflow, 'deal')
+        
+        assert projection.properties == ('amount', 'dealname', 'email')
+        assert projection.association_properties == {'companies': ['name']}
+    
+    def test_collects_output_name_template_and_post_actions_fields(self):
+        workflow = make_workflow(
+            nodes=[SimpleNamespace(node_type='gmail', config={'subject_template': 'Proposta'})],
+            output_name_template='Proposta {{dealname}} - {{company.name}}',
+            post_actions={'hubspot_attachment': {'note_template': 'Gerado para {{closedate}}'}}
+        )
+        
+        projection = get_workflow_property_projection(workflow, 'deal')
+        
+        assert projection.properties == ('closedate', 'dealname')
+        assert projection.association_properties == {'companies': ['name']}
+    
+    def test_webhook_node_disables_projection(self):
+        workflow = make_workflow(nodes=[SimpleNamespace(node_type='webhook', config={'url': 'https://x'})])
+        assert get_workflow_property_projection(workflow, 'deal') is None
+    
+    def test_cached_until_workflow_changes(self, monkeypatch):
+        calls = []
+        original = hubspot_projection._collect_workflow_fields
+        
+        def counting_collect(workflow):
+            calls.append(workflow.id)
+            return original(workflow)
+        
+        monkeypatch.setattr(hubspot_projection, '_collect_workflow_fields', counting_collect)
+        workflow = make_workflow(nodes=[SimpleNamespace(node_type='gmail', config={'subject_template': '{{dealname}}'})])
+        
+        get_workflow_property_projection(workflow, 'deal')
+        get_workflow_property_projection(workflow, 'deal')
+        assert len(calls) == 1
+        
+        workflow.updated_at = datetime(2026, 1, 2)
+        get_workflow_property_projection(workflow, 'deal')
+        assert len(calls) == 2
@@ -0,0 +1,73 @@
+"""
+Testes para a renderização de templates Word direto no XML
+"""
+
+import zipfile
+from io import BytesIO
+
+from app.services.document_generation.ooxml_renderer import render_docx, render_part_xml
+
+
+def render(xml, values):
+    return render_part_xml(xml, lambda tag: values.get(tag.strip(), ''))
+
+
+def make_docx(parts):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in parts.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+class TestRenderPartXml:
+    """Testes para render_part_xml()"""
+    
+    def test_tag_split_across_runs_keeps_formatting(self):
+        xml = (
+            '<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>Olá {{</w:t></w:r>'
+            '<w:r><w:t>contact.</w:t></w:r><w:r><w:t>name}}, tudo bem?</w:t></w:r></w:p>'
+        )
+        
+        result, count = render(xml, {'contact.name': 'Ana & Cia'})
+        
+        assert count == 1
+        assert result == (
+            '<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>Olá Ana &amp; Cia</w:t></w:r>'
+            '<w:r><w:t></w:t></w:r><w:r><w:t>, tudo bem?</w:t></w:r></w:p>'
+        )
+    
+    def test_tags_do_not_cross_paragraphs(self):
+        xml = '<w:p><w:r><w:t>{{a</w:t></w:r></w:p><w:p><w:r><w:t>}} {{b}}</w:t></w:r></w:p>'
+        
+        result, count = render(xml, {'b': 'B'})
+        
+        assert count == 1
+        assert result == '<w:p><w:r><w:t>{{a</w:t></w:r></w:p><w:p><w:r><w:t>}} B</w:t></w:r></w:p>'
+    
+    def test_part_without_tags_is_unchanged(self):
+        xml = '<w:p><w:r><w:t xml:space="preserve"> texto { solto </w:t></w:r><w:r><w:t/></w:r></w:p>'
+        assert render(xml, {}) == (xml, 0)
+
+
+class TestRenderDocx:
+    """Testes para render_docx()"""
+    
+    def test_renders_headers_and_copies_other_members(self):
+        image = bytes(range(256)) * 10
+        source = make_docx({
+            '[Content_Types].xml': '<Types/>',
+            'word/document.xml': '<w:body><w:p><w:r><w:t>{{dealname}}</w:t></w:r></w:p></w:body>',
+            'word/header1.xml': '<w:hdr><w:p><w:r><w:t>Proposta {{dealname}}</w:t></w:r></w:p></w:hdr>',
+            'word/media/image1.png': image,
+        })
+        output = BytesIO()
+        
+        stats = render_docx(source, lambda tag: {'dealname': 'Deal X'}.get(tag, ''), output)
+        
+        assert stats == {'parts_rendered': 2, 'tags_replaced': 2}
+        with zipfile.ZipFile(BytesIO(output.getvalue())) as zf:
+            assert zf.namelist() == ['[Content_Types].xml', 'word/document.xml', 'word/header1.xml', 'word/media/image1.png']
+            assert 'Proposta Deal X' in zf.read('word/header1.xml').decode()
+            assert zf.read('word/media/image1.png') == image
+            assert zf.getinfo('word/media/image1.png').compress_type == zipfile.ZIP_DEFLATED
@@ -0,0 +1,66 @@
+"""
+Testes para as ações pós-geração em paralelo
+"""
+
+import threading
+import time
+
+from app.services.document_generation.post_generation import PostGenerationSinks
+
+
+class TestPostGenerationSinks:
+    """Testes do PostGenerationSinks"""
+    
+    def test_sinks_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+        sinks = PostGenerationSinks(deadline_seconds=5)
+        for name in ('drive_pdf', 'hubspot_attachment', 'timeline_event'):
+            # Só passam da barreira se as três estiverem rodando ao mesmo tempo
+            sinks.add(name, lambda name=name: (barrier.wait(), name)[1])
+        
+        report = sinks.run()
+        
+        assert {status['status'] for status in report.values()} == {'success'}
+        assert sinks.results == {
+            'drive_pdf': 'drive_pdf',
+            'hubspot_attachment': 'hubspot_attachment',
+            'timeline_event': 'timeline_event'
+        }
+        assert not sinks.pending
+    
+    def test_failure_is_reported_without_affecting_others(self):
+        def fail():
+            raise RuntimeError('HubSpot indisponível')
+        
+        sinks = PostGenerationSinks(deadline_seconds=5)
+        sinks.add('drive_pdf', lambda: {'id': 'abc'})
+        sinks.add('hubspot_attachment', fail)
+        
+        report = sinks.run()
+        
+        assert report['drive_pdf']['status'] == 'success'
+        assert report['hubspot_attachment'] == {
+            'status': 'failed',
+            'time_ms': report['hubspot_attachment']['time_ms'],
+            'error': 'HubSpot indisponível'
+        }
+        assert sinks.results == {'drive_pdf': {'id': 'abc'}}
+    
+    def test_shared_deadline(self):
+        release = threading.Event()
+        sinks = PostGenerationSinks(deadline_seconds=0.2)
+        sinks.add('fast', lambda: 'ok')
+        sinks.add('slow', lambda: release.wait(5))
+        
+        start = time.monotonic()
+        report = sinks.run()
+        release.set()
+        
+        assert time.monotonic() - start < 2
+        assert report['fast']['status'] == 'success'
+        assert report['slow']['status'] == 'timeout'
+        assert 'slow' not in sinks.results
+        assert sinks.pending
+    
+    def test_no_sinks(self):
+        assert PostGenerationSinks(deadline_seconds=1).run() == {}
@@ -0,0 +1,32 @@
+"""
+Testes para os templates compilados do TagProcessor
+"""
+
+from app.services.document_generation.tag_processor import TagProcessor
+
+
+class TestCompiledTemplate:
+    """Testes para TagProcessor.compile() e replace_tags()"""
+    
+    def test_compile_is_cached_by_text(self):
+        assert TagProcessor.compile('Olá {{ name }}') is TagProcessor.compile('Olá {{ name }}')
+    
+    def test_render_many_data_dicts(self):
+        template = TagProcessor.compile('Proposta {{dealname}} - {{company.name}}{{missing}}')
+        
+        assert template.render({'dealname': 'A', 'company': {'name': 'ACME'}}) == 'Proposta A - ACME'
+        assert template.render({'dealname': 'B', 'company': 'not a dict'}) == 'Proposta B - '
+    
+    def test_replace_tags_with_mappings(self):
+        data = {'contact': {'firstname': 'Ana'}, 'nome': 'ignorado'}
+        result = TagProcessor.replace_tags('Oi {{nome}}, {{ai:intro}}', data, {'nome': 'contact.firstname'})
+        assert result == 'Oi Ana, '
+    
+    def test_text_without_tags(self):
+        template = TagProcessor.compile('Sem tags')
+        assert not template.has_tags
+        assert template.render({}) == 'Sem tags'
+    
+    def test_extract_tags_keeps_raw_names(self):
+        tags = TagProcessor.extract_tags('{{ name }} {{ai:intro}} {{deal.amount}} {{deal.amount}}')
+        assert sorted(tags) == [' name ', 'deal.amount']
@@ -0,0 +1,75 @@
+"""
+Testes para o cache em disco de templates Word/PowerPoint
+"""
+
+import os
+
+from app.services.document_generation import template_blob_cache
+from app.services.document_generation.template_blob_cache import TemplateBlobCache, get_template_content
+
+
+class FakeResponse:
+    def __init__(self, data=None, content=b''):
+        self._data = data
+        self.content = content
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self._data
+
+
+class FakeGraph:
+    def __init__(self, ctag, content):
+        self.ctag = ctag
+        self.file_content = content
+        self.urls = []
+    
+    def get(self, url, headers=None, params=None):
+        self.urls.append(url)
+        if url.endswith('/content'):
+            return FakeResponse(content=self.file_content)
+        return FakeResponse({'id': 'item-1', 'name': 'Contrato.docx', 'cTag': self.ctag})
+
+
+class TestTemplateBlobCache:
+    """Testes para TemplateBlobCache"""
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = TemplateBlobCache(str(tmp_path), max_bytes=25)
+        cache.put('a', 'v1', b'a' * 10)
+        cache.put('b', 'v1', b'b' * 10)
+        
+        # 'a' lido por último: 'b' é o menos usado
+        os.utime(cache._path('b', 'v1'), (1, 1))
+        assert cache.get('a', 'v1') == b'a' * 10
+        cache.put('c', 'v1', b'c' * 10)
+        
+        assert cache.get('b', 'v1') is None
+        assert cache.get('a', 'v1') == b'a' * 10
+        assert cache.get('c', 'v1') == b'c' * 10
+    
+    def test_version_is_part_of_key(self, tmp_path):
+        cache = TemplateBlobCache(str(tmp_path), max_bytes=1000)
+        cache.put('a', 'v1', b'old')
+        assert cache.get('a', 'v2') is None
+
+
+class TestGetTemplateContent:
+    """Testes para get_template_content()"""
+    
+    def test_downloads_only_when_ctag_changes(self, tmp_path, monkeypatch):
+        graph = FakeGraph('ctag-1', b'docx v1')
+        monkeypatch.setattr(template_blob_cache, 'http_client', graph)
+        monkeypatch.setattr(template_blob_cache, '_cache', TemplateBlobCache(str(tmp_path), 1000))
+        
+        get_template_content('https://graph', 'Bearer x', 'item-1')
+        content, metadata = get_template_content('https://graph', 'Bearer x', 'item-1')
+        assert content == b'docx v1'
+        assert metadata['name'] == 'Contrato.docx'
+        assert sum(url.endswith('/content') for url in graph.urls) == 1
+        
+        graph.ctag, graph.file_content = 'ctag-2', b'docx v2'
+        assert get_template_content('https://graph', 'Bearer x', 'item-1')[0] == b'docx v2'
+        assert sum(url.endswith('/content') for url in graph.urls) == 2
@@ -0,0 +1,93 @@
+"""
+Testes para o cache do índice de tags de templates Google Docs
+"""
+import pytest
+
+from app.database import db
+from app.models import Template
+from app.services.document_generation import template_cache
+from app.services.document_generation.template_cache import get_template_tag_index
+
+
+class FakeDocs:
+    """GoogleDocsService falso: registra as leituras do Drive"""
+    
+    def __init__(self, modified_time='2026-01-01T00:00:00Z', tags=None, error=None):
+        self.modified_time = modified_time
+        self.tags = tags or ['dealname']
+        self.error = error
+        self.calls = []
+    
+    def get_file_modified_time(self, file_id):
+        self.calls.append('modified_time')
+        if self.error:
+            raise self.error
+        return self.modified_time
+    
+    def extract_tag_index(self, file_id):
+        self.calls.append('extract')
+        return {'tags': list(self.tags), 'ai_tags': []}
+
+
+@pytest.fixture
+def template(organization):
+    template_cache._checked.clear()
+    template = Template(
+        organization_id=organization.id,
+        name='Proposta',
+        google_file_id='file-1',
+        google_file_type='document',
+        version=1,
+        detected_tags=['dealname'],
+        tag_index={'tags': ['dealname'], 'ai_tags': []},
+        source_modified_time='2026-01-01T00:00:00Z'
+    )
+    db.session.add(template)
+    db.session.commit()
+    yield template
+    template_cache._checked.clear()
+
+
+class TestGetTemplateTagIndex:
+    """Testes de get_template_tag_index()"""
+    
+    def test_cache_hit_without_reading_the_document(self, template):
+        docs = FakeDocs()
+        
+        assert get_template_tag_index(template, docs) == {'tags': ['dealname'], 'ai_tags': []}
+        assert docs.calls == ['modified_time']
+    
+    def test_modified_time_memo_skips_drive_for_60_seconds(self, template, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(template_cache.time, 'time', lambda: now[0])
+        docs = FakeDocs()
+        
+        get_template_tag_index(template, docs)
+        now[0] += 30
+        get_template_tag_index(template, docs)
+        assert docs.calls == ['modified_time']
+        
+        now[0] += template_cache.MODIFIED_TIME_CHECK_SECONDS
+        get_template_tag_index(template, docs)
+        assert docs.calls == ['modified_time', 'modified_time']
+    
+    def test_changed_modified_time_reindexes_and_bumps_version(self, template):
+        docs = FakeDocs(modified_time='2026-02-01T00:00:00Z', tags=['dealname', 'amount'])
+        
+        tag_index = get_template_tag_index(template, docs)
+        
+        assert docs.calls == ['modified_time', 'extract']
+        assert tag_index['tags'] == ['dealname', 'amount']
+        assert template.version == 2
+        assert template.source_modified_time == '2026-02-01T00:00:00Z'
+        
+        # Só flush: o commit é do chamador
+        db.session.rollback()
+        assert db.session.get(Template, template.id).version == 1
+    
+    def test_drive_error_returns_none(self, template):
+        docs = FakeDocs(error=RuntimeError('403'))
+        
+        assert get_template_tag_index(template, docs) is None
+        assert template.version == 1
+        assert not db.session.dirty
@@ -0,0 +1,108 @@
+"""
+Testes para o grafo de dependências do scheduler de workflows
+"""
+
+import pytest
+from types import SimpleNamespace
+
+from app.services.workflow_scheduler import build_dependency_graph
+from app.services.workflow_executor import ExecutionContext
+
+
+def make_node(node_id, position, node_type='google-docs', parent_node_id=None, config=None):
+    return SimpleNamespace(
+        id=node_id,
+        position=position,
+        node_type=node_type,
+        parent_node_id=parent_node_id,
+        config=config or {}
+    )
+
+
+class TestBuildDependencyGraph:
+    """Testes para build_dependency_graph()"""
+    
+    def test_linear_workflow_keeps_position_order(self):
+        nodes = [
+            make_node('t', 1, 'trigger'),
+            make_node('a', 2),
+            make_node('b', 3, 'clicksign'),
+        ]
+        graph = build_dependency_graph(nodes)
+        assert graph == {'t': set(), 'a': {'t'}, 'b': {'a'}}
+    
+    def test_siblings_share_parent(self):
+        nodes = [
+            make_node('t', 1, 'trigger'),
+            make_node('docs', 2, 'google-docs', parent_node_id='t'),
+            make_node('slides', 3, 'google-slides', parent_node_id='t'),
+        ]
+        graph = build_dependency_graph(nodes)
+        assert graph['docs'] == {'t'}
+        assert graph['slides'] == {'t'}
+    
+    def test_email_depends_on_attached_documents(self):
+        nodes = [
+            make_node('t', 1, 'trigger'),
+            make_node('docs', 2, parent_node_id='t'),
+            make_node('slides', 3, 'google-slides', parent_node_id='t'),
+            make_node('email', 4, 'gmail', parent_node_id='docs', config={
+                'attach_documents': True,
+                'document_node_ids': ['docs', 'slides']
+            }),
+        ]
+        graph = build_dependency_graph(nodes)
+        assert graph['email'] == {'docs', 'slides'}
+    
+    def test_cycle_raises(self):
+        nodes = [
+            make_node('t', 1, 'trigger'),
+            make_node('a', 2, parent_node_id='b'),
+            make_node('b', 3, parent_node_id='a'),
+        ]
+        with pytest.raises(ValueError):
+            build_dependency_graph(nodes)
+
+
+class TestExecutionContextForkMerge:
+    """Testes para ExecutionContext.fork() e merge()"""
+    
+    def test_merge_appends_only_new_items(self):
+        context = ExecutionContext('w', 'e', '1', 'deal')
+        context.generated_documents.append({'node_id': 'existing'})
+        
+        first = context.fork()
+        second = context.fork()
+        first.generated_documents.append({'node_id': 'docs'})
+        second.generated_documents.append({'node_id': 'slides'})
+        second.add_error('slides', 'google-slides', 'falhou')
+        
+        context.merge(first)
+        context.merge(second)
+        
+        assert [d['node_id'] for d in context.generated_documents] == ['existing', 'docs', 'slides']
+        assert len(context.metadata['errors']) == 1
+    
+    def test_merge_keeps_pause_flag(self):
+        context = ExecutionContext('w', 'e', '1', 'deal')
+        branch = context.fork()
+        branch.metadata['paused'] = True
+        branch.metadata['approval_ids'] = ['a1']
+        
+        context.merge(branch)
+        
+        assert context.metadata['paused'] is True
+        assert context.metadata['approval_ids'] == ['a1']
+    
+    def test_from_dict_restores_snapshot(self):
+        context = ExecutionContext('w', 'e', '1', 'deal')
+        context.source_data = {'dealname': 'ACME'}
+        context.generated_documents.append({'node_id': 'docs'})
+        context.add_error('slides', 'google-slides', 'falhou')
+        
+        restored = ExecutionContext.from_dict(context.to_dict())
+        
+        assert restored.source_data == {'dealname': 'ACME'}
+        assert restored.generated_documents == [{'node_id': 'docs'}]
+        assert restored.metadata['errors'] == context.metadata['errors']
+        assert restored.metadata['started_at'] == context.metadata['started_at']
@@ -0,0 +1 @@
+# Tasks tests package
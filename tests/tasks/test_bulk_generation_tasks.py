@@ -0,0 +1,169 @@
+"""
+Testes para a geração em lote (Celery em modo eager)
+"""
+import pytest
+
+from app.database import db
+from app.models import BulkGenerationItem, Workflow, WorkflowExecution, WorkflowNode
+from app.services import bulk_generation
+from app.services.bulk_generation import BulkGenerationError, create_bulk_job, retry_failed_items
+from app.tasks import bulk_generation_tasks
+from app.tasks.bulk_generation_tasks import enqueue_bulk_generation, process_bulk_chunk_task, start_bulk_generation_task
+
+
+class FakeHubSpot:
+    """HubSpotDataSource falso: objetos conhecidos e IDs de lista/filtro"""
+    
+    def __init__(self, known_ids, source_ids=None):
+        self.known_ids = set(known_ids)
+        self.source_ids = source_ids or []
+        self.batches = []
+    
+    def iter_object_ids(self, object_type, list_id=None, filters=None):
+        yield from self.source_ids
+    
+    def get_objects_data(self, object_type, object_ids, projection=None):
+        self.batches.append(list(object_ids))
+        return {
+            object_id: {'id': object_id, 'properties': {'dealname': f'Deal {object_id}'}}
+            for object_id in object_ids if object_id in self.known_ids
+        }
+
+
+@pytest.fixture
+def workflow(organization):
+    workflow = Workflow(organization_id=organization.id, name='Workflow', status='active', source_object_type='deal')
+    db.session.add(workflow)
+    db.session.flush()
+    db.session.add(WorkflowNode(
+        workflow_id=workflow.id,
+        node_type='trigger',
+        position=1,
+        config={'trigger_type': 'hubspot', 'source_object_type': 'deal'}
+    ))
+    db.session.commit()
+    return workflow
+
+
+@pytest.fixture
+def hubspot(app, monkeypatch):
+    """Conexão HubSpot falsa, lotes de 2 itens e uma execução por vez"""
+    fake = FakeHubSpot(known_ids=['1', '2', '3', '4', '5'])
+    monkeypatch.setattr(bulk_generation, 'get_job_data_source', lambda job: fake)
+    monkeypatch.setattr(bulk_generation_tasks, 'get_job_data_source', lambda job: fake)
+    app.config['BULK_GENERATION_CHUNK_SIZE'] = 2
+    app.config['BULK_GENERATION_MAX_CONCURRENCY'] = 1
+    return fake
+
+
+def item_statuses(job):
+    items = BulkGenerationItem.query.filter_by(job_id=job.id).order_by(BulkGenerationItem.id)
+    return {item.source_object_id: item.status for item in items}
+
+
+class TestCreateBulkJob:
+    """Testes de create_bulk_job"""
+    
+    def test_object_ids_create_deduplicated_items(self, workflow):
+        job = create_bulk_job(workflow, {'object_ids': ['1', '2', '2', 3]})
+        
+        assert job.status == 'pending'
+        assert job.items_collected is True
+        assert job.total_items == 3
+        assert job.source == {}
+        assert item_statuses(job) == {'1': 'pending', '2': 'pending', '3': 'pending'}
+    
+    def test_list_source_defers_item_collection(self, workflow):
+        job = create_bulk_job(workflow, {'list_id': '42'})
+        
+        assert job.items_collected is False
+        assert job.source == {'list_id': '42'}
+        assert item_statuses(job) == {}
+    
+    @pytest.mark.parametrize('source', [
+        {},
+        {'object_ids': ['1'], 'list_id': '42'},
+        {'object_ids': '1'},
+        {'filters': {'propertyName': 'dealstage'}},
+    ])
+    def test_invalid_source(self, workflow, source):
+        with pytest.raises(BulkGenerationError):
+            create_bulk_job(workflow, source)
+
+
+class TestBulkGenerationTasks:
+    """Testes do fluxo start -> lotes -> contadores do job"""
+    
+    def test_fans_out_chunks_and_completes(self, workflow, hubspot):
+        job = create_bulk_job(workflow, {'object_ids': ['1', '2', '3', '4', '5']})
+        
+        enqueue_bulk_generation(job)
+        
+        db.session.refresh(job)
+        assert hubspot.batches == [['1', '2'], ['3', '4'], ['5']]
+        assert job.status == 'completed'
+        assert (job.total_items, job.succeeded_items, job.failed_items) == (5, 5, 0)
+        assert job.started_at is not None and job.completed_at is not None
+        assert set(item_statuses(job).values()) == {'succeeded'}
+        assert WorkflowExecution.query.filter_by(workflow_id=workflow.id, trigger_type='bulk').count() == 5
+    
+    def test_collects_items_from_list(self, workflow, hubspot):
+        hubspot.source_ids = ['1', '2', '3']
+        job = create_bulk_job(workflow, {'list_id': '42'})
+        
+        enqueue_bulk_generation(job)
+        
+        db.session.refresh(job)
+        assert job.items_collected is True
+        assert job.status == 'completed'
+        assert job.total_items == 3
+    
+    def test_missing_objects_fail_and_retry_only_reprocesses_them(self, workflow, hubspot):
+        hubspot.known_ids.discard('2')
+        job = create_bulk_job(workflow, {'object_ids': ['1', '2', '3']})
+        
+        enqueue_bulk_generation(job)
+        
+        db.session.refresh(job)
+        assert job.status == 'completed_with_errors'
+        assert (job.succeeded_items, job.failed_items) == (2, 1)
+        failed = BulkGenerationItem.query.filter_by(job_id=job.id, status='failed').one()
+        assert failed.source_object_id == '2'
+        assert 'não encontrado' in failed.error_message
+        
+        hubspot.known_ids.add('2')
+        hubspot.batches.clear()
+        assert retry_failed_items(job) == 1
+        enqueue_bulk_generation(job)
+        
+        db.session.refresh(job)
+        assert hubspot.batches == [['2']]
+        assert job.status == 'completed'
+        assert (job.succeeded_items, job.failed_items) == (3, 0)
+        assert BulkGenerationItem.query.filter_by(job_id=job.id, source_object_id='2').one().attempts == 2
+    
+    def test_cancelled_job_skips_pending_chunks(self, workflow, hubspot):
+        job = create_bulk_job(workflow, {'object_ids': ['1', '2']})
+        job.status = 'cancelled'
+        db.session.commit()
+        
+        start_bulk_generation_task.delay(str(job.id))
+        process_bulk_chunk_task.delay(str(job.id), [item.id for item in BulkGenerationItem.query.filter_by(job_id=job.id)])
+        
+        assert hubspot.batches == []
+        assert set(item_statuses(job).values()) == {'pending'}
+        db.session.refresh(job)
+        assert job.status == 'cancelled'
+    
+    def test_source_error_fails_job(self, workflow, hubspot, monkeypatch):
+        def broken_iter(*args, **kwargs):
+            raise RuntimeError('HubSpot indisponível')
+            yield
+        monkeypatch.setattr(hubspot, 'iter_object_ids', broken_iter)
+        job = create_bulk_job(workflow, {'filters': [{'propertyName': 'dealstage', 'operator': 'EQ', 'value': 'won'}]})
+        
+        enqueue_bulk_generation(job)
+        
+        db.session.refresh(job)
+        assert job.status == 'failed'
+        assert 'HubSpot indisponível' in job.error_message
@@ -0,0 +1,150 @@
+"""
+Testes para a fila de execução de workflows (Celery em modo eager)
+"""
+import pytest
+
+from app.database import db
+from app.models import Workflow, WorkflowExecution, WorkflowNode
+from app.tasks import workflow_tasks
+from app.tasks.workflow_tasks import enqueue_workflow_execution, execute_workflow_task
+
+
+class FakeResponse:
+    def __init__(self, status_code=204):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = ''
+
+
+def make_workflow(organization, with_trigger=True):
+    workflow = Workflow(organization_id=organization.id, name='Workflow', status='active')
+    db.session.add(workflow)
+    db.session.flush()
+    if with_trigger:
+        db.session.add(WorkflowNode(
+            workflow_id=workflow.id,
+            node_type='trigger',
+            position=1,
+            config={'trigger_type': 'webhook', 'source_object_type': 'deal'}
+        ))
+    db.session.commit()
+    return workflow
+
+
+@pytest.fixture
+def callbacks(monkeypatch):
+    """Chamadas de callback enviadas ao HubSpot"""
+    sent = []
+    
+    def fake_post(url, **kwargs):
+        sent.append({'url': url, **kwargs})
+        return FakeResponse()
+    
+    monkeypatch.setattr(workflow_tasks.http_client, 'post', fake_post)
+    return sent
+
+
+class TestEnqueueWorkflowExecution:
+    """Testes de enqueue_workflow_execution"""
+    
+    def test_creates_queued_execution(self, organization, monkeypatch):
+        workflow = make_workflow(organization)
+        queued = []
+        monkeypatch.setattr(execute_workflow_task, 'delay', lambda execution_id: queued.append(execution_id))
+        
+        execution = enqueue_workflow_execution(
+            workflow=workflow,
+            source_object_id='42',
+            source_object_type='deal',
+            trigger_type='webhook',
+            trigger_data={'source_data': {'id': '42'}}
+        )
+        
+        assert execution.status == 'queued'
+        assert execution.trigger_data['source_object_id'] == '42'
+        assert execution.trigger_data['source_data'] == {'id': '42'}
+        assert queued == [str(execution.id)]
+    
+    def test_publish_error_marks_execution_failed(self, organization, monkeypatch):
+        workflow = make_workflow(organization)
+        
+        def broken_delay(execution_id):
+            raise ConnectionError('broker indisponível')
+        
+        monkeypatch.setattr(execute_workflow_task, 'delay', broken_delay)
+        
+        with pytest.raises(ConnectionError):
+            enqueue_workflow_execution(workflow=workflow, source_object_id='42', source_object_type='deal')
+        
+        execution = WorkflowExecution.query.one()
+        assert execution.status == 'failed'
+        assert 'broker indisponível' in execution.error_message
+    
+    def test_eager_task_runs_execution(self, organization, callbacks):
+        workflow = make_workflow(organization)
+        
+        execution = enqueue_workflow_execution(
+            workflow=workflow,
+            source_object_id='42',
+            source_object_type='deal',
+            trigger_type='webhook',
+            trigger_data={'source_data': {'id': '42'}}
+        )
+        
+        db.session.refresh(execution)
+        assert execution.status == 'completed'
+        assert execution.progress['completed_nodes'] == 1
+        assert callbacks == []
+
+
+class TestExecuteWorkflowTask:
+    """Testes de execute_workflow_task e do callback da workflow action"""
+    
+    def test_final_execution_is_not_reprocessed(self, organization, callbacks):
+        workflow = make_workflow(organization)
+        execution = WorkflowExecution(workflow_id=workflow.id, status='completed', trigger_data={})
+        db.session.add(execution)
+        db.session.commit()
+        
+        execute_workflow_task.delay(str(execution.id))
+        
+        db.session.refresh(execution)
+        assert execution.status == 'completed'
+        assert execution.progress is None
+    
+    def test_callback_sent_on_success(self, organization, callbacks):
+        workflow = make_workflow(organization)
+        
+        enqueue_workflow_execution(
+            workflow=workflow,
+            source_object_id='42',
+            source_object_type='deal',
+            trigger_type='hubspot_action',
+            trigger_data={'source_data': {'id': '42'}, 'hubspot_callback_id': 'cb-1'}
+        )
+        
+        assert len(callbacks) == 1
+        assert callbacks[0]['url'].endswith('/callbacks/cb-1/complete')
+        assert callbacks[0]['headers']['Authorization'] == 'Bearer hubspot-token'
+        output_fields = callbacks[0]['json']['outputFields']
+        assert output_fields['status'] == 'success'
+        assert output_fields['hs_execution_state'] == 'SUCCESS'
+    
+    def test_callback_sent_on_failure(self, organization, callbacks):
+        workflow = make_workflow(organization, with_trigger=False)
+        
+        execution = enqueue_workflow_execution(
+            workflow=workflow,
+            source_object_id='42',
+            source_object_type='deal',
+            trigger_type='hubspot_action',
+            trigger_data={'hubspot_callback_id': 'cb-2'}
+        )
+        
+        db.session.refresh(execution)
+        assert execution.status == 'failed'
+        assert len(callbacks) == 1
+        output_fields = callbacks[0]['json']['outputFields']
+        assert output_fields['status'] == 'error'
+        assert output_fields['hs_execution_state'] == 'FAIL_CONTINUE'
+        assert output_fields['error_message'] == execution.error_message
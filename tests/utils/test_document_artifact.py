@@ -0,0 +1,76 @@
+"""
+Testes para o DocumentArtifact (conteúdo em memória/disco lido sem cópias)
+"""
+
+from app.utils.document_artifact import DocumentArtifact
+
+
+class FakeStreamResponse:
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.closed = False
+    
+    def iter_content(self, chunk_size):
+        return iter(self._chunks)
+    
+    def close(self):
+        self.closed = True
+
+
+class TestDocumentArtifact:
+    """Testes do spool memória/disco"""
+    
+    def test_small_content_stays_in_memory(self):
+        with DocumentArtifact.from_bytes(b'%PDF-1.7 abc', max_memory_bytes=1024) as artifact:
+            assert not artifact.on_disk
+            assert len(artifact) == 12
+            assert bytes(artifact.view()) == b'%PDF-1.7 abc'
+    
+    def test_large_content_rolls_over_to_disk(self):
+        chunks = [bytes([i]) * 100 for i in range(5)]
+        with DocumentArtifact.from_chunks(chunks, max_memory_bytes=250) as artifact:
+            assert artifact.on_disk
+            assert artifact.size == 500
+            assert artifact.read_bytes() == b''.join(chunks)
+    
+    def test_readers_have_independent_positions(self):
+        content = bytes(range(256)) * 10
+        for max_memory in (10, 1 << 20):
+            with DocumentArtifact.from_bytes(content, max_memory_bytes=max_memory) as artifact:
+                first = artifact.open()
+                second = artifact.open()
+                
+                assert first.read(100) == content[:100]
+                assert second.read() == content
+                assert first.read() == content[100:]
+                
+                first.seek(-10, 2)
+                assert first.read() == content[-10:]
+    
+    def test_write_after_read_is_rejected(self):
+        artifact = DocumentArtifact.from_bytes(b'abc')
+        artifact.view()
+        try:
+            artifact.write(b'd')
+            assert False, 'write depois de view() deveria falhar'
+        except ValueError:
+            pass
+        finally:
+            artifact.close()
+    
+    def test_close_with_slice_in_use(self):
+        artifact = DocumentArtifact.from_bytes(b'x' * 100, max_memory_bytes=10)
+        piece = artifact.view()[:4]
+        artifact.close()
+        assert bytes(piece) == b'xxxx'
+    
+    def test_empty_content(self):
+        with DocumentArtifact(max_memory_bytes=0) as artifact:
+            artifact.write(b'')
+            assert artifact.read_bytes() == b''
+    
+    def test_from_response_closes_response(self):
+        response = FakeStreamResponse([b'ab', b'', b'cd'])
+        with DocumentArtifact.from_response(response, max_memory_bytes=1024) as artifact:
+            assert artifact.read_bytes() == b'abcd'
+        assert response.closed
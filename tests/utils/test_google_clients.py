@@ -0,0 +1,54 @@
+"""
+Testes para a fábrica de clientes das APIs do Google
+"""
+
+import threading
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from app.utils.google_clients import get_google_service, get_google_client_stats, clear_google_clients
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    clear_google_clients()
+    yield
+    clear_google_clients()
+
+
+class TestGetGoogleService:
+    """Testes para get_google_service()"""
+    
+    def test_reuses_transport_for_same_credential(self):
+        first = get_google_service('drive', 'v3', Credentials(token='a', refresh_token='r1'))
+        second = get_google_service('drive', 'v3', Credentials(token='b', refresh_token='r1'))
+        
+        assert first._http is second._http
+        # Token renovado aplicado ao transporte reaproveitado
+        assert second._http.credentials.token == 'b'
+    
+    def test_separate_transport_per_credential(self):
+        first = get_google_service('drive', 'v3', Credentials(token='a', refresh_token='r1'))
+        second = get_google_service('drive', 'v3', Credentials(token='a', refresh_token='r2'))
+        
+        assert first._http is not second._http
+    
+    def test_separate_transport_per_thread(self):
+        credentials = Credentials(token='a', refresh_token='r1')
+        main = get_google_service('docs', 'v1', credentials)
+        result = {}
+        
+        thread = threading.Thread(target=lambda: result.update(service=get_google_service('docs', 'v1', credentials)))
+        thread.start()
+        thread.join()
+        
+        assert main._http is not result['service']._http
+    
+    def test_discovery_loaded_once(self):
+        before = get_google_client_stats()['discovery_loads']
+        for i in range(3):
+            service = get_google_service('slides', 'v1', Credentials(token='a', refresh_token=f'r{i}'))
+            assert hasattr(service, 'presentations')
+        
+        assert get_google_client_stats()['discovery_loads'] == before + 1
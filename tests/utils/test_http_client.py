@@ -0,0 +1,93 @@
+"""
+Testes para o cliente HTTP compartilhado das integrações
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from app.utils.http_client import IntegrationSession
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # path -> lista de status a devolver em sequência
+    responses = {}
+    calls = {}
+    
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        
+        self.calls[self.path] = self.calls.get(self.path, 0) + 1
+        statuses = self.responses.get(self.path, [200])
+        status = statuses[min(self.calls[self.path], len(statuses)) - 1]
+        
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+    
+    do_GET = _respond
+    do_POST = _respond
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.responses = {}
+    _Handler.calls = {}
+    httpd = HTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestIntegrationSession:
+    """Testes para IntegrationSession"""
+    
+    def test_retries_429_on_post(self, server):
+        _Handler.responses['/rate'] = [429, 200]
+        session = IntegrationSession()
+        
+        response = session.post(f'{server}/rate', json={'a': 1})
+        
+        assert response.status_code == 200
+        assert _Handler.calls['/rate'] == 2
+    
+    def test_does_not_retry_5xx_on_post(self, server):
+        _Handler.responses['/fail'] = [503, 200]
+        session = IntegrationSession()
+        
+        response = session.post(f'{server}/fail', json={'a': 1})
+        
+        assert response.status_code == 503
+        assert _Handler.calls['/fail'] == 1
+    
+    def test_retries_5xx_on_get(self, server):
+        _Handler.responses['/flaky'] = [502, 200]
+        session = IntegrationSession()
+        
+        response = session.get(f'{server}/flaky')
+        
+        assert response.status_code == 200
+        assert _Handler.calls['/flaky'] == 2
+    
+    def test_host_stats(self, server):
+        _Handler.responses['/missing'] = [404]
+        session = IntegrationSession()
+        
+        session.get(f'{server}/ok')
+        session.get(f'{server}/missing')
+        
+        stats = session.get_stats()[server.split('//')[1]]
+        assert stats['requests'] == 2
+        assert stats['status_4xx'] == 1
+        assert stats['errors'] == 0
@@ -0,0 +1,98 @@
+"""
+Testes para o cache em processo da resolução de organização
+"""
+import uuid
+
+import pytest
+
+from app.utils import organization_cache
+from app.utils.organization_cache import TTLCache, get_cached_portal_organization, invalidate_organization
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    organization_cache.clear_organization_cache()
+    yield
+    organization_cache.clear_organization_cache()
+
+
+class TestTTLCache:
+    """Testes do LRU com expiração"""
+    
+    def test_entry_expires(self):
+        clock = FakeClock()
+        cache = TTLCache(clock=clock)
+        cache.set('a', 1, ttl_seconds=10)
+        
+        clock.now = 9
+        assert cache.get('a') == 1
+        clock.now = 10
+        assert cache.get('a') is organization_cache._MISSING
+        assert len(cache) == 0
+    
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        
+        assert cache.get('a') == 1
+        assert cache.get('b') is organization_cache._MISSING
+    
+    def test_pop_values(self):
+        cache = TTLCache()
+        cache.set('a', 1, 60)
+        cache.set('b', 1, 60)
+        cache.set('c', 2, 60)
+        cache.pop_values(1)
+        
+        assert len(cache) == 1
+
+
+class TestPortalOrganization:
+    """Testes do cache portal_id -> organization_id"""
+    
+    def test_loader_called_once(self):
+        org_id = uuid.uuid4()
+        calls = []
+        
+        def loader(portal_id):
+            calls.append(portal_id)
+            return org_id
+        
+        assert get_cached_portal_organization(123, loader) == org_id
+        assert get_cached_portal_organization('123', loader) == org_id
+        assert calls == ['123']
+    
+    def test_not_found_is_not_cached(self):
+        calls = []
+        
+        def loader(portal_id):
+            calls.append(portal_id)
+            return None
+        
+        assert get_cached_portal_organization('999', loader) is None
+        assert get_cached_portal_organization('999', loader) is None
+        assert len(calls) == 2
+    
+    def test_invalidate_organization_drops_its_portals(self):
+        org_id = uuid.uuid4()
+        calls = []
+        
+        def loader(portal_id):
+            calls.append(portal_id)
+            return org_id
+        
+        get_cached_portal_organization('123', loader)
+        invalidate_organization(org_id)
+        get_cached_portal_organization('123', loader)
+        assert calls == ['123', '123']
@@ -0,0 +1,28 @@
+"""
+Testes para o cursor da paginação keyset
+"""
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+class TestCursor:
+    """Testes de encode/decode do cursor"""
+    
+    def test_roundtrip(self):
+        created_at = datetime(2026, 10, 16, 12, 30, 45, 123456)
+        item_id = uuid.uuid4()
+        
+        assert decode_cursor(encode_cursor(created_at, item_id)) == (created_at, item_id)
+    
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(datetime(2026, 1, 1), uuid.uuid4())
+        assert all(c.isalnum() or c in '-_=' for c in cursor)
+    
+    @pytest.mark.parametrize('cursor', ['', 'não-base64', 'YWJj', 'MjAyNi0wMS0wMXx4eXo='])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
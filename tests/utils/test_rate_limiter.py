@@ -0,0 +1,64 @@
+"""
+Testes para o rate limiter token bucket (backend em memória)
+"""
+
+from app.utils.rate_limiter import TokenBucketRateLimiter, hubspot_rate_limit_key
+
+
+class TestTokenBucketRateLimiter:
+    """Testes para TokenBucketRateLimiter sem Redis"""
+    
+    def test_burst_within_capacity_does_not_wait(self):
+        limiter = TokenBucketRateLimiter(capacity=5, refill_per_second=1)
+        
+        waits = [limiter.acquire('portal:1') for _ in range(5)]
+        
+        assert max(waits) < 0.05
+        assert limiter.get_utilization('portal:1')['tokens_available'] < 1
+    
+    def test_waits_for_refill_when_empty(self):
+        limiter = TokenBucketRateLimiter(capacity=2, refill_per_second=20)
+        limiter.acquire('portal:1')
+        limiter.acquire('portal:1')
+        
+        waited = limiter.acquire('portal:1')
+        
+        assert waited >= 0.03
+        assert limiter.get_utilization('portal:1')['throttled_requests'] == 1
+    
+    def test_gives_up_after_max_wait(self):
+        limiter = TokenBucketRateLimiter(capacity=1, refill_per_second=0.01, max_wait_seconds=0.1)
+        limiter.acquire('portal:1')
+        
+        waited = limiter.acquire('portal:1')
+        
+        assert waited < 0.1
+    
+    def test_buckets_are_per_key(self):
+        limiter = TokenBucketRateLimiter(capacity=1, refill_per_second=0.01, max_wait_seconds=0)
+        limiter.acquire('portal:1')
+        
+        assert limiter.get_utilization('portal:2')['tokens_available'] == 1
+    
+    def test_daily_utilization(self):
+        limiter = TokenBucketRateLimiter(capacity=10, refill_per_second=1, daily_limit=4)
+        for _ in range(4):
+            limiter.acquire('portal:1')
+        
+        utilization = limiter.get_utilization('portal:1')
+        assert utilization['daily_count'] == 4
+        assert utilization['daily_utilization'] == 1.0
+        assert utilization['near_limit'] is True
+        assert utilization['backend'] == 'memory'
+
+
+class TestHubspotRateLimitKey:
+    """Testes para hubspot_rate_limit_key()"""
+    
+    def test_portal_id_preferred(self):
+        assert hubspot_rate_limit_key('123', 'token') == 'portal:123'
+    
+    def test_token_hash_without_portal(self):
+        key = hubspot_rate_limit_key(None, 'token')
+        assert key.startswith('token:')
+        assert 'token' not in key[len('token:'):]